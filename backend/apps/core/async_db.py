@@ -0,0 +1,131 @@
+"""
+Accès base de données depuis les consumers WebSocket
+
+database_sync_to_async exécute tout dans le thread unique partagé
+(thread_sensitive) : sous une rafale de reconnexions, une requête lente
+bloque toutes les sockets du processus. Les chemins critiques passent
+donc par un pool de threads dédié et borné (DB_EXECUTOR_WORKERS, à garder
+sous la taille du pool de connexions), instrumenté pour repérer la
+saturation (attente dans la file, durée d'exécution).
+
+Usage :
+    @db_sync_to_async
+    def _get_session_time(self, session_id): ...
+"""
+
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .instrumentation import compter_requetes
+
+logger = logging.getLogger(__name__)
+
+
+class DBExecutor:
+    """Pool de threads borné pour les requêtes des consumers, avec métriques"""
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db-async')
+        self._lock = threading.Lock()
+        self._en_attente = 0
+        self._en_cours = 0
+        self._total = 0
+        self._erreurs = 0
+        self._attente_totale = 0.0
+        self._attente_max = 0.0
+        self._duree_totale = 0.0
+
+    def soumis(self):
+        with self._lock:
+            self._en_attente += 1
+
+    def demarre(self, attente):
+        with self._lock:
+            self._en_attente -= 1
+            self._en_cours += 1
+            self._attente_totale += attente
+            self._attente_max = max(self._attente_max, attente)
+        seuil = getattr(settings, 'DB_EXECUTOR_SLOW_WAIT', 0.5)
+        if attente > seuil:
+            logger.warning(
+                f"Pool DB des consumers saturé : {attente * 1000:.0f} ms d'attente "
+                f"({self._en_attente} en file, {self.max_workers} threads)"
+            )
+
+    def termine(self, duree, erreur=False):
+        with self._lock:
+            self._en_cours -= 1
+            self._total += 1
+            self._duree_totale += duree
+            if erreur:
+                self._erreurs += 1
+
+    def stats(self):
+        """Instantané des métriques du pool"""
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'en_cours': self._en_cours,
+                'en_attente': self._en_attente,
+                'total': self._total,
+                'erreurs': self._erreurs,
+                'attente_moyenne_ms': self._attente_totale / self._total * 1000 if self._total else 0,
+                'attente_max_ms': self._attente_max * 1000,
+                'duree_moyenne_ms': self._duree_totale / self._total * 1000 if self._total else 0,
+            }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor():
+    """Retourne le pool du processus (créé au premier appel)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = DBExecutor(getattr(settings, 'DB_EXECUTOR_WORKERS', 8))
+    return _executor
+
+
+def db_sync_to_async(func):
+    """
+    Variante de database_sync_to_async utilisant le pool dédié
+
+    Comme database_sync_to_async, ferme les connexions obsolètes avant et
+    après l'appel (chaque thread du pool garde sa propre connexion). Les
+    requêtes sont comptées dans la mesure du message en cours.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        executor = get_db_executor()
+        soumis_a = time.monotonic()
+        executor.soumis()
+
+        def run():
+            debut = time.monotonic()
+            executor.demarre(debut - soumis_a)
+            erreur = False
+            close_old_connections()
+            try:
+                with compter_requetes():
+                    return func(*args, **kwargs)
+            except Exception:
+                erreur = True
+                raise
+            finally:
+                close_old_connections()
+                executor.termine(time.monotonic() - debut, erreur)
+
+        return await sync_to_async(run, thread_sensitive=False, executor=executor.pool)()
+
+    return wrapper
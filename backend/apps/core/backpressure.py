@@ -0,0 +1,191 @@
+"""
+Contre-pression des consumers WebSocket
+
+La couche de canaux limite chaque canal à `capacity` messages ; au-delà,
+les envois au canal d'un consumer en retard (onglet d'administration lent,
+handler bloqué) sont perdus sans bruit (ChannelFull). Avec les
+'time_update' envoyés chaque seconde, un retard de quelques secondes
+suffit.
+
+BackpressureConsumerMixin vide donc la couche en continu dans une file
+locale, indépendamment du traitement des messages :
+
+- Coalescence : un message d'un type de WS_COALESCE_TYPES remplace, à sa
+  place dans la file, celui du même type (et de la même session) encore en
+  attente ; un retard se résume à la dernière valeur. Tout autre message
+  fait barrière : une valeur arrivée après lui (ex: time_update après
+  session_terminated) n'est jamais remontée avant.
+- Profondeur : la taille de la file est mesurée à chaque arrivée
+  (epn_ws_channel_backlog) ; la plus grande file du processus est
+  exportée en jauge.
+- Consumers trop lents : au-delà de WS_MAX_BACKLOG messages en attente
+  pendant WS_SLOW_CONSUMER_GRACE secondes, la politique
+  WS_SLOW_CONSUMER_POLICY s'applique : 'disconnect' ferme la socket
+  (code 4429, le client se reconnecte et repart d'un état complet),
+  'drop' écarte les plus anciens messages.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+import weakref
+from collections import OrderedDict
+
+from django.conf import settings
+
+from . import metrics
+from .instrumentation import nom_consumer
+
+logger = logging.getLogger(__name__)
+
+CODE_CONSUMER_LENT = 4429
+
+# Files des consumers vivants du processus (jauge)
+_FILES = weakref.WeakSet()
+
+
+def backlog_max():
+    """Plus grande file d'attente des consumers du processus"""
+    return max((len(file) for file in list(_FILES)), default=0)
+
+
+class FileCanal:
+    """Messages reçus de la couche, en attente de traitement par le consumer"""
+
+    def __init__(self, coalescents):
+        self.coalescents = frozenset(coalescents)
+        self.messages = OrderedDict()
+        self.disponible = asyncio.Event()
+        self._sequence = itertools.count()
+        # (type, session) → clé du message coalescent remplaçable
+        self._remplacables = {}
+
+    def __len__(self):
+        return len(self.messages)
+
+    def ajouter(self, message):
+        """
+        Ajoute un message en fin de file, ou remplace sur place la valeur
+        en attente du même type et de la même session
+
+        Returns:
+            True si le message a remplacé un message en attente (coalescence)
+        """
+        type_ = message.get('type')
+        cle = next(self._sequence)
+        if type_ in self.coalescents:
+            groupe = (type_, message.get('session_id'))
+            precedente = self._remplacables.get(groupe)
+            if precedente in self.messages:
+                self.messages[precedente] = message
+                return True
+            self._remplacables[groupe] = cle
+        else:
+            # Barrière : les valeurs suivantes prennent place après ce message
+            self._remplacables.clear()
+        self.messages[cle] = message
+        self.disponible.set()
+        return False
+
+    def retirer(self):
+        """Message le plus ancien"""
+        message = self.messages.popitem(last=False)[1]
+        if not self.messages:
+            self.disponible.clear()
+        return message
+
+
+class BackpressureConsumerMixin:
+    """
+    Mixin de consumer Channels : file locale coalescente devant la couche
+
+    AsyncConsumer lit la couche via self.channel_receive ; le mixin
+    intercepte cette affectation et lui substitue la lecture de la file
+    locale, alimentée par une tâche de fond.
+    """
+
+    @property
+    def channel_receive(self):
+        return self._recevoir_file
+
+    @channel_receive.setter
+    def channel_receive(self, recevoir):
+        self._recevoir_couche = recevoir
+        self._file = FileCanal(getattr(settings, 'WS_COALESCE_TYPES', ()))
+        self._pompe = None
+        self._en_retard_depuis = None
+        _FILES.add(self._file)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            return await super().__call__(scope, receive, send)
+        finally:
+            pompe = getattr(self, '_pompe', None)
+            if pompe is not None:
+                pompe.cancel()
+                try:
+                    await pompe
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+    async def _recevoir_file(self):
+        if self._pompe is None:
+            self._pompe = asyncio.ensure_future(self._pomper())
+        while not self._file:
+            attente = asyncio.ensure_future(self._file.disponible.wait())
+            try:
+                await asyncio.wait([attente, self._pompe], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                attente.cancel()
+            if self._pompe.done() and not self._file:
+                # Erreur de la couche : la remonter au consumer
+                self._pompe.result()
+                # Pompe arrêtée (consumer fermé pour lenteur) : plus rien à lire
+                await asyncio.Future()
+        return self._file.retirer()
+
+    async def _pomper(self):
+        """Vide la couche dans la file locale, au rythme de la couche"""
+        consumer = nom_consumer(self)
+        limite = getattr(settings, 'WS_MAX_BACKLOG', 100)
+        while True:
+            message = await self._recevoir_couche()
+            if self._file.ajouter(message):
+                metrics.WS_MESSAGES_COALESCED.inc(consumer=consumer, type=message.get('type', '?'))
+            metrics.WS_CHANNEL_BACKLOG.observe(len(self._file), consumer=consumer)
+
+            if len(self._file) <= limite:
+                self._en_retard_depuis = None
+            elif not await self._consumer_lent(consumer, limite):
+                return
+
+    async def _consumer_lent(self, consumer, limite):
+        """
+        Applique la politique aux consumers en retard
+
+        Returns:
+            False si la socket est fermée (la pompe s'arrête)
+        """
+        maintenant = time.monotonic()
+        if self._en_retard_depuis is None:
+            self._en_retard_depuis = maintenant
+        if maintenant - self._en_retard_depuis < getattr(settings, 'WS_SLOW_CONSUMER_GRACE', 5):
+            return True
+
+        if getattr(settings, 'WS_SLOW_CONSUMER_POLICY', 'disconnect') == 'drop':
+            while len(self._file) > limite:
+                message = self._file.retirer()
+                metrics.WS_MESSAGES_DROPPED.inc(consumer=consumer, type=message.get('type', '?'))
+            return True
+
+        logger.warning(
+            f"Consumer trop lent fermé : {consumer} {self.channel_name} "
+            f"({len(self._file)} messages en attente)"
+        )
+        metrics.WS_SLOW_CONSUMER_DISCONNECTS.inc(consumer=consumer)
+        for message in self._file.messages.values():
+            metrics.WS_MESSAGES_DROPPED.inc(consumer=consumer, type=message.get('type', '?'))
+        self._file.messages.clear()
+        await self.close(code=CODE_CONSUMER_LENT)
+        return False
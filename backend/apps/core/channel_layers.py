@@ -0,0 +1,54 @@
+"""
+Couches de canaux instrumentées
+
+Sous-classes des backends Channels qui comptent chaque envoi
+(epn_channel_layer_sends_total) et le rattachent à la mesure de la
+requête ou du message en cours. À utiliser dans CHANNEL_LAYERS à la place
+du backend d'origine.
+
+Les envois refusés faute de place (ChannelFull) sont comptés
+(epn_channel_layer_full_total). Le group_send de la couche Redis les
+ignore sans passer par send : seuls ceux de la couche en mémoire et les
+envois directs le sont. Voir aussi apps.core.backpressure.
+"""
+
+from contextvars import ContextVar
+
+from channels.exceptions import ChannelFull
+from channels.layers import InMemoryChannelLayer as BaseInMemoryChannelLayer
+from channels_redis.core import RedisChannelLayer as BaseRedisChannelLayer
+
+from . import metrics
+from .instrumentation import compter_envoi
+
+# group_send de la couche en mémoire passe par send : ne compter qu'une fois
+_dans_group_send = ContextVar('dans_group_send', default=False)
+
+
+class SendCountingMixin:
+    """Compte send et group_send"""
+
+    async def send(self, channel, message):
+        if not _dans_group_send.get():
+            compter_envoi('send', message)
+        try:
+            return await super().send(channel, message)
+        except ChannelFull:
+            metrics.CHANNEL_LAYER_FULL.inc(type=message.get('type', '?'))
+            raise
+
+    async def group_send(self, group, message):
+        compter_envoi('group_send', message)
+        token = _dans_group_send.set(True)
+        try:
+            return await super().group_send(group, message)
+        finally:
+            _dans_group_send.reset(token)
+
+
+class RedisChannelLayer(SendCountingMixin, BaseRedisChannelLayer):
+    pass
+
+
+class InMemoryChannelLayer(SendCountingMixin, BaseInMemoryChannelLayer):
+    pass
@@ -4,15 +4,58 @@ WebSocket Consumers pour les mises à jour temps réel
 
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
 from django.utils import timezone
+from apps.core.async_db import db_sync_to_async
+from apps.core.backpressure import BackpressureConsumerMixin
+from apps.core.instrumentation import InstrumentedConsumerMixin
 
 
-class DashboardConsumer(AsyncWebsocketConsumer):
+class SiteScopedConsumerMixin:
+    """
+    Consumer restreint aux sites de l'opérateur
+
+    Le site est pris dans l'URL (/ws/sites/<slug ou id>/...) ; sans site,
+    l'opérateur reçoit ses sites (tous s'il n'est rattaché à aucun). Le
+    consumer rejoint '<groupe>_<site>' pour chaque site, ou '<groupe>'.
+    """
+
+    groupe = None
+
+    async def rejoindre_groupes(self):
+        """Résout les sites et rejoint leurs groupes (connexion refusée si site inconnu)"""
+        from apps.postes.models import Site
+        from apps.postes.sites import groupes
+
+        try:
+            self.sites = await self.resoudre_sites(self.scope['url_route']['kwargs'].get('site'))
+        except Site.DoesNotExist:
+            await self.close(code=4404)
+            return False
+
+        self.room_groups = groupes(self.groupe, self.sites)
+        for groupe in self.room_groups:
+            await self.channel_layer.group_add(groupe, self.channel_name)
+        return True
+
+    async def quitter_groupes(self):
+        for groupe in getattr(self, 'room_groups', ()):
+            await self.channel_layer.group_discard(groupe, self.channel_name)
+
+    @db_sync_to_async
+    def resoudre_sites(self, site):
+        from apps.postes.sites import resoudre_sites
+        return resoudre_sites(self.user, site)
+
+
+class DashboardConsumer(
+    SiteScopedConsumerMixin, BackpressureConsumerMixin, InstrumentedConsumerMixin, AsyncWebsocketConsumer
+):
     """
     Consumer pour le dashboard - envoie les statistiques en temps réel
     """
 
+    groupe = 'dashboard'
+
     async def connect(self):
         """Connexion au WebSocket"""
         # Vérifier l'authentification
@@ -22,14 +65,11 @@ class DashboardConsumer(AsyncWebsocketConsumer):
             await self.close(code=4401)
             return
 
-        self.room_group_name = 'dashboard'
         self.user = user
 
-        # Rejoindre le groupe dashboard
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
+        # Rejoindre le groupe dashboard (ou ceux des sites de l'opérateur)
+        if not await self.rejoindre_groupes():
+            return
 
         await self.accept()
 
@@ -42,10 +82,7 @@ class DashboardConsumer(AsyncWebsocketConsumer):
 
     async def disconnect(self, close_code):
         """Déconnexion du WebSocket"""
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        await self.quitter_groupes()
 
     async def receive(self, text_data):
         """Réception de message du client"""
@@ -65,13 +102,16 @@ class DashboardConsumer(AsyncWebsocketConsumer):
             'data': event['data']
         }))
 
-    @database_sync_to_async
+    @db_sync_to_async
     def get_dashboard_stats(self):
-        """Récupère les statistiques du dashboard"""
+        """Récupère les statistiques du dashboard (sites de l'opérateur)"""
         from apps.utilisateurs.models import Utilisateur
         from apps.sessions.models import Session
         from apps.postes.models import Poste
 
+        sessions = Session.objects.des_sites(self.sites)
+        postes = Poste.objects.des_sites(self.sites)
+
         return {
             'utilisateurs': {
                 'total': Utilisateur.objects.count(),
@@ -81,28 +121,32 @@ class DashboardConsumer(AsyncWebsocketConsumer):
                 ).count()
             },
             'sessions': {
-                'total': Session.objects.count(),
-                'actives': Session.objects.filter(statut='active').count(),
-                'en_attente': Session.objects.filter(statut='en_attente').count(),
-                'terminees_aujourd_hui': Session.objects.filter(
+                'total': sessions.count(),
+                'actives': sessions.filter(statut='active').count(),
+                'en_attente': sessions.filter(statut='en_attente').count(),
+                'terminees_aujourd_hui': sessions.filter(
                     fin_session__date=timezone.now().date()
                 ).count()
             },
             'postes': {
-                'total': Poste.objects.count(),
-                'disponibles': Poste.objects.filter(statut='disponible').count(),
-                'occupes': Poste.objects.filter(statut='occupe').count(),
-                'hors_ligne': Poste.objects.filter(statut='hors_ligne').count()
+                'total': postes.count(),
+                'disponibles': postes.filter(statut='disponible').count(),
+                'occupes': postes.filter(statut='occupe').count(),
+                'hors_ligne': postes.filter(statut='hors_ligne').count()
             },
             'timestamp': timezone.now().isoformat()
         }
 
 
-class SessionConsumer(AsyncWebsocketConsumer):
+class SessionConsumer(
+    SiteScopedConsumerMixin, BackpressureConsumerMixin, InstrumentedConsumerMixin, AsyncWebsocketConsumer
+):
     """
     Consumer pour les sessions - mises à jour temps réel des sessions
     """
 
+    groupe = 'sessions'
+
     async def connect(self):
         """Connexion au WebSocket"""
         # Vérifier l'authentification
@@ -112,14 +156,11 @@ class SessionConsumer(AsyncWebsocketConsumer):
             await self.close(code=4401)
             return
 
-        self.room_group_name = 'sessions'
         self.user = user
 
-        # Rejoindre le groupe sessions
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
+        # Rejoindre le groupe sessions (ou ceux des sites de l'opérateur)
+        if not await self.rejoindre_groupes():
+            return
 
         await self.accept()
 
@@ -132,10 +173,7 @@ class SessionConsumer(AsyncWebsocketConsumer):
 
     async def disconnect(self, close_code):
         """Déconnexion du WebSocket"""
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        await self.quitter_groupes()
 
     async def receive(self, text_data):
         """Réception de message du client"""
@@ -169,12 +207,19 @@ class SessionConsumer(AsyncWebsocketConsumer):
             'data': event['data']
         }))
 
-    @database_sync_to_async
+    async def place_attribuee(self, event):
+        """Notification d'un poste attribué à un usager de la file d'attente"""
+        await self.send(text_data=json.dumps({
+            'type': 'place_attribuee',
+            'data': event['data']
+        }))
+
+    @db_sync_to_async
     def get_active_sessions(self):
-        """Récupère les sessions actives"""
+        """Récupère les sessions actives (sites de l'opérateur)"""
         from apps.sessions.models import Session
 
-        sessions = Session.objects.filter(
+        sessions = Session.objects.des_sites(self.sites).filter(
             statut__in=['active', 'en_attente']
         ).select_related('utilisateur', 'poste')
 
@@ -187,3 +232,73 @@ class SessionConsumer(AsyncWebsocketConsumer):
             'statut': s.statut,
             'debut_session': s.debut_session.isoformat() if s.debut_session else None
         } for s in sessions]
+
+
+class SeatBoardConsumer(
+    SiteScopedConsumerMixin, BackpressureConsumerMixin, InstrumentedConsumerMixin, AsyncWebsocketConsumer
+):
+    """
+    Consumer pour le tableau des places - snapshot à la connexion puis deltas
+    """
+
+    groupe = 'seat_board'  # apps.postes.seat_board.SEAT_BOARD_GROUP
+
+    async def connect(self):
+        """Connexion au WebSocket"""
+        # Vérifier l'authentification
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated:
+            # Rejeter la connexion si non authentifié
+            await self.close(code=4401)
+            return
+
+        self.user = user
+
+        # Rejoindre le groupe seat_board (ou ceux des sites de l'opérateur)
+        if not await self.rejoindre_groupes():
+            return
+
+        await self.accept()
+
+        # Envoyer le tableau complet
+        snapshot = await self.get_snapshot()
+        await self.send(text_data=json.dumps({
+            'type': 'seat_board_snapshot',
+            'data': snapshot
+        }))
+
+    async def disconnect(self, close_code):
+        """Déconnexion du WebSocket"""
+        await self.quitter_groupes()
+
+    async def receive(self, text_data):
+        """
+        Réception de message du client
+
+        {'type': 'get_snapshot', 'since': <version>} renvoie le delta depuis
+        cette version (ou tout le tableau sans 'since'), ex: après une reconnexion.
+        """
+        data = json.loads(text_data)
+
+        if data.get('type') == 'get_snapshot':
+            since = data.get('since')
+            snapshot = await self.get_snapshot(
+                since=since if isinstance(since, int) else None
+            )
+            await self.send(text_data=json.dumps({
+                'type': 'seat_board_snapshot',
+                'data': snapshot
+            }))
+
+    async def seat_update(self, event):
+        """Envoi d'un delta du tableau des places au client"""
+        await self.send(text_data=json.dumps({
+            'type': 'seat_update',
+            'data': event['data']
+        }))
+
+    @db_sync_to_async
+    def get_snapshot(self, since=None):
+        """Lit le tableau des places (une seule requête)"""
+        from apps.postes.seat_board import get_snapshot
+        return get_snapshot(since=since, sites=self.sites)
@@ -0,0 +1,92 @@
+"""
+Utilitaires d'accès à la base de données communs à toutes les apps
+"""
+
+import functools
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, transaction
+from django.db.models import sql
+
+from .http_cache import invalider_modele
+
+
+def update_returning(queryset, returning, invalider=True, **values):
+    """
+    Exécute un UPDATE conditionnel et renvoie les colonnes demandées
+    des lignes modifiées, en une seule requête (UPDATE ... RETURNING).
+
+    Le filtre du queryset sert de garde (ex: WHERE statut = 'active') :
+    aucune ligne renvoyée signifie que la condition n'était plus vraie
+    au moment de l'écriture. Les valeurs peuvent être des expressions
+    (F(), Case...), évaluées par la base sur l'état courant de la ligne.
+    Comme aucun signal n'est émis, le cache des endpoints de lecture est
+    invalidé ici après le commit dès qu'une ligne est modifiée.
+
+    Args:
+        queryset: QuerySet filtré sur les lignes à modifier
+        returning: Noms des champs à renvoyer (entiers ou chaînes) ;
+            la clé primaire si vide
+        invalider: Faux pour une écriture que les réponses en cache
+            tolèrent jusqu'à leur expiration (ex: décompte du temps restant)
+        **values: Champs à mettre à jour, comme pour QuerySet.update()
+
+    Returns:
+        Liste de tuples (un par ligne modifiée), dans l'ordre de `returning`
+    """
+    model = queryset.model
+    db = queryset.db
+    connection = connections[db]
+    returning = tuple(returning) or ('pk',)
+    fields = [
+        model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        for name in returning
+    ]
+
+    if not connection.features.can_return_columns_from_insert:
+        # Pas de RETURNING : verrouiller les lignes le temps de relire l'état écrit
+        with transaction.atomic(using=db):
+            pks = list(queryset.select_for_update().values_list('pk', flat=True))
+            if not pks:
+                return []
+            model._base_manager.using(db).filter(pk__in=pks).update(**values)
+            if invalider:
+                transaction.on_commit(functools.partial(invalider_modele, model), using=db)
+            return list(
+                model._base_manager.using(db).filter(pk__in=pks).values_list(*returning)
+            )
+
+    query = queryset.order_by().query.chain(sql.UpdateQuery)
+    query.add_update_values(values)
+    query.annotations = {}
+    try:
+        update_sql, params = query.get_compiler(db).as_sql()
+    except EmptyResultSet:
+        # Filtre toujours faux (ex: pk__in=[]) : aucune ligne à modifier
+        return []
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+
+    with transaction.mark_for_rollback_on_error(using=db):
+        with connection.cursor() as cursor:
+            cursor.execute(f'{update_sql} RETURNING {columns}', params)
+            rows = cursor.fetchall()
+
+    if rows and invalider:
+        transaction.on_commit(functools.partial(invalider_modele, model), using=db)
+
+    # Conversions du backend (ex: datetimes SQLite rendus naïfs), comme pour un SELECT
+    colonnes = [field.get_col(model._meta.db_table) for field in fields]
+    convertisseurs = [
+        connection.ops.get_db_converters(col) + col.get_db_converters(connection)
+        for col in colonnes
+    ]
+
+    def convertir(value, col, conversions):
+        for conversion in conversions:
+            value = conversion(value, col, connection)
+        return col.target.to_python(value)
+
+    return [
+        tuple(convertir(value, col, conversions) for value, col, conversions in zip(row, colonnes, convertisseurs))
+        for row in rows
+    ]
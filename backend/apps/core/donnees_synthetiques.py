@@ -0,0 +1,331 @@
+"""
+Génération de données synthétiques à l'échelle de la production
+
+Jeu de données reproductible (graine fixe) pour les tests de charge et les
+benchmarks : postes, utilisateurs, sessions réparties sur plusieurs mois
+(heures d'ouverture, durées et fins de session réalistes) et logs associés.
+
+Les lignes sont produites en flux et insérées par lots : COPY sur
+PostgreSQL, INSERT multi-lignes ailleurs. Les identifiants sont attribués
+à la génération pour relier les tables sans relecture ; les séquences sont
+recalées à la fin. Aucun signal n'est émis : le tableau des places, les
+statistiques quotidiennes et le cache sont mis à jour explicitement.
+"""
+
+import itertools
+import random
+from datetime import timedelta
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from apps.logs.models import Log
+from apps.postes.models import Poste, Site
+from apps.sessions.models import Session
+from apps.utilisateurs.models import Utilisateur
+
+# Alphabet des codes d'accès (sans O/0/I/1), 32 caractères
+ALPHABET_CODES = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+# Longueur distincte de CODE_LENGTH : pas de collision avec les vrais codes
+LONGUEUR_CODES = 8
+
+NOMS = [
+    'Payet', 'Hoarau', 'Grondin', 'Fontaine', 'Rivière', 'Técher', 'Boyer',
+    'Lebon', 'Robert', 'Maillot', 'Nativel', 'Dijoux', 'Lauret', 'Morel',
+    'Turpin', 'Baillif', 'Ethève', 'Clain', 'Hoareau', 'Sautron',
+]
+PRENOMS = [
+    'Jean', 'Marie', 'Pierre', 'Sophie', 'Louis', 'Emma', 'Noah', 'Léa',
+    'Lucas', 'Chloé', 'Hugo', 'Manon', 'Nathan', 'Camille', 'Enzo', 'Inès',
+]
+DUREES = [1800, 3600, 3600, 5400, 7200]
+# Actions des logs hors cycle de vie des sessions (poids relatifs)
+ACTIONS_POSTES = [('connexion_poste', 6), ('deconnexion_poste', 5), ('info', 2), ('warning', 1), ('erreur', 1)]
+# Heures d'ouverture de l'EPN
+OUVERTURE, FERMETURE = 9, 18
+
+
+def encoder_code(numero):
+    """Code d'accès unique dérivé d'un numéro (base 32, longueur fixe)"""
+    caracteres = []
+    for _ in range(LONGUEUR_CODES):
+        numero, reste = divmod(numero, len(ALPHABET_CODES))
+        caracteres.append(ALPHABET_CODES[reste])
+    return ''.join(reversed(caracteres))
+
+
+def _lots(lignes, taille):
+    iterateur = iter(lignes)
+    while lot := list(itertools.islice(iterateur, taille)):
+        yield lot
+
+
+def inserer(model, colonnes, lignes, taille_lot=10000):
+    """
+    Insère des lignes en masse (COPY sur PostgreSQL, INSERT sinon)
+
+    Les valeurs sont préparées par les champs du modèle (dates, JSON) ;
+    auto_now et les signaux sont contournés.
+
+    Args:
+        model: Modèle cible
+        colonnes: Noms des champs, dans l'ordre des tuples
+        lignes: Itérable de tuples (consommé par lots)
+        taille_lot: Lignes par transaction
+
+    Returns:
+        Nombre de lignes insérées
+    """
+    champs = [model._meta.get_field(nom) for nom in colonnes]
+    table = connection.ops.quote_name(model._meta.db_table)
+    noms = ', '.join(connection.ops.quote_name(champ.column) for champ in champs)
+    total = 0
+
+    for lot in _lots(lignes, taille_lot):
+        valeurs = [
+            [champ.get_db_prep_save(valeur, connection) for champ, valeur in zip(champs, ligne)]
+            for ligne in lot
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                with cursor.copy(f'COPY {table} ({noms}) FROM STDIN') as copy:
+                    for ligne in valeurs:
+                        copy.write_row(ligne)
+            else:
+                marques = ', '.join(['%s'] * len(champs))
+                cursor.executemany(f'INSERT INTO {table} ({noms}) VALUES ({marques})', valeurs)
+        total += len(lot)
+    return total
+
+
+def recaler_sequences(*models):
+    """Recale les séquences d'identifiants après des insertions à id explicite"""
+    requetes = connection.ops.sequence_reset_sql(no_style(), models)
+    if requetes:
+        with connection.cursor() as cursor:
+            for requete in requetes:
+                cursor.execute(requete)
+
+
+class GenerateurDonnees:
+    """
+    Générateur de données synthétiques reproductible
+
+    Usage :
+        generateur = GenerateurDonnees(graine=42, jours=365)
+        generateur.generer(postes=200, utilisateurs=500_000,
+                           sessions=5_000_000, logs=50_000_000)
+    """
+
+    def __init__(self, graine=42, jours=365, taille_lot=10000, progression=None):
+        """
+        Args:
+            graine: Graine du générateur aléatoire (même graine, mêmes données)
+            jours: Profondeur de l'historique des sessions et logs
+            taille_lot: Lignes insérées par transaction
+            progression: Fonction appelée avec un message après chaque table
+        """
+        self.rng = random.Random(graine)
+        self.jours = jours
+        self.taille_lot = taille_lot
+        self.progression = progression or (lambda message: None)
+        self.maintenant = timezone.now().replace(microsecond=0)
+
+    @staticmethod
+    def _prochain_id(model):
+        return (model.objects.aggregate(m=Max('pk'))['m'] or 0) + 1
+
+    def _instant_ouverture(self):
+        """Instant aléatoire pendant les heures d'ouverture de l'historique"""
+        jour = self.rng.randint(1, self.jours)
+        seconde = self.rng.randint(OUVERTURE * 3600, FERMETURE * 3600 - 1)
+        debut_jour = (self.maintenant - timedelta(days=jour)).replace(hour=0, minute=0, second=0)
+        return debut_jour + timedelta(seconds=seconde)
+
+    def generer_postes(self, nombre):
+        """
+        Crée les postes (répartis en salles de 20, une par site, 20 % gaming)
+
+        Returns:
+            range des IDs créés
+        """
+        premier = self._prochain_id(Poste)
+        salles = max(nombre // 20, 1)
+        sites = [
+            Site.objects.get_or_create(nom=f'Salle {k}', defaults={'slug': f'salle-{k}'})[0].pk
+            for k in range(1, salles + 1)
+        ]
+
+        def lignes():
+            for i in range(nombre):
+                pk = premier + i
+                yield (
+                    pk, f'BENCH-{pk:04d}', sites[i % salles],
+                    'gaming' if self.rng.random() < 0.2 else 'bureautique',
+                    f'10.{pk // 65536 % 256}.{pk // 256 % 256}.{pk % 256}',
+                    ':'.join(f'{octet:02X}' for octet in (0x02, 0xEB, *pk.to_bytes(4, 'big'))),
+                    'disponible', f'Salle {i % salles + 1}',
+                    self.maintenant - timedelta(seconds=self.rng.randint(0, 30)),
+                    '1.0.0', 0, False, self.maintenant, self.maintenant,
+                )
+
+        inserer(Poste, [
+            'id', 'nom', 'site_id', 'type_poste', 'ip_address', 'mac_address', 'statut', 'emplacement',
+            'derniere_connexion', 'version_client', 'nombre_sessions_total',
+            'is_certificate_revoked', 'created_at', 'updated_at',
+        ], lignes(), self.taille_lot)
+        recaler_sequences(Poste)
+        self.progression(f'{nombre} poste(s)')
+        return range(premier, premier + nombre)
+
+    def generer_utilisateurs(self, nombre):
+        """
+        Crée les utilisateurs (30 % d'invités)
+
+        Returns:
+            range des IDs créés
+        """
+        premier = self._prochain_id(Utilisateur)
+
+        def lignes():
+            for i in range(nombre):
+                pk = premier + i
+                invite = self.rng.random() < 0.3
+                cree_le = self.maintenant - timedelta(days=self.rng.randint(0, self.jours), seconds=self.rng.randint(0, 86399))
+                yield (
+                    pk,
+                    f'Invité-{pk}' if invite else self.rng.choice(NOMS),
+                    'Invité' if invite else self.rng.choice(PRENOMS),
+                    None if invite else f'usager{pk}@example.re',
+                    None if invite else f'0692{pk % 1000000:06d}',
+                    invite, not invite, None if invite else cree_le,
+                    'system' if invite else 'admin', 0, cree_le, cree_le,
+                )
+
+        inserer(Utilisateur, [
+            'id', 'nom', 'prenom', 'email', 'telephone', 'is_guest', 'consentement_rgpd',
+            'date_consentement', 'created_by', 'nombre_sessions_total', 'created_at', 'updated_at',
+        ], lignes(), self.taille_lot)
+        recaler_sequences(Utilisateur)
+        self.progression(f'{nombre} utilisateur(s)')
+        return range(premier, premier + nombre)
+
+    def generer_sessions(self, nombre, poste_ids, utilisateur_ids, actives=0):
+        """
+        Crée l'historique des sessions (85 % terminées, 15 % expirées) et,
+        en plus, `actives` sessions en cours sur autant de postes
+
+        Returns:
+            range des IDs créés
+        """
+        premier = self._prochain_id(Session)
+        poste_ids = list(poste_ids)
+        actives = min(actives, len(poste_ids))
+
+        def historique():
+            for i in range(nombre):
+                pk = premier + i
+                cree_le = self._instant_ouverture()
+                duree = self.rng.choice(DUREES)
+                ajoute = 900 if self.rng.random() < 0.1 else 0
+                debut = cree_le + timedelta(seconds=self.rng.randint(10, 300))
+                if self.rng.random() < 0.15:
+                    statut, utilise = 'expiree', duree + ajoute
+                else:
+                    statut, utilise = 'terminee', self.rng.randint(300, duree + ajoute)
+                fin = debut + timedelta(seconds=utilise)
+                yield (
+                    pk, self.rng.choice(utilisateur_ids), self.rng.choice(poste_ids),
+                    encoder_code(pk), duree, 0, ajoute, debut, fin, statut, 'admin', cree_le, fin,
+                )
+
+        def en_cours():
+            for i, poste_id in enumerate(poste_ids[:actives]):
+                pk = premier + nombre + i
+                duree = self.rng.choice(DUREES)
+                ecoule = self.rng.randint(60, duree - 60)
+                debut = self.maintenant - timedelta(seconds=ecoule)
+                yield (
+                    pk, self.rng.choice(utilisateur_ids), poste_id, encoder_code(pk),
+                    duree, duree - ecoule, 0, debut, None, 'active', 'admin', debut, self.maintenant,
+                )
+
+        inserer(Session, [
+            'id', 'utilisateur_id', 'poste_id', 'code_acces', 'duree_initiale', 'temps_restant',
+            'temps_ajoute', 'debut_session', 'fin_session', 'statut', 'operateur', 'created_at', 'updated_at',
+        ], itertools.chain(historique(), en_cours()), self.taille_lot)
+        recaler_sequences(Session)
+
+        # Site de chaque session : celui de son poste (un seul UPDATE)
+        Session.objects.filter(pk__gte=premier).update(
+            site_id=Subquery(Poste.objects.filter(pk=OuterRef('poste_id')).values('site_id')[:1])
+        )
+
+        if actives:
+            Poste.objects.filter(pk__in=poste_ids[:actives]).update(statut='occupe')
+        self.progression(f'{nombre} session(s) terminée(s) et {actives} en cours')
+        return range(premier, premier + nombre + actives)
+
+    def generer_logs(self, nombre, session_ids, poste_ids):
+        """
+        Crée les logs : trois quarts liés aux sessions, le reste aux postes
+
+        Returns:
+            Nombre de logs créés
+        """
+        premier = self._prochain_id(Log)
+        actions, poids = zip(*ACTIONS_POSTES)
+
+        def lignes():
+            for i in range(nombre):
+                cree_le = self._instant_ouverture()
+                if session_ids and self.rng.random() < 0.75:
+                    session_id = self.rng.choice(session_ids)
+                    action = self.rng.choice(['generation_code', 'demarrage_session', 'fermeture', 'ajout_temps'])
+                    yield (
+                        premier + i, session_id, action, 'admin',
+                        f'Session {encoder_code(session_id)} ({action})', None, None, cree_le,
+                    )
+                else:
+                    poste_id = self.rng.choice(poste_ids)
+                    action = self.rng.choices(actions, poids)[0]
+                    yield (
+                        premier + i, None, action, 'system', f'Poste BENCH-{poste_id:04d} ({action})',
+                        f'10.0.{poste_id // 256 % 256}.{poste_id % 256}', {'poste_id': poste_id}, cree_le,
+                    )
+
+        inserer(Log, [
+            'id', 'session_id', 'action', 'operateur', 'details', 'ip_address', 'metadata', 'created_at',
+        ], lignes(), self.taille_lot)
+        recaler_sequences(Log)
+        self.progression(f'{nombre} log(s)')
+        return nombre
+
+    def generer(self, postes, utilisateurs, sessions, logs, consolider=True):
+        """
+        Génère un jeu de données complet
+
+        Args:
+            consolider: Calculer les statistiques quotidiennes de l'historique
+
+        Returns:
+            dict des IDs créés par table (ranges)
+        """
+        from apps.postes.seat_board import refresh_seats
+        from apps.sessions.statistiques import consolider as consolider_statistiques
+        from .http_cache import invalider
+
+        poste_ids = self.generer_postes(postes)
+        utilisateur_ids = self.generer_utilisateurs(utilisateurs)
+        session_ids = self.generer_sessions(sessions, poste_ids, utilisateur_ids, actives=postes // 2)
+        self.generer_logs(logs, session_ids, poste_ids)
+
+        refresh_seats(poste_ids, publish=False)
+        if consolider:
+            jours = consolider_statistiques()
+            self.progression(f'{len(jours)} jour(s) de statistiques consolidé(s)')
+        invalider('postes', 'sessions', 'logs')
+
+        return {'postes': poste_ids, 'utilisateurs': utilisateur_ids, 'sessions': session_ids}
@@ -0,0 +1,211 @@
+"""
+Exports volumineux en streaming (CSV, Parquet)
+
+Les lignes sont lues par paquets depuis un curseur côté serveur
+(QuerySet.iterator) et envoyées au client au fil de l'eau : la mémoire
+du worker reste bornée quelle que soit la période exportée.
+
+Sous ASGI (Daphne), Django consommerait un générateur synchrone d'un bloc
+(sync_to_async(list)) avant d'envoyer le premier octet : le contenu y est
+donc servi par un itérateur asynchrone qui produit les paquets un à un
+dans le thread de la requête.
+
+Parquet nécessite pyarrow (optionnel) ; sans lui seul le CSV est proposé.
+"""
+
+import csv
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Lignes lues par aller-retour avec la base / par row group Parquet
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def formats_disponibles():
+    """Formats d'export utilisables dans cet environnement"""
+    return ['csv', 'parquet'] if pyarrow is not None else ['csv']
+
+
+def parse_periode(params):
+    """
+    Lit les paramètres debut / fin (AAAA-MM-JJ, inclus)
+
+    Returns:
+        (début, fin exclue) en datetimes aware, None si absent
+
+    Raises:
+        ValueError: date invalide
+    """
+    bornes = []
+    for nom, decalage in (('debut', 0), ('fin', 1)):
+        valeur = params.get(nom)
+        if not valeur:
+            bornes.append(None)
+            continue
+        jour = date.fromisoformat(valeur) + timedelta(days=decalage)
+        bornes.append(timezone.make_aware(datetime.combine(jour, time.min)))
+    return tuple(bornes)
+
+
+class _Echo:
+    """Pseudo-fichier : write() renvoie la valeur au lieu de l'écrire"""
+
+    def write(self, value):
+        return value
+
+
+def _valeur_csv(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+    return '' if value is None else value
+
+
+def stream_csv(rows, colonnes):
+    """
+    Générateur CSV (en-tête puis une ligne par tuple)
+
+    Args:
+        rows: Itérable de tuples dans l'ordre des colonnes
+        colonnes: Liste de (nom, type)
+    """
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # BOM : ouverture directe dans un tableur
+    yield writer.writerow([nom for nom, _ in colonnes])
+    for row in rows:
+        yield writer.writerow([_valeur_csv(value) for value in row])
+
+
+class _Tampon:
+    """Fichier en écriture seule dont on récupère le contenu au fur et à mesure"""
+
+    def __init__(self):
+        self._morceaux = []
+        self.closed = False
+
+    def write(self, data):
+        self._morceaux.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def vider(self):
+        data = b''.join(self._morceaux)
+        self._morceaux = []
+        return data
+
+
+def _schema_parquet(colonnes):
+    types = {
+        'int': pyarrow.int64(),
+        'str': pyarrow.string(),
+        'bool': pyarrow.bool_(),
+        'datetime': pyarrow.timestamp('us', tz='UTC'),
+    }
+    return pyarrow.schema([(nom, types[type_]) for nom, type_ in colonnes])
+
+
+def stream_parquet(rows, colonnes, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Générateur Parquet : un row group par paquet de lignes
+
+    Args:
+        rows: Itérable de tuples dans l'ordre des colonnes
+        colonnes: Liste de (nom, type) avec type parmi int, str, bool, datetime
+    """
+    schema = _schema_parquet(colonnes)
+    tampon = _Tampon()
+    writer = pyarrow.parquet.ParquetWriter(tampon, schema)
+
+    def ecrire(paquet):
+        writer.write_table(pyarrow.Table.from_pylist(
+            [dict(zip(schema.names, row)) for row in paquet], schema=schema
+        ))
+
+    paquet = []
+    for row in rows:
+        paquet.append(row)
+        if len(paquet) >= chunk_size:
+            ecrire(paquet)
+            paquet = []
+            yield tampon.vider()
+    if paquet:
+        ecrire(paquet)
+    writer.close()
+    yield tampon.vider()
+
+
+async def _en_asynchrone(contenu, taille):
+    """
+    Itérateur asynchrone sur un générateur synchrone
+
+    Les morceaux sont produits par paquets de `taille` dans le thread de la
+    requête (thread_sensitive : même connexion et même curseur côté
+    serveur que la vue).
+    """
+    suivants = sync_to_async(lambda: list(islice(contenu, taille)))
+    try:
+        while paquet := await suivants():
+            for morceau in paquet:
+                yield morceau
+    finally:
+        # Client déconnecté : libérer le curseur côté serveur
+        await sync_to_async(contenu.close)()
+
+
+def export_response(rows, colonnes, format_, nom_fichier, request=None):
+    """
+    Réponse HTTP en streaming pour un export
+
+    Args:
+        rows: Itérable (paresseux) de tuples
+        colonnes: Liste de (nom, type)
+        format_: 'csv' ou 'parquet'
+        nom_fichier: Nom sans extension proposé au téléchargement
+        request: Requête de la vue ; sous ASGI le contenu est servi par un
+            itérateur asynchrone
+
+    Returns:
+        StreamingHttpResponse, ou Response 400 si le format est indisponible
+    """
+    if format_ not in formats_disponibles():
+        return Response(
+            {
+                'error': f"Format d'export non disponible: {format_}",
+                'formats': formats_disponibles()
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if format_ == 'csv':
+        # Une ligne par morceau : un paquet de lignes par passage dans le thread
+        contenu, taille = stream_csv(rows, colonnes), EXPORT_CHUNK_SIZE
+    else:
+        # Un row group par morceau
+        contenu, taille = stream_parquet(rows, colonnes), 1
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        contenu = _en_asynchrone(contenu, taille)
+    response = StreamingHttpResponse(contenu, content_type=CONTENT_TYPES[format_])
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}.{format_}"'
+    return response
@@ -0,0 +1,213 @@
+"""
+Cache partagé des endpoints de lecture fréquente
+
+Chaque endpoint déclare les données dont il dépend (espaces 'sessions',
+'postes', 'reservations', 'logs'). Chaque espace a un numéro de version
+dans le cache partagé, incrémenté par toute écriture sur ses modèles
+(signaux, UPDATE en masse via update_returning, appels explicites à
+invalider). La clé d'une
+réponse contient les versions de ses dépendances : une écriture rend
+simplement les anciennes entrées inaccessibles, sans suppression.
+
+- Anti-stampede : un seul processus recalcule une entrée manquante
+  (verrou cache.add) ; les autres servent la dernière réponse connue
+  pendant ce temps, sans attendre.
+- ETag / If-None-Match : l'ETag est l'empreinte du contenu ; une réponse
+  inchangée renvoie 304 sans requête sur les données de l'endpoint.
+- Par site : une écriture dont le site est connu n'incrémente que la
+  version de ce site ('postes@3') et celle des vues tous sites
+  ('postes@tous') ; les réponses des autres sites restent valides. Une
+  écriture de site inconnu incrémente la version commune ('postes'),
+  dont dépendent toutes les réponses.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+VERSION_PREFIX = 'http_cache:version:'
+ENTRY_PREFIX = 'http_cache:entry:'
+STALE_PREFIX = 'http_cache:stale:'
+
+# Version des réponses non restreintes à des sites
+TOUS_LES_SITES = 'tous'
+
+# Espace invalidé par les écritures de chaque modèle
+ESPACES_PAR_MODELE = {
+    'poste_sessions.session': 'sessions',
+    'poste_sessions.statistiquejour': 'sessions',
+    'poste_sessions.reservation': 'reservations',
+    'postes.poste': 'postes',
+    'logs.log': 'logs',
+}
+
+
+def _incrementer(espaces):
+    for espace in espaces:
+        cle = f'{VERSION_PREFIX}{espace}'
+        try:
+            # Valeur initiale horodatée : une clé évincée puis recréée ne
+            # reprend jamais une version déjà servie
+            if not cache.add(cle, time.time_ns(), timeout=None):
+                cache.incr(cle)
+        except Exception as e:
+            logger.warning(f"Invalidation du cache '{espace}' impossible: {e}")
+
+
+def invalider(*espaces, sites=None):
+    """
+    Invalide les réponses dépendant des espaces donnés
+
+    Immédiatement, puis à nouveau après le commit : une lecture concurrente
+    qui aurait mis en cache l'état d'avant le commit sous la nouvelle
+    version est ainsi écartée.
+
+    Args:
+        sites: IDs des sites touchés par l'écriture (None : inconnus,
+            toutes les réponses sont invalidées)
+    """
+    if sites is not None:
+        sites = {site for site in sites if site is not None} | {TOUS_LES_SITES}
+        espaces = [f'{espace}@{site}' for espace in espaces for site in sorted(sites, key=str)]
+    _incrementer(espaces)
+    transaction.on_commit(lambda: _incrementer(espaces))
+
+
+def invalider_modele(model, sites=None):
+    """Invalide l'espace associé à un modèle (sans effet si aucun)"""
+    espace = ESPACES_PAR_MODELE.get(model._meta.label_lower)
+    if espace:
+        invalider(espace, sites=sites)
+
+
+def dependances(espaces, sites=None):
+    """Versions dont dépend une réponse restreinte aux sites donnés (tous si None)"""
+    sites = [TOUS_LES_SITES] if sites is None else sorted(sites)
+    return [*espaces, *(f'{espace}@{site}' for espace in espaces for site in sites)]
+
+
+def versions(espaces):
+    """Versions courantes des espaces (créées au besoin)"""
+    cles = [f'{VERSION_PREFIX}{espace}' for espace in espaces]
+    valeurs = cache.get_many(cles)
+    for cle in cles:
+        if cle not in valeurs:
+            cache.add(cle, time.time_ns(), timeout=None)
+            valeurs[cle] = cache.get(cle)
+    return [valeurs[cle] for cle in cles]
+
+
+def etag(data):
+    """ETag fort : empreinte du contenu sérialisé"""
+    contenu = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    return '"' + hashlib.sha1(contenu.encode()).hexdigest() + '"'
+
+
+def _etag_correspond(request, valeur):
+    en_tete = request.headers.get('If-None-Match')
+    if not en_tete:
+        return False
+    candidats = {candidat.strip().removeprefix('W/') for candidat in en_tete.split(',')}
+    return valeur in candidats or '*' in candidats
+
+
+def _reponse(request, entree):
+    if _etag_correspond(request, entree['etag']):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(entree['data'])
+    response['ETag'] = entree['etag']
+    # Le navigateur garde la réponse mais revalide à chaque fois (If-None-Match)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _calculer(cle, cle_stale, calcul, timeout):
+    """
+    Recalcule une entrée, un seul processus à la fois
+
+    Returns:
+        (entrée, None) ou (None, Response non cachable)
+    """
+    verrou = f'{cle}:lock'
+    jeton = uuid.uuid4().hex
+    acquis = cache.add(verrou, jeton, timeout=getattr(settings, 'HTTP_CACHE_LOCK_TIMEOUT', 10))
+    if not acquis:
+        # Recalcul en cours ailleurs : servir la dernière réponse connue
+        stale = cache.get(cle_stale)
+        if stale is not None:
+            return stale, None
+    try:
+        response = calcul()
+        if response.status_code != status.HTTP_200_OK:
+            return None, response
+        entree = {'etag': etag(response.data), 'data': response.data}
+        cache.set_many({cle: entree, cle_stale: entree}, timeout)
+        return entree, None
+    finally:
+        # Ne libérer que notre propre verrou (il a pu expirer entre-temps)
+        if acquis and cache.get(verrou) == jeton:
+            cache.delete(verrou)
+
+
+def cached_endpoint(nom, depend_de=(), timeout=None, par_site=False):
+    """
+    Met en cache la réponse d'une action de ViewSet (GET, 200 uniquement)
+
+    Usage :
+        @action(detail=False, methods=['get'])
+        @cached_endpoint('postes:stats', depend_de=('postes', 'sessions'), timeout=30)
+        def stats(self, request): ...
+
+    Args:
+        nom: Identifiant de l'endpoint dans les clés de cache
+        depend_de: Espaces dont les écritures invalident la réponse
+        timeout: Durée de vie (secondes) ; borne la fraîcheur des données
+            dépendant de l'heure (défaut: HTTP_CACHE_TIMEOUT)
+        par_site: Réponse restreinte aux sites de l'opérateur
+            (viewset.get_sites()) : une entrée et une version par site
+    """
+    def decorator(vue):
+        @functools.wraps(vue)
+        def wrapper(viewset, request, *args, **kwargs):
+            if not getattr(settings, 'HTTP_CACHE_ENABLED', True):
+                return vue(viewset, request, *args, **kwargs)
+
+            duree = timeout or getattr(settings, 'HTTP_CACHE_TIMEOUT', 60)
+            parametres = request.query_params.urlencode()
+            sites = None
+            if par_site:
+                sites = viewset.get_sites()
+                if sites is not None:
+                    parametres += f"&sites={','.join(str(site) for site in sorted(sites))}"
+            try:
+                version = ':'.join(str(v) for v in versions(dependances(depend_de, sites)))
+                cle = f'{ENTRY_PREFIX}{nom}:{version}:{parametres}'
+                entree = cache.get(cle)
+            except Exception as e:
+                logger.warning(f"Cache HTTP indisponible ({nom}): {e}")
+                return vue(viewset, request, *args, **kwargs)
+
+            if entree is None:
+                entree, response = _calculer(
+                    cle, f'{STALE_PREFIX}{nom}:{parametres}',
+                    lambda: vue(viewset, request, *args, **kwargs), duree
+                )
+                if response is not None:
+                    return response
+            return _reponse(request, entree)
+
+        return wrapper
+    return decorator
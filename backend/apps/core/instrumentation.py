@@ -0,0 +1,167 @@
+"""
+Mesure par requête HTTP / message WebSocket
+
+Une Mesure est portée par une variable de contexte : elle suit la requête
+dans les threads de sync_to_async (pool DB des consumers) et dans
+async_to_sync (envois sur la couche de canaux depuis une vue). Les requêtes
+SQL sont comptées par un execute_wrapper posé sur les connexions du thread
+qui les exécute.
+"""
+
+import json
+import re
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+from . import metrics
+
+_mesure_courante = ContextVar('mesure_courante', default=None)
+
+_VERBE_RE = re.compile(r'\s*(\w+)')
+_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?([\w.]+)"?', re.IGNORECASE)
+
+
+def cle_requete(sql):
+    """Regroupement d'une requête : verbe + première table ('SELECT sessions')"""
+    verbe = _VERBE_RE.match(sql)
+    verbe = verbe.group(1).upper() if verbe else '?'
+    table = _TABLE_RE.search(sql)
+    return f'{verbe} {table.group(1)}' if table else verbe
+
+
+class Mesure:
+    """Compteurs d'une requête HTTP ou d'un message WebSocket"""
+
+    def __init__(self, detail=False):
+        self.requetes = 0
+        self.duree_sql = 0.0
+        self.envois = 0
+        # {clé: [nombre, durée]} si detail (DEBUG)
+        self.detail = {} if detail else None
+        self._lock = threading.Lock()
+
+    def ajouter_requete(self, sql, duree):
+        with self._lock:
+            self.requetes += 1
+            self.duree_sql += duree
+            if self.detail is not None:
+                ligne = self.detail.setdefault(cle_requete(sql), [0, 0.0])
+                ligne[0] += 1
+                ligne[1] += duree
+
+    def ajouter_envoi(self):
+        with self._lock:
+            self.envois += 1
+
+    def resume(self, limite=10):
+        """Répartition des requêtes, les plus coûteuses d'abord ('SELECT sessions x3 (1.2ms), ...')"""
+        if not self.detail:
+            return ''
+        lignes = sorted(self.detail.items(), key=lambda item: item[1][1], reverse=True)
+        return ', '.join(
+            f'{cle} x{nombre} ({duree * 1000:.1f}ms)' for cle, (nombre, duree) in lignes[:limite]
+        )
+
+
+def mesure_courante():
+    """Mesure en cours dans ce contexte, ou None"""
+    return _mesure_courante.get()
+
+
+def _compter_requete(execute, sql, params, many, context):
+    mesure = _mesure_courante.get()
+    if mesure is None:
+        return execute(sql, params, many, context)
+    debut = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        mesure.ajouter_requete(sql, time.perf_counter() - debut)
+
+
+@contextmanager
+def compter_requetes():
+    """Compte les requêtes des connexions du thread courant dans la mesure en cours"""
+    if _mesure_courante.get() is None:
+        yield
+        return
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(_compter_requete))
+        yield
+
+
+@contextmanager
+def mesurer(detail=False, connexions=True):
+    """
+    Ouvre une mesure pour le contexte courant
+
+    Args:
+        detail: Conserver la répartition des requêtes (Mesure.resume)
+        connexions: Compter les requêtes des connexions du thread courant
+            (False dans la boucle asyncio : les requêtes s'exécutent dans
+            les threads de db_sync_to_async, qui les comptent eux-mêmes)
+    """
+    mesure = Mesure(detail=detail)
+    token = _mesure_courante.set(mesure)
+    try:
+        if connexions:
+            with compter_requetes():
+                yield mesure
+        else:
+            yield mesure
+    finally:
+        _mesure_courante.reset(token)
+
+
+def compter_envoi(kind, message):
+    """Enregistre un envoi sur la couche de canaux (appelé par apps.core.channel_layers)"""
+    metrics.CHANNEL_LAYER_SENDS.inc(kind=kind, type=message.get('type', '?'))
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        mesure.ajouter_envoi()
+
+
+def nom_consumer(consumer):
+    """'postes.ClientConsumer' : plusieurs apps ont un SessionConsumer"""
+    return f"{type(consumer).__module__.split('.')[-2]}.{type(consumer).__name__}"
+
+
+class InstrumentedConsumerMixin:
+    """
+    Mixin de consumer Channels : latence, requêtes SQL et envois par message
+
+    Le type retenu est celui du message client pour websocket.receive
+    (uniquement s'il correspond à une méthode handle_<type>, pour borner
+    la cardinalité), sinon le type de l'événement ('time_update',
+    'websocket.connect'...).
+    """
+
+    async def dispatch(self, message):
+        type_ = self._type_metrique(message)
+        consumer = nom_consumer(self)
+        debut = time.perf_counter()
+        with mesurer(connexions=False) as mesure:
+            try:
+                await super().dispatch(message)
+            finally:
+                metrics.WS_MESSAGE_DURATION.observe(time.perf_counter() - debut, consumer=consumer, type=type_)
+                metrics.WS_MESSAGE_QUERIES.observe(mesure.requetes, consumer=consumer, type=type_)
+                metrics.WS_MESSAGE_DB_DURATION.observe(mesure.duree_sql, consumer=consumer, type=type_)
+                if mesure.envois:
+                    metrics.WS_MESSAGE_CHANNEL_SENDS.inc(mesure.envois, consumer=consumer, type=type_)
+
+    def _type_metrique(self, message):
+        if message['type'] != 'websocket.receive' or not message.get('text'):
+            return message['type']
+        try:
+            type_ = json.loads(message['text']).get('type')
+        except (ValueError, AttributeError):
+            return 'invalide'
+        if isinstance(type_, str) and type_.isidentifier() and hasattr(self, f'handle_{type_}'):
+            return type_
+        return 'autre'
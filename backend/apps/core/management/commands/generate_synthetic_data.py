@@ -0,0 +1,66 @@
+"""
+Commande Django pour générer un jeu de données synthétiques volumineux
+Tests de charge et benchmarks à l'échelle de la production, par exemple :
+    python manage.py generate_synthetic_data --postes 200 --utilisateurs 500000 \
+        --sessions 5000000 --logs 50000000
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.donnees_synthetiques import GenerateurDonnees
+
+
+class Command(BaseCommand):
+    """Génère postes, utilisateurs, sessions et logs synthétiques (reproductibles)"""
+
+    help = (
+        "Génère un jeu de données synthétiques (insertions en masse, COPY sur "
+        "PostgreSQL). Refusé hors DEBUG sans --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--postes', type=int, default=200, help="Nombre de postes (défaut: 200)")
+        parser.add_argument('--utilisateurs', type=int, default=5000, help="Nombre d'utilisateurs (défaut: 5000)")
+        parser.add_argument('--sessions', type=int, default=50000, help="Sessions terminées (défaut: 50000)")
+        parser.add_argument('--logs', type=int, default=500000, help="Nombre de logs (défaut: 500000)")
+        parser.add_argument('--jours', type=int, default=365, help="Profondeur de l'historique (défaut: 365)")
+        parser.add_argument('--graine', type=int, default=42, help="Graine aléatoire (défaut: 42)")
+        parser.add_argument('--taille-lot', dest='taille_lot', type=int, default=10000,
+                            help="Lignes par transaction (défaut: 10000)")
+        parser.add_argument('--sans-consolidation', dest='consolider', action='store_false',
+                            help="Ne pas calculer les statistiques quotidiennes")
+        parser.add_argument('--force', action='store_true', help="Autoriser l'exécution hors DEBUG")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError(
+                "Génération refusée hors DEBUG (base de production ?) : utiliser --force"
+            )
+        if options['postes'] < 1 or options['utilisateurs'] < 1:
+            raise CommandError("Il faut au moins un poste et un utilisateur")
+
+        debut = time.monotonic()
+
+        def progression(message):
+            self.stdout.write(f'  {message} ({time.monotonic() - debut:.1f}s)')
+
+        generateur = GenerateurDonnees(
+            graine=options['graine'],
+            jours=options['jours'],
+            taille_lot=options['taille_lot'],
+            progression=progression,
+        )
+        generateur.generer(
+            postes=options['postes'],
+            utilisateurs=options['utilisateurs'],
+            sessions=options['sessions'],
+            logs=options['logs'],
+            consolider=options['consolider'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Jeu de données généré en {time.monotonic() - debut:.1f}s'
+        ))
@@ -0,0 +1,306 @@
+"""
+Métriques au format Prometheus (exposition texte)
+
+Registre minimal en mémoire, propre à chaque processus : compteurs,
+histogrammes et jauges calculées à la lecture. Exposé par GET /api/metrics/
+(voir apps.core.views.metrics) et alimenté par InstrumentationMiddleware,
+InstrumentedConsumerMixin, les couches de canaux instrumentées et, via le
+cache partagé, les signaux des workers Celery (apps.core.taches).
+"""
+
+import threading
+
+# Bornes des histogrammes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{nom}="{_echapper(valeur)}"' for nom, valeur in labels) + '}'
+
+
+def _format_valeur(valeur):
+    if valeur == float('inf'):
+        return '+Inf'
+    return repr(float(valeur)) if isinstance(valeur, float) else str(valeur)
+
+
+class _Metrique:
+    type_ = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._valeurs = {}
+
+    def _cle(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels attendus {self.labelnames}, reçus {tuple(labels)}")
+        return tuple(str(labels[nom]) for nom in self.labelnames)
+
+    def _labels(self, cle, *extra):
+        return list(zip(self.labelnames, cle)) + list(extra)
+
+    def entete(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_}']
+
+    def clear(self):
+        with self._lock:
+            self._valeurs.clear()
+
+
+class Counter(_Metrique):
+    """Compteur monotone"""
+
+    type_ = 'counter'
+
+    def inc(self, amount=1, **labels):
+        cle = self._cle(labels)
+        with self._lock:
+            self._valeurs[cle] = self._valeurs.get(cle, 0) + amount
+
+    def value(self, **labels):
+        return self._valeurs.get(self._cle(labels), 0)
+
+    def collect(self):
+        with self._lock:
+            valeurs = sorted(self._valeurs.items())
+        return [f'{self.name}{_format_labels(self._labels(cle))} {_format_valeur(v)}' for cle, v in valeurs]
+
+
+class Histogram(_Metrique):
+    """Histogramme à bornes fixes (cumulées à l'export)"""
+
+    type_ = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        cle = self._cle(labels)
+        with self._lock:
+            serie = self._valeurs.get(cle)
+            if serie is None:
+                serie = self._valeurs[cle] = {'buckets': [0] * len(self.buckets), 'count': 0, 'sum': 0.0}
+            for i, borne in enumerate(self.buckets):
+                if value <= borne:
+                    serie['buckets'][i] += 1
+                    break
+            serie['count'] += 1
+            serie['sum'] += value
+
+    def count(self, **labels):
+        serie = self._valeurs.get(self._cle(labels))
+        return serie['count'] if serie else 0
+
+    def sum(self, **labels):
+        serie = self._valeurs.get(self._cle(labels))
+        return serie['sum'] if serie else 0
+
+    def collect(self):
+        with self._lock:
+            valeurs = sorted((cle, dict(serie, buckets=list(serie['buckets']))) for cle, serie in self._valeurs.items())
+        lignes = []
+        for cle, serie in valeurs:
+            cumul = 0
+            for borne, nombre in zip(self.buckets, serie['buckets']):
+                cumul += nombre
+                labels = _format_labels(self._labels(cle, ('le', _format_valeur(float(borne)))))
+                lignes.append(f'{self.name}_bucket{labels} {cumul}')
+            labels = _format_labels(self._labels(cle, ('le', '+Inf')))
+            lignes.append(f'{self.name}_bucket{labels} {serie["count"]}')
+            lignes.append(f'{self.name}_sum{_format_labels(self._labels(cle))} {_format_valeur(serie["sum"])}')
+            lignes.append(f'{self.name}_count{_format_labels(self._labels(cle))} {serie["count"]}')
+        return lignes
+
+
+class Gauge(_Metrique):
+    """Jauge calculée à la lecture par une fonction (None : non exportée)"""
+
+    type_ = 'gauge'
+
+    def __init__(self, name, documentation, fonction):
+        super().__init__(name, documentation)
+        self.fonction = fonction
+
+    def collect(self):
+        valeur = self.fonction()
+        return [] if valeur is None else [f'{self.name} {_format_valeur(valeur)}']
+
+
+class CeleryTasksCollector:
+    """
+    Compteurs des tâches Celery, agrégés par les workers dans le cache partagé
+
+    Exportés en summary (durée, attente dans la file) et en compteurs.
+    """
+
+    SUMMARIES = (
+        ('epn_celery_task_duration_seconds', "Durée d'exécution des tâches Celery", 'executions', 'duree_ms'),
+        ('epn_celery_task_queue_wait_seconds', "Attente des tâches Celery dans la file", 'attentes', 'attente_ms'),
+    )
+    COUNTERS = (
+        ('epn_celery_task_failures_total', "Tâches Celery en erreur", 'erreurs'),
+        ('epn_celery_task_overlaps_total', "Exécutions ignorées (tâche déjà en cours)", 'chevauchements'),
+        ('epn_celery_task_budget_exceeded_total', "Exécutions au-delà du budget (TASK_RUNTIME_BUDGETS)", 'depassements'),
+    )
+
+    def collect(self):
+        from .taches import statistiques
+
+        stats = statistiques()
+        if not stats:
+            return []
+        lignes = []
+        for nom, documentation, nombre, total_ms in self.SUMMARIES:
+            lignes += [f'# HELP {nom} {documentation}', f'# TYPE {nom} summary']
+            for tache, valeurs in sorted(stats.items()):
+                labels = _format_labels([('task', tache)])
+                lignes.append(f'{nom}_sum{labels} {_format_valeur(valeurs[total_ms] / 1000)}')
+                lignes.append(f'{nom}_count{labels} {valeurs[nombre]}')
+        for nom, documentation, compteur in self.COUNTERS:
+            lignes += [f'# HELP {nom} {documentation}', f'# TYPE {nom} counter']
+            for tache, valeurs in sorted(stats.items()):
+                lignes.append(f'{nom}{_format_labels([("task", tache)])} {valeurs[compteur]}')
+        return lignes
+
+    def entete(self):
+        return []
+
+    def clear(self):
+        pass
+
+
+class Registry:
+    """Ensemble des métriques exportées par le processus"""
+
+    def __init__(self):
+        self._metriques = []
+
+    def register(self, metrique):
+        self._metriques.append(metrique)
+        return metrique
+
+    def render(self):
+        """Exposition texte Prometheus de toutes les métriques"""
+        lignes = []
+        for metrique in self._metriques:
+            valeurs = metrique.collect()
+            if valeurs:
+                lignes.extend(metrique.entete())
+                lignes.extend(valeurs)
+        return '\n'.join(lignes) + '\n'
+
+    def clear(self):
+        for metrique in self._metriques:
+            metrique.clear()
+
+
+REGISTRY = Registry()
+
+# HTTP (route = nom de la vue résolue, bornée par l'URLconf)
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    'epn_http_request_duration_seconds', "Durée de traitement des requêtes HTTP",
+    ('method', 'route', 'status'),
+))
+HTTP_REQUEST_QUERIES = REGISTRY.register(Histogram(
+    'epn_http_request_db_queries', "Requêtes SQL par requête HTTP",
+    ('method', 'route'), buckets=QUERY_COUNT_BUCKETS,
+))
+HTTP_REQUEST_DB_DURATION = REGISTRY.register(Histogram(
+    'epn_http_request_db_duration_seconds', "Temps SQL cumulé par requête HTTP",
+    ('method', 'route'),
+))
+HTTP_REQUEST_CHANNEL_SENDS = REGISTRY.register(Counter(
+    'epn_http_request_channel_sends_total', "Envois sur la couche de canaux depuis les requêtes HTTP",
+    ('method', 'route'),
+))
+
+# WebSocket (type = type du message client ou de l'événement de groupe)
+WS_MESSAGE_DURATION = REGISTRY.register(Histogram(
+    'epn_ws_message_duration_seconds', "Durée de traitement des messages WebSocket",
+    ('consumer', 'type'),
+))
+WS_MESSAGE_QUERIES = REGISTRY.register(Histogram(
+    'epn_ws_message_db_queries', "Requêtes SQL par message WebSocket",
+    ('consumer', 'type'), buckets=QUERY_COUNT_BUCKETS,
+))
+WS_MESSAGE_DB_DURATION = REGISTRY.register(Histogram(
+    'epn_ws_message_db_duration_seconds', "Temps SQL cumulé par message WebSocket",
+    ('consumer', 'type'),
+))
+WS_MESSAGE_CHANNEL_SENDS = REGISTRY.register(Counter(
+    'epn_ws_message_channel_sends_total', "Envois sur la couche de canaux depuis les consumers",
+    ('consumer', 'type'),
+))
+
+# Couche de canaux (tous processus confondus : vues, consumers, tâches)
+CHANNEL_LAYER_SENDS = REGISTRY.register(Counter(
+    'epn_channel_layer_sends_total', "Messages envoyés sur la couche de canaux",
+    ('kind', 'type'),
+))
+
+CHANNEL_LAYER_FULL = REGISTRY.register(Counter(
+    'epn_channel_layer_full_total', "Envois refusés, canal plein (ChannelFull)",
+    ('type',),
+))
+
+# Files locales des consumers (apps.core.backpressure)
+BACKLOG_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+WS_CHANNEL_BACKLOG = REGISTRY.register(Histogram(
+    'epn_ws_channel_backlog', "Messages en attente dans la file d'un consumer, mesurés à chaque arrivée",
+    ('consumer',), buckets=BACKLOG_BUCKETS,
+))
+WS_MESSAGES_COALESCED = REGISTRY.register(Counter(
+    'epn_ws_messages_coalesced_total', "Messages remplacés par une valeur plus récente avant traitement",
+    ('consumer', 'type'),
+))
+WS_MESSAGES_DROPPED = REGISTRY.register(Counter(
+    'epn_ws_messages_dropped_total', "Messages écartés d'un consumer trop lent",
+    ('consumer', 'type'),
+))
+WS_SLOW_CONSUMER_DISCONNECTS = REGISTRY.register(Counter(
+    'epn_ws_slow_consumer_disconnects_total', "Sockets fermées car leur consumer était trop lent",
+    ('consumer',),
+))
+
+
+def _backlog_max():
+    from . import backpressure
+    return backpressure.backlog_max()
+
+
+REGISTRY.register(Gauge(
+    'epn_ws_channel_backlog_max', "Plus grande file d'attente des consumers du processus", _backlog_max
+))
+
+
+def _executor_stat(nom):
+    def lire():
+        from . import async_db
+        # Ne pas créer le pool dans un processus qui ne l'utilise pas
+        return async_db._executor.stats()[nom] if async_db._executor is not None else None
+    return lire
+
+
+for _nom, _doc in (
+    ('en_cours', "Appels en cours dans le pool DB des consumers"),
+    ('en_attente', "Appels en attente d'un thread du pool DB des consumers"),
+    ('total', "Appels traités par le pool DB des consumers"),
+    ('erreurs', "Appels en erreur dans le pool DB des consumers"),
+    ('attente_max_ms', "Attente maximum observée dans le pool DB des consumers (ms)"),
+):
+    REGISTRY.register(Gauge(f'epn_db_executor_{_nom}', _doc, _executor_stat(_nom)))
+
+REGISTRY.register(CeleryTasksCollector())
@@ -0,0 +1,49 @@
+"""
+Middlewares transverses
+"""
+
+import time
+
+from django.conf import settings
+
+from . import metrics
+from .instrumentation import mesurer
+
+
+class InstrumentationMiddleware:
+    """
+    Latence, requêtes SQL et envois sur la couche de canaux par route
+
+    La route est le nom de la vue résolue ('sessions:session-add-time'), ce
+    qui borne la cardinalité des séries. En DEBUG, la réponse porte la
+    répartition des requêtes SQL :
+        X-SQL-Queries: 12; 4.3ms
+        X-SQL-Breakdown: SELECT sessions x3 (1.2ms), UPDATE postes x1 (0.4ms)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        debut = time.perf_counter()
+        with mesurer(detail=settings.DEBUG) as mesure:
+            response = self.get_response(request)
+        duree = time.perf_counter() - debut
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = resolver_match.view_name if resolver_match else 'non_resolue'
+        method = request.method
+
+        metrics.HTTP_REQUEST_DURATION.observe(
+            duree, method=method, route=route, status=f'{response.status_code // 100}xx'
+        )
+        metrics.HTTP_REQUEST_QUERIES.observe(mesure.requetes, method=method, route=route)
+        metrics.HTTP_REQUEST_DB_DURATION.observe(mesure.duree_sql, method=method, route=route)
+        if mesure.envois:
+            metrics.HTTP_REQUEST_CHANNEL_SENDS.inc(mesure.envois, method=method, route=route)
+
+        if settings.DEBUG:
+            response['X-SQL-Queries'] = f'{mesure.requetes}; {mesure.duree_sql * 1000:.1f}ms'
+            if mesure.detail:
+                response['X-SQL-Breakdown'] = mesure.resume()
+        return response
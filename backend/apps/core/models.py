@@ -16,3 +16,15 @@ class TimeStampedModel(models.Model):
     class Meta:
         abstract = True
         ordering = ['-created_at']
+
+
+class SiteScopedQuerySet(models.QuerySet):
+    """
+    QuerySet des modèles rattachés à un site (champ 'site')
+    """
+
+    def des_sites(self, site_ids):
+        """Restreint aux sites donnés (aucune restriction si None)"""
+        if site_ids is None:
+            return self
+        return self.filter(site_id__in=list(site_ids))
@@ -0,0 +1,206 @@
+"""
+Registre de présence partagé entre les workers ASGI
+
+Avec plusieurs processus Daphne derrière le reverse proxy, l'état d'une
+socket (poste connecté, session en cours) ne vit que dans le consumer qui
+la tient. Ce registre le publie dans le cache partagé (Redis) sous forme
+de bail par poste :
+
+    presence:poste:<id> → {'channel', 'worker', 'session_id', 'expire'}
+
+- Le bail est posé à la connexion, renouvelé à chaque heartbeat et libéré
+  à la déconnexion. Il expire seul (PRESENCE_TTL) si le worker meurt :
+  aucun nettoyage n'est nécessaire.
+- La connexion la plus récente gagne : un kiosque qui se reconnecte sur
+  un autre worker remplace le bail ; l'ancienne connexion le constate au
+  renouvellement suivant.
+- Les commandes destinées à un poste (remote_command, unlock_kiosk) sont
+  envoyées directement au canal qui tient le bail (channel_layer.send,
+  acheminé par la couche Redis jusqu'au worker concerné), et au groupe
+  poste_<id> à défaut de bail.
+
+Un kiosque dont le worker meurt se reconnecte ailleurs et rejoint à
+nouveau ses groupes ; les canaux morts restent inscrits jusqu'à
+CHANNEL_GROUP_EXPIRY mais leurs messages expirent sans être lus. Les
+appartenances des kiosques sont rafraîchies au heartbeat (group_add est
+idempotent).
+
+Le registre n'est partagé entre processus qu'avec le cache Redis
+(USE_REDIS_CACHE, actif par défaut hors DEBUG). Le renouvellement et la
+libération ne touchent le bail que s'il appartient encore à la connexion :
+vérification et écriture sont atomiques (WATCH / MULTI sur le client Redis
+du cache ; verrou du processus avec un cache local).
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'presence:poste:'
+
+# Identifiant du processus (diagnostic : quel worker tient quelle socket)
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _ttl():
+    return getattr(settings, 'PRESENCE_TTL', 90)
+
+
+# Écritures du registre avec un cache local (un seul processus)
+_verrou = threading.Lock()
+
+
+def _cle(poste_id):
+    return f'{PREFIX}{poste_id}'
+
+
+def _nouveau_bail(channel_name, session_id):
+    return {
+        'channel': channel_name,
+        'worker': WORKER_ID,
+        'session_id': session_id,
+        'expire': time.time() + _ttl(),
+    }
+
+
+def _client_redis():
+    """Client django-redis du cache partagé, None pour un cache local"""
+    client = getattr(cache, 'client', None)
+    return client if hasattr(client, 'get_client') else None
+
+
+def _si_titulaire(poste_id, channel_name, nouveau):
+    """
+    Remplace (nouveau) ou supprime (None) le bail s'il est libre ou tenu
+    par channel_name, en une opération atomique
+
+    Returns:
+        False si une autre connexion tient le bail
+    """
+    cle = _cle(poste_id)
+    client = _client_redis()
+    if client is None:
+        with _verrou:
+            actuel = cache.get(cle)
+            if actuel is not None and actuel['channel'] != channel_name:
+                return False
+            if nouveau is not None:
+                cache.set(cle, nouveau, timeout=_ttl())
+            elif actuel is not None:
+                cache.delete(cle)
+            return True
+
+    from redis.exceptions import WatchError
+
+    cle = client.make_key(cle)
+    with client.get_client(write=True).pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(cle)
+                valeur = pipe.get(cle)
+                actuel = client.decode(valeur) if valeur is not None else None
+                if actuel is not None and actuel['channel'] != channel_name:
+                    return False
+                pipe.multi()
+                if nouveau is not None:
+                    pipe.set(cle, client.encode(nouveau), ex=_ttl())
+                else:
+                    pipe.delete(cle)
+                pipe.execute()
+                return True
+            except WatchError:
+                # Bail modifié entre la lecture et l'écriture : relire
+                continue
+
+
+def enregistrer(poste_id, channel_name, session_id=None):
+    """Pose (ou remplace) le bail du poste pour cette connexion"""
+    bail = _nouveau_bail(channel_name, session_id)
+    try:
+        with _verrou:
+            cache.set(_cle(poste_id), bail, timeout=_ttl())
+    except Exception as e:
+        logger.warning(f"Présence du poste {poste_id} non enregistrée: {e}")
+    return bail
+
+
+def renouveler(poste_id, channel_name, session_id=None):
+    """
+    Prolonge le bail de cette connexion
+
+    Returns:
+        False si une connexion plus récente du poste tient le bail
+        (cette socket est alors obsolète), True sinon
+    """
+    try:
+        return _si_titulaire(poste_id, channel_name, _nouveau_bail(channel_name, session_id))
+    except Exception as e:
+        logger.warning(f"Présence du poste {poste_id} non renouvelée: {e}")
+        return True
+
+
+def liberer(poste_id, channel_name):
+    """Libère le bail s'il appartient encore à cette connexion"""
+    try:
+        _si_titulaire(poste_id, channel_name, None)
+    except Exception as e:
+        logger.warning(f"Présence du poste {poste_id} non libérée: {e}")
+
+
+def bail(poste_id):
+    """Bail courant du poste, ou None s'il n'est connecté à aucun worker"""
+    try:
+        return cache.get(_cle(poste_id))
+    except Exception as e:
+        logger.warning(f"Registre de présence indisponible: {e}")
+        return None
+
+
+def baux(poste_ids):
+    """{poste_id: bail} des postes connectés parmi poste_ids"""
+    poste_ids = list(poste_ids)
+    try:
+        valeurs = cache.get_many([_cle(poste_id) for poste_id in poste_ids])
+    except Exception as e:
+        logger.warning(f"Registre de présence indisponible: {e}")
+        return {}
+    return {
+        poste_id: valeurs[_cle(poste_id)]
+        for poste_id in poste_ids if _cle(poste_id) in valeurs
+    }
+
+
+def envoyer_au_poste(poste_id, message):
+    """
+    Envoie un message au consumer qui tient la socket du poste
+
+    Returns:
+        True si envoyé au canal du bail, False si diffusé au groupe
+        poste_<id> faute de bail
+    """
+    from channels.layers import get_channel_layer
+
+    channel_layer = get_channel_layer()
+    actuel = bail(poste_id)
+    if actuel is not None:
+        try:
+            async_to_sync(channel_layer.send)(actuel['channel'], message)
+            return True
+        except Exception as e:
+            # Canal plein ou worker disparu : le groupe reste un filet
+            logger.warning(f"Envoi direct au poste {poste_id} impossible ({actuel['worker']}): {e}")
+    async_to_sync(channel_layer.group_send)(f'poste_{poste_id}', message)
+    return False
+
+
+aenregistrer = sync_to_async(enregistrer, thread_sensitive=False)
+arenouveler = sync_to_async(renouveler, thread_sensitive=False)
+aliberer = sync_to_async(liberer, thread_sensitive=False)
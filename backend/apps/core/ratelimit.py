@@ -0,0 +1,227 @@
+"""
+Limitation de débit (rate limiting) partagée entre tous les processus
+
+Fenêtre glissante exacte (journal des requêtes dans un sorted set Redis),
+évaluée par un script Lua : une seule requête réseau par vérification,
+atomique même avec plusieurs workers Daphne/Gunicorn. Si Redis n'est pas
+configuré ou ne répond pas, un limiteur en mémoire locale prend le relais
+(limites alors par processus).
+
+Usage REST :
+    @rate_limit('validate_code')
+    @action(detail=False, methods=['post'])
+    def validate_code(self, request): ...
+
+Usage WebSocket :
+    result = await acheck_rate_limit('validate_code', ident)
+    if not result.allowed: ...
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+PERIODES = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# KEYS[1] = clé du journal ; ARGV = maintenant (ms), fenêtre (ms), limite, membre
+SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('PEXPIRE', key, window)
+    return {1, limit - count - 1, 0}
+end
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+return {0, 0, tonumber(oldest[2]) + window - now}
+"""
+
+
+@dataclass
+class RateLimitResult:
+    """Résultat d'une vérification de débit"""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # secondes avant qu'une requête soit de nouveau acceptée
+
+
+def parse_rate(rate):
+    """
+    Convertit une limite '10/m' en (nombre, fenêtre en secondes)
+
+    Formats acceptés : '10/s', '10/m', '100/h', '1000/d', '10/5m'
+    """
+    count, period = rate.split('/')
+    multiplier = int(period[:-1] or 1)
+    return int(count), multiplier * PERIODES[period[-1]]
+
+
+class MemoryRateLimiter:
+    """Fenêtre glissante en mémoire locale (repli, limites par processus)"""
+
+    def __init__(self):
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window):
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.setdefault(key, deque())
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) < limit:
+                hits.append(now)
+                return RateLimitResult(True, limit, limit - len(hits), 0)
+            return RateLimitResult(False, limit, 0, hits[0] + window - now)
+
+    def reset(self):
+        with self._lock:
+            self._hits.clear()
+
+
+class RedisRateLimiter:
+    """Fenêtre glissante partagée dans Redis (script Lua, un aller-retour)"""
+
+    def __init__(self, url, prefix='ratelimit'):
+        import redis
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._script = self._client.register_script(SLIDING_WINDOW_LUA)
+        self._prefix = prefix
+
+    def hit(self, key, limit, window):
+        now_ms = int(time.time() * 1000)
+        allowed, remaining, retry_ms = self._script(
+            keys=[f'{self._prefix}:{key}'],
+            args=[now_ms, window * 1000, limit, f'{now_ms}-{uuid.uuid4().hex[:8]}']
+        )
+        return RateLimitResult(bool(allowed), limit, int(remaining), max(int(retry_ms), 0) / 1000)
+
+    def reset(self):
+        for key in self._client.scan_iter(f'{self._prefix}:*'):
+            self._client.delete(key)
+
+
+_memory_limiter = MemoryRateLimiter()
+_redis_limiter = None
+
+# Après une erreur Redis, délai (secondes) pendant lequel on reste en mémoire
+# pour ne pas payer un timeout de connexion à chaque requête
+REDIS_RETRY_DELAY = 30
+_redis_down_until = 0
+
+
+def get_rate_limiter():
+    """Retourne le limiteur Redis si configuré, sinon le limiteur mémoire"""
+    global _redis_limiter
+    if not getattr(settings, 'USE_REDIS_RATE_LIMIT', False):
+        return _memory_limiter
+    if time.monotonic() < _redis_down_until:
+        return _memory_limiter
+    if _redis_limiter is None:
+        _redis_limiter = RedisRateLimiter(settings.RATE_LIMIT_REDIS_URL)
+    return _redis_limiter
+
+
+def check_rate_limit(scope, ident, rate=None):
+    """
+    Enregistre une tentative et indique si elle est autorisée
+
+    Args:
+        scope: Nom de la limite (clé de settings.RATE_LIMITS)
+        ident: Identifiant limité (IP, poste...)
+        rate: Limite explicite ('10/m'), sinon settings.RATE_LIMITS[scope]
+
+    Returns:
+        RateLimitResult
+    """
+    rate = rate or settings.RATE_LIMITS[scope]
+    limit, window = parse_rate(rate)
+    key = f'{scope}:{ident}'
+
+    global _redis_down_until
+    limiter = get_rate_limiter()
+    try:
+        return limiter.hit(key, limit, window)
+    except Exception as e:
+        if limiter is _memory_limiter:
+            raise
+        # Redis indisponible : ne pas bloquer le service, limiter localement
+        logger.warning(f"Rate limiting Redis indisponible, repli en mémoire: {e}")
+        _redis_down_until = time.monotonic() + REDIS_RETRY_DELAY
+        return _memory_limiter.hit(key, limit, window)
+
+
+# Variante pour les consumers : l'appel Redis ne bloque pas la boucle d'événements
+acheck_rate_limit = sync_to_async(check_rate_limit, thread_sensitive=False)
+
+
+def reset_rate_limits():
+    """Vide tous les compteurs (tests, administration)"""
+    _memory_limiter.reset()
+    if _redis_limiter is not None:
+        _redis_limiter.reset()
+
+
+def get_client_ip(request):
+    """
+    Extrait l'adresse IP du client depuis la requête
+
+    X-Forwarded-For n'est lu que derrière RATE_LIMIT_TRUSTED_PROXIES
+    reverse proxies de confiance : l'adresse retenue est celle ajoutée par
+    le premier d'entre eux (la N-ième en partant de la droite). Les valeurs
+    plus à gauche sont fournies par le client et ignorées.
+    """
+    proxies = getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', 0)
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and x_forwarded_for:
+        adresses = [adresse.strip() for adresse in x_forwarded_for.split(',') if adresse.strip()]
+        if adresses:
+            return adresses[-min(proxies, len(adresses))]
+    return request.META.get('REMOTE_ADDR')
+
+
+def rate_limit_response(result):
+    """Réponse 429 avec en-tête Retry-After"""
+    retry_after = max(int(result.retry_after + 0.999), 1)
+    response = Response({
+        'error': 'Trop de requêtes, réessayez plus tard',
+        'retry_after': retry_after
+    }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(scope, key=get_client_ip):
+    """
+    Décorateur de méthode de ViewSet : renvoie 429 au-delà de la limite
+
+    Args:
+        scope: Nom de la limite (clé de settings.RATE_LIMITS)
+        key: Fonction request -> identifiant limité (IP par défaut)
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            result = check_rate_limit(scope, key(request))
+            if not result.allowed:
+                return rate_limit_response(result)
+            return view_method(self, request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,51 @@
+"""
+Signals de l'app Core
+Invalide le cache des endpoints de lecture (apps.core.http_cache) à chaque
+écriture sur les modèles dont ils dépendent
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .http_cache import invalider, invalider_modele
+
+# Champs écrits par le heartbeat des postes : fraîcheur bornée par la durée
+# de vie des entrées, sans invalider toutes les réponses à chaque battement
+CHAMPS_CONNEXION = {'derniere_connexion', 'version_client'}
+
+
+@receiver(post_save, sender='logs.Log')
+def invalider_cache_sur_ecriture(sender, **kwargs):
+    """Invalide les réponses dépendant du modèle modifié"""
+    invalider_modele(sender)
+
+
+@receiver(post_save, sender='poste_sessions.Session')
+def invalider_cache_sessions(sender, instance, **kwargs):
+    """
+    Invalide les réponses dépendant des sessions du site de la session
+
+    Pas de post_delete (il empêcherait la suppression en masse) : les
+    suppressions invalident depuis SessionQuerySet.delete / Session.delete.
+    """
+    invalider_modele(sender, sites=[instance.site_id])
+
+
+@receiver(post_save, sender='poste_sessions.Reservation')
+@receiver(post_delete, sender='poste_sessions.Reservation')
+def invalider_cache_reservations(sender, instance, **kwargs):
+    """Invalide les réponses dépendant des réservations du site"""
+    invalider_modele(sender, sites=[instance.site_id])
+
+
+@receiver(post_save, sender='postes.Poste')
+@receiver(post_delete, sender='postes.Poste')
+def invalider_cache_postes(sender, instance, update_fields=None, **kwargs):
+    """Invalide les réponses dépendant des postes (sauf heartbeat)"""
+    if update_fields and set(update_fields) <= CHAMPS_CONNEXION:
+        return
+    # Une sauvegarde complète peut avoir changé le site : tout invalider
+    if update_fields and 'site' not in update_fields:
+        invalider('postes', sites=[instance.site_id])
+    else:
+        invalider('postes')
@@ -0,0 +1,173 @@
+"""
+Exécution des tâches Celery : verrou d'exclusivité et métriques
+
+- single_flight : une tâche périodique ne s'exécute jamais en parallèle
+  d'elle-même ; l'exécution en trop est abandonnée et comptée comme
+  chevauchement.
+- Signaux Celery : durée, attente dans la file (depuis la publication),
+  erreurs et dépassements de budget (TASK_RUNTIME_BUDGETS) par tâche.
+
+Les workers n'exposent pas de port HTTP : les compteurs sont agrégés dans
+le cache partagé (Redis en production) et exportés par GET /api/metrics/.
+"""
+
+import functools
+import logging
+import threading
+import time
+import uuid
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+LOCK_PREFIX = 'celery:single_flight:'
+STATS_PREFIX = 'celery:stats:'
+NOMS_KEY = 'celery:stats:taches'
+
+# Compteurs agrégés par tâche (durées en millisecondes)
+COMPTEURS = [
+    'executions', 'erreurs', 'duree_ms', 'attentes', 'attente_ms',
+    'chevauchements', 'depassements',
+]
+
+
+def _incr(tache, compteur, valeur=1):
+    cle = f'{STATS_PREFIX}{tache}:{compteur}'
+    try:
+        cache.add(cle, 0, timeout=None)
+        cache.incr(cle, int(valeur))
+    except Exception as e:
+        logger.debug(f"Métrique Celery non enregistrée ({cle}): {e}")
+
+
+_noms_connus = set()
+_noms_lock = threading.Lock()
+
+
+def _enregistrer_nom(tache):
+    """Ajoute une tâche à la liste exportée (une écriture par processus et par tâche)"""
+    if tache in _noms_connus:
+        return
+    with _noms_lock:
+        noms = set(cache.get(NOMS_KEY) or ())
+        if tache not in noms:
+            cache.set(NOMS_KEY, sorted(noms | {tache}), timeout=None)
+        _noms_connus.add(tache)
+
+
+def statistiques():
+    """
+    Compteurs agrégés de toutes les tâches observées
+
+    Returns:
+        dict {nom de la tâche: {compteur: valeur}}
+    """
+    noms = cache.get(NOMS_KEY) or []
+    cles = [f'{STATS_PREFIX}{nom}:{compteur}' for nom in noms for compteur in COMPTEURS]
+    valeurs = cache.get_many(cles) if cles else {}
+    return {
+        nom: {
+            compteur: valeurs.get(f'{STATS_PREFIX}{nom}:{compteur}', 0)
+            for compteur in COMPTEURS
+        }
+        for nom in noms
+    }
+
+
+def single_flight(timeout=None):
+    """
+    Empêche une tâche de s'exécuter en parallèle d'elle-même
+
+    Le verrou (cache.add, atomique dans Redis) expire après timeout
+    secondes au cas où le worker serait tué en cours d'exécution.
+
+    Usage (sous @shared_task) :
+        @shared_task
+        @single_flight(timeout=30)
+        def update_session_times(): ...
+
+    Args:
+        timeout: Durée de vie du verrou (défaut: CELERY_TASK_TIME_LIMIT)
+    """
+    def decorator(func):
+        nom = f'{func.__module__}.{func.__name__}'
+        cle = f'{LOCK_PREFIX}{nom}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            jeton = uuid.uuid4().hex
+            duree = timeout or getattr(settings, 'CELERY_TASK_TIME_LIMIT', 1800)
+            if not cache.add(cle, jeton, timeout=duree):
+                _enregistrer_nom(nom)
+                _incr(nom, 'chevauchements')
+                logger.warning(f"Tâche {nom} déjà en cours : exécution ignorée")
+                return f"{nom} déjà en cours, exécution ignorée"
+            try:
+                return func(*args, **kwargs)
+            finally:
+                # Ne libérer que notre propre verrou (il a pu expirer entre-temps)
+                if cache.get(cle) == jeton:
+                    cache.delete(cle)
+
+        return wrapper
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Signaux Celery
+# ---------------------------------------------------------------------------
+
+SENT_AT_HEADER = 'epn_sent_at'
+
+# task_id -> début (horloge monotone), propre au processus worker
+_en_cours = {}
+
+
+@before_task_publish.connect
+def _horodater_publication(headers=None, **kwargs):
+    """Horodate le message pour mesurer l'attente dans la file"""
+    if headers is not None:
+        headers[SENT_AT_HEADER] = time.time()
+
+
+def _sent_at(request):
+    sent_at = getattr(request, SENT_AT_HEADER, None)
+    if sent_at is None:
+        sent_at = (getattr(request, 'headers', None) or {}).get(SENT_AT_HEADER)
+    return sent_at
+
+
+@task_prerun.connect
+def _debut_tache(task_id=None, task=None, **kwargs):
+    _en_cours[task_id] = time.monotonic()
+    _enregistrer_nom(task.name)
+
+    sent_at = _sent_at(task.request)
+    if sent_at is not None:
+        _incr(task.name, 'attentes')
+        _incr(task.name, 'attente_ms', max(time.time() - sent_at, 0) * 1000)
+
+
+@task_postrun.connect
+def _fin_tache(task_id=None, task=None, state=None, **kwargs):
+    debut = _en_cours.pop(task_id, None)
+    if debut is None:
+        return
+    duree = time.monotonic() - debut
+
+    _incr(task.name, 'executions')
+    _incr(task.name, 'duree_ms', duree * 1000)
+    # En mode eager avec propagation, l'état n'est pas renseigné sur erreur
+    if state not in ('SUCCESS', 'RETRY', 'IGNORED', 'REJECTED'):
+        _incr(task.name, 'erreurs')
+
+    budget = getattr(settings, 'TASK_RUNTIME_BUDGETS', {}).get(task.name)
+    if budget is not None and duree > budget:
+        _incr(task.name, 'depassements')
+        logger.warning(
+            f"Tâche {task.name} : {duree:.2f}s pour un budget de {budget}s "
+            f"(l'exécution suivante est retardée)"
+        )
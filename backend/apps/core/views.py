@@ -0,0 +1,76 @@
+"""
+Vues transverses (supervision : santé, métriques)
+"""
+
+import hmac
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from . import metrics as metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+@transaction.non_atomic_requests
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def health(request):
+    """
+    Sonde de santé (HEALTHCHECK Docker, répartiteur de charge)
+
+    GET /api/health/
+
+    Passe par la connexion courante du thread : persistante (CONN_MAX_AGE,
+    vérifiée par CONN_HEALTH_CHECKS), empruntée au pool psycopg ou à
+    PgBouncer. Une sonde n'ouvre donc pas de nouvelle connexion PostgreSQL,
+    et n'ouvre pas de transaction (hors ATOMIC_REQUESTS).
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except Exception as e:
+        logger.warning(f"Sonde de santé : base indisponible ({e})")
+        return Response(
+            {'status': 'error', 'database': 'unavailable'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    return Response({
+        'status': 'ok',
+        'database': 'ok',
+        'process_type': settings.DB_PROCESS_TYPE,
+        'pool_mode': settings.DB_POOL_MODE,
+    })
+
+
+@transaction.non_atomic_requests
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def metrics(request):
+    """
+    Métriques du processus au format Prometheus
+
+    GET /api/metrics/
+    Authorization: Bearer <METRICS_TOKEN>
+
+    Sans METRICS_TOKEN configuré, l'endpoint n'est ouvert qu'en DEBUG.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        fourni = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(fourni.encode(), token.encode()):
+            return Response({'error': 'Jeton invalide'}, status=status.HTTP_403_FORBIDDEN)
+    elif not settings.DEBUG:
+        return Response({'error': 'Métriques désactivées'}, status=status.HTTP_404_NOT_FOUND)
+
+    return HttpResponse(metrics_registry.REGISTRY.render(), content_type=metrics_registry.CONTENT_TYPE)
@@ -7,6 +7,19 @@ from django.db import models
 from django.utils import timezone
 
 
+class LogQuerySet(models.QuerySet):
+    """QuerySet des logs"""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create n'émet pas post_save : invalider le cache des logs ici"""
+        from apps.core.http_cache import invalider
+
+        logs = super().bulk_create(objs, *args, **kwargs)
+        if logs:
+            invalider('logs')
+        return logs
+
+
 class Log(models.Model):
     """
     Modèle pour les logs et l'audit trail
@@ -102,6 +115,8 @@ class Log(models.Model):
         verbose_name="Date de création"
     )
 
+    objects = LogQuerySet.as_manager()
+
     class Meta:
         db_table = 'logs'
         ordering = ['-created_at']
@@ -191,4 +206,7 @@ class Log(models.Model):
         """
         cutoff_date = timezone.now() - timezone.timedelta(days=days)
         deleted_count, _ = cls.objects.filter(created_at__lt=cutoff_date).delete()
+        if deleted_count:
+            from apps.core.http_cache import invalider
+            invalider('logs')
         return deleted_count
@@ -6,9 +6,11 @@ from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
 from .models import Log
+from apps.core.taches import single_flight
 
 
 @shared_task
+@single_flight()
 def cleanup_old_logs(days=90):
     """
     Supprime les logs plus anciens que X jours
@@ -30,6 +32,7 @@ def cleanup_old_logs(days=90):
 
 
 @shared_task
+@single_flight()
 def generate_logs_report():
     """
     Génère un rapport quotidien des logs
@@ -79,6 +82,7 @@ def generate_logs_report():
 
 
 @shared_task
+@single_flight()
 def archive_old_logs(days=180):
     """
     Archive les logs anciens (export vers fichier)
@@ -6,9 +6,10 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count
+from django.db.models import Count, Max
 from django.utils import timezone
 from datetime import timedelta
+from apps.core.http_cache import cached_endpoint
 from .models import Log
 from .serializers import (
     LogSerializer,
@@ -27,10 +28,11 @@ class LogViewSet(viewsets.ReadOnlyModelViewSet):
     - GET /api/logs/{id}/ - Détail d'un log
     - GET /api/logs/stats/ - Statistiques des logs
     - GET /api/logs/recent/ - Logs récents
+    - GET /api/logs/export/ - Export CSV / Parquet en streaming
     - POST /api/logs/search/ - Recherche avancée
     """
 
-    queryset = Log.objects.all()
+    queryset = Log.objects.select_related('session')
     serializer_class = LogSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
@@ -47,6 +49,73 @@ class LogViewSet(viewsets.ReadOnlyModelViewSet):
         return LogSerializer
 
     @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporte les logs en streaming (mémoire bornée)
+
+        GET /api/logs/export/?type=csv&debut=2025-01-01&fin=2025-12-31&poste=3&action=fermeture
+
+        Paramètres:
+            type: csv (défaut) ou parquet (si pyarrow est installé)
+            debut / fin: période (AAAA-MM-JJ, incluses)
+            poste: ID du poste, via la session ou les métadonnées (répétable)
+            action: Type d'action (répétable)
+        """
+        import json
+        from django.db.models import Q
+        from apps.core.exports import EXPORT_CHUNK_SIZE, export_response, parse_periode
+
+        try:
+            debut, fin = parse_periode(request.query_params)
+            poste_ids = [int(p) for p in request.query_params.getlist('poste')]
+        except ValueError:
+            return Response(
+                {'error': 'Paramètres invalides (dates au format AAAA-MM-JJ)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = Log.objects.order_by('created_at')
+        if debut:
+            queryset = queryset.filter(created_at__gte=debut)
+        if fin:
+            queryset = queryset.filter(created_at__lt=fin)
+        if poste_ids:
+            queryset = queryset.filter(
+                Q(session__poste_id__in=poste_ids) | Q(metadata__poste_id__in=poste_ids)
+            )
+        actions = request.query_params.getlist('action')
+        if actions:
+            queryset = queryset.filter(action__in=actions)
+
+        colonnes = [
+            ('id', 'int'), ('created_at', 'datetime'), ('action', 'str'),
+            ('operateur', 'str'), ('session_id', 'int'), ('poste_id', 'int'),
+            ('ip_address', 'str'), ('details', 'str'), ('metadata', 'str'),
+        ]
+
+        def lignes():
+            for log_id, created_at, action_, operateur, session_id, session_poste_id, \
+                    ip_address, details, metadata in queryset.values_list(
+                        'id', 'created_at', 'action', 'operateur', 'session_id',
+                        'session__poste_id', 'ip_address', 'details', 'metadata'
+                    ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                poste_id = session_poste_id
+                if poste_id is None and isinstance(metadata, dict):
+                    valeur = metadata.get('poste_id')
+                    poste_id = valeur if isinstance(valeur, int) else None
+                yield (
+                    log_id, created_at, action_, operateur, session_id, poste_id,
+                    ip_address, details,
+                    json.dumps(metadata, ensure_ascii=False) if metadata is not None else None
+                )
+
+        nom = f"logs_{timezone.localdate().isoformat()}"
+        return export_response(
+            lignes(), colonnes, request.query_params.get('type', 'csv'), nom, request=request
+        )
+
+    @action(detail=False, methods=['get'])
+    @cached_endpoint('logs:stats', depend_de=('logs',), timeout=60)
     def stats(self, request):
         """
         Retourne les statistiques des logs
@@ -55,7 +124,8 @@ class LogViewSet(viewsets.ReadOnlyModelViewSet):
         """
         # Statistiques par action
         stats_par_action = Log.objects.values('action').annotate(
-            count=Count('id')
+            count=Count('id'),
+            last_occurrence=Max('created_at')
         ).order_by('-count')
 
         # Ajouter le display name
@@ -64,14 +134,11 @@ class LogViewSet(viewsets.ReadOnlyModelViewSet):
             action_code = item['action']
             action_display = dict(Log.ACTION_CHOICES).get(action_code, action_code)
 
-            # Dernière occurrence
-            last_log = Log.objects.filter(action=action_code).first()
-
             action_stats.append({
                 'action': action_code,
                 'action_display': action_display,
                 'count': item['count'],
-                'last_occurrence': last_log.created_at if last_log else None
+                'last_occurrence': item['last_occurrence']
             })
 
         # Total
@@ -106,7 +173,7 @@ class LogViewSet(viewsets.ReadOnlyModelViewSet):
         limit = int(request.query_params.get('limit', 100))
 
         cutoff = timezone.now() - timedelta(hours=hours)
-        logs = Log.objects.filter(created_at__gte=cutoff)[:limit]
+        logs = Log.objects.filter(created_at__gte=cutoff).select_related('session')[:limit]
 
         serializer = LogListSerializer(logs, many=True)
         return Response({
@@ -149,7 +216,7 @@ class LogViewSet(viewsets.ReadOnlyModelViewSet):
                 filters['ip_address'] = serializer.validated_data['ip_address']
 
             # Filtres de date
-            queryset = Log.objects.filter(**filters)
+            queryset = Log.objects.filter(**filters).select_related('session')
 
             if 'date_debut' in serializer.validated_data:
                 queryset = queryset.filter(created_at__gte=serializer.validated_data['date_debut'])
@@ -210,7 +277,7 @@ class LogViewSet(viewsets.ReadOnlyModelViewSet):
         logs = Log.objects.filter(
             action__in=['erreur', 'warning'],
             created_at__gte=cutoff
-        )
+        ).select_related('session')
 
         serializer = LogListSerializer(logs, many=True)
 
@@ -8,7 +8,41 @@ from datetime import timedelta
 from django.contrib import admin
 from django.utils import timezone
 from django.utils.html import format_html
-from .models import Poste
+from apps.core.http_cache import invalider
+from .models import CommandePoste, Poste, Site
+from .seat_board import refresh_seats
+from .services import validate_many, revoke_many
+
+
+@admin.register(Site)
+class SiteAdmin(admin.ModelAdmin):
+    """Administration des sites"""
+
+    list_display = ['nom', 'slug', 'adresse', 'created_at']
+    search_fields = ['nom', 'slug', 'adresse']
+    prepopulated_fields = {'slug': ('nom',)}
+    filter_horizontal = ['operateurs']
+
+
+@admin.register(CommandePoste)
+class CommandePosteAdmin(admin.ModelAdmin):
+    """Administration des commandes envoyées aux postes (lecture seule)"""
+
+    list_display = ['created_at', 'poste', 'type', 'statut', 'tentatives', 'expire_at', 'acquittee_at', 'operateur']
+    list_filter = ['statut', 'type', 'poste__site', 'created_at']
+    search_fields = ['poste__nom', 'operateur']
+    list_select_related = ['poste']
+    date_hierarchy = 'created_at'
+    readonly_fields = [
+        'id', 'poste', 'type', 'payload', 'statut', 'tentatives',
+        'expire_at', 'acquittee_at', 'operateur', 'created_at', 'updated_at'
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Poste)
@@ -17,6 +51,7 @@ class PosteAdmin(admin.ModelAdmin):
 
     list_display = [
         'nom',
+        'site',
         'type_poste_display',
         'ip_address',
         'mac_address',
@@ -29,6 +64,7 @@ class PosteAdmin(admin.ModelAdmin):
     ]
 
     list_filter = [
+        'site',
         'type_poste',
         'statut',
         ('discovered_at', admin.EmptyFieldListFilter),
@@ -66,7 +102,7 @@ class PosteAdmin(admin.ModelAdmin):
 
     fieldsets = (
         ('Identification', {
-            'fields': ('nom', 'type_poste', 'emplacement')
+            'fields': ('nom', 'site', 'type_poste', 'emplacement')
         }),
         ('Réseau', {
             'fields': (
@@ -188,27 +224,38 @@ class PosteAdmin(admin.ModelAdmin):
     @admin.action(description='Marquer comme disponible')
     def marquer_disponible(self, request, queryset):
         """Action pour marquer les postes comme disponibles"""
+        poste_ids = list(queryset.values_list('pk', flat=True))
         queryset.update(statut='disponible')
+        invalider('postes')
+        refresh_seats(poste_ids)
         self.message_user(request, f"{queryset.count()} poste(s) marqué(s) comme disponible(s)")
 
     @admin.action(description='Marquer en maintenance')
     def marquer_maintenance(self, request, queryset):
         """Action pour marquer les postes en maintenance"""
+        poste_ids = list(queryset.values_list('pk', flat=True))
         queryset.update(statut='maintenance')
+        invalider('postes')
+        refresh_seats(poste_ids)
         self.message_user(request, f"{queryset.count()} poste(s) marqué(s) en maintenance")
 
     @admin.action(description='Marquer hors ligne')
     def marquer_hors_ligne(self, request, queryset):
         """Action pour marquer les postes hors ligne"""
+        poste_ids = list(queryset.values_list('pk', flat=True))
         queryset.update(statut='hors_ligne')
+        invalider('postes')
+        refresh_seats(poste_ids)
         self.message_user(request, f"{queryset.count()} poste(s) marqué(s) hors ligne")
 
     @admin.action(description='Valider les postes découverts')
     def valider_postes_decouverts(self, request, queryset):
         """Action pour valider les postes en attente de validation"""
-        pending = queryset.filter(statut='en_attente_validation')
-        count = pending.count()
-        if count == 0:
+        poste_ids = queryset.filter(
+            statut='en_attente_validation'
+        ).values_list('pk', flat=True)
+        valides = validate_many(poste_ids, operateur=request.user.username)
+        if not valides:
             self.message_user(
                 request,
                 "Aucun poste en attente de validation sélectionné",
@@ -216,52 +263,50 @@ class PosteAdmin(admin.ModelAdmin):
             )
             return
 
-        for poste in pending:
-            poste.validate_discovery(request.user.username)
-
-        self.message_user(request, f"{count} poste(s) validé(s) avec succès")
+        self.message_user(request, f"{len(valides)} poste(s) validé(s) avec succès")
 
     @admin.action(description='Générer tokens d\'enregistrement')
     def generer_tokens_enregistrement(self, request, queryset):
         """Action pour générer des tokens d'enregistrement pour les postes validés"""
-        # Exclure les postes en attente et ceux déjà enregistrés
-        eligible = queryset.exclude(
+        now = timezone.now()
+        # Exclure les postes en attente, ceux déjà enregistrés
+        # et ceux qui ont encore un token valide
+        eligible = list(queryset.exclude(
             statut='en_attente_validation'
         ).filter(
             certificate_cn__isnull=True
-        )
-        count = 0
+        ).exclude(
+            registration_token__isnull=False,
+            registration_token_expires__gt=now
+        ).only('pk'))
 
         for poste in eligible:
-            # Ne pas régénérer si un token valide existe
-            if poste.has_pending_registration:
-                continue
-
-            # Générer un nouveau token
             poste.registration_token = secrets.token_urlsafe(32)
-            poste.registration_token_expires = timezone.now() + timedelta(hours=24)
-            poste.save(update_fields=['registration_token', 'registration_token_expires'])
-            count += 1
+            poste.registration_token_expires = now + timedelta(hours=24)
+        Poste.objects.bulk_update(
+            eligible, ['registration_token', 'registration_token_expires']
+        )
+        invalider('postes')
 
-        if count == 0:
+        if not eligible:
             self.message_user(
                 request,
                 "Aucun poste éligible (déjà enregistrés ou en attente de validation)",
                 level='warning'
             )
         else:
-            self.message_user(request, f"{count} token(s) d'enregistrement généré(s)")
+            self.message_user(request, f"{len(eligible)} token(s) d'enregistrement généré(s)")
 
     @admin.action(description='Révoquer les certificats')
     def revoquer_certificats(self, request, queryset):
         """Action pour révoquer les certificats des postes sélectionnés"""
-        registered = queryset.filter(
+        poste_ids = queryset.filter(
             certificate_cn__isnull=False,
             is_certificate_revoked=False
-        )
-        count = registered.count()
+        ).values_list('pk', flat=True)
+        revoques = revoke_many(poste_ids, operateur=request.user.username)
 
-        if count == 0:
+        if not revoques:
             self.message_user(
                 request,
                 "Aucun poste avec certificat actif sélectionné",
@@ -269,11 +314,8 @@ class PosteAdmin(admin.ModelAdmin):
             )
             return
 
-        for poste in registered:
-            poste.revoke_certificate()
-
         self.message_user(
             request,
-            f"{count} certificat(s) révoqué(s). Les clients devront se ré-enregistrer.",
+            f"{len(revoques)} certificat(s) révoqué(s). Les clients devront se ré-enregistrer.",
             level='success'
         )
@@ -5,3 +5,6 @@ class PostesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.postes'
     verbose_name = 'Postes'
+
+    def ready(self):
+        import apps.postes.signals  # noqa
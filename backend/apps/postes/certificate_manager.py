@@ -5,17 +5,25 @@ Ce module gère :
 - La création et la gestion de la CA (Certificate Authority) interne
 - La génération de certificats clients signés par la CA
 - La vérification des certificats clients
+
+La CA (certificat + clé déchiffrée) est gardée en mémoire après le premier
+chargement et rechargée si les fichiers changent. Les clés clients peuvent
+être RSA 2048 (défaut) ou ECDSA P-256 (bien plus rapides à générer), et
+pré-générées dans une réserve (CLIENT_CERT_KEY_POOL_SIZE) remplie par le
+worker Celery entre deux émissions.
 """
 
 import os
 import re
+import threading
+from collections import deque
 from datetime import datetime, timedelta, timezone as dt_timezone
 from pathlib import Path
 
 from cryptography import x509
 from cryptography.x509.oid import NameOID, ExtendedKeyUsageOID
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric import ec, rsa, padding
 from cryptography.hazmat.backends import default_backend
 
 from django.conf import settings
@@ -31,6 +39,10 @@ class CertificateManager:
         CA_KEY_PATH: Chemin vers la clé privée CA (ex: /etc/epn/ca/ca.key)
         CA_KEY_PASSWORD: Mot de passe de la clé CA (optionnel, None si non chiffré)
         CLIENT_CERT_VALIDITY_DAYS: Durée de validité des certificats clients (défaut: 365)
+        CLIENT_CERT_KEY_ALGORITHM: 'rsa' (défaut) ou 'ecdsa' (P-256)
+        CLIENT_CERT_KEY_POOL_SIZE: Nombre de clés clients pré-générées (0 = désactivé)
+        CA_CRL_PATH: Chemin de la CRL exportée pour le reverse proxy
+        CRL_VALIDITY_DAYS: Validité de la CRL (next_update), régénérée chaque jour
     """
 
     def __init__(self):
@@ -39,6 +51,18 @@ class CertificateManager:
         self.ca_key_password = getattr(settings, 'CA_KEY_PASSWORD', None)
         self.cert_validity_days = getattr(settings, 'CLIENT_CERT_VALIDITY_DAYS', 365)
         self.organization_name = getattr(settings, 'CA_ORGANIZATION_NAME', 'EPN')
+        self.key_algorithm = getattr(settings, 'CLIENT_CERT_KEY_ALGORITHM', 'rsa').lower()
+        self.key_pool_size = getattr(settings, 'CLIENT_CERT_KEY_POOL_SIZE', 0)
+        self.crl_path = Path(getattr(settings, 'CA_CRL_PATH', '/etc/epn/ca/crl.pem'))
+        self.crl_validity_days = getattr(settings, 'CRL_VALIDITY_DAYS', 7)
+
+        # CA en mémoire : (mtimes des fichiers, certificat, clé)
+        self._ca_cache = None
+        self._ca_lock = threading.Lock()
+
+        # Réserve de clés clients pré-générées
+        self._key_pool = deque()
+        self._key_pool_lock = threading.Lock()
 
     def ensure_ca_exists(self):
         """S'assure que la CA existe, la crée si nécessaire"""
@@ -136,6 +160,54 @@ class CertificateManager:
                 backend=default_backend()
             )
 
+    def _get_ca(self):
+        """
+        Retourne (ca_cert, ca_key) depuis le cache mémoire
+
+        La clé n'est lue et déchiffrée qu'une fois par processus ; le cache
+        est invalidé si les fichiers de la CA sont modifiés (rotation).
+        """
+        self.ensure_ca_exists()
+        mtimes = (self.ca_cert_path.stat().st_mtime_ns, self.ca_key_path.stat().st_mtime_ns)
+        with self._ca_lock:
+            if self._ca_cache is None or self._ca_cache[0] != mtimes:
+                self._ca_cache = (mtimes, self._load_ca_cert(), self._load_ca_key())
+            return self._ca_cache[1], self._ca_cache[2]
+
+    def _generate_client_key(self):
+        """Génère une clé client selon CLIENT_CERT_KEY_ALGORITHM"""
+        if self.key_algorithm == 'ecdsa':
+            return ec.generate_private_key(ec.SECP256R1(), default_backend())
+        return rsa.generate_private_key(
+            public_exponent=65537,
+            key_size=2048,
+            backend=default_backend()
+        )
+
+    def _take_client_key(self):
+        """Prend une clé dans la réserve, ou en génère une si elle est vide"""
+        with self._key_pool_lock:
+            if self._key_pool:
+                return self._key_pool.popleft()
+        return self._generate_client_key()
+
+    def fill_key_pool(self):
+        """
+        Complète la réserve de clés pré-générées jusqu'à CLIENT_CERT_KEY_POOL_SIZE
+
+        Returns:
+            Nombre de clés générées
+        """
+        added = 0
+        while True:
+            with self._key_pool_lock:
+                if len(self._key_pool) >= self.key_pool_size:
+                    return added
+            key = self._generate_client_key()
+            with self._key_pool_lock:
+                self._key_pool.append(key)
+            added += 1
+
     def generate_client_certificate(self, poste):
         """
         Génère un certificat client pour un poste.
@@ -146,17 +218,10 @@ class CertificateManager:
         Returns:
             dict avec: client_cert, client_key, ca_cert, cn, fingerprint, expires_at
         """
-        self.ensure_ca_exists()
+        ca_cert, ca_key = self._get_ca()
 
-        ca_cert = self._load_ca_cert()
-        ca_key = self._load_ca_key()
-
-        # Génère clé client RSA 2048 bits
-        client_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048,
-            backend=default_backend()
-        )
+        # Clé client (RSA 2048 ou ECDSA P-256), pré-générée si possible
+        client_key = self._take_client_key()
 
         # CN unique : format "poste-{id}-{nom_sanitized}"
         nom_sanitized = re.sub(r'[^a-zA-Z0-9]', '', poste.nom)[:20]
@@ -187,7 +252,8 @@ class CertificateManager:
             .add_extension(
                 x509.KeyUsage(
                     digital_signature=True,
-                    key_encipherment=True,
+                    # Le chiffrement de clé n'existe qu'en RSA
+                    key_encipherment=isinstance(client_key, rsa.RSAPrivateKey),
                     content_commitment=False,
                     data_encipherment=False,
                     key_agreement=False,
@@ -228,6 +294,7 @@ class CertificateManager:
             'ca_cert': ca_cert.public_bytes(serialization.Encoding.PEM).decode(),
             'cn': cn,
             'fingerprint': fingerprint,
+            'serial': format(client_cert.serial_number, 'x'),
             'expires_at': expires_at,
         }
 
@@ -242,13 +309,14 @@ class CertificateManager:
             tuple: (is_valid: bool, result: str)
                 - Si valide: (True, cn)
                 - Si invalide: (False, message_erreur)
-        """
-        from .models import Poste
 
-        self.ensure_ca_exists()
+        L'existence du poste et la correspondance avec son certificat courant
+        sont vérifiées par ClientCertAuthMiddleware lors du chargement du poste.
+        """
+        from .revocation import get_revocation_set
 
         try:
-            ca_cert = self._load_ca_cert()
+            ca_cert, _ = self._get_ca()
 
             # Charge le certificat client
             if isinstance(cert_pem, str):
@@ -284,31 +352,73 @@ class CertificateManager:
             if not match:
                 return False, f"Format CN invalide: {cn}"
 
-            poste_id = int(match.group(1))
-
-            # Vérifie que le poste existe et n'est pas révoqué
-            try:
-                poste = Poste.objects.get(id=poste_id)
-            except Poste.DoesNotExist:
-                return False, f"Poste {poste_id} introuvable"
-
-            if poste.is_certificate_revoked:
-                return False, "Certificat révoqué"
-
-            # Vérifie le fingerprint si enregistré
+            # Vérifie la liste de révocation (copie mémoire, sans requête en base)
             fingerprint = client_cert.fingerprint(hashes.SHA256()).hex()
-            if poste.certificate_fingerprint and poste.certificate_fingerprint != fingerprint:
-                return False, "Empreinte du certificat ne correspond pas"
+            serial = format(client_cert.serial_number, 'x')
+            if get_revocation_set().is_revoked(fingerprint, serial):
+                return False, "Certificat révoqué"
 
             return True, cn
 
         except Exception as e:
             return False, f"Erreur de vérification: {str(e)}"
 
+    @staticmethod
+    def certificate_fingerprint(cert_pem):
+        """Retourne l'empreinte SHA256 (hex) d'un certificat PEM"""
+        if isinstance(cert_pem, str):
+            cert_pem = cert_pem.encode()
+        client_cert = x509.load_pem_x509_certificate(cert_pem, default_backend())
+        return client_cert.fingerprint(hashes.SHA256()).hex()
+
+    def generate_crl(self, revoked):
+        """
+        Génère une CRL signée par la CA
+
+        Args:
+            revoked: Itérable de (numéro de série hexadécimal, date de révocation)
+
+        Returns:
+            CRL au format PEM (bytes)
+        """
+        ca_cert, ca_key = self._get_ca()
+        now = datetime.now(dt_timezone.utc)
+
+        builder = (
+            x509.CertificateRevocationListBuilder()
+            .issuer_name(ca_cert.subject)
+            .last_update(now)
+            .next_update(now + timedelta(days=self.crl_validity_days))
+        )
+        for serial, revoked_at in revoked:
+            builder = builder.add_revoked_certificate(
+                x509.RevokedCertificateBuilder()
+                .serial_number(int(serial, 16))
+                .revocation_date(revoked_at)
+                .build(default_backend())
+            )
+
+        crl = builder.sign(ca_key, hashes.SHA256(), default_backend())
+        return crl.public_bytes(serialization.Encoding.PEM)
+
+    def export_crl(self, revoked):
+        """
+        Écrit la CRL dans CA_CRL_PATH (remplacement atomique)
+
+        Returns:
+            CRL au format PEM (bytes)
+        """
+        crl_pem = self.generate_crl(revoked)
+        self.crl_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.crl_path.with_suffix('.tmp')
+        with open(tmp_path, "wb") as f:
+            f.write(crl_pem)
+        os.replace(tmp_path, self.crl_path)
+        return crl_pem
+
     def get_ca_certificate(self):
         """Retourne le certificat CA au format PEM"""
-        self.ensure_ca_exists()
-        ca_cert = self._load_ca_cert()
+        ca_cert, _ = self._get_ca()
         return ca_cert.public_bytes(serialization.Encoding.PEM).decode()
 
 
@@ -0,0 +1,16 @@
+"""
+URLs pour les commandes envoyées aux postes
+"""
+
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import CommandePosteViewSet
+
+router = DefaultRouter()
+router.register(r'', CommandePosteViewSet, basename='commande')
+
+app_name = 'commandes'
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
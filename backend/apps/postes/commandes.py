@@ -0,0 +1,236 @@
+"""
+Boîte d'envoi des commandes aux postes
+
+Une commande (verrouillage, message, déverrouillage du kiosque...) est
+d'abord persistée (CommandePoste), puis envoyée après le commit au worker
+qui tient la socket du poste (apps.core.presence), avec son identifiant :
+
+    {'type': 'remote_command', 'commande_id': '<uuid>', 'command': 'lock', ...}
+
+- Le kiosque répond {'type': 'command_ack', 'commande_id': '<uuid>'} ;
+  la commande passe 'acquittee' (un acquittement répété est sans effet).
+- Un kiosque déconnecté au moment de l'envoi reçoit ses commandes non
+  acquittées à sa reconnexion (ClientConsumer.connect), dans l'ordre
+  d'envoi. Un même identifiant pouvant donc arriver deux fois, le kiosque
+  ignore ceux qu'il a déjà traités.
+- Passé COMMANDES_TTL secondes, une commande non acquittée expire : elle
+  n'est plus renvoyée (un 'lock' de la veille n'a plus de sens).
+
+Diffusion à la flotte (diffuser) : une commande par poste ciblé est
+persistée (un INSERT), puis un seul message part au groupe 'flotte' (ou
+'flotte_<site>') que rejoint chaque ClientConsumer. Le consumer écarte la
+diffusion si son poste ne correspond pas au filtre et recalcule
+l'identifiant de sa commande (id_commande) : acquittement et renvoi à la
+reconnexion fonctionnent comme pour une commande unitaire.
+"""
+
+import datetime
+import functools
+import logging
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from apps.core.db import update_returning
+
+from .models import CommandePoste, Poste
+from .sites import groupes
+
+logger = logging.getLogger(__name__)
+
+
+def _ttl():
+    return getattr(settings, 'COMMANDES_TTL', 300)
+
+
+def contenu(command, payload, operateur):
+    """
+    Type et champs du message d'une commande
+
+    Returns:
+        (type, payload) : 'unlock_kiosk' pour le déverrouillage du kiosque,
+        'remote_command' pour les autres commandes
+    """
+    if command == 'unlock_kiosk':
+        return 'unlock_kiosk', {'admin': operateur, 'message': f'Mode kiosque désactivé par {operateur}'}
+    return 'remote_command', {'command': command, 'payload': payload}
+
+
+def envoyer(poste_ids, type_commande, payload, operateur, ttl=None):
+    """
+    Persiste une commande par poste et l'envoie après le commit
+
+    Args:
+        poste_ids: Postes destinataires
+        type_commande: 'remote_command' ou 'unlock_kiosk'
+        payload: Champs du message (ex: {'command': 'lock'})
+        ttl: Durée de validité en secondes (défaut: COMMANDES_TTL)
+
+    Returns:
+        Liste des CommandePoste créées (une requête INSERT pour le lot)
+    """
+    now = timezone.now()
+    expire_at = now + datetime.timedelta(seconds=ttl or _ttl())
+    commandes = CommandePoste.objects.bulk_create([
+        CommandePoste(
+            poste_id=poste_id,
+            type=type_commande,
+            payload=payload or {},
+            tentatives=1,
+            expire_at=expire_at,
+            operateur=operateur,
+        )
+        for poste_id in dict.fromkeys(poste_ids)
+    ])
+    transaction.on_commit(functools.partial(_livrer, commandes), robust=True)
+    return commandes
+
+
+def id_commande(diffusion, poste_id):
+    """Identifiant de la commande d'un poste dans une diffusion (sans requête)"""
+    return uuid.uuid5(uuid.UUID(str(diffusion)), str(poste_id))
+
+
+def diffuser(type_commande, payload, operateur, sites=None, type_poste=None, ttl=None):
+    """
+    Envoie une commande à toute la flotte, à des sites ou à un type de poste
+
+    Args:
+        sites: IDs des sites ciblés (None : tous)
+        type_poste: Restreint aux postes de ce type
+
+    Returns:
+        (diffusion, poste_ids) : identifiant de la diffusion et postes ciblés
+    """
+    postes = Poste.objects.all()
+    if sites is not None:
+        postes = postes.filter(site__in=sites)
+    if type_poste:
+        postes = postes.filter(type_poste=type_poste)
+    poste_ids = list(postes.order_by('pk').values_list('pk', flat=True))
+
+    diffusion = uuid.uuid4()
+    now = timezone.now()
+    expire_at = now + datetime.timedelta(seconds=ttl or _ttl())
+    CommandePoste.objects.bulk_create([
+        CommandePoste(
+            id=id_commande(diffusion, poste_id),
+            poste_id=poste_id,
+            type=type_commande,
+            payload=payload or {},
+            tentatives=1,
+            expire_at=expire_at,
+            operateur=operateur,
+            diffusion=diffusion,
+        )
+        for poste_id in poste_ids
+    ])
+
+    if poste_ids:
+        message = {
+            'type': 'diffusion',
+            'diffusion_id': str(diffusion),
+            'commande': {**(payload or {}), 'type': type_commande},
+            'type_poste': type_poste or None,
+        }
+        transaction.on_commit(
+            functools.partial(_diffuser, [(groupe, message) for groupe in groupes('flotte', sites)]),
+            robust=True
+        )
+    return diffusion, poste_ids
+
+
+def _diffuser(messages):
+    from apps.sessions.websocket_utils import send_many
+    send_many(messages)
+
+
+def resume_diffusion(diffusion, commandes=None):
+    """
+    Acquittements d'une diffusion (une requête)
+
+    Args:
+        commandes: Commandes visibles (défaut: toutes)
+
+    Returns:
+        {'total': n, 'envoyee': n, 'acquittee': n, 'expiree': n}
+    """
+    if commandes is None:
+        commandes = CommandePoste.objects.all()
+    resume = dict.fromkeys((statut for statut, _ in CommandePoste.STATUT_CHOICES), 0)
+    for ligne in commandes.filter(diffusion=diffusion).values('statut').annotate(n=Count('pk')).order_by():
+        resume[ligne['statut']] = ligne['n']
+    return {'total': sum(resume.values()), **resume}
+
+
+def _livrer(commandes):
+    """Envoie chaque commande au canal du poste (groupe poste_<id> à défaut)"""
+    from apps.core import presence
+
+    for commande in commandes:
+        try:
+            presence.envoyer_au_poste(commande.poste_id, commande.message())
+        except Exception as e:
+            # Renvoyée à la reconnexion du poste
+            logger.warning(f"Commande {commande.pk} non envoyée au poste {commande.poste_id}: {e}")
+
+
+def acquitter(poste_id, commande_id):
+    """
+    Enregistre l'acquittement d'une commande par son poste
+
+    Returns:
+        True si la commande vient d'être acquittée, False si elle était
+        inconnue, d'un autre poste, déjà acquittée ou expirée
+    """
+    try:
+        commande_id = uuid.UUID(str(commande_id))
+    except ValueError:
+        # Identifiant mal formé envoyé par le client
+        return False
+
+    now = timezone.now()
+    return bool(update_returning(
+        CommandePoste.objects.filter(
+            pk=commande_id, poste_id=poste_id, statut__in=CommandePoste.STATUTS_EN_SUSPENS
+        ),
+        (),
+        statut='acquittee',
+        acquittee_at=now,
+        updated_at=now,
+    ))
+
+
+def en_suspens(poste_id):
+    """
+    Messages des commandes non acquittées et non expirées d'un poste
+
+    Appelé à la reconnexion : le compteur d'envois est incrémenté.
+    """
+    now = timezone.now()
+    commandes = list(
+        CommandePoste.objects.filter(
+            poste_id=poste_id, statut__in=CommandePoste.STATUTS_EN_SUSPENS, expire_at__gt=now
+        ).order_by('created_at')
+    )
+    if commandes:
+        CommandePoste.objects.filter(pk__in=[commande.pk for commande in commandes]).update(
+            tentatives=F('tentatives') + 1, updated_at=now
+        )
+    return [commande.message() for commande in commandes]
+
+
+def expirer(now=None):
+    """
+    Marque expirées les commandes non acquittées dont le TTL est passé
+
+    Returns:
+        Nombre de commandes expirées
+    """
+    now = now or timezone.now()
+    return CommandePoste.objects.filter(
+        statut__in=CommandePoste.STATUTS_EN_SUSPENS, expire_at__lte=now
+    ).update(statut='expiree', updated_at=now)
@@ -6,12 +6,21 @@ via leur certificat TLS client.
 """
 
 import json
+import logging
+
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
+from django.conf import settings
 from django.utils import timezone
+from apps.core import presence
+from apps.core.async_db import db_sync_to_async
+from apps.core.backpressure import BackpressureConsumerMixin
+from apps.core.instrumentation import InstrumentedConsumerMixin
+from apps.core.ratelimit import acheck_rate_limit
+
+logger = logging.getLogger(__name__)
 
 
-class ClientConsumer(AsyncWebsocketConsumer):
+class ClientConsumer(BackpressureConsumerMixin, InstrumentedConsumerMixin, AsyncWebsocketConsumer):
     """
     Consumer WebSocket pour les clients (postes) authentifiés par certificat.
 
@@ -20,19 +29,34 @@ class ClientConsumer(AsyncWebsocketConsumer):
 
     Messages du client → serveur :
     - heartbeat: Signal que le client est actif
-    - validate_code: Valider un code d'accès session
+    - validate_code: Valider un code d'accès session (resume_from : dernier
+      'seq' reçu, pour rejouer les événements manqués à la reconnexion)
+    - resume: Rejouer les événements de la session après resume_from
     - start_session: Démarrer une session
     - get_time: Obtenir le temps restant
     - end_session: Terminer une session (par le client)
+    - command_ack: Acquitter une commande (commande_id)
 
     Messages du serveur → client :
     - connection_established: Connexion acceptée
     - code_valid / code_invalid: Résultat validation code
+    - rate_limited: Trop de tentatives de validation
     - session_started: Session démarrée
     - time_update: Mise à jour du temps
     - session_terminated: Session terminée
+    - certificate_revoked: Certificat révoqué (connexion fermée)
     - warning: Avertissement temps
+    - time_added, warning, extension_response, session_terminated portent
+      un 'seq' par session (apps.sessions.evenements) ; replay_complete clôt
+      un rejeu (complet=False : resynchroniser avec get_time)
+    - remote_command / unlock_kiosk: Commande (commande_id à acquitter ;
+      les commandes non acquittées sont renvoyées à la reconnexion), reçue
+      seule ou par diffusion à la flotte (groupes 'flotte' et 'flotte_<site>')
     - error: Erreur
+
+    L'état de la connexion (poste, session en cours, canal) est publié dans
+    le registre de présence partagé (apps.core.presence) : n'importe quel
+    worker peut joindre la socket, quel que soit celui qui la tient.
     """
 
     async def connect(self):
@@ -80,10 +104,15 @@ class ClientConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
 
+        # Diffusions à toute la flotte ou au site du poste
+        for groupe in self._groupes_flotte():
+            await self.channel_layer.group_add(groupe, self.channel_name)
+
         # Mettre à jour la dernière connexion
         await self._update_poste_connection()
 
         await self.accept()
+        await presence.aenregistrer(poste.id, self.channel_name)
         await self.send(text_data=json.dumps({
             'type': 'connection_established',
             'message': 'Connecté avec certificat valide',
@@ -93,8 +122,15 @@ class ClientConsumer(AsyncWebsocketConsumer):
             'poste_cn': self.poste_cn
         }))
 
+        # Commandes envoyées pendant la déconnexion (non acquittées)
+        for message in await self._commandes_en_suspens():
+            await self.dispatch(message)
+
     async def disconnect(self, close_code):
         """Déconnexion"""
+        if getattr(self, 'poste', None):
+            await presence.aliberer(self.poste.id, self.channel_name)
+
         if hasattr(self, 'poste_group_name'):
             await self.channel_layer.group_discard(
                 self.poste_group_name,
@@ -107,6 +143,18 @@ class ClientConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
 
+        if getattr(self, 'poste', None):
+            for groupe in self._groupes_flotte():
+                await self.channel_layer.group_discard(groupe, self.channel_name)
+
+    def _groupes_flotte(self):
+        """Groupes de diffusion du poste : la flotte et son site"""
+        from .sites import groupe_site
+
+        if self.poste.site_id is None:
+            return ['flotte']
+        return ['flotte', groupe_site('flotte', self.poste.site_id)]
+
     async def receive(self, text_data):
         """Réception d'un message du client"""
         try:
@@ -128,6 +176,12 @@ class ClientConsumer(AsyncWebsocketConsumer):
             elif message_type == 'end_session':
                 await self.handle_end_session(data)
 
+            elif message_type == 'command_ack':
+                await self.handle_command_ack(data)
+
+            elif message_type == 'resume':
+                await self.handle_resume(data)
+
             else:
                 await self.send_error(f"Type de message inconnu: {message_type}")
 
@@ -137,9 +191,16 @@ class ClientConsumer(AsyncWebsocketConsumer):
             await self.send_error(f"Erreur: {str(e)}")
 
     async def handle_heartbeat(self, data):
-        """Heartbeat du client"""
+        """
+        Heartbeat du client
+
+        Renouvelle le bail de présence et les appartenances aux groupes
+        (group_add est idempotent) : elles expirent d'elles-mêmes
+        (CHANNEL_GROUP_EXPIRY) si le worker qui tient la socket meurt.
+        """
         if self.poste:
             await self._update_poste_connection()
+            await self._renouveler_presence()
 
         await self.send(text_data=json.dumps({
             'type': 'heartbeat_ack',
@@ -155,6 +216,16 @@ class ClientConsumer(AsyncWebsocketConsumer):
             await self.send_error("Code d'accès requis")
             return
 
+        # Même limite que l'API REST (partagée entre tous les workers)
+        result = await acheck_rate_limit('validate_code', self._rate_limit_ident())
+        if not result.allowed:
+            await self.send(text_data=json.dumps({
+                'type': 'rate_limited',
+                'message': 'Trop de tentatives, réessayez plus tard',
+                'retry_after': max(int(result.retry_after + 0.999), 1)
+            }))
+            return
+
         # En mode dev sans auth, identifier le poste via MAC
         if not self.poste and mac_address:
             await self._identify_poste_by_mac(mac_address)
@@ -170,18 +241,42 @@ class ClientConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
             self.current_session_id = session_data["id"]
+            self.dernier_seq = 0
+            self.seq_envoyes = set()
+            if self.poste:
+                await presence.aenregistrer(self.poste.id, self.channel_name, self.current_session_id)
 
             await self.send(text_data=json.dumps({
                 'type': 'code_valid',
                 'session': session_data,
                 'is_reconnection': session_data.get('is_reconnection', False)
             }))
+
+            if data.get('resume_from') is not None:
+                await self.handle_resume(data)
         else:
             await self.send(text_data=json.dumps({
                 'type': 'code_invalid',
                 'message': 'Code invalide ou session déjà utilisée'
             }))
 
+    async def _renouveler_presence(self):
+        session_id = getattr(self, 'current_session_id', None)
+        if not await presence.arenouveler(self.poste.id, self.channel_name, session_id):
+            # Une connexion plus récente du poste (autre worker) tient le bail
+            logger.info(f"Poste {self.poste.id} : connexion {self.channel_name} remplacée")
+            return
+        for groupe in (f'poste_{self.poste.id}', getattr(self, 'session_group_name', None), *self._groupes_flotte()):
+            if groupe:
+                await self.channel_layer.group_add(groupe, self.channel_name)
+
+    def _rate_limit_ident(self):
+        """Identifiant limité : le poste authentifié, sinon l'IP du client"""
+        if self.poste:
+            return f'poste-{self.poste.id}'
+        client = self.scope.get('client') or ('inconnu',)
+        return client[0]
+
     async def handle_start_session(self, data):
         """Démarre une session"""
         session_id = data.get('session_id') or getattr(self, 'current_session_id', None)
@@ -239,6 +334,81 @@ class ClientConsumer(AsyncWebsocketConsumer):
         else:
             await self.send_error(result['error'])
 
+    async def handle_resume(self, data):
+        """
+        Rejoue les événements de la session postérieurs à resume_from
+
+        Les événements arrivés pendant le rejeu sont traités après lui ;
+        ceux déjà rejoués sont écartés (_evenement_nouveau).
+        """
+        from apps.sessions.evenements import adepuis
+
+        session_id = getattr(self, 'current_session_id', None)
+        try:
+            resume_from = int(data.get('resume_from'))
+        except (TypeError, ValueError):
+            await self.send_error("resume_from (entier) requis")
+            return
+        if not session_id:
+            await self.send_error("Aucune session en cours")
+            return
+
+        evenements, complet = await adepuis(session_id, resume_from)
+        self.dernier_seq = resume_from if complet else 0
+        self.seq_envoyes = {seq for seq in getattr(self, 'seq_envoyes', ()) if seq > self.dernier_seq}
+        for evenement in evenements:
+            await self.dispatch(evenement)
+
+        await self.send(text_data=json.dumps({
+            'type': 'replay_complete',
+            'seq': self.dernier_seq,
+            'rejoues': len(evenements),
+            'complet': complet
+        }))
+
+    def _evenement_nouveau(self, event):
+        """
+        Faux si l'événement numéroté a déjà été envoyé au kiosque
+
+        Les numéros sont attribués avant l'envoi : deux workers peuvent
+        livrer seq 5 avant seq 4. dernier_seq est donc le plus grand numéro
+        en deçà duquel tout a été envoyé, et seq_envoyes les numéros envoyés
+        au-delà ; cette fenêtre est bornée par la taille du journal
+        (SESSION_EVENTS_MAXLEN), au-delà de laquelle rien n'est rejouable.
+        """
+        seq = event.get('seq')
+        if seq is None:
+            return True
+        envoyes = getattr(self, 'seq_envoyes', None)
+        if envoyes is None:
+            envoyes = self.seq_envoyes = set()
+        dernier = getattr(self, 'dernier_seq', 0)
+        if seq <= dernier or seq in envoyes:
+            return False
+
+        envoyes.add(seq)
+        while dernier + 1 in envoyes:
+            dernier += 1
+            envoyes.remove(dernier)
+        fenetre = getattr(settings, 'SESSION_EVENTS_MAXLEN', 50)
+        while len(envoyes) > fenetre:
+            # Trou trop ancien : l'événement manquant est abandonné
+            dernier = min(envoyes)
+            envoyes.remove(dernier)
+            while dernier + 1 in envoyes:
+                dernier += 1
+                envoyes.remove(dernier)
+        self.dernier_seq = dernier
+        return True
+
+    async def handle_command_ack(self, data):
+        """Acquittement d'une commande par le kiosque"""
+        commande_id = data.get('commande_id')
+        if not commande_id or not self.poste:
+            await self.send_error("ID de commande requis")
+            return
+        await self._acquitter_commande(commande_id)
+
     # Handlers pour les messages de groupe (notifications serveur)
 
     async def time_update(self, event):
@@ -253,8 +423,11 @@ class ClientConsumer(AsyncWebsocketConsumer):
 
     async def time_added(self, event):
         """Notification temps ajouté"""
+        if not self._evenement_nouveau(event):
+            return
         await self.send(text_data=json.dumps({
             'type': 'time_added',
+            'seq': event.get('seq'),
             'secondes_ajoutees': event['secondes'],
             'temps_restant': event['temps_restant'],
             'operateur': event.get('operateur')
@@ -262,16 +435,22 @@ class ClientConsumer(AsyncWebsocketConsumer):
 
     async def session_terminated(self, event):
         """Notification session terminée"""
+        if not self._evenement_nouveau(event):
+            return
         await self.send(text_data=json.dumps({
             'type': 'session_terminated',
+            'seq': event.get('seq'),
             'raison': event.get('raison', 'fermeture_normale'),
             'message': event.get('message', 'Session terminée')
         }))
 
     async def session_warning(self, event):
         """Avertissement"""
+        if not self._evenement_nouveau(event):
+            return
         await self.send(text_data=json.dumps({
             'type': 'warning',
+            'seq': event.get('seq'),
             'level': event.get('level', 'info'),
             'message': event['message'],
             'temps_restant': event.get('temps_restant')
@@ -289,10 +468,39 @@ class ClientConsumer(AsyncWebsocketConsumer):
         """
         await self.send(text_data=json.dumps({
             'type': 'remote_command',
+            'commande_id': event.get('commande_id'),
             'command': event['command'],
             'payload': event.get('payload')
         }))
 
+    async def diffusion(self, event):
+        """
+        Commande diffusée à la flotte (apps.postes.commandes.diffuser)
+
+        Écartée si le poste n'est pas du type ciblé ; sinon envoyée comme
+        une commande unitaire, avec l'identifiant de la commande du poste.
+        """
+        from .commandes import id_commande
+
+        type_poste = event.get('type_poste')
+        if type_poste and self.poste.type_poste != type_poste:
+            return
+        await self.dispatch({
+            **event['commande'],
+            'commande_id': str(id_commande(event['diffusion_id'], self.poste.id)),
+        })
+
+    async def certificate_revoked(self, event):
+        """
+        Le certificat du poste vient d'être révoqué : on prévient le client
+        puis on ferme la connexion (il devra se ré-enregistrer).
+        """
+        await self.send(text_data=json.dumps({
+            'type': 'certificate_revoked',
+            'message': 'Certificat révoqué, ré-enregistrement nécessaire'
+        }))
+        await self.close(code=4403)
+
     async def extension_response(self, event):
         """
         Envoie la réponse à une demande de prolongation au client.
@@ -303,8 +511,11 @@ class ClientConsumer(AsyncWebsocketConsumer):
         - new_remaining: Nouveau temps restant (si approved)
         - message: Message de l'admin
         """
+        if not self._evenement_nouveau(event):
+            return
         await self.send(text_data=json.dumps({
             'type': 'extension_response',
+            'seq': event.get('seq'),
             'approved': event['approved'],
             'minutes': event.get('minutes', 0),
             'new_remaining': event.get('new_remaining'),
@@ -323,6 +534,7 @@ class ClientConsumer(AsyncWebsocketConsumer):
         """
         await self.send(text_data=json.dumps({
             'type': 'unlock_kiosk',
+            'commande_id': event.get('commande_id'),
             'admin': event.get('admin', 'Administrateur'),
             'message': event.get('message', 'Mode kiosque désactivé par un administrateur')
         }))
@@ -336,13 +548,24 @@ class ClientConsumer(AsyncWebsocketConsumer):
             'message': message
         }))
 
-    @database_sync_to_async
+    @db_sync_to_async
     def _update_poste_connection(self):
         """Met à jour la dernière connexion du poste"""
         if self.poste:
             self.poste.mettre_a_jour_connexion()
 
-    @database_sync_to_async
+    @db_sync_to_async
+    def _commandes_en_suspens(self):
+        """Commandes du poste non acquittées (renvoyées à la connexion)"""
+        from .commandes import en_suspens
+        return en_suspens(self.poste.id)
+
+    @db_sync_to_async
+    def _acquitter_commande(self, commande_id):
+        from .commandes import acquitter
+        return acquitter(self.poste.id, commande_id)
+
+    @db_sync_to_async
     def _identify_poste_by_mac(self, mac_address):
         """
         Identifie un poste par son adresse MAC.
@@ -361,7 +584,7 @@ class ClientConsumer(AsyncWebsocketConsumer):
         except Poste.DoesNotExist:
             pass  # Poste non trouvé, self.poste reste None
 
-    @database_sync_to_async
+    @db_sync_to_async
     def _validate_session_code(self, code, mac_address=None):
         """
         Valide un code d'accès.
@@ -374,7 +597,7 @@ class ClientConsumer(AsyncWebsocketConsumer):
 
         try:
             code = code.upper().strip()
-            session = Session.objects.get(code_acces=code)
+            session = Session.objects.select_related('poste', 'utilisateur').get(code_acces=code)
 
             is_reconnection = False
 
@@ -420,7 +643,7 @@ class ClientConsumer(AsyncWebsocketConsumer):
         except Session.DoesNotExist:
             return None
 
-    @database_sync_to_async
+    @db_sync_to_async
     def _start_session(self, session_id):
         """
         Démarre une session ou gère la reconnexion.
@@ -443,8 +666,22 @@ class ClientConsumer(AsyncWebsocketConsumer):
             reconnected = False
 
             if session.statut == 'en_attente':
-                # Nouveau démarrage
-                session.demarrer()
+                # Nouveau démarrage ; un poste réservé n'accepte que la session
+                # qui lui a été attribuée. Si un démarrage concurrent a gagné,
+                # c'est une reconnexion
+                if not session.demarrer(exiger_poste_disponible=True):
+                    session.refresh_from_db()
+                    reconnected = session.statut == 'active'
+                    if session.statut == 'en_attente':
+                        return {
+                            'success': False,
+                            'error': f"Le poste {session.poste.nom} est réservé ou indisponible"
+                        }
+                    if not reconnected:
+                        return {
+                            'success': False,
+                            'error': f"Session ne peut pas être démarrée (statut: {session.get_statut_display()})"
+                        }
             elif session.statut == 'active':
                 # Reconnexion - pas besoin de redémarrer
                 reconnected = True
@@ -471,7 +708,7 @@ class ClientConsumer(AsyncWebsocketConsumer):
                 'error': 'Session introuvable'
             }
 
-    @database_sync_to_async
+    @db_sync_to_async
     def _get_session_time(self, session_id):
         """Récupère le temps restant"""
         from apps.sessions.models import Session
@@ -492,7 +729,7 @@ class ClientConsumer(AsyncWebsocketConsumer):
         except Session.DoesNotExist:
             return None
 
-    @database_sync_to_async
+    @db_sync_to_async
     def _end_session(self, session_id, raison):
         """Termine une session"""
         from apps.sessions.models import Session
@@ -500,14 +737,15 @@ class ClientConsumer(AsyncWebsocketConsumer):
         try:
             session = Session.objects.get(id=session_id)
 
-            if session.statut not in ['active', 'suspendue']:
+            if session.statut not in ['active', 'suspendue'] or not session.terminer(
+                operateur='client', raison=raison
+            ):
+                session.refresh_from_db(fields=['statut'])
                 return {
                     'success': False,
                     'error': f"Session ne peut pas être terminée (statut: {session.get_statut_display()})"
                 }
 
-            session.terminer(raison=raison)
-
             return {'success': True}
         except Session.DoesNotExist:
             return {
@@ -0,0 +1,18 @@
+"""
+Commande Django pour reconstruire le tableau des places
+Utile après une modification en masse hors ORM (SQL direct, restauration)
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.postes.seat_board import refresh_seats
+
+
+class Command(BaseCommand):
+    """Recalcule toutes les places du tableau depuis les postes et sessions"""
+
+    help = "Reconstruit le tableau des places (seat board)"
+
+    def handle(self, *args, **options):
+        entries = refresh_seats()
+        self.stdout.write(self.style.SUCCESS(f'{len(entries)} place(s) recalculée(s)'))
@@ -84,17 +84,20 @@ class ClientCertAuthMiddleware:
             cert_pem = scope.get("client_cert")
 
             if cert_pem:
-                # Vérifier le certificat
-                from apps.postes.certificate_manager import get_certificate_manager
-                cert_manager = get_certificate_manager()
-                is_valid, result = cert_manager.verify_client_certificate(cert_pem)
+                # Vérifier le certificat (signature, validité, liste de révocation en mémoire)
+                is_valid, result = await self._verify(cert_pem)
 
                 if is_valid:
                     # result contient le CN, on récupère le poste
-                    poste = await self._get_poste_from_cn(result)
-                    scope["poste"] = poste
-                    scope["poste_cn"] = result
-                    scope["cert_valid"] = True
+                    poste = await self._get_poste_from_cn(result, cert_pem)
+                    if poste is not None:
+                        scope["poste"] = poste
+                        scope["poste_cn"] = result
+                        scope["cert_valid"] = True
+                    else:
+                        scope["poste"] = None
+                        scope["cert_valid"] = False
+                        scope["cert_error"] = "Poste introuvable, certificat remplacé ou révoqué"
                 else:
                     scope["poste"] = None
                     scope["cert_valid"] = False
@@ -106,16 +109,35 @@ class ClientCertAuthMiddleware:
         return await self.app(scope, receive, send)
 
     @database_sync_to_async
-    def _get_poste_from_cn(self, cn):
-        """Récupère le poste depuis le CN du certificat"""
+    def _verify(self, cert_pem):
+        """Vérifie le certificat hors de la boucle d'événements"""
+        from apps.postes.certificate_manager import get_certificate_manager
+        return get_certificate_manager().verify_client_certificate(cert_pem)
+
+    @database_sync_to_async
+    def _get_poste_from_cn(self, cn, cert_pem):
+        """
+        Récupère le poste depuis le CN du certificat
+
+        Le certificat doit être le certificat courant du poste (un certificat
+        remplacé par un ré-enregistrement est refusé) et ne pas être marqué
+        révoqué sur le poste, même s'il manque au jeu de révocation.
+        """
         import re
+        from apps.postes.certificate_manager import get_certificate_manager
         from apps.postes.models import Poste
 
         match = re.match(r'^poste-(\d+)-', cn)
         if match:
             poste_id = int(match.group(1))
             try:
-                return Poste.objects.get(id=poste_id)
+                poste = Poste.objects.get(id=poste_id)
             except Poste.DoesNotExist:
                 return None
+            fingerprint = get_certificate_manager().certificate_fingerprint(cert_pem)
+            if poste.certificate_fingerprint and poste.certificate_fingerprint != fingerprint:
+                return None
+            if poste.is_certificate_revoked:
+                return None
+            return poste
         return None
@@ -0,0 +1,98 @@
+# Generated manually
+
+import time
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def remplir_seat_board(apps, schema_editor):
+    """Construit le tableau des places à partir des postes et sessions existants"""
+    Poste = apps.get_model('postes', 'Poste')
+    Session = apps.get_model('poste_sessions', 'Session')
+    SeatBoardEntry = apps.get_model('postes', 'SeatBoardEntry')
+
+    occupants = {}
+    sessions = Session.objects.filter(
+        statut__in=['active', 'suspendue']
+    ).select_related('utilisateur').order_by('debut_session')
+    for session in sessions:
+        occupants[session.poste_id] = session
+
+    version = time.time_ns() // 1000
+    entries = []
+    for poste in Poste.objects.exclude(statut='en_attente_validation'):
+        session = occupants.get(poste.pk)
+        utilisateur = session.utilisateur if session else None
+        if utilisateur is None:
+            nom_utilisateur = None
+        elif utilisateur.is_guest:
+            nom_utilisateur = utilisateur.nom
+        else:
+            nom_utilisateur = f"{utilisateur.prenom} {utilisateur.nom}"
+        entries.append(SeatBoardEntry(
+            poste_id=poste.pk,
+            nom=poste.nom,
+            type_poste=poste.type_poste,
+            emplacement=poste.emplacement,
+            statut=poste.statut,
+            derniere_connexion=poste.derniere_connexion,
+            session_id=session.pk if session else None,
+            session_code=session.code_acces if session else None,
+            session_statut=session.statut if session else None,
+            utilisateur_nom=nom_utilisateur,
+            is_guest=utilisateur.is_guest if utilisateur else False,
+            temps_restant=session.temps_restant if session else None,
+            debut_session=session.debut_session if session else None,
+            version=version,
+        ))
+    SeatBoardEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postes', '0004_add_type_poste_field'),
+        ('poste_sessions', '0002_extensionrequest'),
+        ('utilisateurs', '0002_add_is_guest_field'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatBoardEntry',
+            fields=[
+                ('poste', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    primary_key=True,
+                    related_name='seat',
+                    serialize=False,
+                    to='postes.poste',
+                    verbose_name='Poste'
+                )),
+                ('nom', models.CharField(max_length=50, verbose_name='Nom du poste')),
+                ('type_poste', models.CharField(max_length=20, verbose_name='Type de poste')),
+                ('emplacement', models.CharField(blank=True, max_length=100, null=True, verbose_name='Emplacement physique')),
+                ('statut', models.CharField(max_length=25, verbose_name='Statut du poste')),
+                ('derniere_connexion', models.DateTimeField(blank=True, null=True, verbose_name='Dernière connexion')),
+                ('session_id', models.BigIntegerField(blank=True, null=True, verbose_name='Session')),
+                ('session_code', models.CharField(blank=True, max_length=10, null=True, verbose_name="Code d'accès")),
+                ('session_statut', models.CharField(blank=True, max_length=20, null=True, verbose_name='Statut session')),
+                ('utilisateur_nom', models.CharField(blank=True, max_length=201, null=True, verbose_name='Utilisateur')),
+                ('is_guest', models.BooleanField(default=False, verbose_name='Invité')),
+                ('temps_restant', models.IntegerField(blank=True, null=True, verbose_name='Temps restant')),
+                ('debut_session', models.DateTimeField(blank=True, null=True, verbose_name='Début de session')),
+                ('version', models.BigIntegerField(default=0, verbose_name='Version')),
+            ],
+            options={
+                'verbose_name': 'Place (tableau)',
+                'verbose_name_plural': 'Tableau des places',
+                'db_table': 'seat_board',
+                'ordering': ['nom'],
+                'indexes': [
+                    models.Index(fields=['emplacement', 'nom'], name='seat_board_emplace_9bc3b7_idx'),
+                    models.Index(fields=['session_id'], name='seat_board_session_208e32_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(remplir_seat_board, migrations.RunPython.noop),
+    ]
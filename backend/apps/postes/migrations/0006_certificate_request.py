@@ -0,0 +1,60 @@
+# Generated manually
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postes', '0005_seat_board'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateRequest',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('statut', models.CharField(
+                    choices=[
+                        ('pending', 'En cours'),
+                        ('issued', 'Délivré'),
+                        ('collected', 'Récupéré'),
+                        ('failed', 'Échec'),
+                    ],
+                    default='pending',
+                    max_length=20,
+                    verbose_name='Statut'
+                )),
+                ('hostname', models.CharField(blank=True, max_length=255, null=True, verbose_name='Hostname')),
+                ('mac_address', models.CharField(blank=True, max_length=17, null=True, verbose_name='Adresse MAC')),
+                ('client_cert', models.TextField(blank=True, null=True, verbose_name='Certificat client')),
+                ('client_key', models.TextField(blank=True, null=True, verbose_name='Clé privée client')),
+                ('ca_cert', models.TextField(blank=True, null=True, verbose_name='Certificat CA')),
+                ('certificate_cn', models.CharField(blank=True, max_length=100, null=True, verbose_name='CN du certificat')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Expiration du certificat')),
+                ('error', models.CharField(blank=True, max_length=255, null=True, verbose_name='Erreur')),
+                ('issued_at', models.DateTimeField(blank=True, null=True, verbose_name='Délivré le')),
+                ('poste', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='certificate_requests',
+                    to='postes.poste',
+                    verbose_name='Poste'
+                )),
+            ],
+            options={
+                'verbose_name': 'Demande de certificat',
+                'verbose_name_plural': 'Demandes de certificat',
+                'db_table': 'certificate_requests',
+                'ordering': ['-created_at'],
+                'indexes': [
+                    models.Index(fields=['poste', 'statut'], name='certificate_poste_i_b5c8f0_idx'),
+                    models.Index(fields=['created_at'], name='certificate_created_f167e0_idx'),
+                ],
+            },
+        ),
+    ]
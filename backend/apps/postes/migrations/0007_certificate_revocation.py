@@ -0,0 +1,81 @@
+# Generated manually
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def remplir_revocations(apps, schema_editor):
+    """Reprend les certificats déjà révoqués dans la liste de révocation"""
+    Poste = apps.get_model('postes', 'Poste')
+    RevokedCertificate = apps.get_model('postes', 'RevokedCertificate')
+
+    postes = Poste.objects.filter(
+        is_certificate_revoked=True,
+        certificate_fingerprint__isnull=False
+    )
+    RevokedCertificate.objects.bulk_create([
+        RevokedCertificate(
+            fingerprint=poste.certificate_fingerprint,
+            certificate_cn=poste.certificate_cn,
+            poste_id=poste.pk,
+            raison='revoked',
+        )
+        for poste in postes
+    ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postes', '0006_certificate_request'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poste',
+            name='certificate_serial',
+            field=models.CharField(
+                blank=True,
+                help_text='Numéro de série (hexadécimal), utilisé dans la CRL',
+                max_length=40,
+                null=True,
+                verbose_name='Numéro de série certificat'
+            ),
+        ),
+        migrations.CreateModel(
+            name='RevokedCertificate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('fingerprint', models.CharField(help_text='SHA256 fingerprint du certificat', max_length=64, unique=True, verbose_name='Empreinte')),
+                ('serial', models.CharField(blank=True, db_index=True, max_length=40, null=True, verbose_name='Numéro de série')),
+                ('certificate_cn', models.CharField(blank=True, max_length=100, null=True, verbose_name='CN du certificat')),
+                ('raison', models.CharField(
+                    choices=[
+                        ('revoked', 'Révoqué par un administrateur'),
+                        ('superseded', 'Remplacé par un nouveau certificat'),
+                        ('poste_supprime', 'Poste supprimé'),
+                    ],
+                    default='revoked',
+                    max_length=20,
+                    verbose_name='Raison'
+                )),
+                ('poste', models.ForeignKey(
+                    blank=True,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='revoked_certificates',
+                    to='postes.poste',
+                    verbose_name='Poste'
+                )),
+            ],
+            options={
+                'verbose_name': 'Certificat révoqué',
+                'verbose_name_plural': 'Certificats révoqués',
+                'db_table': 'revoked_certificates',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RunPython(remplir_revocations, migrations.RunPython.noop),
+    ]
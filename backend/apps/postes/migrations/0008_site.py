@@ -0,0 +1,102 @@
+# Generated manually
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def creer_sites(apps, schema_editor):
+    """Crée un site par emplacement existant et y rattache les postes"""
+    Poste = apps.get_model('postes', 'Poste')
+    Site = apps.get_model('postes', 'Site')
+    SeatBoardEntry = apps.get_model('postes', 'SeatBoardEntry')
+
+    emplacements = (
+        Poste.objects.exclude(emplacement__isnull=True).exclude(emplacement='')
+        .values_list('emplacement', flat=True).distinct()
+    )
+    slugs = set()
+    for emplacement in sorted(set(e.strip() for e in emplacements) - {''}):
+        base = slugify(emplacement)[:40] or 'site'
+        slug, suffixe = base, 2
+        while slug in slugs:
+            slug, suffixe = f'{base}-{suffixe}', suffixe + 1
+        slugs.add(slug)
+        site = Site.objects.create(nom=emplacement[:100], slug=slug)
+        Poste.objects.filter(emplacement__iexact=emplacement).update(site=site)
+
+    for poste_id, site_id in Poste.objects.filter(site__isnull=False).values_list('pk', 'site_id'):
+        SeatBoardEntry.objects.filter(poste_id=poste_id).update(site_id=site_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postes', '0007_certificate_revocation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Site',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('nom', models.CharField(max_length=100, unique=True, verbose_name='Nom du site')),
+                ('slug', models.SlugField(
+                    help_text='Utilisé dans les URL (ex: /ws/sites/<slug>/dashboard/)',
+                    unique=True,
+                    verbose_name='Identifiant'
+                )),
+                ('adresse', models.CharField(blank=True, max_length=255, null=True, verbose_name='Adresse')),
+                ('operateurs', models.ManyToManyField(
+                    blank=True,
+                    help_text='Opérateurs rattachés (aucun : site visible par tous)',
+                    related_name='sites',
+                    to=settings.AUTH_USER_MODEL,
+                    verbose_name='Opérateurs'
+                )),
+            ],
+            options={
+                'verbose_name': 'Site',
+                'verbose_name_plural': 'Sites',
+                'db_table': 'sites',
+                'ordering': ['nom'],
+            },
+        ),
+        migrations.AddField(
+            model_name='poste',
+            name='site',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='postes',
+                to='postes.site',
+                verbose_name='Site'
+            ),
+        ),
+        migrations.AddField(
+            model_name='seatboardentry',
+            name='site',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to='postes.site',
+                verbose_name='Site'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='poste',
+            index=models.Index(fields=['site', 'statut'], name='postes_site_id_ab3fda_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seatboardentry',
+            index=models.Index(fields=['site', 'nom'], name='seat_board_site_id_b1ae1c_idx'),
+        ),
+        migrations.RunPython(creer_sites, migrations.RunPython.noop),
+    ]
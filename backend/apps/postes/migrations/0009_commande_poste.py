@@ -0,0 +1,65 @@
+# Generated manually
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postes', '0008_site'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommandePoste',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('type', models.CharField(
+                    choices=[
+                        ('remote_command', 'Commande à distance'),
+                        ('unlock_kiosk', 'Déverrouillage du kiosque'),
+                    ],
+                    max_length=20,
+                    verbose_name='Type'
+                )),
+                ('payload', models.JSONField(
+                    blank=True,
+                    default=dict,
+                    help_text='Champs du message envoyé au kiosque',
+                    verbose_name='Contenu'
+                )),
+                ('statut', models.CharField(
+                    choices=[('envoyee', 'Envoyée'), ('acquittee', 'Acquittée'), ('expiree', 'Expirée')],
+                    default='envoyee',
+                    max_length=20,
+                    verbose_name='Statut'
+                )),
+                ('tentatives', models.PositiveIntegerField(default=0, verbose_name='Envois')),
+                ('expire_at', models.DateTimeField(verbose_name='Expire le')),
+                ('acquittee_at', models.DateTimeField(blank=True, null=True, verbose_name='Acquittée le')),
+                ('operateur', models.CharField(max_length=100, verbose_name='Opérateur')),
+                ('poste', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='commandes',
+                    to='postes.poste',
+                    verbose_name='Poste'
+                )),
+            ],
+            options={
+                'verbose_name': 'Commande',
+                'verbose_name_plural': 'Commandes',
+                'db_table': 'commandes_postes',
+                'ordering': ['-created_at'],
+                'indexes': [
+                    models.Index(fields=['poste', 'statut', 'expire_at'], name='commandes_p_poste_i_e28348_idx'),
+                    models.Index(fields=['statut', 'expire_at'], name='commandes_p_statut_d2a8f5_idx'),
+                    models.Index(fields=['created_at'], name='commandes_p_created_0abef2_idx'),
+                ],
+            },
+        ),
+    ]
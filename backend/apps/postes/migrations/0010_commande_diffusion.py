@@ -0,0 +1,24 @@
+# Generated manually
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postes', '0009_commande_poste'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commandeposte',
+            name='diffusion',
+            field=models.UUIDField(
+                blank=True,
+                db_index=True,
+                help_text="Envoi groupé à la flotte dont fait partie la commande",
+                null=True,
+                verbose_name='Diffusion'
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated manually
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postes', '0010_commande_diffusion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificaterequest',
+            name='statut',
+            field=models.CharField(
+                choices=[
+                    ('pending', 'En cours'),
+                    ('issued', 'Délivré'),
+                    ('collected', 'Récupéré'),
+                    ('expired', 'Non récupéré à temps'),
+                    ('failed', 'Échec'),
+                ],
+                default='pending',
+                max_length=20,
+                verbose_name='Statut'
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated manually
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postes', '0011_certificaterequest_expired'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatBoardTombstone',
+            fields=[
+                ('poste_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Poste')),
+                ('site_id', models.BigIntegerField(blank=True, null=True, verbose_name='Site')),
+                ('version', models.BigIntegerField(db_index=True, default=0, verbose_name='Version')),
+            ],
+            options={
+                'verbose_name': 'Place retirée (tableau)',
+                'verbose_name_plural': 'Places retirées (tableau)',
+                'db_table': 'seat_board_tombstones',
+            },
+        ),
+    ]
@@ -2,9 +2,92 @@
 Modèle Poste pour la gestion des postes informatiques
 """
 
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
-from apps.core.models import TimeStampedModel
+from apps.core.models import SiteScopedQuerySet, TimeStampedModel
+
+
+class SiteQuerySet(models.QuerySet):
+    """QuerySet des sites"""
+
+    def ids_operateur(self, user):
+        """
+        IDs des sites auxquels un opérateur est rattaché
+
+        None (tous les sites) pour un superutilisateur, un opérateur sans
+        rattachement ou une requête anonyme (poste client).
+        """
+        if not user or not user.is_authenticated or user.is_superuser:
+            return None
+        return list(self.filter(operateurs=user).values_list('pk', flat=True)) or None
+
+
+class Site(TimeStampedModel):
+    """
+    Site (salle EPN) regroupant des postes
+
+    Les listes, statistiques, groupes WebSocket et caches sont découpés par
+    site : un opérateur ne reçoit et n'interroge que les postes de sa salle.
+    """
+
+    nom = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Nom du site"
+    )
+    slug = models.SlugField(
+        max_length=50,
+        unique=True,
+        verbose_name="Identifiant",
+        help_text="Utilisé dans les URL (ex: /ws/sites/<slug>/dashboard/)"
+    )
+    adresse = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        verbose_name="Adresse"
+    )
+    operateurs = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        blank=True,
+        related_name='sites',
+        verbose_name="Opérateurs",
+        help_text="Opérateurs rattachés (aucun : site visible par tous)"
+    )
+
+    objects = SiteQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'sites'
+        ordering = ['nom']
+        verbose_name = 'Site'
+        verbose_name_plural = 'Sites'
+
+    def __str__(self):
+        return self.nom
+
+
+class PosteQuerySet(SiteScopedQuerySet):
+    """QuerySet des postes"""
+
+    def avec_session_active(self):
+        """
+        Précharge la session active (et son utilisateur) de chaque poste
+
+        Poste.session_active lit alors le préchargement au lieu d'une
+        requête par poste.
+        """
+        from apps.sessions.models import Session
+
+        return self.prefetch_related(models.Prefetch(
+            'sessions',
+            queryset=Session.objects.filter(statut='active').select_related('utilisateur'),
+            to_attr='_sessions_actives',
+        ))
 
 
 class Poste(TimeStampedModel):
@@ -26,6 +109,16 @@ class Poste(TimeStampedModel):
         ('gaming', 'Gaming'),
     ]
 
+    # Site (salle)
+    site = models.ForeignKey(
+        Site,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='postes',
+        verbose_name="Site"
+    )
+
     # Type de poste
     type_poste = models.CharField(
         max_length=20,
@@ -127,6 +220,13 @@ class Poste(TimeStampedModel):
         blank=True,
         verbose_name="Certificat expire le"
     )
+    certificate_serial = models.CharField(
+        max_length=40,
+        null=True,
+        blank=True,
+        verbose_name="Numéro de série certificat",
+        help_text="Numéro de série (hexadécimal), utilisé dans la CRL"
+    )
     is_certificate_revoked = models.BooleanField(
         default=False,
         verbose_name="Certificat révoqué"
@@ -173,6 +273,8 @@ class Poste(TimeStampedModel):
         verbose_name="Date de validation"
     )
 
+    objects = PosteQuerySet.as_manager()
+
     class Meta:
         db_table = 'postes'
         ordering = ['nom']
@@ -180,6 +282,7 @@ class Poste(TimeStampedModel):
         verbose_name_plural = 'Postes'
         indexes = [
             models.Index(fields=['statut']),
+            models.Index(fields=['site', 'statut']),
             models.Index(fields=['ip_address']),
             models.Index(fields=['mac_address']),
         ]
@@ -201,6 +304,8 @@ class Poste(TimeStampedModel):
     @property
     def session_active(self):
         """Retourne la session active du poste (s'il y en a une)"""
+        if hasattr(self, '_sessions_actives'):
+            return self._sessions_actives[0] if self._sessions_actives else None
         return self.sessions.filter(statut='active').first()
 
     @property
@@ -249,10 +354,23 @@ class Poste(TimeStampedModel):
             and self.registration_token_expires > timezone.now()
         )
 
-    def revoke_certificate(self):
-        """Révoque le certificat du poste"""
+    def revoke_certificate(self, raison='revoked'):
+        """
+        Révoque le certificat du poste
+
+        Ajoute l'empreinte à la liste de révocation partagée et déconnecte
+        immédiatement le client s'il est connecté.
+        """
+        from .revocation import revoke_certificate
         self.is_certificate_revoked = True
         self.save(update_fields=['is_certificate_revoked'])
+        revoke_certificate(
+            fingerprint=self.certificate_fingerprint,
+            serial=self.certificate_serial,
+            certificate_cn=self.certificate_cn,
+            poste=self,
+            raison=raison
+        )
 
     def clear_registration_token(self):
         """Supprime le token d'enregistrement"""
@@ -272,3 +390,454 @@ class Poste(TimeStampedModel):
         self.validated_by = username
         self.validated_at = timezone.now()
         self.save(update_fields=['statut', 'validated_by', 'validated_at'])
+
+
+class SeatBoardEntry(models.Model):
+    """
+    Read model du tableau des places (une ligne par poste)
+
+    Dénormalise poste + session en cours + utilisateur pour que le
+    dashboard affiche toute une salle en une seule requête sans jointure.
+    Maintenu par apps.postes.seat_board à chaque transition Session/Poste.
+    """
+
+    poste = models.OneToOneField(
+        Poste,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='seat',
+        verbose_name="Poste"
+    )
+
+    # Poste
+    site = models.ForeignKey(
+        Site,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name="Site"
+    )
+    nom = models.CharField(max_length=50, verbose_name="Nom du poste")
+    type_poste = models.CharField(max_length=20, verbose_name="Type de poste")
+    emplacement = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        verbose_name="Emplacement physique"
+    )
+    statut = models.CharField(max_length=25, verbose_name="Statut du poste")
+    derniere_connexion = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Dernière connexion"
+    )
+
+    # Session en cours (active ou suspendue)
+    session_id = models.BigIntegerField(blank=True, null=True, verbose_name="Session")
+    session_code = models.CharField(max_length=10, blank=True, null=True, verbose_name="Code d'accès")
+    session_statut = models.CharField(max_length=20, blank=True, null=True, verbose_name="Statut session")
+    utilisateur_nom = models.CharField(max_length=201, blank=True, null=True, verbose_name="Utilisateur")
+    is_guest = models.BooleanField(default=False, verbose_name="Invité")
+    temps_restant = models.IntegerField(blank=True, null=True, verbose_name="Temps restant")
+    debut_session = models.DateTimeField(blank=True, null=True, verbose_name="Début de session")
+
+    # Version (µs) de la dernière modification, pour ordonner les deltas ;
+    # attribuée après le commit (apps.postes.seat_board.estampiller)
+    version = models.BigIntegerField(default=0, verbose_name="Version")
+
+    class Meta:
+        db_table = 'seat_board'
+        ordering = ['nom']
+        verbose_name = 'Place (tableau)'
+        verbose_name_plural = 'Tableau des places'
+        indexes = [
+            models.Index(fields=['emplacement', 'nom']),
+            models.Index(fields=['site', 'nom']),
+            models.Index(fields=['session_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.nom} - {self.session_code or self.statut}"
+
+    @property
+    def est_en_ligne(self):
+        """Même règle que Poste.est_en_ligne (dernière connexion < 60 secondes)"""
+        if not self.derniere_connexion:
+            return False
+        delta = timezone.now() - self.derniere_connexion
+        return delta.total_seconds() < 60
+
+    def to_dict(self):
+        """Représentation compacte envoyée par l'API et le WebSocket"""
+        return {
+            'poste_id': self.poste_id,
+            'site_id': self.site_id,
+            'nom': self.nom,
+            'type_poste': self.type_poste,
+            'emplacement': self.emplacement,
+            'statut': self.statut,
+            'est_en_ligne': self.est_en_ligne,
+            'session': {
+                'id': self.session_id,
+                'code_acces': self.session_code,
+                'statut': self.session_statut,
+                'utilisateur': self.utilisateur_nom,
+                'is_guest': self.is_guest,
+                'temps_restant': self.temps_restant,
+                'debut_session': self.debut_session.isoformat() if self.debut_session else None,
+            } if self.session_id else None,
+            'version': self.version,
+        }
+
+
+class SeatBoardTombstone(models.Model):
+    """
+    Place retirée du tableau (poste supprimé ou repassé en attente de validation)
+
+    Conservée pour que get_snapshot(since=...) signale aussi les retraits à
+    un client qui a manqué le delta diffusé.
+    """
+
+    poste_id = models.BigIntegerField(primary_key=True, verbose_name="Poste")
+    site_id = models.BigIntegerField(blank=True, null=True, verbose_name="Site")
+    version = models.BigIntegerField(default=0, db_index=True, verbose_name="Version")
+
+    class Meta:
+        db_table = 'seat_board_tombstones'
+        verbose_name = 'Place retirée (tableau)'
+        verbose_name_plural = 'Places retirées (tableau)'
+
+    def __str__(self):
+        return f"{self.poste_id} retiré ({self.version})"
+
+
+class CertificateRequest(TimeStampedModel):
+    """
+    Demande d'émission de certificat client (enregistrement mTLS)
+
+    Permet de générer le certificat hors de la requête HTTP : le client
+    dépose sa demande, un worker Celery l'émet, le client récupère le
+    résultat par polling. La clé privée n'est conservée que jusqu'à sa
+    récupération (usage unique), au plus CLIENT_CERT_KEY_TTL secondes ; en
+    mode synchrone, elle n'est jamais écrite en base.
+    """
+
+    STATUT_CHOICES = [
+        ('pending', 'En cours'),
+        ('issued', 'Délivré'),
+        ('collected', 'Récupéré'),
+        ('expired', 'Non récupéré à temps'),
+        ('failed', 'Échec'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    poste = models.ForeignKey(
+        Poste,
+        on_delete=models.CASCADE,
+        related_name='certificate_requests',
+        verbose_name="Poste"
+    )
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default='pending',
+        verbose_name="Statut"
+    )
+
+    # Informations transmises par le client
+    hostname = models.CharField(max_length=255, blank=True, null=True, verbose_name="Hostname")
+    mac_address = models.CharField(max_length=17, blank=True, null=True, verbose_name="Adresse MAC")
+
+    # Résultat (effacé après récupération)
+    client_cert = models.TextField(blank=True, null=True, verbose_name="Certificat client")
+    client_key = models.TextField(blank=True, null=True, verbose_name="Clé privée client")
+    ca_cert = models.TextField(blank=True, null=True, verbose_name="Certificat CA")
+    certificate_cn = models.CharField(max_length=100, blank=True, null=True, verbose_name="CN du certificat")
+    expires_at = models.DateTimeField(blank=True, null=True, verbose_name="Expiration du certificat")
+    error = models.CharField(max_length=255, blank=True, null=True, verbose_name="Erreur")
+    issued_at = models.DateTimeField(blank=True, null=True, verbose_name="Délivré le")
+
+    class Meta:
+        db_table = 'certificate_requests'
+        ordering = ['-created_at']
+        verbose_name = 'Demande de certificat'
+        verbose_name_plural = 'Demandes de certificat'
+        indexes = [
+            models.Index(fields=['poste', 'statut']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"Certificat {self.poste.nom} ({self.get_statut_display()})"
+
+    def issue(self, operateur='system', conserver_cle=True):
+        """
+        Génère et signe le certificat, puis l'attribue au poste
+
+        Args:
+            operateur: Nom de l'opérateur (journal)
+            conserver_cle: Faux si la clé est renvoyée dans la même requête
+                (mode synchrone) : elle reste alors en mémoire seulement
+
+        Returns:
+            True si le certificat a été délivré, False en cas d'erreur
+        """
+        from .certificate_manager import get_certificate_manager
+
+        try:
+            cert_data = get_certificate_manager().generate_client_certificate(self.poste)
+        except Exception as e:
+            self.statut = 'failed'
+            self.error = f"Erreur lors de la génération du certificat: {str(e)}"[:255]
+            self.save(update_fields=['statut', 'error', 'updated_at'])
+            return False
+
+        # Met à jour le poste
+        poste = self.poste
+        ancien = (poste.certificate_fingerprint, poste.certificate_serial, poste.certificate_cn)
+        poste.certificate_cn = cert_data['cn']
+        poste.certificate_fingerprint = cert_data['fingerprint']
+        poste.certificate_serial = cert_data['serial']
+        poste.certificate_issued_at = timezone.now()
+        poste.certificate_expires_at = cert_data['expires_at']
+        poste.is_certificate_revoked = False
+        poste.registration_token = None  # Invalide le token (usage unique)
+        poste.registration_token_expires = None
+
+        if self.mac_address:
+            poste.mac_address = self.mac_address
+
+        poste.save()
+
+        # L'ancien certificat du poste n'est plus valable
+        if ancien[0] and ancien[0] != cert_data['fingerprint']:
+            from .revocation import revoke_certificate
+            revoke_certificate(
+                fingerprint=ancien[0],
+                serial=ancien[1],
+                certificate_cn=ancien[2],
+                poste=poste,
+                raison='superseded',
+                deconnecter=False
+            )
+
+        self.client_cert = cert_data['client_cert']
+        self.client_key = cert_data['client_key'] if conserver_cle else None
+        self.ca_cert = cert_data['ca_cert']
+        self.certificate_cn = cert_data['cn']
+        self.expires_at = cert_data['expires_at']
+        self.statut = 'issued'
+        self.issued_at = timezone.now()
+        self.save()
+        self.client_key = cert_data['client_key']
+
+        # Log l'enregistrement
+        from apps.logs.models import Log
+        Log.log_action(
+            action='client_registered',
+            details=f"Client {poste.nom} enregistré avec certificat {cert_data['cn']}",
+            operateur=operateur,
+            metadata={
+                'poste_id': poste.id,
+                'certificate_cn': cert_data['cn'],
+                'fingerprint': cert_data['fingerprint'],
+                'hostname': self.hostname,
+                'mac_address': self.mac_address,
+            }
+        )
+        return True
+
+    def collect(self):
+        """
+        Retourne le certificat délivré et efface la clé privée
+
+        Un seul appelant obtient la clé : la récupération est un UPDATE
+        conditionnel sur le statut 'issued'. Une clé délivrée depuis plus de
+        CLIENT_CERT_KEY_TTL secondes n'est plus remise (statut 'expired').
+
+        Returns:
+            dict au format de la réponse register_client, None si déjà
+            récupéré ou expiré
+        """
+        now = timezone.now()
+        demandes = CertificateRequest.objects.filter(pk=self.pk, statut='issued')
+        collected = demandes.filter(
+            issued_at__gte=now - timedelta(seconds=self.duree_cle())
+        ).update(client_key=None, statut='collected', updated_at=now)
+        if not collected:
+            if demandes.update(client_key=None, statut='expired', updated_at=now):
+                self.statut = 'expired'
+            self.client_key = None
+            return None
+
+        data = {
+            'client_cert': self.client_cert,
+            'client_key': self.client_key,
+            'ca_cert': self.ca_cert,
+            'poste_id': self.poste_id,
+            'poste_nom': self.poste.nom,
+            'certificate_cn': self.certificate_cn,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+        }
+        self.client_key = None
+        self.statut = 'collected'
+        return data
+
+    @staticmethod
+    def duree_cle():
+        """Durée de conservation d'une clé délivrée non récupérée (secondes)"""
+        return getattr(settings, 'CLIENT_CERT_KEY_TTL', 600)
+
+    @classmethod
+    def expirer_cles(cls, now=None):
+        """
+        Efface les clés délivrées et non récupérées à temps
+
+        Returns:
+            Nombre de demandes expirées
+        """
+        now = now or timezone.now()
+        return cls.objects.filter(
+            statut='issued',
+            issued_at__lt=now - timedelta(seconds=cls.duree_cle())
+        ).update(client_key=None, statut='expired', updated_at=now)
+
+
+class RevokedCertificate(TimeStampedModel):
+    """
+    Certificat client révoqué
+
+    Source de vérité de la liste de révocation : le jeu d'empreintes et de
+    numéros de série est publié dans le cache partagé (Redis) et la CRL
+    exportée pour le reverse proxy (voir apps.postes.revocation).
+    """
+
+    RAISON_CHOICES = [
+        ('revoked', 'Révoqué par un administrateur'),
+        ('superseded', 'Remplacé par un nouveau certificat'),
+        ('poste_supprime', 'Poste supprimé'),
+    ]
+
+    fingerprint = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Empreinte",
+        help_text="SHA256 fingerprint du certificat"
+    )
+    serial = models.CharField(
+        max_length=40,
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Numéro de série"
+    )
+    certificate_cn = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        verbose_name="CN du certificat"
+    )
+    poste = models.ForeignKey(
+        Poste,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='revoked_certificates',
+        verbose_name="Poste"
+    )
+    raison = models.CharField(
+        max_length=20,
+        choices=RAISON_CHOICES,
+        default='revoked',
+        verbose_name="Raison"
+    )
+
+    class Meta:
+        db_table = 'revoked_certificates'
+        ordering = ['-created_at']
+        verbose_name = 'Certificat révoqué'
+        verbose_name_plural = 'Certificats révoqués'
+
+    def __str__(self):
+        return f"{self.certificate_cn or self.fingerprint[:16]} ({self.get_raison_display()})"
+
+
+class CommandePoste(TimeStampedModel):
+    """
+    Commande envoyée à un poste (boîte d'envoi)
+
+    Chaque commande est persistée avant d'être envoyée au kiosque avec son
+    identifiant ; le kiosque l'acquitte (message 'command_ack'). Une
+    commande non acquittée est renvoyée à chaque reconnexion du poste
+    jusqu'à son expiration : le kiosque ignore un identifiant déjà traité.
+    """
+
+    TYPE_CHOICES = [
+        ('remote_command', 'Commande à distance'),
+        ('unlock_kiosk', 'Déverrouillage du kiosque'),
+    ]
+
+    STATUT_CHOICES = [
+        ('envoyee', 'Envoyée'),
+        ('acquittee', 'Acquittée'),
+        ('expiree', 'Expirée'),
+    ]
+
+    # Commandes en attente d'acquittement
+    STATUTS_EN_SUSPENS = ('envoyee',)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    poste = models.ForeignKey(
+        Poste,
+        on_delete=models.CASCADE,
+        related_name='commandes',
+        verbose_name="Poste"
+    )
+    type = models.CharField(
+        max_length=20,
+        choices=TYPE_CHOICES,
+        verbose_name="Type"
+    )
+    payload = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Contenu",
+        help_text="Champs du message envoyé au kiosque"
+    )
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default='envoyee',
+        verbose_name="Statut"
+    )
+    tentatives = models.PositiveIntegerField(default=0, verbose_name="Envois")
+    expire_at = models.DateTimeField(verbose_name="Expire le")
+    acquittee_at = models.DateTimeField(blank=True, null=True, verbose_name="Acquittée le")
+    operateur = models.CharField(max_length=100, verbose_name="Opérateur")
+    diffusion = models.UUIDField(
+        blank=True,
+        null=True,
+        db_index=True,
+        verbose_name="Diffusion",
+        help_text="Envoi groupé à la flotte dont fait partie la commande"
+    )
+
+    class Meta:
+        db_table = 'commandes_postes'
+        ordering = ['-created_at']
+        verbose_name = 'Commande'
+        verbose_name_plural = 'Commandes'
+        indexes = [
+            # Commandes à renvoyer à la reconnexion d'un poste
+            models.Index(fields=['poste', 'statut', 'expire_at']),
+            models.Index(fields=['statut', 'expire_at']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_type_display()} {self.poste_id} ({self.get_statut_display()})"
+
+    def message(self):
+        """Message envoyé au consumer du poste"""
+        return {**self.payload, 'type': self.type, 'commande_id': str(self.pk)}
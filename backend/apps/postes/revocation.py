@@ -0,0 +1,182 @@
+"""
+Liste de révocation des certificats clients partagée entre processus
+
+La table RevokedCertificate est la source de vérité. Le jeu compact
+(empreintes + numéros de série) est publié dans le cache partagé (Redis
+en production) avec un numéro de version ; chaque processus en garde une
+copie en mémoire et ne relit que la version, au plus une fois par
+REVOCATION_CHECK_INTERVAL. La vérification d'un certificat à la connexion
+WebSocket ne fait donc aucune requête en base.
+
+Chaque révocation republie le jeu, régénère la CRL pour le reverse proxy
+et déconnecte le client concerné s'il est connecté.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'revocation:set'
+VERSION_KEY = 'revocation:version'
+
+
+def load_revocations():
+    """
+    Relit la liste en base et la publie dans le cache partagé
+
+    Returns:
+        dict {'version', 'fingerprints', 'serials'}
+    """
+    from .models import RevokedCertificate
+
+    rows = list(RevokedCertificate.objects.values_list('fingerprint', 'serial'))
+    data = {
+        'version': time.time_ns(),
+        'fingerprints': [fingerprint for fingerprint, _ in rows],
+        'serials': [serial for _, serial in rows if serial],
+    }
+    timeout = getattr(settings, 'REVOCATION_CACHE_TIMEOUT', 300)
+    cache.set_many({CACHE_KEY: data, VERSION_KEY: data['version']}, timeout)
+    return data
+
+
+class RevocationSet:
+    """Copie en mémoire du jeu de révocation, invalidée par numéro de version"""
+
+    def __init__(self):
+        self._version = None
+        self._fingerprints = frozenset()
+        self._serials = frozenset()
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, fingerprint, serial=None):
+        """Vérifie si un certificat (empreinte ou numéro de série) est révoqué"""
+        self.refresh()
+        return fingerprint in self._fingerprints or (
+            serial is not None and serial in self._serials
+        )
+
+    def refresh(self, force=False):
+        """
+        Synchronise la copie locale avec le cache partagé
+
+        Une seule lecture de la version tant qu'elle n'a pas changé ; la base
+        n'est relue que si le cache a expiré.
+        """
+        interval = getattr(settings, 'REVOCATION_CHECK_INTERVAL', 1)
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._checked_at is not None and now - self._checked_at < interval:
+                return
+            self._checked_at = now
+
+            version = cache.get(VERSION_KEY)
+            if version is not None and version == self._version:
+                return
+
+            data = cache.get(CACHE_KEY)
+            if data is None or data['version'] != version:
+                data = load_revocations()
+
+            self._fingerprints = frozenset(data['fingerprints'])
+            self._serials = frozenset(data['serials'])
+            self._version = data['version']
+
+
+_revocation_set = RevocationSet()
+
+
+def get_revocation_set():
+    """Retourne le jeu de révocation du processus"""
+    return _revocation_set
+
+
+def revoke_certificate(fingerprint, serial=None, certificate_cn=None, poste=None,
+                       raison='revoked', deconnecter=True):
+    """
+    Ajoute un certificat à la liste de révocation
+
+    Après le commit : republie le jeu, régénère la CRL et, si demandé,
+    déconnecte le poste (groupe WebSocket poste_<id>).
+
+    Args:
+        fingerprint: Empreinte SHA256 du certificat
+        serial: Numéro de série (hexadécimal)
+        certificate_cn: CN du certificat
+        poste: Poste concerné
+        raison: revoked, superseded ou poste_supprime
+        deconnecter: Fermer la connexion WebSocket du poste
+
+    Returns:
+        RevokedCertificate ou None si aucune empreinte
+    """
+    from .models import RevokedCertificate
+
+    if not fingerprint:
+        return None
+
+    entry, _ = RevokedCertificate.objects.get_or_create(
+        fingerprint=fingerprint,
+        defaults={
+            'serial': serial,
+            'certificate_cn': certificate_cn,
+            'poste': poste if poste is not None and poste.pk else None,
+            'raison': raison,
+        }
+    )
+
+    poste_ids = [poste.pk] if deconnecter and poste is not None else []
+    transaction.on_commit(lambda: publish_revocation(poste_ids))
+    return entry
+
+
+def publish_revocation(poste_ids=()):
+    """
+    Propage des révocations (à appeler après commit)
+
+    Republie le jeu, régénère la CRL et déconnecte les postes donnés.
+
+    Args:
+        poste_ids: Postes dont la connexion WebSocket doit être fermée
+    """
+    load_revocations()
+    _revocation_set.refresh(force=True)
+
+    try:
+        export_crl()
+    except Exception as e:
+        logger.warning(f"Export de la CRL impossible: {e}")
+
+    if not poste_ids:
+        return
+    try:
+        from apps.sessions.websocket_utils import send_many
+        send_many([
+            (f'poste_{poste_id}', {'type': 'certificate_revoked'})
+            for poste_id in poste_ids
+        ])
+    except Exception as e:
+        logger.warning(f"Déconnexion des postes {list(poste_ids)} impossible: {e}")
+
+
+def export_crl():
+    """
+    Génère la CRL signée par la CA et l'écrit dans CA_CRL_PATH
+
+    Returns:
+        CRL au format PEM (bytes)
+    """
+    from .models import RevokedCertificate
+    from .certificate_manager import get_certificate_manager
+
+    revoked = RevokedCertificate.objects.filter(
+        serial__isnull=False
+    ).values_list('serial', 'created_at')
+    return get_certificate_manager().export_crl(revoked)
@@ -0,0 +1,307 @@
+"""
+Read model du tableau des places (seat board)
+
+Une ligne SeatBoardEntry par poste, tenue à jour à chaque transition
+Session/Poste, pour que le dashboard lise une salle entière en une requête
+sans jointure. Chaque mise à jour est diffusée au groupe WebSocket
+'seat_board' sous forme de delta (places modifiées / supprimées), et à
+chaque groupe 'seat_board_<site>' la part du delta qui concerne son site.
+
+Les versions sont attribuées après le commit (estampiller) : une version
+attribuée dans la transaction pourrait être validée après une version plus
+récente déjà lue, et get_snapshot(since=...) ne la renverrait jamais. Les
+places retirées laissent une ligne SeatBoardTombstone, renvoyée dans
+'removed' avec le delta.
+"""
+
+import logging
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from .models import Poste, SeatBoardEntry, SeatBoardTombstone
+
+logger = logging.getLogger(__name__)
+
+# Groupe WebSocket des abonnés au tableau des places
+SEAT_BOARD_GROUP = 'seat_board'
+
+# Statuts de session qui occupent une place
+STATUTS_OCCUPANT = ('active', 'suspendue')
+
+# Champs réécrits à chaque rafraîchissement (la version l'est après le commit)
+CHAMPS_PLACE = [
+    'site', 'nom', 'type_poste', 'emplacement', 'statut', 'derniere_connexion',
+    'session_id', 'session_code', 'session_statut', 'utilisateur_nom',
+    'is_guest', 'temps_restant', 'debut_session',
+]
+
+
+def nouvelle_version():
+    """Version d'une place : horodatage en microsecondes"""
+    return time.time_ns() // 1000
+
+
+def estampiller(poste_ids, entries=(), retires=()):
+    """
+    Attribue une nouvelle version aux places après le commit
+
+    Un UPDATE par transaction, quel que soit le nombre de places. Hors
+    transaction, immédiatement.
+
+    Args:
+        poste_ids: Postes dont la place a été modifiée
+        entries: SeatBoardEntry en mémoire à mettre à jour (diffusion)
+        retires: Postes retirés du tableau (SeatBoardTombstone)
+    """
+    poste_ids = list(poste_ids)
+    retires = list(retires)
+    if not poste_ids and not retires:
+        return
+
+    def _estampiller():
+        version = nouvelle_version()
+        if poste_ids:
+            SeatBoardEntry.objects.filter(poste_id__in=poste_ids).update(version=version)
+        if retires:
+            SeatBoardTombstone.objects.filter(poste_id__in=retires).update(version=version)
+        for entry in entries:
+            entry.version = version
+
+    transaction.on_commit(_estampiller, robust=True)
+
+
+def _version_hors_transaction(poste_ids):
+    """
+    Champ version d'un UPDATE isolé : écrit directement hors transaction
+    (validé aussitôt), attribué après le commit sinon
+    """
+    if transaction.get_connection().in_atomic_block:
+        estampiller(poste_ids)
+        return {}
+    return {'version': nouvelle_version()}
+
+
+def refresh_seats(poste_ids=None, publish=True):
+    """
+    Recalcule les places des postes donnés (tous si None)
+
+    Nombre de requêtes constant quel que soit le nombre de postes :
+    une lecture des postes, une des sessions en cours, un upsert.
+
+    Args:
+        poste_ids: IDs des postes à recalculer
+        publish: Diffuser le delta au groupe 'seat_board'
+
+    Returns:
+        Liste des SeatBoardEntry écrites
+    """
+    from apps.sessions.models import Session
+
+    postes = Poste.objects.exclude(statut='en_attente_validation')
+    sessions = Session.objects.filter(statut__in=STATUTS_OCCUPANT)
+    if poste_ids is not None:
+        poste_ids = list(poste_ids)
+        if not poste_ids:
+            return []
+        postes = postes.filter(pk__in=poste_ids)
+        sessions = sessions.filter(poste_id__in=poste_ids)
+
+    # Session la plus récente de chaque poste
+    occupants = {}
+    for session in sessions.select_related('utilisateur').order_by('debut_session'):
+        occupants[session.poste_id] = session
+
+    entries = []
+    for poste in postes.only(
+        'id', 'site_id', 'nom', 'type_poste', 'emplacement', 'statut', 'derniere_connexion'
+    ):
+        session = occupants.get(poste.pk)
+        entries.append(SeatBoardEntry(
+            poste_id=poste.pk,
+            site_id=poste.site_id,
+            nom=poste.nom,
+            type_poste=poste.type_poste,
+            emplacement=poste.emplacement,
+            statut=poste.statut,
+            derniere_connexion=poste.derniere_connexion,
+            session_id=session.pk if session else None,
+            session_code=session.code_acces if session else None,
+            session_statut=session.statut if session else None,
+            utilisateur_nom=session.utilisateur.get_full_name() if session else None,
+            is_guest=session.utilisateur.is_guest if session else False,
+            temps_restant=session.temps_restant if session else None,
+            debut_session=session.debut_session if session else None,
+        ))
+
+    if entries:
+        SeatBoardEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['poste'],
+            update_fields=CHAMPS_PLACE,
+        )
+
+    # Postes disparus du tableau (supprimés ou repassés en attente de validation)
+    presents = {entry.poste_id for entry in entries}
+    obsoletes = SeatBoardEntry.objects.exclude(poste_id__in=presents)
+    if poste_ids is not None:
+        obsoletes = obsoletes.filter(poste_id__in=poste_ids)
+    removed = list(obsoletes.values_list('poste_id', 'site_id'))
+    if removed:
+        SeatBoardEntry.objects.filter(poste_id__in=[poste_id for poste_id, _ in removed]).delete()
+
+    estampiller(presents, entries=entries, retires=_enterrer(removed))
+    if publish:
+        publish_seats(entries, removed=removed)
+    return entries
+
+
+def _enterrer(removed):
+    """Enregistre les places retirées ; renvoie leurs IDs de poste"""
+    if removed:
+        SeatBoardTombstone.objects.bulk_create(
+            [SeatBoardTombstone(poste_id=poste_id, site_id=site_id) for poste_id, site_id in removed],
+            update_conflicts=True,
+            unique_fields=['poste_id'],
+            update_fields=['site_id'],
+        )
+    return [poste_id for poste_id, _ in removed]
+
+
+def remove_seats(removed):
+    """
+    Retire du tableau les places de postes supprimés
+
+    La ligne SeatBoardEntry disparaît avec le poste (CASCADE) ; il reste à
+    laisser une trace pour les deltas et à diffuser le retrait.
+
+    Args:
+        removed: Tuples (poste_id, site_id)
+    """
+    removed = list(removed)
+    estampiller([], retires=_enterrer(removed))
+    publish_seats([], removed=removed)
+
+
+def update_seat_time(session):
+    """
+    Met à jour le temps restant d'une place sans tout recalculer
+
+    Utilisé par le décompte périodique : un seul UPDATE, sans diffusion
+    (la tâche diffuse un delta groupé via publish_poste_ids).
+    """
+    return SeatBoardEntry.objects.filter(
+        poste_id=session.poste_id,
+        session_id=session.pk
+    ).update(
+        temps_restant=session.temps_restant,
+        session_statut=session.statut,
+        **_version_hors_transaction([session.poste_id])
+    )
+
+
+def update_seat_connexion(poste):
+    """Met à jour la dernière connexion d'une place (heartbeat), sans diffusion"""
+    return SeatBoardEntry.objects.filter(poste_id=poste.pk).update(
+        derniere_connexion=poste.derniere_connexion,
+        **_version_hors_transaction([poste.pk])
+    )
+
+
+def get_snapshot(emplacement=None, since=None, sites=None):
+    """
+    Retourne le tableau des places
+
+    Args:
+        emplacement: Restreindre à un emplacement (salle)
+        since: Ne renvoyer que les places modifiées après cette version,
+            et les postes retirés depuis ('removed')
+        sites: Restreindre à ces sites (IDs ; tous si None)
+
+    Returns:
+        dict {'version': int, 'seats': [...]}, plus 'removed': [poste_id]
+        avec since
+    """
+    queryset = SeatBoardEntry.objects.all()
+    if sites is not None:
+        sites = list(sites)
+        queryset = queryset.filter(site_id__in=sites)
+    if emplacement:
+        queryset = queryset.filter(emplacement=emplacement)
+    if since is None:
+        seats = [entry.to_dict() for entry in queryset]
+        return {'version': max((seat['version'] for seat in seats), default=0), 'seats': seats}
+
+    seats = [entry.to_dict() for entry in queryset.filter(version__gt=since)]
+    # Retraits (hors postes revenus sur le tableau depuis)
+    retraits = SeatBoardTombstone.objects.filter(version__gt=since).exclude(
+        poste_id__in=SeatBoardEntry.objects.values('poste_id')
+    )
+    if sites is not None:
+        retraits = retraits.filter(site_id__in=sites)
+    retraits = list(retraits.values_list('poste_id', 'version'))
+
+    versions = [seat['version'] for seat in seats] + [version for _, version in retraits]
+    return {
+        'version': max(versions, default=since),
+        'seats': seats,
+        'removed': [poste_id for poste_id, _ in retraits],
+    }
+
+
+def publish_poste_ids(poste_ids):
+    """Estampille et diffuse l'état courant des places données (une seule lecture)"""
+    poste_ids = list(poste_ids)
+    if not poste_ids:
+        return
+    entries = list(SeatBoardEntry.objects.filter(poste_id__in=poste_ids))
+    estampiller(poste_ids, entries=entries)
+    publish_seats(entries)
+
+
+def publish_seats(entries, removed=()):
+    """
+    Diffuse un delta au groupe 'seat_board' après le commit
+
+    Chaque groupe 'seat_board_<site>' ne reçoit que les places de son site.
+
+    Args:
+        entries: SeatBoardEntry modifiées
+        removed: Postes retirés du tableau : IDs, ou (ID, site_id) pour
+            prévenir aussi le groupe du site
+    """
+    if not entries and not removed:
+        return
+    from .sites import groupe_site
+
+    removed = [item if isinstance(item, tuple) else (item, None) for item in removed]
+    deltas = {SEAT_BOARD_GROUP: {'seats': [], 'removed': []}}
+    for entry in entries:
+        seat = entry.to_dict()
+        deltas[SEAT_BOARD_GROUP]['seats'].append(seat)
+        if entry.site_id is not None:
+            groupe = groupe_site(SEAT_BOARD_GROUP, entry.site_id)
+            deltas.setdefault(groupe, {'seats': [], 'removed': []})['seats'].append(seat)
+    for poste_id, site_id in removed:
+        deltas[SEAT_BOARD_GROUP]['removed'].append(poste_id)
+        if site_id is not None:
+            groupe = groupe_site(SEAT_BOARD_GROUP, site_id)
+            deltas.setdefault(groupe, {'seats': [], 'removed': []})['removed'].append(poste_id)
+
+    async def _send_all(channel_layer):
+        for groupe, data in deltas.items():
+            await channel_layer.group_send(groupe, {'type': 'seat_update', 'data': data})
+
+    def _send():
+        try:
+            channel_layer = get_channel_layer()
+            if channel_layer is None:
+                return
+            async_to_sync(_send_all)(channel_layer)
+        except Exception as e:
+            logger.warning(f"Diffusion du tableau des places impossible: {e}")
+
+    transaction.on_commit(_send)
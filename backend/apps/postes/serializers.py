@@ -3,7 +3,7 @@ Serializers pour l'app Postes
 """
 
 from rest_framework import serializers
-from .models import Poste
+from .models import CommandePoste, Poste, Site
 
 
 class PosteSerializer(serializers.ModelSerializer):
@@ -22,6 +22,7 @@ class PosteSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'nom',
+            'site',
             'type_poste',
             'ip_address',
             'mac_address',
@@ -127,6 +128,7 @@ class PosteListSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'nom',
+            'site',
             'type_poste',
             'ip_address',
             'mac_address',
@@ -146,6 +148,26 @@ class PosteListSerializer(serializers.ModelSerializer):
         return session.code_acces if session else None
 
 
+class SiteSerializer(serializers.ModelSerializer):
+    """
+    Serializer pour les sites (salles EPN)
+    """
+    nombre_postes = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Site
+        fields = [
+            'id',
+            'nom',
+            'slug',
+            'adresse',
+            'nombre_postes',
+            'created_at',
+            'updated_at'
+        ]
+        read_only_fields = ['id', 'nombre_postes', 'created_at', 'updated_at']
+
+
 class PosteStatsSerializer(serializers.ModelSerializer):
     """
     Serializer pour les statistiques de poste
@@ -336,3 +358,67 @@ class ValidateDiscoverySerializer(serializers.Serializer):
                     f"Un poste avec le nom '{value}' existe déjà"
                 )
         return value
+
+
+class PosteBulkSerializer(serializers.Serializer):
+    """
+    Serializer pour les opérations en masse sur les postes
+    """
+    poste_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+        help_text="IDs des postes"
+    )
+
+
+class CommandePosteSerializer(serializers.ModelSerializer):
+    """
+    Serializer pour les commandes envoyées aux postes
+    """
+    poste_nom = serializers.CharField(source='poste.nom', read_only=True)
+
+    class Meta:
+        model = CommandePoste
+        fields = [
+            'id',
+            'poste',
+            'poste_nom',
+            'type',
+            'payload',
+            'statut',
+            'tentatives',
+            'expire_at',
+            'acquittee_at',
+            'operateur',
+            'created_at'
+        ]
+        read_only_fields = fields
+
+
+class CommandeDiffusionSerializer(serializers.Serializer):
+    """
+    Serializer pour la diffusion d'une commande à la flotte
+    """
+    command = serializers.ChoiceField(
+        choices=['lock', 'message', 'shutdown', 'restart', 'unlock_kiosk'],
+        help_text="Commande à envoyer"
+    )
+    payload = serializers.CharField(required=False, allow_blank=True, help_text="Texte du message")
+    type_poste = serializers.ChoiceField(
+        choices=Poste.TYPE_POSTE_CHOICES,
+        required=False,
+        help_text="Restreindre aux postes de ce type"
+    )
+
+    def validate(self, attrs):
+        if attrs['command'] == 'message' and not attrs.get('payload'):
+            raise serializers.ValidationError({'payload': 'Requis pour la commande "message"'})
+        return attrs
+
+
+class CommandeBulkSerializer(PosteBulkSerializer, CommandeDiffusionSerializer):
+    """
+    Serializer pour l'envoi d'une commande à un lot de postes
+    """
+    type_poste = None
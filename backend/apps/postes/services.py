@@ -0,0 +1,126 @@
+"""
+Opérations en masse sur les postes
+
+Chaque fonction traite un lot de postes en un nombre constant de requêtes
+(UPDATE ... RETURNING conditionnel, écritures et logs en bulk_create, un
+seul recalcul du tableau des places) et regroupe les notifications
+WebSocket en un seul envoi après le commit.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.db import update_returning
+from apps.logs.models import Log
+from .models import Poste, RevokedCertificate
+from .revocation import publish_revocation
+from .seat_board import refresh_seats
+
+
+def validate_many(poste_ids, operateur):
+    """
+    Valide un lot de postes découverts
+
+    Les postes qui ne sont plus en attente de validation sont ignorés.
+
+    Args:
+        poste_ids: IDs des postes à valider
+        operateur: Nom de l'opérateur effectuant l'action
+
+    Returns:
+        Liste des IDs des postes validés
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = update_returning(
+            Poste.objects.filter(
+                pk__in=list(poste_ids),
+                statut='en_attente_validation'
+            ),
+            ('id', 'nom', 'mac_address', 'discovered_hostname'),
+            statut='hors_ligne',
+            validated_by=operateur,
+            validated_at=now,
+            updated_at=now,
+        )
+        if not rows:
+            return []
+
+        Log.objects.bulk_create([
+            Log(
+                action='client_validated',
+                operateur=operateur,
+                details=f"Poste {nom} validé par {operateur}",
+                metadata={
+                    'poste_id': poste_id,
+                    'mac_address': mac_address,
+                    'discovered_hostname': discovered_hostname,
+                }
+            )
+            for poste_id, nom, mac_address, discovered_hostname in rows
+        ])
+
+        poste_ids = [poste_id for poste_id, _, _, _ in rows]
+        refresh_seats(poste_ids)
+
+    return poste_ids
+
+
+def revoke_many(poste_ids, operateur):
+    """
+    Révoque les certificats d'un lot de postes
+
+    Les postes sans certificat ou déjà révoqués sont ignorés. Après le
+    commit, le jeu de révocation et la CRL sont republiés une seule fois
+    et les clients concernés sont déconnectés en un seul envoi.
+
+    Args:
+        poste_ids: IDs des postes
+        operateur: Nom de l'opérateur effectuant l'action
+
+    Returns:
+        Liste des IDs des postes dont le certificat a été révoqué
+    """
+    with transaction.atomic():
+        rows = update_returning(
+            Poste.objects.filter(
+                pk__in=list(poste_ids),
+                certificate_cn__isnull=False,
+                is_certificate_revoked=False
+            ),
+            ('id', 'nom', 'certificate_cn', 'certificate_fingerprint', 'certificate_serial'),
+            is_certificate_revoked=True,
+            updated_at=timezone.now(),
+        )
+        if not rows:
+            return []
+
+        RevokedCertificate.objects.bulk_create([
+            RevokedCertificate(
+                fingerprint=fingerprint,
+                serial=serial,
+                certificate_cn=certificate_cn,
+                poste_id=poste_id,
+                raison='revoked'
+            )
+            for poste_id, _, certificate_cn, fingerprint, serial in rows
+            if fingerprint
+        ], ignore_conflicts=True)
+
+        Log.objects.bulk_create([
+            Log(
+                action='certificate_revoked',
+                operateur=operateur,
+                details=f"Certificat du poste {nom} révoqué",
+                metadata={
+                    'poste_id': poste_id,
+                    'certificate_cn': certificate_cn,
+                }
+            )
+            for poste_id, nom, certificate_cn, _, _ in rows
+        ])
+
+        poste_ids = [row[0] for row in rows]
+        transaction.on_commit(lambda: publish_revocation(poste_ids))
+
+    return poste_ids
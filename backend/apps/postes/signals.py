@@ -0,0 +1,56 @@
+"""
+Signals pour l'app Postes
+Tient à jour le tableau des places (seat board) et la liste de révocation
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Poste
+from . import seat_board
+
+# Champs écrits par le heartbeat : pas de recalcul complet de la place
+CHAMPS_CONNEXION = {'derniere_connexion', 'version_client'}
+
+
+@receiver(post_save, sender=Poste)
+def refresh_seat_on_poste_save(sender, instance, created, update_fields=None, **kwargs):
+    """Recalcule la place du poste à chaque modification"""
+    if update_fields and set(update_fields) <= CHAMPS_CONNEXION:
+        seat_board.update_seat_connexion(instance)
+        return
+    seat_board.refresh_seats([instance.pk])
+
+
+@receiver(post_delete, sender=Poste)
+def remove_seat_on_poste_delete(sender, instance, **kwargs):
+    """Retire la place du tableau à la suppression du poste"""
+    seat_board.remove_seats([(instance.pk, instance.site_id)])
+
+
+@receiver(post_delete, sender=Poste)
+def revoke_certificate_on_poste_delete(sender, instance, **kwargs):
+    """Révoque le certificat d'un poste supprimé (CRL du reverse proxy)"""
+    if instance.certificate_fingerprint and not instance.is_certificate_revoked:
+        from .revocation import revoke_certificate
+        revoke_certificate(
+            fingerprint=instance.certificate_fingerprint,
+            serial=instance.certificate_serial,
+            certificate_cn=instance.certificate_cn,
+            raison='poste_supprime',
+            deconnecter=False
+        )
+
+
+@receiver(post_save, sender='utilisateurs.Utilisateur')
+def refresh_seat_on_utilisateur_save(sender, instance, created, **kwargs):
+    """Répercute un changement de nom sur les places occupées par l'utilisateur"""
+    if created:
+        return
+    from apps.sessions.models import Session
+    poste_ids = Session.objects.filter(
+        utilisateur=instance,
+        statut__in=seat_board.STATUTS_OCCUPANT
+    ).values_list('poste_id', flat=True)
+    poste_ids = list(poste_ids)
+    if poste_ids:
+        seat_board.refresh_seats(poste_ids)
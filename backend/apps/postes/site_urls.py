@@ -0,0 +1,16 @@
+"""
+URLs pour les sites (salles EPN)
+"""
+
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import SiteViewSet
+
+router = DefaultRouter()
+router.register(r'', SiteViewSet, basename='site')
+
+app_name = 'sites'
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,88 @@
+"""
+Découpage par site (salle EPN)
+
+Un opérateur rattaché à des sites ne voit que leurs postes et sessions :
+querysets, statistiques, groupes WebSocket et caches sont restreints à ses
+sites, pour que son coût suive la taille de sa salle et non du parc.
+
+- Requêtes HTTP : paramètre ?site=<slug ou id> (SiteScopedMixin)
+- WebSocket : /ws/sites/<slug ou id>/dashboard/ (seat-board, sessions)
+- Groupes : '<groupe>_<site_id>' (ex: dashboard_3) en plus du groupe global
+"""
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+
+from .models import Site
+
+
+def resoudre_sites(user, site=None):
+    """
+    Sites visibles pour une requête ou une connexion WebSocket
+
+    Args:
+        user: Utilisateur Django
+        site: Slug ou ID du site demandé (optionnel)
+
+    Returns:
+        Liste d'IDs de sites, ou None pour tous les sites
+
+    Raises:
+        Site.DoesNotExist: Site inconnu ou hors des sites de l'opérateur
+    """
+    autorises = Site.objects.ids_operateur(user)
+    if site in (None, ''):
+        return autorises
+
+    critere = Q(slug=str(site))
+    if str(site).isdigit():
+        critere |= Q(pk=int(site))
+    site_id = Site.objects.filter(critere).values_list('pk', flat=True).first()
+    if site_id is None or (autorises is not None and site_id not in autorises):
+        raise Site.DoesNotExist(f"Site inconnu: {site}")
+    return [site_id]
+
+
+def groupe_site(groupe, site_id):
+    """Nom du groupe WebSocket d'un site (ex: dashboard_3)"""
+    return f'{groupe}_{site_id}'
+
+
+def groupes(groupe, sites):
+    """Groupes WebSocket à rejoindre : le groupe global si tous les sites"""
+    if sites is None:
+        return [groupe]
+    return [groupe_site(groupe, site_id) for site_id in sites]
+
+
+class SiteScopedMixin:
+    """
+    ViewSet restreint aux sites de l'opérateur
+
+    Filtre get_queryset() sur champ_site ; ?site=<slug ou id> restreint à
+    un site (404 s'il est inconnu ou hors des sites de l'opérateur).
+    """
+
+    champ_site = 'site'
+
+    def get_sites(self):
+        """IDs des sites de la requête (None : tous), calculés une fois"""
+        if not hasattr(self, '_sites'):
+            try:
+                self._sites = resoudre_sites(self.request.user, self.request.query_params.get('site'))
+            except Site.DoesNotExist:
+                raise NotFound("Site inconnu")
+        return self._sites
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        sites = self.get_sites()
+        if sites is not None:
+            queryset = queryset.filter(**{f'{self.champ_site}__in': sites})
+        return queryset
+
+    def ids_des_sites(self, ids):
+        """IDs parmi ids qui appartiennent aux sites de la requête (opérations en masse)"""
+        if self.get_sites() is None:
+            return list(ids)
+        return list(self.get_queryset().filter(pk__in=ids).values_list('pk', flat=True))
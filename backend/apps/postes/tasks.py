@@ -0,0 +1,96 @@
+"""
+Tâches Celery pour les postes
+"""
+
+from celery import shared_task
+from django.utils import timezone
+from datetime import timedelta
+from .models import CertificateRequest
+from .certificate_manager import get_certificate_manager
+from apps.core.taches import single_flight
+
+
+@shared_task
+def issue_client_certificate(request_id):
+    """
+    Émet le certificat d'une demande d'enregistrement en attente
+    Déclenché par register_client en mode asynchrone ; file par défaut,
+    la génération de clé ne doit pas retarder les tâches temps_reel
+
+    Args:
+        request_id: UUID de la CertificateRequest
+    """
+    cert_request = CertificateRequest.objects.select_related('poste').filter(
+        pk=request_id,
+        statut='pending'
+    ).first()
+    if cert_request is None:
+        return f"Demande {request_id} introuvable ou déjà traitée"
+
+    issued = cert_request.issue()
+
+    # Compléter la réserve de clés maintenant que le client est servi,
+    # dans une tâche à part de la même file (la réserve est par processus)
+    if get_certificate_manager().key_pool_size:
+        fill_certificate_key_pool.delay()
+
+    if not issued:
+        return f"Échec de l'émission pour {cert_request.poste.nom}: {cert_request.error}"
+    return f"Certificat {cert_request.certificate_cn} délivré"
+
+
+@shared_task
+def fill_certificate_key_pool():
+    """
+    Pré-génère des clés clients dans le worker
+    Utile avant l'enregistrement d'une salle entière
+    """
+    added = get_certificate_manager().fill_key_pool()
+    return f"{added} clé(s) pré-générée(s)"
+
+
+@shared_task
+@single_flight()
+def cleanup_certificate_requests(hours=1):
+    """
+    Efface les clés non récupérées à temps (CLIENT_CERT_KEY_TTL) et
+    supprime les demandes de certificat anciennes
+    Exécuté toutes les 5 minutes via Celery Beat
+
+    Args:
+        hours: Âge maximum des demandes conservées (défaut: 1h)
+    """
+    now = timezone.now()
+    expirees = CertificateRequest.expirer_cles(now=now)
+    limite = now - timedelta(hours=hours)
+    deleted_count, _ = CertificateRequest.objects.filter(created_at__lt=limite).delete()
+    return f"{expirees} clé(s) non récupérée(s) effacée(s), {deleted_count} demande(s) de certificat supprimée(s)"
+
+
+@shared_task
+@single_flight()
+def export_crl():
+    """
+    Régénère la CRL pour le reverse proxy
+    Exécuté tous les jours via Celery Beat (la CRL a une date de validité)
+    """
+    from .revocation import export_crl as exporter_crl
+    exporter_crl()
+    return "CRL exportée"
+
+
+@shared_task
+@single_flight()
+def expirer_commandes():
+    """
+    Expire les commandes non acquittées et purge l'historique ancien
+    Exécuté toutes les 5 minutes via Celery Beat
+    """
+    from django.conf import settings
+    from .commandes import expirer
+    from .models import CommandePoste
+
+    expirees = expirer()
+    limite = timezone.now() - timedelta(days=getattr(settings, 'COMMANDES_RETENTION_JOURS', 30))
+    supprimees, _ = CommandePoste.objects.filter(created_at__lt=limite).delete()
+    return f"{expirees} commande(s) expirée(s), {supprimees} supprimée(s)"
@@ -5,7 +5,8 @@ Django Admin pour Sessions
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils import timezone
-from .models import Session
+from .models import FileAttente, Reservation, Session
+from .services import terminate_many, add_time_many
 
 
 @admin.register(Session)
@@ -158,26 +159,45 @@ class SessionAdmin(admin.ModelAdmin):
     @admin.action(description='Terminer les sessions sélectionnées')
     def terminer_sessions(self, request, queryset):
         """Action pour terminer les sessions"""
-        count = 0
-        for session in queryset.filter(statut='active'):
-            session.terminer(operateur=request.user.username, raison='fermeture_admin')
-            count += 1
-        self.message_user(request, f"{count} session(s) terminée(s)")
+        session_ids = queryset.filter(statut='active').values_list('pk', flat=True)
+        terminees = terminate_many(
+            session_ids, operateur=request.user.username, raison='fermeture_admin'
+        )
+        self.message_user(request, f"{len(terminees)} session(s) terminée(s)")
 
     @admin.action(description='Ajouter 15 minutes')
     def ajouter_15_minutes(self, request, queryset):
         """Action pour ajouter 15 minutes"""
-        count = 0
-        for session in queryset.filter(statut='active'):
-            session.ajouter_temps(secondes=900, operateur=request.user.username)
-            count += 1
-        self.message_user(request, f"15 minutes ajoutées à {count} session(s)")
+        session_ids = queryset.filter(statut='active').values_list('pk', flat=True)
+        modifiees = add_time_many(session_ids, secondes=900, operateur=request.user.username)
+        self.message_user(request, f"15 minutes ajoutées à {len(modifiees)} session(s)")
 
     @admin.action(description='Ajouter 30 minutes')
     def ajouter_30_minutes(self, request, queryset):
         """Action pour ajouter 30 minutes"""
-        count = 0
-        for session in queryset.filter(statut='active'):
-            session.ajouter_temps(secondes=1800, operateur=request.user.username)
-            count += 1
-        self.message_user(request, f"30 minutes ajoutées à {count} session(s)")
+        session_ids = queryset.filter(statut='active').values_list('pk', flat=True)
+        modifiees = add_time_many(session_ids, secondes=1800, operateur=request.user.username)
+        self.message_user(request, f"30 minutes ajoutées à {len(modifiees)} session(s)")
+
+
+@admin.register(Reservation)
+class ReservationAdmin(admin.ModelAdmin):
+    """Administration des réservations"""
+
+    list_display = ['poste', 'utilisateur', 'debut', 'fin', 'statut', 'site', 'operateur']
+    list_filter = ['statut', 'site', 'debut']
+    search_fields = ['poste__nom', 'utilisateur__nom', 'utilisateur__prenom', 'operateur']
+    raw_id_fields = ['utilisateur', 'poste', 'session']
+    readonly_fields = ['created_at', 'updated_at']
+    date_hierarchy = 'debut'
+
+
+@admin.register(FileAttente)
+class FileAttenteAdmin(admin.ModelAdmin):
+    """Administration de la file d'attente"""
+
+    list_display = ['utilisateur', 'type_poste', 'site', 'statut', 'poste', 'created_at', 'attribuee_at']
+    list_filter = ['statut', 'type_poste', 'site']
+    search_fields = ['utilisateur__nom', 'utilisateur__prenom', 'operateur']
+    raw_id_fields = ['utilisateur', 'poste', 'session']
+    readonly_fields = ['created_at', 'updated_at', 'attribuee_at']
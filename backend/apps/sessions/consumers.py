@@ -5,12 +5,14 @@ Gère la communication temps réel avec les clients
 
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
 from django.utils import timezone
+from apps.core.async_db import db_sync_to_async
+from apps.core.backpressure import BackpressureConsumerMixin
+from apps.core.instrumentation import InstrumentedConsumerMixin
 from .models import Session
 
 
-class SessionConsumer(AsyncWebsocketConsumer):
+class SessionConsumer(BackpressureConsumerMixin, InstrumentedConsumerMixin, AsyncWebsocketConsumer):
     """
     Consumer WebSocket pour gérer les sessions en temps réel
 
@@ -226,14 +228,14 @@ class SessionConsumer(AsyncWebsocketConsumer):
 
     # Méthodes utilitaires (accès BDD)
 
-    @database_sync_to_async
+    @db_sync_to_async
     def validate_session_code(self, code, ip_address=None):
         """
         Valide un code d'accès et retourne les données de la session
         """
         try:
             code = code.upper().strip()
-            session = Session.objects.get(code_acces=code)
+            session = Session.objects.select_related('poste', 'utilisateur').get(code_acces=code)
 
             # Vérifier le statut
             if session.statut != 'en_attente':
@@ -255,7 +257,7 @@ class SessionConsumer(AsyncWebsocketConsumer):
         except Session.DoesNotExist:
             return None
 
-    @database_sync_to_async
+    @db_sync_to_async
     def start_session(self, session_id):
         """
         Démarre une session
@@ -269,15 +271,20 @@ class SessionConsumer(AsyncWebsocketConsumer):
                     'error': f"La session ne peut pas être démarrée (statut: {session.get_statut_display()})"
                 }
 
-            if not session.poste.est_disponible:
+            # Démarrer la session (UPDATE conditionnels sur les statuts de la
+            # session et du poste)
+            if not session.demarrer(exiger_poste_disponible=True):
+                session.refresh_from_db(fields=['statut'])
+                if session.statut == 'en_attente':
+                    return {
+                        'success': False,
+                        'error': f"Le poste {session.poste.nom} n'est pas disponible"
+                    }
                 return {
                     'success': False,
-                    'error': f"Le poste {session.poste.nom} n'est pas disponible"
+                    'error': "La session a déjà été démarrée"
                 }
 
-            # Démarrer la session
-            session.demarrer()
-
             return {
                 'success': True,
                 'session': {
@@ -294,7 +301,7 @@ class SessionConsumer(AsyncWebsocketConsumer):
                 'error': 'Session introuvable'
             }
 
-    @database_sync_to_async
+    @db_sync_to_async
     def get_session_time(self, session_id):
         """
         Récupère le temps restant d'une session
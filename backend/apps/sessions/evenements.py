@@ -0,0 +1,191 @@
+"""
+Journal des événements de session, rejoués à la reconnexion du kiosque
+
+Les événements qu'un kiosque ne doit pas manquer (time_added,
+session_warning, extension_response, session_terminated) reçoivent un
+numéro de séquence par session ('seq') et sont conservés dans un tampon
+borné :
+
+    evenements:session:<id>       → stream Redis (XADD MAXLEN ~ SESSION_EVENTS_MAXLEN)
+    evenements:session:<id>:seq   → dernier numéro attribué (INCR)
+
+Les deux opérations passent par un script Lua : une requête réseau par
+événement, numéros strictement croissants quel que soit le worker qui
+publie. Les clés expirent SESSION_EVENTS_TTL secondes après le dernier
+événement.
+
+À la reconnexion, le kiosque envoie le dernier 'seq' reçu (resume_from) ;
+ClientConsumer lui renvoie les seuls événements suivants (depuis).
+Si le tampon ne remonte plus jusque-là, le rejeu est incomplet et le
+kiosque resynchronise son état (get_time).
+
+Sans Redis (SESSION_EVENTS_REDIS désactivé : DEBUG, tests), le journal vit
+en mémoire du processus. Si Redis ne répond pas, l'événement est envoyé
+sans 'seq' (non rejouable) plutôt que retardé.
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Types de messages journalisés (handlers de ClientConsumer)
+TYPES_REJOUABLES = ('time_added', 'session_warning', 'extension_response', 'session_terminated')
+
+# KEYS[1] = stream, KEYS[2] = compteur ; ARGV = longueur max, TTL, message JSON
+PUBLIER_LUA = """
+local seq = redis.call('INCR', KEYS[2])
+redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '0-' .. seq, 'm', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return seq
+"""
+
+
+def _maxlen():
+    return getattr(settings, 'SESSION_EVENTS_MAXLEN', 50)
+
+
+def _ttl():
+    return getattr(settings, 'SESSION_EVENTS_TTL', 3600)
+
+
+class MemoryJournal:
+    """Tampon en mémoire locale (un processus : développement, tests)"""
+
+    def __init__(self):
+        self._evenements = {}
+        self._seq = {}
+        self._lock = threading.Lock()
+
+    def publier(self, session_id, message):
+        with self._lock:
+            seq = self._seq[session_id] = self._seq.get(session_id, 0) + 1
+            tampon = self._evenements.setdefault(session_id, deque(maxlen=_maxlen()))
+            tampon.append({**message, 'seq': seq})
+            return seq
+
+    def depuis(self, session_id, seq):
+        with self._lock:
+            tampon = list(self._evenements.get(session_id, ()))
+        return [message for message in tampon if message['seq'] > seq]
+
+    def dernier(self, session_id):
+        with self._lock:
+            return self._seq.get(session_id, 0)
+
+    def reset(self):
+        with self._lock:
+            self._evenements.clear()
+            self._seq.clear()
+
+
+class RedisJournal:
+    """Tampon partagé dans Redis (stream borné par session)"""
+
+    def __init__(self, url, prefix='evenements:session'):
+        import redis
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._script = self._client.register_script(PUBLIER_LUA)
+        self._prefix = prefix
+
+    def _cles(self, session_id):
+        cle = f'{self._prefix}:{session_id}'
+        return [cle, f'{cle}:seq']
+
+    def publier(self, session_id, message):
+        return int(self._script(
+            keys=self._cles(session_id),
+            args=[_maxlen(), _ttl(), json.dumps(message)]
+        ))
+
+    def depuis(self, session_id, seq):
+        entrees = self._client.xrange(self._cles(session_id)[0], min=f'0-{seq + 1}', max='+')
+        return [
+            {**json.loads(champs[b'm']), 'seq': int(entree_id.split(b'-')[1])}
+            for entree_id, champs in entrees
+        ]
+
+    def dernier(self, session_id):
+        return int(self._client.get(self._cles(session_id)[1]) or 0)
+
+    def reset(self):
+        for cle in self._client.scan_iter(f'{self._prefix}:*'):
+            self._client.delete(cle)
+
+
+_memory_journal = MemoryJournal()
+_redis_journal = None
+
+
+def get_journal():
+    """Retourne le journal Redis si configuré, sinon le journal mémoire"""
+    global _redis_journal
+    if not getattr(settings, 'SESSION_EVENTS_REDIS', False):
+        return _memory_journal
+    if _redis_journal is None:
+        _redis_journal = RedisJournal(settings.SESSION_EVENTS_REDIS_URL)
+    return _redis_journal
+
+
+def publier(session_id, message):
+    """
+    Numérote et journalise un événement de session
+
+    Returns:
+        Le message avec son numéro 'seq' (sans 'seq' si le journal est
+        indisponible)
+    """
+    try:
+        seq = get_journal().publier(session_id, message)
+    except Exception as e:
+        logger.warning(f"Événement {message['type']} de la session {session_id} non journalisé: {e}")
+        return message
+    return {**message, 'seq': seq}
+
+
+def publier_many(evenements):
+    """
+    Journalise un lot d'événements (opérations en masse)
+
+    Args:
+        evenements: Liste de tuples (session_id, message)
+
+    Returns:
+        Liste de tuples (groupe session_<id>, message numéroté) pour send_many
+    """
+    return [(f'session_{session_id}', publier(session_id, message)) for session_id, message in evenements]
+
+
+def depuis(session_id, seq):
+    """
+    Événements d'une session postérieurs à seq, dans l'ordre
+
+    Returns:
+        (evenements, complet) : complet est False si des événements
+        postérieurs à seq ne sont plus dans le tampon
+    """
+    journal = get_journal()
+    dernier = journal.dernier(session_id)
+    complet = True
+    if seq > dernier:
+        # Journal expiré entre-temps : la numérotation est repartie de zéro
+        seq, complet = 0, False
+    evenements = journal.depuis(session_id, seq)
+    return evenements, complet and len(evenements) >= dernier - seq
+
+
+# Variante pour les consumers : l'appel Redis ne bloque pas la boucle d'événements
+adepuis = sync_to_async(depuis, thread_sensitive=False)
+
+
+def reset_journal():
+    """Vide le journal (tests)"""
+    _memory_journal.reset()
+    if _redis_journal is not None:
+        _redis_journal.reset()
@@ -0,0 +1,198 @@
+"""
+File d'attente des postes et attribution automatique
+
+Quand un poste se libère (fin ou expiration de session, créneau réservé
+non honoré), postes_liberes déclenche après le commit la tâche
+attribuer_postes, qui attribue chaque poste libre au premier inscrit
+compatible :
+
+- Les postes libres et les inscriptions sont verrouillés (SELECT ... FOR
+  UPDATE SKIP LOCKED) : deux attributions concurrentes ne prennent jamais
+  le même poste ni le même usager.
+- La session est créée en attente (code d'accès), le poste passe en
+  'reserve' et l'accueil est prévenu par WebSocket (groupe 'sessions',
+  message 'place_attribuee').
+- Un poste réservé plus tard n'est attribué qu'à un usager dont la session
+  se termine avant l'ouverture du créneau.
+- Un usager qui ne s'est pas présenté après FILE_ATTENTE_DELAI_PRESENTATION
+  secondes perd son poste, attribué au suivant (tâche traiter_file_attente,
+  qui rattrape aussi les libérations manquées).
+"""
+
+import datetime
+import functools
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from apps.core.db import update_returning
+from apps.postes.models import Poste
+
+from .models import FileAttente, Reservation, Session
+
+logger = logging.getLogger(__name__)
+
+# Sessions qui retiennent un poste (une session en attente y est attendue)
+STATUTS_RETENANT = ('en_attente', 'active', 'suspendue')
+
+
+def inscrire(utilisateur, duree, operateur, type_poste=None, site=None, notes=None):
+    """
+    Inscrit un usager dans la file d'attente
+
+    Un poste compatible déjà libre lui est attribué aussitôt (après le
+    commit).
+
+    Raises:
+        ValueError: L'usager est déjà dans la file
+    """
+    try:
+        with transaction.atomic():
+            entree = FileAttente.objects.create(
+                utilisateur=utilisateur,
+                duree_initiale=duree,
+                type_poste=type_poste or None,
+                site=site,
+                operateur=operateur,
+                notes=notes,
+            )
+    except IntegrityError:
+        raise ValueError(f"{utilisateur.get_full_name()} est déjà dans la file d'attente")
+    postes_liberes()
+    return entree
+
+
+def postes_liberes(poste_ids=None):
+    """
+    Signale des postes redevenus disponibles (None : tous)
+
+    L'attribution est lancée après le commit, et seulement si la file
+    n'est pas vide.
+    """
+    if poste_ids is not None:
+        poste_ids = list(poste_ids)
+    transaction.on_commit(functools.partial(_declencher, poste_ids), robust=True)
+
+
+def _declencher(poste_ids):
+    if not FileAttente.objects.filter(statut='en_attente').exists():
+        return
+    from .tasks import attribuer_postes
+    attribuer_postes.delay(poste_ids)
+
+
+def attribuer(poste_ids=None):
+    """
+    Attribue les postes libres aux premiers inscrits compatibles
+
+    Args:
+        poste_ids: Postes à considérer (None : tous les postes libres)
+
+    Returns:
+        Liste des inscriptions attribuées
+    """
+    now = timezone.now()
+    avance = datetime.timedelta(seconds=getattr(settings, 'RESERVATION_AVANCE', 300))
+    attribuees = []
+
+    with transaction.atomic():
+        postes = Poste.objects.select_for_update(skip_locked=True).filter(statut='disponible').exclude(
+            Exists(Session.objects.filter(poste=OuterRef('pk'), statut__in=STATUTS_RETENANT))
+        ).annotate(
+            prochaine_reservation=Subquery(
+                Reservation.objects.filter(poste=OuterRef('pk'), fin__gt=now).actives()
+                .order_by('debut').values('debut')[:1]
+            )
+        ).order_by('pk')
+        if poste_ids is not None:
+            postes = postes.filter(pk__in=poste_ids)
+
+        for poste in postes:
+            inscrits = FileAttente.objects.select_for_update(skip_locked=True, of=('self',)).select_related(
+                'utilisateur'
+            ).filter(
+                Q(type_poste__isnull=True) | Q(type_poste=poste.type_poste),
+                Q(site__isnull=True) | Q(site_id=poste.site_id),
+                statut='en_attente',
+            ).exclude(pk__in=[entree.pk for entree in attribuees])
+            if poste.prochaine_reservation is not None:
+                # La session doit se terminer avant l'ouverture du créneau
+                limite = (poste.prochaine_reservation - avance - now).total_seconds()
+                inscrits = inscrits.filter(duree_initiale__lte=limite)
+            entree = inscrits.order_by('created_at', 'pk').first()
+            if entree is None:
+                continue
+
+            session = Session.objects.create(
+                utilisateur_id=entree.utilisateur_id,
+                poste=poste,
+                duree_initiale=entree.duree_initiale,
+                operateur=entree.operateur,
+                notes=f"File d'attente #{entree.pk}",
+            )
+            update_returning(
+                Poste.objects.filter(pk=poste.pk, statut='disponible'), (),
+                statut='reserve', updated_at=now
+            )
+            entree._transition(
+                ('en_attente',), 'attribuee', poste=poste, session=session, attribuee_at=now
+            )
+            attribuees.append(entree)
+
+        if attribuees:
+            from apps.postes.seat_board import refresh_seats
+            refresh_seats([entree.poste_id for entree in attribuees])
+            transaction.on_commit(functools.partial(_notifier, attribuees), robust=True)
+
+    if attribuees:
+        logger.info(f"File d'attente : {len(attribuees)} poste(s) attribué(s)")
+    return attribuees
+
+
+def _notifier(attribuees):
+    """Prévient l'accueil (groupe 'sessions' et groupe du site)"""
+    from apps.postes.sites import groupe_site
+    from .websocket_utils import send_many
+
+    messages = []
+    for entree in attribuees:
+        message = {
+            'type': 'place_attribuee',
+            'data': {
+                'attente_id': entree.pk,
+                'utilisateur': entree.utilisateur.get_full_name(),
+                'poste_id': entree.poste_id,
+                'poste': entree.poste.nom,
+                'session_id': entree.session_id,
+                'code_acces': entree.session.code_acces,
+                'site_id': entree.poste.site_id,
+            },
+        }
+        messages.append(('sessions', message))
+        if entree.poste.site_id is not None:
+            messages.append((groupe_site('sessions', entree.poste.site_id), message))
+    send_many(messages)
+
+
+def liberer_absents(now=None):
+    """
+    Reprend les postes attribués dont l'usager ne s'est pas présenté
+
+    Returns:
+        Nombre d'inscriptions passées en 'absente'
+    """
+    now = now or timezone.now()
+    delai = datetime.timedelta(seconds=getattr(settings, 'FILE_ATTENTE_DELAI_PRESENTATION', 300))
+
+    absents = 0
+    for entree in FileAttente.objects.filter(
+        statut='attribuee', session__statut='en_attente', attribuee_at__lte=now - delai
+    ).select_related('session'):
+        if not entree._transition(('attribuee',), 'absente'):
+            continue
+        entree.session.terminer_avant_demarrage(operateur='system', raison='absence_file_attente')
+        absents += 1
+    return absents
@@ -0,0 +1,16 @@
+"""
+URLs pour la file d'attente des postes
+"""
+
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import FileAttenteViewSet
+
+router = DefaultRouter()
+router.register(r'', FileAttenteViewSet, basename='file-attente')
+
+app_name = 'file_attente'
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
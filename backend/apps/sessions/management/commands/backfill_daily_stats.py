@@ -0,0 +1,46 @@
+"""
+Commande Django pour (re)calculer les statistiques quotidiennes
+Utile à la mise en place de la table de faits ou après une correction
+de données ; la tâche consolider_statistiques prend ensuite le relais
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.sessions.statistiques import consolider
+
+
+class Command(BaseCommand):
+    """Consolide les statistiques quotidiennes sur une période"""
+
+    help = (
+        "Recalcule la table des statistiques quotidiennes (par défaut depuis "
+        "la plus ancienne session conservée jusqu'à hier)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--depuis', help="Premier jour (AAAA-MM-JJ)")
+        parser.add_argument('--jusqu-a', dest='jusqu_a', help="Dernier jour inclus (AAAA-MM-JJ)")
+
+    def handle(self, *args, **options):
+        depuis = self._parse_date(options['depuis'])
+        jusqu_a = self._parse_date(options['jusqu_a'])
+
+        jours = consolider(depuis=depuis or date.min, jusqu_a=jusqu_a)
+
+        if jours:
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(jours)} jour(s) consolidé(s) du {jours[0]} au {jours[-1]}'
+            ))
+        else:
+            self.stdout.write('Aucun jour à consolider')
+
+    @staticmethod
+    def _parse_date(value):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Date invalide: {value} (format attendu AAAA-MM-JJ)")
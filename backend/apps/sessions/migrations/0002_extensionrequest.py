@@ -7,7 +7,7 @@ import django.db.models.deletion
 class Migration(migrations.Migration):
 
     dependencies = [
-        ('sessions', '0001_initial'),
+        ('poste_sessions', '0001_initial'),
     ]
 
     operations = [
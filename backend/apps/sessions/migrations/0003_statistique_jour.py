@@ -0,0 +1,47 @@
+# Generated manually
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postes', '0007_certificate_revocation'),
+        ('poste_sessions', '0002_extensionrequest'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['fin_session'], name='sessions_fin_ses_196be8_idx'),
+        ),
+        migrations.CreateModel(
+            name='StatistiqueJour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(verbose_name='Jour')),
+                ('sessions_creees', models.PositiveIntegerField(default=0, verbose_name='Sessions créées')),
+                ('sessions_invites', models.PositiveIntegerField(default=0, verbose_name='Sessions invités')),
+                ('sessions_inscrits', models.PositiveIntegerField(default=0, verbose_name='Sessions utilisateurs inscrits')),
+                ('secondes_ajoutees', models.PositiveIntegerField(default=0, verbose_name='Temps ajouté (secondes)')),
+                ('sessions_demarrees', models.PositiveIntegerField(default=0, verbose_name='Sessions démarrées')),
+                ('sessions_terminees', models.PositiveIntegerField(default=0, verbose_name='Sessions terminées')),
+                ('sessions_expirees', models.PositiveIntegerField(default=0, verbose_name='Sessions expirées')),
+                ('secondes_utilisees', models.PositiveIntegerField(default=0, verbose_name='Temps utilisé (secondes)')),
+                ('duree_initiale_totale', models.PositiveIntegerField(default=0, help_text='Somme des durées initiales des sessions terminées ou expirées', verbose_name='Durée initiale totale (secondes)')),
+                ('demandes_prolongation', models.PositiveIntegerField(default=0, verbose_name='Demandes de prolongation')),
+                ('prolongations_accordees', models.PositiveIntegerField(default=0, verbose_name='Prolongations accordées')),
+                ('consolide_le', models.DateTimeField(auto_now=True, verbose_name='Date de consolidation')),
+                ('poste', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statistiques', to='postes.poste', verbose_name='Poste')),
+            ],
+            options={
+                'verbose_name': 'Statistique quotidienne',
+                'verbose_name_plural': 'Statistiques quotidiennes',
+                'db_table': 'statistiques_jour',
+                'ordering': ['-jour'],
+                'indexes': [models.Index(fields=['jour'], name='statistique_jour_f6e7e4_idx')],
+                'constraints': [models.UniqueConstraint(fields=('poste', 'jour'), name='unique_statistique_poste_jour')],
+            },
+        ),
+    ]
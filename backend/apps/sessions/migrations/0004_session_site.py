@@ -0,0 +1,44 @@
+# Generated manually
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def rattacher_sessions(apps, schema_editor):
+    """Rattache les sessions existantes au site de leur poste"""
+    Session = apps.get_model('poste_sessions', 'Session')
+    Poste = apps.get_model('postes', 'Poste')
+
+    Session.objects.update(
+        site_id=models.Subquery(
+            Poste.objects.filter(pk=models.OuterRef('poste_id')).values('site_id')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poste_sessions', '0003_statistique_jour'),
+        ('postes', '0008_site'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='site',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='sessions',
+                to='postes.site',
+                verbose_name='Site'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['site', 'statut'], name='sessions_site_id_1ac112_idx'),
+        ),
+        migrations.RunPython(rattacher_sessions, migrations.RunPython.noop),
+    ]
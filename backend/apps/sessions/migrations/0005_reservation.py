@@ -0,0 +1,115 @@
+# Generated manually
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def ajouter_exclusion(apps, schema_editor):
+    """
+    PostgreSQL : deux réservations actives d'un même poste ne peuvent pas
+    se chevaucher (contrainte d'exclusion sur l'intervalle [debut, fin))
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        "ALTER TABLE reservations ADD CONSTRAINT reservation_sans_chevauchement "
+        "EXCLUDE USING gist (poste_id WITH =, tstzrange(debut, fin, '[)') WITH &&) "
+        "WHERE (statut IN ('confirmee', 'honoree'))"
+    )
+
+
+def retirer_exclusion(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE reservations DROP CONSTRAINT IF EXISTS reservation_sans_chevauchement')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poste_sessions', '0004_session_site'),
+        ('postes', '0008_site'),
+        ('utilisateurs', '0003_compteur_sessions_jour'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('debut', models.DateTimeField(verbose_name='Début du créneau')),
+                ('fin', models.DateTimeField(verbose_name='Fin du créneau')),
+                ('statut', models.CharField(
+                    choices=[
+                        ('confirmee', 'Confirmée'),
+                        ('honoree', 'Honorée'),
+                        ('annulee', 'Annulée'),
+                        ('absente', 'Absent'),
+                    ],
+                    default='confirmee',
+                    max_length=20,
+                    verbose_name='Statut'
+                )),
+                ('operateur', models.CharField(
+                    help_text="Nom de l'opérateur ayant créé la réservation",
+                    max_length=100,
+                    verbose_name='Opérateur'
+                )),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Notes')),
+                ('poste', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='reservations',
+                    to='postes.poste',
+                    verbose_name='Poste'
+                )),
+                ('session', models.OneToOneField(
+                    blank=True,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='reservation',
+                    to='poste_sessions.session',
+                    verbose_name='Session'
+                )),
+                ('site', models.ForeignKey(
+                    blank=True,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='reservations',
+                    to='postes.site',
+                    verbose_name='Site'
+                )),
+                ('utilisateur', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='reservations',
+                    to='utilisateurs.utilisateur',
+                    verbose_name='Utilisateur'
+                )),
+            ],
+            options={
+                'verbose_name': 'Réservation',
+                'verbose_name_plural': 'Réservations',
+                'db_table': 'reservations',
+                'ordering': ['debut'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['poste', 'debut', 'fin'], name='reservation_poste_i_350258_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['site', 'debut'], name='reservation_site_id_e77289_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['statut', 'debut'], name='reservation_statut_0c4a65_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.CheckConstraint(check=models.Q(('fin__gt', models.F('debut'))), name='reservation_fin_apres_debut'),
+        ),
+        migrations.RunPython(ajouter_exclusion, retirer_exclusion),
+    ]
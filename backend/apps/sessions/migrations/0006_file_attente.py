@@ -0,0 +1,102 @@
+# Generated manually
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poste_sessions', '0005_reservation'),
+        ('postes', '0008_site'),
+        ('utilisateurs', '0003_compteur_sessions_jour'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileAttente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('type_poste', models.CharField(
+                    blank=True,
+                    choices=[('bureautique', 'Bureautique'), ('gaming', 'Gaming')],
+                    max_length=20,
+                    null=True,
+                    verbose_name='Type de poste souhaité'
+                )),
+                ('duree_initiale', models.IntegerField(
+                    validators=[django.core.validators.MinValueValidator(60)],
+                    verbose_name='Durée de la session (secondes)'
+                )),
+                ('statut', models.CharField(
+                    choices=[
+                        ('en_attente', 'En attente'),
+                        ('attribuee', 'Poste attribué'),
+                        ('annulee', 'Annulée'),
+                        ('absente', 'Absent'),
+                    ],
+                    default='en_attente',
+                    max_length=20,
+                    verbose_name='Statut'
+                )),
+                ('attribuee_at', models.DateTimeField(blank=True, null=True, verbose_name="Date d'attribution")),
+                ('operateur', models.CharField(
+                    help_text="Nom de l'opérateur ayant inscrit l'usager",
+                    max_length=100,
+                    verbose_name='Opérateur'
+                )),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Notes')),
+                ('poste', models.ForeignKey(
+                    blank=True,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='attributions',
+                    to='postes.poste',
+                    verbose_name='Poste attribué'
+                )),
+                ('session', models.OneToOneField(
+                    blank=True,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='attente',
+                    to='poste_sessions.session',
+                    verbose_name='Session'
+                )),
+                ('site', models.ForeignKey(
+                    blank=True,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    related_name='attentes',
+                    to='postes.site',
+                    verbose_name='Site'
+                )),
+                ('utilisateur', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='attentes',
+                    to='utilisateurs.utilisateur',
+                    verbose_name='Utilisateur'
+                )),
+            ],
+            options={
+                'verbose_name': "Inscription en file d'attente",
+                'verbose_name_plural': "File d'attente",
+                'db_table': 'file_attente',
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='fileattente',
+            index=models.Index(fields=['statut', 'created_at'], name='file_attent_statut_974d1d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='fileattente',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('statut', 'en_attente')),
+                fields=('utilisateur',),
+                name='file_attente_une_inscription'
+            ),
+        ),
+    ]
@@ -2,13 +2,56 @@
 Modèle Session pour la gestion des sessions utilisateurs
 """
 
+import datetime
+import functools
 import secrets
 import string
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Value, When
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from django.conf import settings
-from apps.core.models import TimeStampedModel
+from apps.core.db import update_returning
+from apps.core.http_cache import invalider_modele
+from apps.core.models import SiteScopedQuerySet, TimeStampedModel
+from apps.postes.models import Poste
+
+
+def _decompter_suppressions(queryset):
+    """
+    Décrémente les compteurs journaliers des sessions supprimées
+
+    Seules les sessions créées aujourd'hui sont décomptées : le quota ne lit
+    que le compteur du jour. La purge des vieilles sessions ne coûte ainsi
+    qu'une requête de plus, et reste un DELETE en masse : aucun receveur
+    post_delete n'est branché sur Session.
+    """
+    from apps.utilisateurs.models import CompteurSessionsJour
+
+    debut_du_jour = timezone.make_aware(
+        datetime.datetime.combine(timezone.localdate(), datetime.time.min)
+    )
+    comptes = (
+        queryset.filter(created_at__gte=debut_du_jour)
+        .order_by()
+        .values('utilisateur_id')
+        .annotate(nombre=Count('pk'))
+    )
+    for compte in comptes:
+        CompteurSessionsJour.incrementer(compte['utilisateur_id'], delta=-compte['nombre'])
+
+
+class SessionQuerySet(SiteScopedQuerySet):
+    """QuerySet des sessions"""
+
+    def delete(self):
+        """Supprime les sessions en tenant à jour le compteur du jour et le cache"""
+        with transaction.atomic(using=self.db):
+            _decompter_suppressions(self)
+            resultat = super().delete()
+        if resultat[0]:
+            invalider_modele(self.model)
+        return resultat
 
 
 class Session(TimeStampedModel):
@@ -25,6 +68,9 @@ class Session(TimeStampedModel):
         ('expiree', 'Expirée'),
     ]
 
+    # Statuts d'une session non terminée (modifiable par les transitions)
+    STATUTS_MODIFIABLES = ('en_attente', 'active', 'suspendue')
+
     # Relations
     utilisateur = models.ForeignKey(
         'utilisateurs.Utilisateur',
@@ -38,6 +84,15 @@ class Session(TimeStampedModel):
         related_name='sessions',
         verbose_name="Poste"
     )
+    # Site du poste à la création (dénormalisé : listes et stats par site sans jointure)
+    site = models.ForeignKey(
+        'postes.Site',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='sessions',
+        verbose_name="Site"
+    )
 
     # Code d'accès
     code_acces = models.CharField(
@@ -96,6 +151,8 @@ class Session(TimeStampedModel):
         verbose_name="Notes"
     )
 
+    objects = SessionQuerySet.as_manager()
+
     class Meta:
         db_table = 'sessions'
         ordering = ['-created_at']
@@ -103,9 +160,11 @@ class Session(TimeStampedModel):
         verbose_name_plural = 'Sessions'
         indexes = [
             models.Index(fields=['statut']),
+            models.Index(fields=['site', 'statut']),
             models.Index(fields=['code_acces']),
             models.Index(fields=['utilisateur', 'poste']),
             models.Index(fields=['debut_session']),
+            models.Index(fields=['fin_session']),
             models.Index(fields=['-created_at']),
         ]
 
@@ -142,8 +201,21 @@ class Session(TimeStampedModel):
         if not self.pk and not self.temps_restant:
             self.temps_restant = self.duree_initiale
 
+        # Nouvelle session : rattachée au site de son poste
+        if not self.pk and self.site_id is None and self.poste_id:
+            self.site_id = self.poste.site_id
+
         super().save(*args, **kwargs)
 
+    def delete(self, *args, **kwargs):
+        """Override delete pour tenir à jour le compteur du jour et le cache"""
+        site_id = self.site_id
+        with transaction.atomic():
+            _decompter_suppressions(Session.objects.filter(pk=self.pk))
+            resultat = super().delete(*args, **kwargs)
+        invalider_modele(Session, sites=[site_id])
+        return resultat
+
     @property
     def duree_totale(self):
         """Durée totale = initiale + ajoutée"""
@@ -179,6 +251,50 @@ class Session(TimeStampedModel):
         """Retourne True si c'est une session invité"""
         return self.utilisateur.is_guest
 
+    def _transition(self, statuts, returning=(), condition=None, invalider=True, **values):
+        """
+        Applique une transition par un UPDATE conditionnel (WHERE statut IN statuts)
+
+        Aucune lecture préalable ni verrou : la base n'écrit que si la session
+        est encore dans un des statuts attendus, et renvoie l'état écrit.
+        L'instance est synchronisée avec cet état.
+
+        Args:
+            statuts: Statuts autorisés pour la transition
+            returning: Champs calculés en base (F(), Case) à relire
+            condition: Q optionnel ajouté à la garde sur le statut
+            invalider: Faux pour ne pas invalider le cache des endpoints
+                (décompte du temps restant)
+            **values: Champs à mettre à jour
+
+        Returns:
+            True si la transition a eu lieu, False si le statut avait changé
+        """
+        values.setdefault('updated_at', timezone.now())
+        queryset = Session.objects.filter(pk=self.pk, statut__in=statuts)
+        if condition is not None:
+            queryset = queryset.filter(condition)
+        rows = update_returning(
+            queryset,
+            returning,
+            invalider=invalider,
+            **values
+        )
+        if not rows:
+            return False
+
+        for name, value in values.items():
+            if not hasattr(value, 'resolve_expression'):
+                setattr(self, name, value)
+        for name, value in zip(returning, rows[0]):
+            setattr(self, name, value)
+        return True
+
+    def _rafraichir_place(self):
+        """Répercute l'état de la session sur le tableau des places"""
+        from apps.postes.seat_board import refresh_seats
+        refresh_seats([self.poste_id])
+
     def ajouter_temps(self, secondes, operateur):
         """
         Ajoute du temps à la session
@@ -186,10 +302,18 @@ class Session(TimeStampedModel):
         Args:
             secondes: Nombre de secondes à ajouter
             operateur: Nom de l'opérateur effectuant l'action
+
+        Returns:
+            True si le temps a été ajouté, False si la session est terminée
         """
-        self.temps_restant += secondes
-        self.temps_ajoute += secondes
-        self.save(update_fields=['temps_restant', 'temps_ajoute', 'updated_at'])
+        ajoute = self._transition(
+            self.STATUTS_MODIFIABLES,
+            returning=('temps_restant', 'temps_ajoute', 'statut'),
+            temps_restant=F('temps_restant') + secondes,
+            temps_ajoute=F('temps_ajoute') + secondes,
+        )
+        if not ajoute:
+            return False
 
         # Créer un log
         from apps.logs.models import Log
@@ -199,32 +323,93 @@ class Session(TimeStampedModel):
             operateur=operateur,
             details=f"{secondes // 60} minutes ajoutées à la session {self.code_acces}"
         )
+        self._rafraichir_place()
+        return True
+
+    def demarrer(self, exiger_poste_disponible=False):
+        """
+        Démarre la session
 
-    def demarrer(self):
-        """Démarre la session"""
-        self.statut = 'active'
-        self.debut_session = timezone.now()
-        self.save(update_fields=['statut', 'debut_session', 'updated_at'])
+        Une seule transaction : la session passe active (UPDATE conditionnel),
+        puis un seul UPDATE du poste (statut occupé et compteur de sessions)
+        et la mise à jour de sa place. Le log et les statistiques de
+        l'utilisateur sont écrits après le commit.
 
-        # Marquer le poste comme occupé
-        self.poste.marquer_occupe()
+        Args:
+            exiger_poste_disponible: Refuser le démarrage si le poste n'est
+                pas disponible (ou réservé pour cette session) ou porte déjà
+                une session active (vérifié par la garde de l'UPDATE du
+                poste, sans lecture préalable)
 
-        # Mettre à jour les stats de l'utilisateur
-        self.utilisateur.nombre_sessions_total += 1
-        self.utilisateur.derniere_session = timezone.now()
-        self.utilisateur.save(update_fields=['nombre_sessions_total', 'derniere_session', 'updated_at'])
+        Returns:
+            True si la session a démarré, False si elle n'était plus en attente
+            ou si le poste n'était pas disponible (rien n'est alors modifié)
+        """
+        now = timezone.now()
+        avant = {name: getattr(self, name) for name in ('statut', 'debut_session', 'temps_restant', 'updated_at')}
 
-        # Mettre à jour les stats du poste
-        self.poste.nombre_sessions_total += 1
-        self.poste.save(update_fields=['nombre_sessions_total', 'updated_at'])
+        with transaction.atomic():
+            demarree = self._transition(
+                ('en_attente',),
+                returning=('temps_restant',),
+                statut='active',
+                debut_session=now,
+            )
+            if not demarree:
+                return False
 
-        # Log
+            postes = Poste.objects.filter(pk=self.poste_id)
+            if exiger_poste_disponible:
+                # Un poste réservé n'accepte que la session qui lui a été
+                # attribuée (réservation ou file d'attente)
+                attribuee = (
+                    Q(Exists(Reservation.objects.filter(poste=OuterRef('pk'), session_id=self.pk)))
+                    | Q(Exists(FileAttente.objects.filter(poste=OuterRef('pk'), session_id=self.pk)))
+                )
+                postes = postes.filter(
+                    Q(statut='disponible') | Q(attribuee, statut='reserve')
+                ).exclude(
+                    Exists(Session.objects.filter(poste=OuterRef('pk'), statut='active').exclude(pk=self.pk))
+                )
+            rows = update_returning(
+                postes,
+                ('nom',),
+                statut='occupe',
+                nombre_sessions_total=F('nombre_sessions_total') + 1,
+                updated_at=now
+            )
+            if not rows:
+                transaction.set_rollback(True)
+                for name, value in avant.items():
+                    setattr(self, name, value)
+                return False
+
+            if Session.poste.is_cached(self):
+                self.poste.statut = 'occupe'
+            self._rafraichir_place()
+
+        transaction.on_commit(
+            functools.partial(self._apres_demarrage, now, rows[0][0]), robust=True
+        )
+        return True
+
+    def _apres_demarrage(self, now, poste_nom):
+        """Effets secondaires du démarrage, exécutés après le commit"""
         from apps.logs.models import Log
+        from apps.utilisateurs.models import Utilisateur
+
+        # Statistiques de l'utilisateur
+        Utilisateur.objects.filter(pk=self.utilisateur_id).update(
+            nombre_sessions_total=F('nombre_sessions_total') + 1,
+            derniere_session=now,
+            updated_at=now
+        )
+
         Log.objects.create(
             session=self,
             action='demarrage_session',
             operateur=self.operateur,
-            details=f"Session {self.code_acces} démarrée sur {self.poste.nom}"
+            details=f"Session {self.code_acces} démarrée sur {poste_nom}"
         )
 
     def terminer(self, operateur, raison='fermeture_normale'):
@@ -234,14 +419,23 @@ class Session(TimeStampedModel):
         Args:
             operateur: Nom de l'opérateur effectuant l'action
             raison: Raison de la fermeture (fermeture_normale, expiration, fermeture_forcee)
+
+        Returns:
+            True si la session a été terminée, False si elle l'était déjà
         """
-        self.statut = 'terminee'
-        self.fin_session = timezone.now()
-        self.temps_restant = 0
-        self.save(update_fields=['statut', 'fin_session', 'temps_restant', 'updated_at'])
+        terminee = self._transition(
+            self.STATUTS_MODIFIABLES,
+            statut='terminee',
+            fin_session=timezone.now(),
+            temps_restant=0,
+        )
+        if not terminee:
+            return False
 
-        # Libérer le poste
+        # Libérer le poste (attribué au premier de la file d'attente)
+        from .file_attente import postes_liberes
         self.poste.marquer_disponible()
+        postes_liberes([self.poste_id])
 
         # Log
         from apps.logs.models import Log
@@ -251,11 +445,46 @@ class Session(TimeStampedModel):
             operateur=operateur,
             details=f"Session {self.code_acces} terminée - Raison: {raison}"
         )
+        return True
+
+    def terminer_avant_demarrage(self, operateur, raison):
+        """
+        Termine une session en attente attribuée d'office (réservation,
+        file d'attente)
+
+        Contrairement à terminer, le poste n'est libéré que s'il était
+        réservé pour cette session (il peut être occupé par une autre
+        session si la précédente a débordé).
+
+        Returns:
+            True si la session a été terminée, False si elle avait démarré
+        """
+        from .file_attente import postes_liberes
+
+        now = timezone.now()
+        if not self._transition(('en_attente',), statut='terminee', fin_session=now, temps_restant=0):
+            return False
+
+        if update_returning(
+            Poste.objects.filter(pk=self.poste_id, statut='reserve'), (),
+            statut='disponible', updated_at=now
+        ):
+            postes_liberes([self.poste_id])
+        self._rafraichir_place()
+
+        from apps.logs.models import Log
+        Log.objects.create(
+            session=self,
+            action='fermeture',
+            operateur=operateur,
+            details=f"Session {self.code_acces} terminée - Raison: {raison}"
+        )
+        return True
 
     def suspendre(self, operateur):
-        """Suspend la session"""
-        self.statut = 'suspendue'
-        self.save(update_fields=['statut', 'updated_at'])
+        """Suspend la session (uniquement si active)"""
+        if not self._transition(('active',), statut='suspendue'):
+            return False
 
         from apps.logs.models import Log
         Log.objects.create(
@@ -264,43 +493,109 @@ class Session(TimeStampedModel):
             operateur=operateur,
             details=f"Session {self.code_acces} suspendue"
         )
+        self._rafraichir_place()
+        return True
 
     def reprendre(self, operateur):
         """Reprend une session suspendue"""
-        if self.statut == 'suspendue':
-            self.statut = 'active'
-            self.save(update_fields=['statut', 'updated_at'])
+        if not self._transition(('suspendue',), statut='active'):
+            return False
 
-            from apps.logs.models import Log
-            Log.objects.create(
-                session=self,
-                action='reprise',
-                operateur=operateur,
-                details=f"Session {self.code_acces} reprise"
-            )
+        from apps.logs.models import Log
+        Log.objects.create(
+            session=self,
+            action='reprise',
+            operateur=operateur,
+            details=f"Session {self.code_acces} reprise"
+        )
+        self._rafraichir_place()
+        return True
+
+    def expirer(self):
+        """
+        Expire une session active dont le temps est écoulé
+
+        Returns:
+            True si la session a été expirée par cet appel
+        """
+        expiree = self._transition(
+            ('active',),
+            condition=Q(temps_restant__lte=0),
+            statut='expiree',
+            fin_session=timezone.now(),
+        )
+        if not expiree:
+            return False
+
+        # Libérer le poste (attribué au premier de la file d'attente)
+        from .file_attente import postes_liberes
+        self.poste.marquer_disponible()
+        postes_liberes([self.poste_id])
+
+        from apps.logs.models import Log
+        Log.objects.create(
+            session=self,
+            action='expiration',
+            operateur='system',
+            details=f"Session {self.code_acces} expirée automatiquement"
+        )
+        return True
 
     def decremente_temps(self, secondes=1):
         """
         Décrémente le temps restant
         Utilisé par les tâches Celery
+
+        Un seul UPDATE : décrémente, et bascule en 'expiree' si le temps
+        atteint zéro. Un ajout de temps concurrent n'est jamais écrasé.
+        Comme pour decrement_all, seule l'expiration invalide le cache.
+
+        Returns:
+            True si la session a été décrémentée
         """
-        if self.temps_restant > 0:
-            self.temps_restant -= secondes
-            if self.temps_restant <= 0:
-                self.temps_restant = 0
-                self.statut = 'expiree'
-                self.fin_session = timezone.now()
-                self.poste.marquer_disponible()
-
-                from apps.logs.models import Log
-                Log.objects.create(
-                    session=self,
-                    action='expiration',
-                    operateur='system',
-                    details=f"Session {self.code_acces} expirée automatiquement"
-                )
+        now = timezone.now()
+        encore = Q(temps_restant__gt=secondes)
+        decrementee = self._transition(
+            ('active',),
+            returning=('temps_restant', 'statut'),
+            condition=Q(temps_restant__gt=0),
+            invalider=False,
+            temps_restant=Case(
+                When(encore, then=F('temps_restant') - secondes),
+                default=Value(0)
+            ),
+            statut=Case(
+                When(encore, then=F('statut')),
+                default=Value('expiree')
+            ),
+            fin_session=Case(
+                When(encore, then=F('fin_session')),
+                default=Value(now),
+                output_field=models.DateTimeField()
+            ),
+        )
+        if not decrementee:
+            return False
 
-            self.save(update_fields=['temps_restant', 'statut', 'fin_session', 'updated_at'])
+        if self.statut == 'expiree':
+            self.fin_session = now
+            invalider_modele(Session)
+            # Libérer le poste (attribué au premier de la file d'attente)
+            from .file_attente import postes_liberes
+            self.poste.marquer_disponible()
+            postes_liberes([self.poste_id])
+
+            from apps.logs.models import Log
+            Log.objects.create(
+                session=self,
+                action='expiration',
+                operateur='system',
+                details=f"Session {self.code_acces} expirée automatiquement"
+            )
+        else:
+            from apps.postes.seat_board import update_seat_time
+            update_seat_time(self)
+        return True
 
 
 class ExtensionRequest(TimeStampedModel):
@@ -391,16 +686,17 @@ class ExtensionRequest(TimeStampedModel):
         if self.statut != 'pending':
             raise ValueError("Cette demande a déjà été traitée")
 
-        # Vérifier que la session est encore active
-        if self.session.statut not in ['active', 'suspendue']:
+        # Ajouter le temps si la session est encore active (vérifié par la base)
+        ajoute = (
+            self.session.statut in ['active', 'suspendue']
+            and self.session.ajouter_temps(self.seconds_requested, admin_username)
+        )
+        if not ajoute:
             self.statut = 'expired'
             self.response_message = "Session terminée"
             self.save()
             raise ValueError("La session n'est plus active")
 
-        # Ajouter le temps à la session
-        self.session.ajouter_temps(self.seconds_requested, admin_username)
-
         # Mettre à jour la demande
         self.statut = 'approved'
         self.responded_by = admin_username
@@ -440,3 +736,359 @@ class ExtensionRequest(TimeStampedModel):
             operateur=admin_username,
             details=f"Prolongation de {self.minutes_requested} min refusée pour {self.session.code_acces}"
         )
+
+
+class StatistiqueJour(models.Model):
+    """
+    Table de faits quotidienne : une ligne par poste et par jour
+
+    Alimentée par la tâche consolider_statistiques (jours terminés) et la
+    commande backfill_daily_stats. Les statistiques lisent cette table,
+    plus un delta calculé à la volée pour la journée en cours
+    (voir apps.sessions.statistiques).
+    """
+
+    poste = models.ForeignKey(
+        'postes.Poste',
+        on_delete=models.CASCADE,
+        related_name='statistiques',
+        verbose_name="Poste"
+    )
+    jour = models.DateField(verbose_name="Jour")
+
+    # Sessions créées ce jour
+    sessions_creees = models.PositiveIntegerField(default=0, verbose_name="Sessions créées")
+    sessions_invites = models.PositiveIntegerField(default=0, verbose_name="Sessions invités")
+    sessions_inscrits = models.PositiveIntegerField(default=0, verbose_name="Sessions utilisateurs inscrits")
+    secondes_ajoutees = models.PositiveIntegerField(default=0, verbose_name="Temps ajouté (secondes)")
+
+    # Sessions démarrées ce jour
+    sessions_demarrees = models.PositiveIntegerField(default=0, verbose_name="Sessions démarrées")
+
+    # Sessions terminées ce jour
+    sessions_terminees = models.PositiveIntegerField(default=0, verbose_name="Sessions terminées")
+    sessions_expirees = models.PositiveIntegerField(default=0, verbose_name="Sessions expirées")
+    secondes_utilisees = models.PositiveIntegerField(default=0, verbose_name="Temps utilisé (secondes)")
+    duree_initiale_totale = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Durée initiale totale (secondes)",
+        help_text="Somme des durées initiales des sessions terminées ou expirées"
+    )
+
+    # Demandes de prolongation créées ce jour
+    demandes_prolongation = models.PositiveIntegerField(default=0, verbose_name="Demandes de prolongation")
+    prolongations_accordees = models.PositiveIntegerField(default=0, verbose_name="Prolongations accordées")
+
+    consolide_le = models.DateTimeField(auto_now=True, verbose_name="Date de consolidation")
+
+    class Meta:
+        db_table = 'statistiques_jour'
+        ordering = ['-jour']
+        verbose_name = 'Statistique quotidienne'
+        verbose_name_plural = 'Statistiques quotidiennes'
+        constraints = [
+            models.UniqueConstraint(fields=['poste', 'jour'], name='unique_statistique_poste_jour'),
+        ]
+        indexes = [
+            models.Index(fields=['jour']),
+        ]
+
+    def __str__(self):
+        return f"{self.poste_id} - {self.jour}"
+
+
+class ReservationQuerySet(SiteScopedQuerySet):
+    """QuerySet des réservations"""
+
+    def actives(self):
+        """Réservations qui occupent leur créneau"""
+        return self.filter(statut__in=Reservation.STATUTS_ACTIFS)
+
+    def chevauchant(self, debut, fin):
+        """Réservations actives dont le créneau chevauche [debut, fin)"""
+        return self.actives().filter(debut__lt=fin, fin__gt=debut)
+
+
+class Reservation(TimeStampedModel):
+    """
+    Réservation d'un poste sur un créneau [debut, fin)
+
+    Deux réservations actives d'un même poste ne se chevauchent jamais :
+    garanti par une contrainte d'exclusion sous PostgreSQL (migration
+    0005), et par le verrou du poste pris par apps.sessions.reservations.reserver.
+    À l'approche du créneau, la tâche ouvrir_reservations crée la session
+    (en attente, code d'accès) et passe le poste en 'reserve'.
+    """
+
+    STATUT_CHOICES = [
+        ('confirmee', 'Confirmée'),
+        ('honoree', 'Honorée'),
+        ('annulee', 'Annulée'),
+        ('absente', 'Absent'),
+    ]
+
+    # Statuts qui occupent le créneau (contrainte d'exclusion)
+    STATUTS_ACTIFS = ('confirmee', 'honoree')
+
+    utilisateur = models.ForeignKey(
+        'utilisateurs.Utilisateur',
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        verbose_name="Utilisateur"
+    )
+    poste = models.ForeignKey(
+        'postes.Poste',
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        verbose_name="Poste"
+    )
+    # Site du poste (dénormalisé, comme Session.site)
+    site = models.ForeignKey(
+        'postes.Site',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='reservations',
+        verbose_name="Site"
+    )
+
+    debut = models.DateTimeField(verbose_name="Début du créneau")
+    fin = models.DateTimeField(verbose_name="Fin du créneau")
+
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default='confirmee',
+        verbose_name="Statut"
+    )
+    # Session créée à l'ouverture du créneau
+    session = models.OneToOneField(
+        Session,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='reservation',
+        verbose_name="Session"
+    )
+
+    operateur = models.CharField(
+        max_length=100,
+        verbose_name="Opérateur",
+        help_text="Nom de l'opérateur ayant créé la réservation"
+    )
+    notes = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name="Notes"
+    )
+
+    objects = ReservationQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'reservations'
+        ordering = ['debut']
+        verbose_name = 'Réservation'
+        verbose_name_plural = 'Réservations'
+        constraints = [
+            models.CheckConstraint(check=Q(fin__gt=F('debut')), name='reservation_fin_apres_debut'),
+        ]
+        indexes = [
+            # Chevauchements d'un poste et disponibilités d'une journée
+            models.Index(fields=['poste', 'debut', 'fin']),
+            models.Index(fields=['site', 'debut']),
+            # Ouverture des créneaux (tâche périodique)
+            models.Index(fields=['statut', 'debut']),
+        ]
+
+    def __str__(self):
+        return f"Réservation {self.poste_id} {self.debut:%d/%m %H:%M}-{self.fin:%H:%M}"
+
+    def save(self, *args, **kwargs):
+        # Nouvelle réservation : rattachée au site de son poste
+        if not self.pk and self.site_id is None and self.poste_id:
+            self.site_id = self.poste.site_id
+        super().save(*args, **kwargs)
+
+    @property
+    def duree(self):
+        """Durée du créneau en secondes"""
+        return int((self.fin - self.debut).total_seconds())
+
+    def annuler(self, operateur):
+        """
+        Annule la réservation (et sa session si elle n'a pas démarré)
+
+        Returns:
+            True si la réservation a été annulée, False si elle ne l'était plus
+        """
+        if not self._transition(self.STATUTS_ACTIFS, 'annulee'):
+            return False
+        self.clore_session(operateur, raison='reservation_annulee')
+
+        from apps.logs.models import Log
+        Log.log_action(
+            action='reservation_annulee',
+            details=f"Réservation du poste {self.poste.nom} ({self.debut:%d/%m %H:%M}) annulée",
+            operateur=operateur,
+            metadata={'reservation_id': self.pk, 'poste_id': self.poste_id}
+        )
+        return True
+
+    def _transition(self, statuts, statut):
+        """Change le statut par un UPDATE conditionnel (WHERE statut IN statuts)"""
+        if not update_returning(
+            Reservation.objects.filter(pk=self.pk, statut__in=statuts), (),
+            statut=statut, updated_at=timezone.now()
+        ):
+            return False
+        self.statut = statut
+        return True
+
+    def clore_session(self, operateur, raison):
+        """
+        Termine la session du créneau si elle n'a pas démarré
+
+        Returns:
+            True si la session a été terminée
+        """
+        if not self.session_id:
+            return False
+        return self.session.terminer_avant_demarrage(operateur, raison)
+
+
+class FileAttente(TimeStampedModel):
+    """
+    Inscription d'un usager dans la file d'attente des postes
+
+    Premier arrivé, premier servi parmi les inscrits compatibles avec le
+    poste libéré (type de poste et site souhaités, vides = indifférent).
+    À l'attribution (apps.sessions.file_attente.attribuer), la session est
+    créée en attente et le poste passe en 'reserve' jusqu'à ce que l'usager
+    s'y connecte.
+    """
+
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('attribuee', 'Poste attribué'),
+        ('annulee', 'Annulée'),
+        ('absente', 'Absent'),
+    ]
+
+    utilisateur = models.ForeignKey(
+        'utilisateurs.Utilisateur',
+        on_delete=models.CASCADE,
+        related_name='attentes',
+        verbose_name="Utilisateur"
+    )
+    # Préférences (vides : indifférent)
+    type_poste = models.CharField(
+        max_length=20,
+        choices=Poste.TYPE_POSTE_CHOICES,
+        blank=True,
+        null=True,
+        verbose_name="Type de poste souhaité"
+    )
+    site = models.ForeignKey(
+        'postes.Site',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='attentes',
+        verbose_name="Site"
+    )
+    duree_initiale = models.IntegerField(
+        validators=[MinValueValidator(60)],
+        verbose_name="Durée de la session (secondes)"
+    )
+
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default='en_attente',
+        verbose_name="Statut"
+    )
+    # Attribution
+    poste = models.ForeignKey(
+        'postes.Poste',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='attributions',
+        verbose_name="Poste attribué"
+    )
+    session = models.OneToOneField(
+        Session,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='attente',
+        verbose_name="Session"
+    )
+    attribuee_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Date d'attribution"
+    )
+
+    operateur = models.CharField(
+        max_length=100,
+        verbose_name="Opérateur",
+        help_text="Nom de l'opérateur ayant inscrit l'usager"
+    )
+    notes = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name="Notes"
+    )
+
+    objects = SiteScopedQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'file_attente'
+        ordering = ['created_at', 'id']
+        verbose_name = "Inscription en file d'attente"
+        verbose_name_plural = "File d'attente"
+        constraints = [
+            # Un usager n'attend qu'une fois
+            models.UniqueConstraint(
+                fields=['utilisateur'],
+                condition=Q(statut='en_attente'),
+                name='file_attente_une_inscription'
+            ),
+        ]
+        indexes = [
+            # Premier inscrit en attente (attribution)
+            models.Index(fields=['statut', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Attente {self.utilisateur_id} ({self.get_statut_display()})"
+
+    def _transition(self, statuts, statut, **values):
+        """Change le statut par un UPDATE conditionnel (WHERE statut IN statuts)"""
+        values.setdefault('updated_at', timezone.now())
+        if not update_returning(
+            FileAttente.objects.filter(pk=self.pk, statut__in=statuts), (),
+            statut=statut, **values
+        ):
+            return False
+        self.statut = statut
+        for name, value in values.items():
+            setattr(self, name, value)
+        return True
+
+    def annuler(self, operateur):
+        """
+        Retire l'usager de la file (et libère le poste attribué s'il ne
+        s'y est pas encore connecté)
+
+        Returns:
+            True si l'inscription a été annulée, False si elle ne l'était plus
+        """
+        if self.session_id and self.session.statut != 'en_attente':
+            return False
+        if not self._transition(('en_attente', 'attribuee'), 'annulee'):
+            return False
+        if self.session_id:
+            self.session.terminer_avant_demarrage(operateur, raison='attente_annulee')
+        return True
@@ -0,0 +1,221 @@
+"""
+Moteur de réservation des postes
+
+- reserver : crée une réservation sans chevauchement (verrou du poste ;
+  contrainte d'exclusion sous PostgreSQL en dernier recours).
+- disponibilites : créneaux libres de tous les postes pour une journée,
+  en une seule requête (LEFT JOIN des réservations du jour, index
+  (poste, debut, fin)), les trous étant calculés en Python.
+- ouvrir_reservations : appelé chaque minute par Celery Beat ; crée la
+  session des créneaux qui commencent, passe leur poste en 'reserve' dès
+  qu'il est libre et libère les créneaux non honorés.
+"""
+
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, FilteredRelation, OuterRef, Q
+from django.utils import timezone
+
+from apps.core.db import update_returning
+
+from .models import Reservation, Session
+
+logger = logging.getLogger(__name__)
+
+# Postes qui ne peuvent pas être réservés
+STATUTS_NON_RESERVABLES = ('en_attente_validation', 'maintenance')
+
+
+class CreneauIndisponible(ValueError):
+    """Le créneau demandé chevauche une réservation du poste"""
+
+
+def _horaires(jour):
+    """(ouverture, fermeture) d'un jour, en datetimes du fuseau local"""
+    ouverture, fermeture = getattr(settings, 'RESERVATION_HORAIRES', ('09:00', '18:00'))
+    fuseau = timezone.get_current_timezone()
+    return tuple(
+        timezone.make_aware(datetime.datetime.combine(jour, datetime.time.fromisoformat(heure)), fuseau)
+        for heure in (ouverture, fermeture)
+    )
+
+
+def reserver(utilisateur, poste, debut, fin, operateur, notes=None):
+    """
+    Réserve un poste sur [debut, fin)
+
+    Le poste est verrouillé le temps de vérifier et d'écrire : deux
+    réservations concurrentes d'un même poste sont sérialisées.
+
+    Raises:
+        CreneauIndisponible: Le créneau chevauche une réservation active
+        ValueError: Créneau invalide ou poste non réservable
+    """
+    from apps.postes.models import Poste
+
+    if fin <= debut:
+        raise ValueError("La fin du créneau doit être après son début")
+    if fin <= timezone.now():
+        raise ValueError("Le créneau est déjà passé")
+    duree_max = getattr(settings, 'RESERVATION_DUREE_MAX', 240 * 60)
+    if (fin - debut).total_seconds() > duree_max:
+        raise ValueError(f"La durée maximale d'une réservation est de {duree_max // 60} minutes")
+
+    with transaction.atomic():
+        statut = Poste.objects.select_for_update().filter(pk=poste.pk).values_list('statut', flat=True).first()
+        if statut is None or statut in STATUTS_NON_RESERVABLES:
+            raise ValueError(f"Le poste {poste.nom} ne peut pas être réservé")
+        if Reservation.objects.filter(poste=poste).chevauchant(debut, fin).exists():
+            raise CreneauIndisponible(f"Le poste {poste.nom} est déjà réservé sur ce créneau")
+        try:
+            with transaction.atomic():
+                return Reservation.objects.create(
+                    utilisateur=utilisateur,
+                    poste=poste,
+                    debut=debut,
+                    fin=fin,
+                    operateur=operateur,
+                    notes=notes,
+                )
+        except IntegrityError:
+            # Contrainte d'exclusion (PostgreSQL) : réservation concurrente
+            raise CreneauIndisponible(f"Le poste {poste.nom} est déjà réservé sur ce créneau")
+
+
+def disponibilites(jour, duree, sites=None, type_poste=None):
+    """
+    Créneaux libres d'au moins `duree` secondes de chaque poste pour un jour
+
+    Une seule requête : les postes joints (LEFT JOIN) à leurs réservations
+    actives du jour, triés par poste puis par début.
+
+    Returns:
+        Liste de {'poste_id', 'nom', 'type_poste', 'site_id', 'creneaux': [{'debut', 'fin'}]}
+        (uniquement les postes ayant au moins un créneau libre)
+    """
+    from apps.postes.models import Poste
+
+    ouverture, fermeture = _horaires(jour)
+    ouverture = max(ouverture, timezone.now().replace(second=0, microsecond=0))
+    if fermeture <= ouverture:
+        return []
+
+    postes = Poste.objects.des_sites(sites).exclude(statut__in=STATUTS_NON_RESERVABLES)
+    if type_poste:
+        postes = postes.filter(type_poste=type_poste)
+    lignes = postes.annotate(
+        reservation_du_jour=FilteredRelation('reservations', condition=Q(
+            reservations__statut__in=Reservation.STATUTS_ACTIFS,
+            reservations__debut__lt=fermeture,
+            reservations__fin__gt=ouverture,
+        ))
+    ).order_by('nom', 'pk', 'reservation_du_jour__debut').values_list(
+        'pk', 'nom', 'type_poste', 'site_id', 'reservation_du_jour__debut', 'reservation_du_jour__fin'
+    )
+
+    duree = datetime.timedelta(seconds=duree)
+    resultat = []
+    courant = None
+    for poste_id, nom, type_, site_id, debut, fin in lignes:
+        if courant is None or courant['poste_id'] != poste_id:
+            if courant is not None:
+                _fermer(courant, curseur, fermeture, duree)
+                resultat.append(courant)
+            courant = {'poste_id': poste_id, 'nom': nom, 'type_poste': type_, 'site_id': site_id, 'creneaux': []}
+            curseur = ouverture
+        if debut is None:
+            continue
+        if debut - curseur >= duree:
+            courant['creneaux'].append({'debut': curseur, 'fin': debut})
+        curseur = max(curseur, fin)
+    if courant is not None:
+        _fermer(courant, curseur, fermeture, duree)
+        resultat.append(courant)
+
+    return [poste for poste in resultat if poste['creneaux']]
+
+
+def _fermer(poste, curseur, fermeture, duree):
+    """Ajoute le dernier créneau libre (jusqu'à la fermeture)"""
+    if fermeture - curseur >= duree:
+        poste['creneaux'].append({'debut': curseur, 'fin': fermeture})
+
+
+def ouvrir_reservations(now=None):
+    """
+    Fait avancer les réservations (tâche périodique)
+
+    1. Créneaux qui commencent dans RESERVATION_AVANCE secondes : session
+       en attente (code d'accès) pour la durée du créneau.
+    2. Postes libres dont le créneau est ouvert : statut 'reserve' (un seul
+       UPDATE), seul le titulaire de la réservation peut y démarrer.
+    3. Créneaux non honorés RESERVATION_DELAI_ABSENCE secondes après leur
+       début : session close, poste libéré s'il leur était réservé.
+
+    Returns:
+        (sessions créées, postes réservés, réservations non honorées)
+    """
+    from apps.postes.models import Poste
+    from apps.postes.seat_board import refresh_seats
+
+    now = now or timezone.now()
+    avance = datetime.timedelta(seconds=getattr(settings, 'RESERVATION_AVANCE', 300))
+    delai_absence = datetime.timedelta(seconds=getattr(settings, 'RESERVATION_DELAI_ABSENCE', 900))
+
+    # 1. Ouverture des créneaux
+    creees = 0
+    a_ouvrir = Reservation.objects.filter(
+        statut='confirmee', debut__lte=now + avance, fin__gt=now
+    ).select_related('poste')
+    for reservation in a_ouvrir:
+        with transaction.atomic():
+            session = Session.objects.create(
+                utilisateur_id=reservation.utilisateur_id,
+                poste=reservation.poste,
+                duree_initiale=max(int((reservation.fin - max(reservation.debut, now)).total_seconds()), 60),
+                operateur=reservation.operateur,
+                notes=f"Réservation #{reservation.pk}",
+            )
+            ouverte = update_returning(
+                Reservation.objects.filter(pk=reservation.pk, statut='confirmee'), (),
+                statut='honoree', session=session, updated_at=now
+            )
+            if not ouverte:
+                # Annulée entre-temps
+                transaction.set_rollback(True)
+                continue
+        creees += 1
+
+    # 2. Postes réservés pour les créneaux ouverts
+    reserves = update_returning(
+        Poste.objects.filter(statut='disponible').filter(Exists(
+            Reservation.objects.filter(
+                poste=OuterRef('pk'), statut='honoree', session__statut='en_attente'
+            )
+        )),
+        ('pk',),
+        statut='reserve',
+        updated_at=now,
+    )
+    if reserves:
+        refresh_seats([pk for pk, in reserves])
+
+    # 3. Créneaux non honorés
+    absentes = 0
+    for reservation in Reservation.objects.filter(
+        statut='honoree', session__statut='en_attente', debut__lte=now - delai_absence
+    ).select_related('session'):
+        if not reservation._transition(('honoree',), 'absente'):
+            continue
+        reservation.clore_session(operateur='system', raison='reservation_non_honoree')
+        absentes += 1
+
+    if creees or reserves or absentes:
+        logger.info(
+            f"Réservations : {creees} session(s) créée(s), {len(reserves)} poste(s) réservé(s), "
+            f"{absentes} non honorée(s)"
+        )
+    return creees, len(reserves), absentes
@@ -4,7 +4,8 @@ Routing WebSocket pour les sessions et le dashboard
 
 from django.urls import re_path
 from .consumers import SessionConsumer
-from apps.core.consumers import DashboardConsumer
+from apps.core.consumers import DashboardConsumer, SeatBoardConsumer
+from apps.core.consumers import SessionConsumer as SessionsSiteConsumer
 from apps.postes.consumers import ClientConsumer
 
 websocket_urlpatterns = [
@@ -12,6 +13,16 @@ websocket_urlpatterns = [
     # ws://localhost:8001/ws/dashboard/
     re_path(r'ws/dashboard/$', DashboardConsumer.as_asgi()),
 
+    # WebSocket pour le tableau des places (snapshot + deltas)
+    # ws://localhost:8001/ws/seat-board/
+    re_path(r'ws/seat-board/$', SeatBoardConsumer.as_asgi()),
+
+    # Dashboard, tableau des places et sessions actives d'un site
+    # ws://localhost:8001/ws/sites/<slug ou id>/dashboard/
+    re_path(r'ws/sites/(?P<site>[-\w]+)/dashboard/$', DashboardConsumer.as_asgi()),
+    re_path(r'ws/sites/(?P<site>[-\w]+)/seat-board/$', SeatBoardConsumer.as_asgi()),
+    re_path(r'ws/sites/(?P<site>[-\w]+)/sessions/$', SessionsSiteConsumer.as_asgi()),
+
     # WebSocket pour une session spécifique (frontend admin)
     # ws://localhost:8001/ws/sessions/<session_id>/
     re_path(r'ws/sessions/(?P<session_id>\d+)/$', SessionConsumer.as_asgi()),
@@ -4,7 +4,7 @@ Serializers pour l'app Sessions
 
 from rest_framework import serializers
 from django.utils import timezone
-from .models import Session, ExtensionRequest
+from .models import Session, ExtensionRequest, FileAttente, Reservation
 from apps.postes.models import Poste
 
 
@@ -41,6 +41,7 @@ class SessionSerializer(serializers.ModelSerializer):
             'utilisateur_nom',
             'poste',
             'poste_nom',
+            'site',
             'duree_initiale',
             'temps_restant',
             'temps_ajoute',
@@ -61,6 +62,7 @@ class SessionSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'id',
             'code_acces',
+            'site',
             'temps_restant',
             'temps_ajoute',
             'duree_totale',
@@ -252,6 +254,30 @@ class SessionTerminateSerializer(serializers.Serializer):
     )
 
 
+class SessionBulkAddTimeSerializer(SessionAddTimeSerializer):
+    """
+    Serializer pour ajouter du temps à plusieurs sessions
+    """
+    session_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+        help_text="IDs des sessions"
+    )
+
+
+class SessionBulkTerminateSerializer(SessionTerminateSerializer):
+    """
+    Serializer pour terminer plusieurs sessions
+    """
+    session_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+        help_text="IDs des sessions"
+    )
+
+
 class SessionStatsSerializer(serializers.ModelSerializer):
     """
     Serializer pour les statistiques de session
@@ -496,3 +522,162 @@ class ExtensionRequestResponseSerializer(serializers.Serializer):
         max_length=255,
         help_text="Message optionnel"
     )
+
+
+# ==================== Serializers pour les réservations ====================
+
+class ReservationSerializer(serializers.ModelSerializer):
+    """
+    Serializer pour les réservations
+    """
+    utilisateur_nom = serializers.CharField(source='utilisateur.get_full_name', read_only=True)
+    poste_nom = serializers.CharField(source='poste.nom', read_only=True)
+    code_acces = serializers.CharField(source='session.code_acces', read_only=True, default=None)
+
+    class Meta:
+        model = Reservation
+        fields = [
+            'id',
+            'utilisateur',
+            'utilisateur_nom',
+            'poste',
+            'poste_nom',
+            'site',
+            'debut',
+            'fin',
+            'statut',
+            'session',
+            'code_acces',
+            'operateur',
+            'notes',
+            'created_at',
+            'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class ReservationCreateSerializer(serializers.ModelSerializer):
+    """
+    Serializer pour réserver un poste
+    La fin du créneau est déduite de la durée
+    """
+    duree_minutes = serializers.IntegerField(
+        write_only=True,
+        min_value=15,
+        max_value=240,
+        help_text="Durée en minutes (15-240)"
+    )
+
+    class Meta:
+        model = Reservation
+        fields = [
+            'utilisateur',
+            'poste',
+            'debut',
+            'duree_minutes',
+            'operateur',
+            'notes'
+        ]
+
+    def create(self, validated_data):
+        """Réservation sans chevauchement (apps.sessions.reservations.reserver)"""
+        from datetime import timedelta
+        from .reservations import reserver
+
+        debut = validated_data['debut']
+        try:
+            return reserver(
+                utilisateur=validated_data['utilisateur'],
+                poste=validated_data['poste'],
+                debut=debut,
+                fin=debut + timedelta(minutes=validated_data['duree_minutes']),
+                operateur=validated_data['operateur'],
+                notes=validated_data.get('notes'),
+            )
+        except ValueError as e:
+            raise serializers.ValidationError({'debut': str(e)})
+
+
+class DisponibilitesSerializer(serializers.Serializer):
+    """
+    Paramètres de recherche des créneaux libres
+    """
+    date = serializers.DateField(required=False, help_text="Jour (AAAA-MM-JJ, aujourd'hui par défaut)")
+    duree = serializers.IntegerField(
+        min_value=15,
+        max_value=240,
+        default=60,
+        help_text="Durée souhaitée en minutes"
+    )
+    type_poste = serializers.ChoiceField(choices=Poste.TYPE_POSTE_CHOICES, required=False)
+
+
+# ==================== Serializers pour la file d'attente ====================
+
+class FileAttenteSerializer(serializers.ModelSerializer):
+    """
+    Serializer pour les inscriptions en file d'attente
+    """
+    utilisateur_nom = serializers.CharField(source='utilisateur.get_full_name', read_only=True)
+    poste_nom = serializers.CharField(source='poste.nom', read_only=True, default=None)
+    code_acces = serializers.CharField(source='session.code_acces', read_only=True, default=None)
+
+    class Meta:
+        model = FileAttente
+        fields = [
+            'id',
+            'utilisateur',
+            'utilisateur_nom',
+            'type_poste',
+            'site',
+            'duree_initiale',
+            'statut',
+            'poste',
+            'poste_nom',
+            'session',
+            'code_acces',
+            'attribuee_at',
+            'operateur',
+            'notes',
+            'created_at'
+        ]
+        read_only_fields = fields
+
+
+class FileAttenteCreateSerializer(serializers.ModelSerializer):
+    """
+    Serializer pour inscrire un usager dans la file d'attente
+    """
+    duree_minutes = serializers.IntegerField(
+        write_only=True,
+        min_value=1,
+        max_value=240,
+        help_text="Durée de la session en minutes (1-240)"
+    )
+
+    class Meta:
+        model = FileAttente
+        fields = [
+            'utilisateur',
+            'type_poste',
+            'site',
+            'duree_minutes',
+            'operateur',
+            'notes'
+        ]
+
+    def create(self, validated_data):
+        """Inscription (apps.sessions.file_attente.inscrire)"""
+        from .file_attente import inscrire
+
+        try:
+            return inscrire(
+                utilisateur=validated_data['utilisateur'],
+                duree=validated_data['duree_minutes'] * 60,
+                operateur=validated_data['operateur'],
+                type_poste=validated_data.get('type_poste'),
+                site=validated_data.get('site'),
+                notes=validated_data.get('notes'),
+            )
+        except ValueError as e:
+            raise serializers.ValidationError({'utilisateur': str(e)})
@@ -0,0 +1,227 @@
+"""
+Opérations en masse sur les sessions
+
+Chaque fonction traite un lot de sessions en un nombre constant de
+requêtes (UPDATE ... RETURNING conditionnel, logs en bulk_create, un seul
+recalcul du tableau des places) et envoie les notifications WebSocket
+en un seul lot après le commit.
+"""
+
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from apps.core.db import update_returning
+from apps.core.http_cache import invalider
+from apps.logs.models import Log
+from apps.postes.models import Poste, SeatBoardEntry
+from apps.postes.seat_board import publish_poste_ids, refresh_seats, STATUTS_OCCUPANT
+from .evenements import publier_many
+from .file_attente import postes_liberes
+from .models import Session
+from .websocket_utils import send_many, time_update_message
+
+
+def terminate_many(session_ids, operateur, raison='fermeture_normale', message='Session terminée'):
+    """
+    Termine un lot de sessions
+
+    Les sessions déjà terminées ou expirées sont ignorées.
+
+    Args:
+        session_ids: IDs des sessions à terminer
+        operateur: Nom de l'opérateur effectuant l'action
+        raison: Raison de la fermeture
+        message: Message affiché sur les postes
+
+    Returns:
+        Liste des IDs des sessions effectivement terminées
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = update_returning(
+            Session.objects.filter(
+                pk__in=list(session_ids),
+                statut__in=Session.STATUTS_MODIFIABLES
+            ),
+            ('id', 'poste_id', 'code_acces'),
+            statut='terminee',
+            fin_session=now,
+            temps_restant=0,
+            updated_at=now,
+        )
+        if not rows:
+            return []
+
+        # Libérer les postes qui n'ont plus de session en cours
+        poste_ids = {poste_id for _, poste_id, _ in rows}
+        Poste.objects.filter(pk__in=poste_ids).exclude(
+            sessions__statut__in=STATUTS_OCCUPANT
+        ).update(statut='disponible', updated_at=now)
+        invalider('postes')
+        postes_liberes(poste_ids)
+
+        Log.objects.bulk_create([
+            Log(
+                session_id=session_id,
+                action='fermeture',
+                operateur=operateur,
+                details=f"Session {code_acces} terminée - Raison: {raison}"
+            )
+            for session_id, _, code_acces in rows
+        ])
+
+        refresh_seats(poste_ids)
+
+        messages = [
+            (session_id, {
+                'type': 'session_terminated',
+                'raison': raison,
+                'message': message
+            })
+            for session_id, _, _ in rows
+        ]
+        transaction.on_commit(lambda: send_many(publier_many(messages)))
+
+    return [session_id for session_id, _, _ in rows]
+
+
+def add_time_many(session_ids, secondes, operateur):
+    """
+    Ajoute du temps à un lot de sessions
+
+    Les sessions terminées ou expirées sont ignorées.
+
+    Args:
+        session_ids: IDs des sessions
+        secondes: Nombre de secondes à ajouter
+        operateur: Nom de l'opérateur effectuant l'action
+
+    Returns:
+        Liste des IDs des sessions modifiées
+    """
+    with transaction.atomic():
+        rows = update_returning(
+            Session.objects.filter(
+                pk__in=list(session_ids),
+                statut__in=Session.STATUTS_MODIFIABLES
+            ),
+            ('id', 'poste_id', 'code_acces', 'temps_restant'),
+            temps_restant=F('temps_restant') + secondes,
+            temps_ajoute=F('temps_ajoute') + secondes,
+            updated_at=timezone.now(),
+        )
+        if not rows:
+            return []
+
+        Log.objects.bulk_create([
+            Log(
+                session_id=session_id,
+                action='ajout_temps',
+                operateur=operateur,
+                details=f"{secondes // 60} minutes ajoutées à la session {code_acces}"
+            )
+            for session_id, _, code_acces, _ in rows
+        ])
+
+        refresh_seats({poste_id for _, poste_id, _, _ in rows})
+
+        messages = [
+            (session_id, {
+                'type': 'time_added',
+                'secondes': secondes,
+                'temps_restant': temps_restant,
+                'operateur': operateur
+            })
+            for session_id, _, _, temps_restant in rows
+        ]
+        transaction.on_commit(lambda: send_many(publier_many(messages)))
+
+    return [session_id for session_id, _, _, _ in rows]
+
+
+def decrement_all(secondes=1):
+    """
+    Décrémente le temps restant de toutes les sessions actives
+
+    Un seul UPDATE pour toutes les sessions (bascule en 'expiree' de celles
+    qui atteignent zéro), un seul UPDATE du tableau des places pour les
+    autres : le décompte périodique ne fait plus deux écritures par session.
+    Un ajout de temps concurrent n'est jamais écrasé. Le décompte seul
+    n'invalide pas le cache des endpoints (il le viderait chaque seconde) :
+    le temps restant mis en cache vit le temps de l'entrée ; seules les
+    expirations l'invalident.
+
+    Args:
+        secondes: Nombre de secondes à décompter
+
+    Returns:
+        Liste des IDs des sessions décrémentées
+    """
+    now = timezone.now()
+    encore = Q(temps_restant__gt=secondes)
+    colonnes = ('id', 'poste_id', 'code_acces', 'statut', 'temps_restant',
+                'duree_initiale', 'temps_ajoute', 'debut_session')
+    with transaction.atomic():
+        rows = update_returning(
+            Session.objects.filter(statut='active', temps_restant__gt=0),
+            colonnes,
+            invalider=False,
+            temps_restant=Case(
+                When(encore, then=F('temps_restant') - secondes),
+                default=Value(0)
+            ),
+            statut=Case(
+                When(encore, then=F('statut')),
+                default=Value('expiree')
+            ),
+            fin_session=Case(
+                When(encore, then=F('fin_session')),
+                default=Value(now),
+                output_field=DateTimeField()
+            ),
+            updated_at=now,
+        )
+        if not rows:
+            return []
+
+        sessions = [Session(**dict(zip(colonnes, row))) for row in rows]
+        expirees = [session for session in sessions if session.statut == 'expiree']
+        en_cours = [session for session in sessions if session.statut != 'expiree']
+
+        if expirees:
+            poste_ids = {session.poste_id for session in expirees}
+            Poste.objects.filter(pk__in=poste_ids).exclude(
+                sessions__statut__in=STATUTS_OCCUPANT
+            ).update(statut='disponible', updated_at=now)
+            invalider('postes', 'sessions')
+            postes_liberes(poste_ids)
+
+            Log.objects.bulk_create([
+                Log(
+                    session_id=session.pk,
+                    action='expiration',
+                    operateur='system',
+                    details=f"Session {session.code_acces} expirée automatiquement"
+                )
+                for session in expirees
+            ])
+            refresh_seats(poste_ids)
+
+        if en_cours:
+            # Temps restant des places occupées, en un UPDATE ... CASE
+            SeatBoardEntry.objects.filter(
+                session_id__in=[session.pk for session in en_cours]
+            ).update(
+                temps_restant=Case(
+                    *(When(session_id=session.pk, then=Value(session.temps_restant)) for session in en_cours),
+                    output_field=IntegerField()
+                )
+            )
+            # Versions attribuées après le commit, puis diffusion
+            publish_poste_ids(session.poste_id for session in en_cours)
+
+        messages = [(f'session_{session.pk}', time_update_message(session)) for session in sessions]
+        transaction.on_commit(lambda: send_many(messages))
+
+    return [session.pk for session in sessions]
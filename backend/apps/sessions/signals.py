@@ -5,8 +5,10 @@ Gère les logs automatiques et autres actions
 
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 from .models import Session
 from apps.logs.models import Log
+from apps.utilisateurs.models import CompteurSessionsJour
 
 
 @receiver(post_save, sender=Session)
@@ -25,3 +27,14 @@ def log_session_creation(sender, instance, created, **kwargs):
                 'poste_id': instance.poste.id
             }
         )
+
+
+@receiver(post_save, sender=Session)
+def compter_session_creation(sender, instance, created, **kwargs):
+    """Incrémente le compteur journalier de l'utilisateur"""
+    if created:
+        CompteurSessionsJour.incrementer(
+            instance.utilisateur_id,
+            jour=timezone.localdate(instance.created_at)
+        )
+
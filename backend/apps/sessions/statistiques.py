@@ -0,0 +1,255 @@
+"""
+Entrepôt de statistiques quotidiennes (table StatistiqueJour)
+
+Les agrégats d'un jour terminé sont calculés une fois, par intervalles
+[début, fin[ sur des colonnes indexées (jamais de __date), puis stockés par
+poste. Les lectures additionnent ces lignes et n'interrogent les tables
+brutes que pour les jours postérieurs au dernier jour consolidé (la
+journée en cours, et la veille jusqu'au passage de consolider_statistiques) :
+leur coût ne dépend plus de l'historique accumulé.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from apps.core.http_cache import invalider
+from .models import ExtensionRequest, Session, StatistiqueJour
+
+# Compteurs de la table de faits
+CHAMPS_STATS = [
+    'sessions_creees', 'sessions_invites', 'sessions_inscrits', 'secondes_ajoutees',
+    'sessions_demarrees', 'sessions_terminees', 'sessions_expirees',
+    'secondes_utilisees', 'duree_initiale_totale',
+    'demandes_prolongation', 'prolongations_accordees',
+]
+
+
+def bornes_jour(jour):
+    """Début et fin (exclue) d'un jour local, en datetimes aware"""
+    debut = timezone.make_aware(datetime.combine(jour, time.min))
+    return debut, timezone.make_aware(datetime.combine(jour + timedelta(days=1), time.min))
+
+
+def calculer_jour(jour, poste_ids=None):
+    """
+    Calcule les agrégats d'un jour depuis les tables brutes (sans écrire)
+
+    Quatre requêtes par intervalle sur created_at, debut_session et
+    fin_session (indexés), quel que soit le volume de l'historique.
+
+    Args:
+        jour: Jour local
+        poste_ids: Restreindre à ces postes (tous si None)
+
+    Returns:
+        dict {poste_id: {champ: valeur}}
+    """
+    debut, fin = bornes_jour(jour)
+    lignes = defaultdict(lambda: dict.fromkeys(CHAMPS_STATS, 0))
+    sessions = Session.objects.all()
+    extensions = ExtensionRequest.objects.all()
+    if poste_ids is not None:
+        sessions = sessions.filter(poste_id__in=list(poste_ids))
+        extensions = extensions.filter(session__poste_id__in=list(poste_ids))
+
+    creees = sessions.filter(
+        created_at__gte=debut, created_at__lt=fin
+    ).values('poste_id').annotate(
+        total=Count('id'),
+        invites=Count('id', filter=Q(utilisateur__is_guest=True)),
+        ajoute=Sum('temps_ajoute'),
+    ).order_by()
+    for item in creees:
+        ligne = lignes[item['poste_id']]
+        ligne['sessions_creees'] = item['total']
+        ligne['sessions_invites'] = item['invites']
+        ligne['sessions_inscrits'] = item['total'] - item['invites']
+        ligne['secondes_ajoutees'] = item['ajoute'] or 0
+
+    demarrees = sessions.filter(
+        debut_session__gte=debut, debut_session__lt=fin
+    ).values('poste_id').annotate(total=Count('id')).order_by()
+    for item in demarrees:
+        lignes[item['poste_id']]['sessions_demarrees'] = item['total']
+
+    # Temps utilisé : durée réelle (fin - début) des sessions closes ce jour
+    closes = sessions.filter(
+        fin_session__gte=debut, fin_session__lt=fin,
+        statut__in=['terminee', 'expiree']
+    ).values_list('poste_id', 'statut', 'duree_initiale', 'debut_session', 'fin_session')
+    for poste_id, statut, duree_initiale, debut_session, fin_session in closes:
+        ligne = lignes[poste_id]
+        ligne['sessions_terminees' if statut == 'terminee' else 'sessions_expirees'] += 1
+        ligne['duree_initiale_totale'] += duree_initiale
+        if debut_session:
+            ligne['secondes_utilisees'] += max(int((fin_session - debut_session).total_seconds()), 0)
+
+    demandes = extensions.filter(
+        created_at__gte=debut, created_at__lt=fin
+    ).values('session__poste_id').annotate(
+        total=Count('id'),
+        accordees=Count('id', filter=Q(statut='approved')),
+    ).order_by()
+    for item in demandes:
+        ligne = lignes[item['session__poste_id']]
+        ligne['demandes_prolongation'] = item['total']
+        ligne['prolongations_accordees'] = item['accordees']
+
+    return dict(lignes)
+
+
+def consolider_jour(jour):
+    """
+    Recalcule et enregistre les lignes d'un jour (idempotent)
+
+    Returns:
+        Nombre de postes ayant une activité ce jour
+    """
+    lignes = calculer_jour(jour)
+    if lignes:
+        StatistiqueJour.objects.bulk_create(
+            [StatistiqueJour(poste_id=poste_id, jour=jour, **valeurs)
+             for poste_id, valeurs in lignes.items()],
+            update_conflicts=True,
+            unique_fields=['poste', 'jour'],
+            update_fields=CHAMPS_STATS + ['consolide_le'],
+        )
+    StatistiqueJour.objects.filter(jour=jour).exclude(poste_id__in=list(lignes)).delete()
+    invalider('sessions')
+    return len(lignes)
+
+
+def premier_jour_activite():
+    """Jour de la plus ancienne session, ou None"""
+    premier = Session.objects.aggregate(premier=Min('created_at'))['premier']
+    return timezone.localdate(premier) if premier else None
+
+
+def consolider(depuis=None, jusqu_a=None):
+    """
+    Consolide les jours terminés de depuis à jusqu_a (inclus)
+
+    Par défaut, reprend au dernier jour consolidé (recalculé, pour les
+    sessions closes ou prolongées après coup) et s'arrête à hier : la
+    journée en cours reste calculée à la volée. Les jours antérieurs à la
+    plus ancienne session conservée ne sont jamais recalculés.
+
+    Returns:
+        Liste des jours consolidés
+    """
+    hier = timezone.localdate() - timedelta(days=1)
+    jusqu_a = min(jusqu_a or hier, hier)
+
+    # Les sessions anciennes sont purgées (cleanup_old_sessions) : ne jamais
+    # recalculer un jour antérieur à la plus ancienne session conservée
+    premier = premier_jour_activite()
+    if premier is None:
+        return []
+    if depuis is None:
+        depuis = StatistiqueJour.objects.aggregate(dernier=Max('jour'))['dernier'] or premier
+    depuis = max(depuis, premier)
+
+    jours = []
+    jour = depuis
+    while jour <= jusqu_a:
+        consolider_jour(jour)
+        jours.append(jour)
+        jour += timedelta(days=1)
+    return jours
+
+
+def _jours_non_consolides(debut, fin):
+    """
+    Jours de la période à calculer depuis les tables brutes
+
+    Ce sont les jours postérieurs au dernier jour de la table de faits :
+    aujourd'hui, plus la veille (ou davantage) tant que la consolidation
+    horaire n'est pas passée. Table vide : tout l'historique conservé.
+
+    Returns:
+        (dernier jour lu dans la table de faits, liste des jours à calculer)
+    """
+    aujourdhui = timezone.localdate()
+    dernier = StatistiqueJour.objects.aggregate(dernier=Max('jour'))['dernier']
+    if dernier is None:
+        premier = premier_jour_activite()
+        dernier = premier - timedelta(days=1) if premier else aujourdhui
+    dernier = min(dernier, aujourdhui - timedelta(days=1))
+
+    jour = dernier + timedelta(days=1)
+    if debut is not None:
+        jour = max(jour, debut)
+    jours = []
+    while jour <= min(fin, aujourdhui):
+        jours.append(jour)
+        jour += timedelta(days=1)
+    return dernier, jours
+
+
+def totaux(debut=None, fin=None, poste_ids=None):
+    """
+    Totaux sur une période : lignes consolidées + jours non encore consolidés
+
+    Args:
+        debut: Premier jour (tout l'historique si None)
+        fin: Dernier jour inclus (aujourd'hui si None)
+        poste_ids: Restreindre à ces postes
+
+    Returns:
+        dict {champ: total}
+    """
+    fin = fin or timezone.localdate()
+    dernier, jours = _jours_non_consolides(debut, fin)
+
+    queryset = StatistiqueJour.objects.filter(jour__lte=min(fin, dernier))
+    if debut is not None:
+        queryset = queryset.filter(jour__gte=debut)
+    if poste_ids is not None:
+        queryset = queryset.filter(poste_id__in=list(poste_ids))
+    resultat = {
+        champ: valeur or 0
+        for champ, valeur in queryset.aggregate(**{champ: Sum(champ) for champ in CHAMPS_STATS}).items()
+    }
+
+    for jour in jours:
+        for valeurs in calculer_jour(jour, poste_ids).values():
+            for champ in CHAMPS_STATS:
+                resultat[champ] += valeurs[champ]
+    return resultat
+
+
+def serie(debut, fin=None, poste_ids=None):
+    """
+    Série quotidienne sur une période, tous postes confondus
+
+    Returns:
+        Liste de dicts {'jour': date, champ: total}, un par jour avec activité
+    """
+    fin = fin or timezone.localdate()
+    dernier, non_consolides = _jours_non_consolides(debut, fin)
+
+    queryset = StatistiqueJour.objects.filter(jour__gte=debut, jour__lte=min(fin, dernier))
+    if poste_ids is not None:
+        queryset = queryset.filter(poste_id__in=list(poste_ids))
+    jours = list(
+        queryset.values('jour').annotate(**{champ: Sum(champ) for champ in CHAMPS_STATS}).order_by('jour')
+    )
+
+    for jour_calcule in non_consolides:
+        lignes = calculer_jour(jour_calcule, poste_ids)
+        if lignes:
+            jour = {'jour': jour_calcule, **dict.fromkeys(CHAMPS_STATS, 0)}
+            for valeurs in lignes.values():
+                for champ in CHAMPS_STATS:
+                    jour[champ] += valeurs[champ]
+            jours.append(jour)
+    return jours
+
+
+def duree_moyenne(stats):
+    """Durée initiale moyenne (secondes) des sessions closes"""
+    closes = stats['sessions_terminees'] + stats['sessions_expirees']
+    return stats['duree_initiale_totale'] // closes if closes else 0
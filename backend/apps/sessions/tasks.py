@@ -5,11 +5,14 @@ Tâches Celery pour les sessions
 from celery import shared_task
 from django.utils import timezone
 from django.conf import settings
-from .models import Session
-from .websocket_utils import send_time_update, send_session_warning, send_session_terminated
+from .models import FileAttente, Session
+from .services import decrement_all
+from .websocket_utils import send_session_warning, send_session_terminated
+from apps.core.taches import single_flight
 
 
 @shared_task
+@single_flight(timeout=300)
 def cleanup_expired_sessions():
     """
     Nettoie les sessions expirées
@@ -23,22 +26,9 @@ def cleanup_expired_sessions():
 
     count = 0
     for session in expired_sessions:
-        # Marquer comme expirée
-        session.statut = 'expiree'
-        session.fin_session = timezone.now()
-        session.save(update_fields=['statut', 'fin_session', 'updated_at'])
-
-        # Libérer le poste
-        session.poste.marquer_disponible()
-
-        # Log
-        from apps.logs.models import Log
-        Log.objects.create(
-            session=session,
-            action='expiration',
-            operateur='system',
-            details=f"Session {session.code_acces} expirée automatiquement"
-        )
+        # Marquer comme expirée (ignoré si du temps a été ajouté entre-temps)
+        if not session.expirer():
+            continue
 
         # Notifier via WebSocket
         send_session_terminated(session, raison='expiration', message='Temps écoulé')
@@ -49,6 +39,7 @@ def cleanup_expired_sessions():
 
 
 @shared_task
+@single_flight(timeout=30)
 def update_session_times():
     """
     Décrémente le temps restant de toutes les sessions actives
@@ -57,19 +48,12 @@ def update_session_times():
     Note: Cette tâche peut être désactivée si le temps est géré
     côté client (calcul depuis debut_session)
     """
-    sessions = Session.objects.filter(statut='active')
-
-    for session in sessions:
-        # Décrémenter 1 seconde
-        session.decremente_temps(secondes=1)
-
-        # Envoyer mise à jour WebSocket
-        send_time_update(session)
-
-    return f"{sessions.count()} session(s) mises à jour"
+    count = len(decrement_all(secondes=1))
+    return f"{count} session(s) mises à jour"
 
 
 @shared_task
+@single_flight(timeout=60)
 def send_time_warnings():
     """
     Envoie des avertissements pour les sessions dont le temps est bientôt écoulé
@@ -115,6 +99,7 @@ def send_time_warnings():
 
 
 @shared_task
+@single_flight()
 def cleanup_old_sessions():
     """
     Supprime les vieilles sessions terminées/expirées
@@ -135,35 +120,47 @@ def cleanup_old_sessions():
 
 
 @shared_task
+@single_flight()
+def consolider_statistiques():
+    """
+    Consolide les statistiques quotidiennes des jours terminés
+    Exécuté toutes les heures via Celery Beat
+    """
+    from .statistiques import consolider
+
+    jours = consolider()
+    return f"{len(jours)} jour(s) consolidé(s)"
+
+
+@shared_task
+@single_flight()
 def generate_sessions_report():
     """
-    Génère un rapport quotidien des sessions
+    Génère le rapport de la veille depuis les statistiques quotidiennes
     Exécuté quotidiennement via Celery Beat
     """
     from datetime import timedelta
-    from django.db.models import Count, Avg, Sum
-
-    # Statistiques des dernières 24h
-    yesterday = timezone.now() - timedelta(days=1)
+    from .statistiques import consolider, duree_moyenne, totaux
 
-    stats = Session.objects.filter(created_at__gte=yesterday).aggregate(
-        total=Count('id'),
-        avg_duration=Avg('duree_initiale'),
-        total_time_added=Sum('temps_ajoute')
-    )
-
-    # Stats par statut
-    stats_by_status = Session.objects.filter(
-        created_at__gte=yesterday
-    ).values('statut').annotate(count=Count('id'))
+    hier = timezone.localdate() - timedelta(days=1)
+    consolider()
+    stats = totaux(debut=hier, fin=hier)
 
     report = {
         'date': timezone.now().isoformat(),
-        'period': '24h',
-        'total_sessions': stats['total'] or 0,
-        'avg_duration_minutes': int((stats['avg_duration'] or 0) / 60),
-        'total_time_added_minutes': int((stats['total_time_added'] or 0) / 60),
-        'by_status': {item['statut']: item['count'] for item in stats_by_status}
+        'period': hier.isoformat(),
+        'total_sessions': stats['sessions_creees'],
+        'guest_sessions': stats['sessions_invites'],
+        'sessions_started': stats['sessions_demarrees'],
+        'avg_duration_minutes': duree_moyenne(stats) // 60,
+        'total_time_used_minutes': stats['secondes_utilisees'] // 60,
+        'total_time_added_minutes': stats['secondes_ajoutees'] // 60,
+        'extension_requests': stats['demandes_prolongation'],
+        'extensions_approved': stats['prolongations_accordees'],
+        'by_status': {
+            'terminee': stats['sessions_terminees'],
+            'expiree': stats['sessions_expirees'],
+        }
     }
 
     # Log le rapport
@@ -175,4 +172,44 @@ def generate_sessions_report():
         metadata=report
     )
 
-    return f"Rapport généré : {stats['total']} sessions en 24h"
+    return f"Rapport généré : {stats['sessions_creees']} sessions le {hier.isoformat()}"
+
+
+@shared_task
+@single_flight(timeout=60)
+def ouvrir_reservations():
+    """
+    Ouvre les créneaux réservés qui commencent et libère les non honorés
+    Exécuté toutes les minutes via Celery Beat
+    """
+    from .reservations import ouvrir_reservations as ouvrir
+
+    creees, reserves, absentes = ouvrir()
+    return f"{creees} réservation(s) ouverte(s), {reserves} poste(s) réservé(s), {absentes} non honorée(s)"
+
+
+@shared_task
+def attribuer_postes(poste_ids=None):
+    """
+    Attribue les postes libérés aux premiers de la file d'attente
+    Déclenchée par apps.sessions.file_attente.postes_liberes
+    """
+    from .file_attente import attribuer
+
+    return f"{len(attribuer(poste_ids))} poste(s) attribué(s)"
+
+
+@shared_task
+@single_flight(timeout=30)
+def traiter_file_attente():
+    """
+    Reprend les postes attribués non occupés et attribue les postes libres
+    Exécuté toutes les 30 secondes via Celery Beat (filet de sécurité des
+    libérations non signalées)
+    """
+    from .file_attente import attribuer, liberer_absents
+
+    absents = liberer_absents()
+    if not FileAttente.objects.filter(statut='en_attente').exists():
+        return f"{absents} absent(s), file vide"
+    return f"{absents} absent(s), {len(attribuer())} poste(s) attribué(s)"
@@ -2,13 +2,11 @@
 ViewSets pour l'app Sessions
 """
 
-from rest_framework import viewsets, status, filters
+from rest_framework import mixins, viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from django.utils.decorators import method_decorator
-from django_ratelimit.decorators import ratelimit
 from .models import Session
 from .serializers import (
     SessionSerializer,
@@ -17,18 +15,30 @@ from .serializers import (
     SessionValidateCodeSerializer,
     SessionAddTimeSerializer,
     SessionTerminateSerializer,
+    SessionBulkAddTimeSerializer,
+    SessionBulkTerminateSerializer,
     SessionStatsSerializer,
     SessionActiveSerializer,
     GuestSessionCreateSerializer,
     ExtensionRequestSerializer,
     ExtensionRequestCreateSerializer,
-    ExtensionRequestResponseSerializer
+    ExtensionRequestResponseSerializer,
+    ReservationSerializer,
+    ReservationCreateSerializer,
+    DisponibilitesSerializer,
+    FileAttenteSerializer,
+    FileAttenteCreateSerializer
 )
-from .models import ExtensionRequest
+from .models import ExtensionRequest, FileAttente, Reservation
+from . import evenements
 from .websocket_utils import send_time_added, send_session_terminated, send_time_update
+from .services import terminate_many, add_time_many
+from apps.core.http_cache import cached_endpoint
+from apps.core.ratelimit import rate_limit
+from apps.postes.sites import SiteScopedMixin
 
 
-class SessionViewSet(viewsets.ModelViewSet):
+class SessionViewSet(SiteScopedMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les sessions
 
@@ -39,16 +49,22 @@ class SessionViewSet(viewsets.ModelViewSet):
     - PUT /api/sessions/{id}/ - Modifier une session
     - DELETE /api/sessions/{id}/ - Supprimer une session
     - GET /api/sessions/actives/ - Sessions actives
+    - GET /api/sessions/stats/ - Statistiques globales
+    - GET /api/sessions/stats_quotidiennes/ - Série quotidienne
+    - GET /api/sessions/export/ - Export CSV / Parquet en streaming
     - POST /api/sessions/validate_code/ - Valider un code d'accès
     - POST /api/sessions/{id}/start/ - Démarrer une session
     - POST /api/sessions/{id}/add_time/ - Ajouter du temps
     - POST /api/sessions/{id}/terminate/ - Terminer une session
     - POST /api/sessions/{id}/suspend/ - Suspendre une session
     - POST /api/sessions/{id}/resume/ - Reprendre une session
+    - POST /api/sessions/bulk_add_time/ - Ajouter du temps à plusieurs sessions
+    - POST /api/sessions/bulk_terminate/ - Terminer plusieurs sessions
     - POST /api/sessions/create_guest/ - Créer une session invité
+    - ?site=<slug ou id> - Restreindre la liste et les statistiques à un site
     """
 
-    queryset = Session.objects.all()
+    queryset = Session.objects.select_related('utilisateur', 'poste')
     serializer_class = SessionSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
@@ -58,6 +74,15 @@ class SessionViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'debut_session', 'temps_restant']
     ordering = ['-created_at']
 
+    def _postes_des_sites(self):
+        """IDs des postes des sites de la requête (None : tous les postes)"""
+        from apps.postes.models import Poste
+
+        sites = self.get_sites()
+        if sites is None:
+            return None
+        return list(Poste.objects.des_sites(sites).values_list('pk', flat=True))
+
     def get_serializer_class(self):
         """Retourne le serializer approprié selon l'action"""
         if self.action == 'list':
@@ -113,46 +138,156 @@ class SessionViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'])
+    @cached_endpoint('sessions:actives', depend_de=('sessions',), timeout=15, par_site=True)
     def actives(self, request):
         """
         Retourne la liste des sessions actives
 
         GET /api/sessions/actives/
         """
-        sessions = Session.objects.filter(statut='active')
+        sessions = self.get_queryset().filter(statut='active')
         serializer = SessionActiveSerializer(sessions, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @cached_endpoint('sessions:stats', depend_de=('sessions',), timeout=60, par_site=True)
     def stats(self, request):
         """
         Retourne les statistiques globales des sessions
 
         GET /api/sessions/stats/
+
+        Lit la table des statistiques quotidiennes (plus le delta du jour) ;
+        seules les sessions en cours sont comptées dans la table brute.
         """
-        from django.db.models import Count, Avg, Sum
+        from django.db.models import Count
+        from .statistiques import totaux, duree_moyenne
 
-        total = Session.objects.count()
-        stats_par_statut = Session.objects.values('statut').annotate(count=Count('id'))
+        poste_ids = self._postes_des_sites()
+        stats = totaux(poste_ids=poste_ids)
+        en_cours = Session.objects.des_sites(self.get_sites()).filter(
+            statut__in=Session.STATUTS_MODIFIABLES
+        ).values('statut').annotate(count=Count('id')).order_by()
 
-        # Sessions aujourd'hui
-        today = timezone.now().date()
-        sessions_today = Session.objects.filter(created_at__date=today).count()
+        par_statut = {item['statut']: item['count'] for item in en_cours}
+        par_statut['terminee'] = stats['sessions_terminees']
+        par_statut['expiree'] = stats['sessions_expirees']
 
-        # Durée moyenne
-        avg_duration = Session.objects.filter(
-            statut__in=['terminee', 'expiree']
-        ).aggregate(Avg('duree_initiale'))['duree_initiale__avg'] or 0
+        aujourdhui = totaux(debut=timezone.localdate(), poste_ids=poste_ids)
+        avg_duration = duree_moyenne(stats)
 
         return Response({
-            'total': total,
-            'sessions_aujourdhui': sessions_today,
-            'duree_moyenne_secondes': int(avg_duration),
-            'duree_moyenne_minutes': int(avg_duration / 60),
-            'par_statut': {item['statut']: item['count'] for item in stats_par_statut}
+            'total': stats['sessions_creees'],
+            'sessions_aujourdhui': aujourdhui['sessions_creees'],
+            'duree_moyenne_secondes': avg_duration,
+            'duree_moyenne_minutes': avg_duration // 60,
+            'par_statut': par_statut
         })
 
-    @method_decorator(ratelimit(key='ip', rate='10/m', method='POST', block=True))
+    @action(detail=False, methods=['get'])
+    def stats_quotidiennes(self, request):
+        """
+        Retourne la série quotidienne des statistiques
+
+        GET /api/sessions/stats_quotidiennes/?debut=2025-01-01&fin=2025-01-31&poste=3
+
+        Par défaut : les 30 derniers jours, tous postes confondus.
+        """
+        from datetime import date, timedelta
+        from .statistiques import serie
+
+        try:
+            fin = date.fromisoformat(request.query_params['fin']) \
+                if request.query_params.get('fin') else timezone.localdate()
+            debut = date.fromisoformat(request.query_params['debut']) \
+                if request.query_params.get('debut') else fin - timedelta(days=29)
+            poste_id = int(request.query_params['poste']) if request.query_params.get('poste') else None
+        except ValueError:
+            return Response(
+                {'error': 'Paramètres invalides (dates au format AAAA-MM-JJ)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        poste_ids = self._postes_des_sites()
+        if poste_id is not None:
+            # Un poste hors des sites de l'opérateur n'existe pas pour lui
+            if poste_ids is not None and poste_id not in poste_ids:
+                return Response({'error': 'Poste introuvable'}, status=status.HTTP_404_NOT_FOUND)
+            poste_ids = [poste_id]
+
+        if debut > fin:
+            return Response(
+                {'error': 'La date de début doit précéder la date de fin'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'debut': debut,
+            'fin': fin,
+            'jours': serie(debut, fin, poste_ids=poste_ids)
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporte les sessions en streaming (mémoire bornée)
+
+        GET /api/sessions/export/?type=csv&debut=2025-01-01&fin=2025-12-31&poste=3
+
+        Paramètres:
+            type: csv (défaut) ou parquet (si pyarrow est installé)
+            debut / fin: période de création (AAAA-MM-JJ, incluses)
+            poste: ID du poste (répétable)
+        """
+        from apps.core.exports import EXPORT_CHUNK_SIZE, export_response, parse_periode
+
+        try:
+            debut, fin = parse_periode(request.query_params)
+            poste_ids = [int(p) for p in request.query_params.getlist('poste')]
+        except ValueError:
+            return Response(
+                {'error': 'Paramètres invalides (dates au format AAAA-MM-JJ)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = Session.objects.des_sites(self.get_sites()).order_by('created_at')
+        if debut:
+            queryset = queryset.filter(created_at__gte=debut)
+        if fin:
+            queryset = queryset.filter(created_at__lt=fin)
+        if poste_ids:
+            queryset = queryset.filter(poste_id__in=poste_ids)
+
+        colonnes = [
+            ('id', 'int'), ('code_acces', 'str'), ('statut', 'str'),
+            ('poste_id', 'int'), ('poste', 'str'), ('emplacement', 'str'),
+            ('utilisateur_id', 'int'), ('utilisateur_nom', 'str'),
+            ('utilisateur_prenom', 'str'), ('is_guest', 'bool'),
+            ('operateur', 'str'), ('created_at', 'datetime'),
+            ('debut_session', 'datetime'), ('fin_session', 'datetime'),
+            ('duree_initiale', 'int'), ('temps_ajoute', 'int'),
+            ('temps_restant', 'int'), ('duree_utilisee', 'int'),
+        ]
+
+        def lignes():
+            for row in queryset.values_list(
+                'id', 'code_acces', 'statut', 'poste_id', 'poste__nom',
+                'poste__emplacement', 'utilisateur_id', 'utilisateur__nom',
+                'utilisateur__prenom', 'utilisateur__is_guest', 'operateur',
+                'created_at', 'debut_session', 'fin_session', 'duree_initiale',
+                'temps_ajoute', 'temps_restant'
+            ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                debut_session, fin_session = row[12], row[13]
+                duree = int((fin_session - debut_session).total_seconds()) \
+                    if debut_session and fin_session else None
+                yield row + (duree,)
+
+        nom = f"sessions_{timezone.localdate().isoformat()}"
+        return export_response(
+            lignes(), colonnes, request.query_params.get('type', 'csv'), nom, request=request
+        )
+
+    @rate_limit('validate_code')
     @action(detail=False, methods=['post'])
     def validate_code(self, request):
         """
@@ -171,7 +306,7 @@ class SessionViewSet(viewsets.ModelViewSet):
                 "message": "Code valide"
             }
 
-        Rate Limited: 10 requests per minute per IP
+        Rate Limited: settings.RATE_LIMITS['validate_code'] par IP (10/min par défaut)
         """
         serializer = SessionValidateCodeSerializer(data=request.data)
 
@@ -222,16 +357,20 @@ class SessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Vérifier que le poste est disponible
-        if not session.poste.est_disponible:
+        # Démarrer la session : refusé si un autre client l'a démarrée entre-temps
+        # ou si le poste n'est pas disponible (gardes des UPDATE, sans lecture préalable)
+        if not session.demarrer(exiger_poste_disponible=True):
+            session.refresh_from_db(fields=['statut'])
+            if session.statut == 'en_attente':
+                return Response(
+                    {'error': f"Le poste {session.poste.nom} n'est pas disponible"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             return Response(
-                {'error': f"Le poste {session.poste.nom} n'est pas disponible"},
+                {'error': f"La session ne peut pas être démarrée (statut: {session.get_statut_display()})"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Démarrer la session
-        session.demarrer()
-
         return Response({
             'message': 'Session démarrée',
             'session': SessionSerializer(session).data
@@ -263,8 +402,13 @@ class SessionViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Ajouter le temps
-            session.ajouter_temps(secondes, operateur)
+            # Ajouter le temps (refusé si la session s'est terminée entre-temps)
+            if not session.ajouter_temps(secondes, operateur):
+                session.refresh_from_db(fields=['statut'])
+                return Response(
+                    {'error': f"Impossible d'ajouter du temps (statut: {session.get_statut_display()})"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
             # Notifier via WebSocket
             send_time_added(session, secondes, operateur)
@@ -303,7 +447,12 @@ class SessionViewSet(viewsets.ModelViewSet):
                 )
 
             # Terminer la session
-            session.terminer(operateur=operateur, raison=raison)
+            if not session.terminer(operateur=operateur, raison=raison):
+                session.refresh_from_db(fields=['statut'])
+                return Response(
+                    {'error': f"La session est déjà terminée (statut: {session.get_statut_display()})"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
             # Notifier via WebSocket
             send_session_terminated(session, raison=raison, message='Session terminée')
@@ -315,6 +464,65 @@ class SessionViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'])
+    def bulk_add_time(self, request):
+        """
+        Ajoute du temps à plusieurs sessions en une opération
+
+        POST /api/sessions/bulk_add_time/
+        Body: {
+            "session_ids": [1, 2, 3],
+            "minutes": 15
+        }
+
+        Les sessions terminées ou expirées, ou d'un autre site que ceux
+        de l'opérateur, sont ignorées.
+        """
+        serializer = SessionBulkAddTimeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        operateur = request.user.username if request.user.is_authenticated else 'anonymous'
+        minutes = serializer.validated_data['minutes']
+        session_ids = serializer.validated_data['session_ids']
+        modifiees = add_time_many(self.ids_des_sites(session_ids), minutes * 60, operateur)
+
+        return Response({
+            'message': f"{minutes} minutes ajoutées à {len(modifiees)} session(s)",
+            'session_ids': modifiees,
+            'ignorees': sorted(set(session_ids) - set(modifiees))
+        })
+
+    @action(detail=False, methods=['post'])
+    def bulk_terminate(self, request):
+        """
+        Termine plusieurs sessions en une opération
+
+        POST /api/sessions/bulk_terminate/
+        Body: {
+            "session_ids": [1, 2, 3],
+            "raison": "fermeture_normale"
+        }
+
+        Les sessions déjà terminées ou expirées, ou d'un autre site que ceux
+        de l'opérateur, sont ignorées.
+        """
+        serializer = SessionBulkTerminateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        operateur = request.user.username if request.user.is_authenticated else 'anonymous'
+        session_ids = serializer.validated_data['session_ids']
+        terminees = terminate_many(
+            self.ids_des_sites(session_ids), operateur, raison=serializer.validated_data['raison']
+        )
+
+        return Response({
+            'message': f"{len(terminees)} session(s) terminée(s)",
+            'session_ids': terminees,
+            'ignorees': sorted(set(session_ids) - set(terminees))
+        })
+
     @action(detail=True, methods=['post'])
     def suspend(self, request, pk=None):
         """
@@ -332,7 +540,12 @@ class SessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        session.suspendre(operateur=operateur)
+        if not session.suspendre(operateur=operateur):
+            session.refresh_from_db(fields=['statut'])
+            return Response(
+                {'error': f"Seules les sessions actives peuvent être suspendues (statut: {session.get_statut_display()})"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response({
             'message': 'Session suspendue',
@@ -356,7 +569,12 @@ class SessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        session.reprendre(operateur=operateur)
+        if not session.reprendre(operateur=operateur):
+            session.refresh_from_db(fields=['statut'])
+            return Response(
+                {'error': f"Seules les sessions suspendues peuvent être reprises (statut: {session.get_statut_display()})"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response({
             'message': 'Session reprise',
@@ -523,13 +741,13 @@ class ExtensionRequestViewSet(viewsets.ModelViewSet):
 
                 async_to_sync(channel_layer.group_send)(
                     group_name,
-                    {
+                    evenements.publier(extension_request.session_id, {
                         'type': 'extension_response',
                         'approved': True,
                         'minutes': extension_request.minutes_requested,
                         'new_remaining': extension_request.session.temps_restant,
                         'message': message or f"Prolongation de {extension_request.minutes_requested} minutes accordée"
-                    }
+                    })
                 )
 
                 # Aussi envoyer une mise à jour du temps
@@ -550,12 +768,12 @@ class ExtensionRequestViewSet(viewsets.ModelViewSet):
 
                 async_to_sync(channel_layer.group_send)(
                     group_name,
-                    {
+                    evenements.publier(extension_request.session_id, {
                         'type': 'extension_response',
                         'approved': False,
                         'minutes': 0,
                         'message': message or "Demande de prolongation refusée"
-                    }
+                    })
                 )
 
             return Response({
@@ -565,3 +783,126 @@ class ExtensionRequestViewSet(viewsets.ModelViewSet):
 
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ReservationViewSet(SiteScopedMixin, mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet pour les réservations de postes
+
+    Endpoints:
+    - GET /api/reservations/ - Liste des réservations
+    - POST /api/reservations/ - Réserver un poste
+    - GET /api/reservations/{id}/ - Détail d'une réservation
+    - POST /api/reservations/{id}/annuler/ - Annuler une réservation
+    - GET /api/reservations/disponibilites/ - Créneaux libres d'une journée
+    - ?site=<slug ou id> - Restreindre à un site
+    """
+
+    queryset = Reservation.objects.select_related('utilisateur', 'poste', 'session')
+    serializer_class = ReservationSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['statut', 'poste', 'utilisateur']
+    ordering_fields = ['debut', 'created_at']
+    ordering = ['debut']
+
+    def get_serializer_class(self):
+        """Retourne le serializer approprié selon l'action"""
+        if self.action == 'create':
+            return ReservationCreateSerializer
+        return ReservationSerializer
+
+    def create(self, request, *args, **kwargs):
+        """Réserve un poste (réponse : la réservation complète)"""
+        serializer = ReservationCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reservation = serializer.save()
+        return Response(ReservationSerializer(reservation).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def annuler(self, request, pk=None):
+        """
+        Annule une réservation (et sa session si elle n'a pas démarré)
+
+        POST /api/reservations/{id}/annuler/
+        """
+        reservation = self.get_object()
+        operateur = request.user.username if request.user.is_authenticated else 'admin'
+
+        if not reservation.annuler(operateur):
+            return Response(
+                {'error': f"La réservation n'est plus active (statut: {reservation.get_statut_display()})"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(ReservationSerializer(reservation).data)
+
+    @action(detail=False, methods=['get'])
+    @cached_endpoint('reservations:disponibilites', depend_de=('reservations', 'postes'), timeout=30, par_site=True)
+    def disponibilites(self, request):
+        """
+        Créneaux libres de chaque poste pour une journée, en une requête
+
+        GET /api/reservations/disponibilites/?date=2026-10-19&duree=60&type_poste=bureautique
+        """
+        from .reservations import disponibilites
+
+        parametres = DisponibilitesSerializer(data=request.query_params)
+        parametres.is_valid(raise_exception=True)
+        jour = parametres.validated_data.get('date') or timezone.localdate()
+
+        postes = disponibilites(
+            jour,
+            parametres.validated_data['duree'] * 60,
+            sites=self.get_sites(),
+            type_poste=parametres.validated_data.get('type_poste'),
+        )
+        return Response({'date': jour, 'count': len(postes), 'postes': postes})
+
+
+class FileAttenteViewSet(SiteScopedMixin, mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet pour la file d'attente des postes
+
+    Endpoints:
+    - GET /api/file-attente/ - Inscriptions (?statut=en_attente pour la file)
+    - POST /api/file-attente/ - Inscrire un usager (poste libre attribué aussitôt)
+    - GET /api/file-attente/{id}/ - Détail d'une inscription
+    - POST /api/file-attente/{id}/annuler/ - Retirer un usager de la file
+    - ?site=<slug ou id> - Restreindre à un site
+    """
+
+    queryset = FileAttente.objects.select_related('utilisateur', 'poste', 'session')
+    serializer_class = FileAttenteSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['statut', 'type_poste', 'utilisateur']
+    ordering_fields = ['created_at', 'attribuee_at']
+    ordering = ['created_at', 'id']
+
+    def get_serializer_class(self):
+        """Retourne le serializer approprié selon l'action"""
+        if self.action == 'create':
+            return FileAttenteCreateSerializer
+        return FileAttenteSerializer
+
+    def create(self, request, *args, **kwargs):
+        """Inscrit un usager (un poste libre lui est attribué après le commit)"""
+        serializer = FileAttenteCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        entree = serializer.save()
+        return Response(FileAttenteSerializer(entree).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def annuler(self, request, pk=None):
+        """
+        Retire un usager de la file (libère le poste attribué s'il ne s'y est pas connecté)
+
+        POST /api/file-attente/{id}/annuler/
+        """
+        entree = self.get_object()
+        operateur = request.user.username if request.user.is_authenticated else 'admin'
+
+        if not entree.annuler(operateur):
+            return Response(
+                {'error': f"L'inscription n'est plus en cours (statut: {entree.get_statut_display()})"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(FileAttenteSerializer(entree).data)
@@ -3,9 +3,13 @@ Utilitaires pour envoyer des messages WebSocket
 Utilisé par les ViewSets et les tâches Celery
 """
 
+import asyncio
+
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+from . import evenements
+
 
 def send_time_update(session):
     """
@@ -17,21 +21,25 @@ def send_time_update(session):
     channel_layer = get_channel_layer()
     group_name = f'session_{session.id}'
 
-    async_to_sync(channel_layer.group_send)(
-        group_name,
-        {
-            'type': 'time_update',
-            'temps_restant': session.temps_restant,
-            'temps_restant_minutes': f"{session.temps_restant // 60:02d}:{session.temps_restant % 60:02d}",
-            'pourcentage_utilise': session.pourcentage_utilise,
-            'statut': session.statut
-        }
-    )
+    async_to_sync(channel_layer.group_send)(group_name, time_update_message(session))
+
+
+def time_update_message(session):
+    """Message 'time_update' d'une session (envoi unitaire ou en lot)"""
+    return {
+        'type': 'time_update',
+        # Clé de coalescence (apps.core.backpressure)
+        'session_id': session.id,
+        'temps_restant': session.temps_restant,
+        'temps_restant_minutes': f"{session.temps_restant // 60:02d}:{session.temps_restant % 60:02d}",
+        'pourcentage_utilise': session.pourcentage_utilise,
+        'statut': session.statut
+    }
 
 
 def send_time_added(session, secondes, operateur):
     """
-    Notifie qu'on a ajouté du temps à la session
+    Notifie qu'on a ajouté du temps à la session (événement rejouable)
 
     Args:
         session: Instance de Session
@@ -43,18 +51,18 @@ def send_time_added(session, secondes, operateur):
 
     async_to_sync(channel_layer.group_send)(
         group_name,
-        {
+        evenements.publier(session.id, {
             'type': 'time_added',
             'secondes': secondes,
             'temps_restant': session.temps_restant,
             'operateur': operateur
-        }
+        })
     )
 
 
 def send_session_terminated(session, raison='fermeture_normale', message='Session terminée'):
     """
-    Notifie que la session a été terminée
+    Notifie que la session a été terminée (événement rejouable)
 
     Args:
         session: Instance de Session
@@ -66,17 +74,17 @@ def send_session_terminated(session, raison='fermeture_normale', message='Sessio
 
     async_to_sync(channel_layer.group_send)(
         group_name,
-        {
+        evenements.publier(session.id, {
             'type': 'session_terminated',
             'raison': raison,
             'message': message
-        }
+        })
     )
 
 
 def send_session_warning(session, message, level='warning'):
     """
-    Envoie un avertissement à la session
+    Envoie un avertissement à la session (événement rejouable)
 
     Args:
         session: Instance de Session
@@ -88,12 +96,12 @@ def send_session_warning(session, message, level='warning'):
 
     async_to_sync(channel_layer.group_send)(
         group_name,
-        {
+        evenements.publier(session.id, {
             'type': 'session_warning',
             'level': level,
             'message': message,
             'temps_restant': session.temps_restant
-        }
+        })
     )
 
 
@@ -121,3 +129,27 @@ def broadcast_to_all_sessions(message_type, data):
                 **data
             }
         )
+
+
+def send_many(messages):
+    """
+    Envoie plusieurs messages de groupe en un seul passage dans la boucle async
+
+    Utilisé par les opérations en masse : un seul async_to_sync pour tout le
+    lot au lieu d'un aller-retour par session.
+
+    Args:
+        messages: Liste de tuples (nom du groupe, message)
+    """
+    if not messages:
+        return
+
+    channel_layer = get_channel_layer()
+
+    async def _send_all():
+        await asyncio.gather(*(
+            channel_layer.group_send(group_name, message)
+            for group_name, message in messages
+        ))
+
+    async_to_sync(_send_all)()
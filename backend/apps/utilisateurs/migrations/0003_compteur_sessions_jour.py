@@ -0,0 +1,51 @@
+# Generated manually
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def remplir_compteurs(apps, schema_editor):
+    """Calcule les compteurs à partir des sessions existantes"""
+    Session = apps.get_model('poste_sessions', 'Session')
+    CompteurSessionsJour = apps.get_model('utilisateurs', 'CompteurSessionsJour')
+
+    lignes = Session.objects.annotate(
+        jour=TruncDate('created_at')
+    ).values('utilisateur_id', 'jour').annotate(nombre=Count('id')).order_by()
+    CompteurSessionsJour.objects.bulk_create([
+        CompteurSessionsJour(
+            utilisateur_id=ligne['utilisateur_id'],
+            jour=ligne['jour'],
+            nombre=ligne['nombre']
+        )
+        for ligne in lignes
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utilisateurs', '0002_add_is_guest_field'),
+        ('poste_sessions', '0002_extensionrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteurSessionsJour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(verbose_name='Jour')),
+                ('nombre', models.PositiveIntegerField(default=0, verbose_name='Nombre de sessions')),
+                ('utilisateur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compteurs_sessions', to='utilisateurs.utilisateur', verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Compteur de sessions journalier',
+                'verbose_name_plural': 'Compteurs de sessions journaliers',
+                'db_table': 'compteurs_sessions_jour',
+                'constraints': [models.UniqueConstraint(fields=('utilisateur', 'jour'), name='unique_compteur_utilisateur_jour')],
+            },
+        ),
+        migrations.RunPython(remplir_compteurs, migrations.RunPython.noop),
+    ]
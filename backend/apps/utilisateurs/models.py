@@ -6,7 +6,8 @@ Conforme RGPD
 import secrets
 import string
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.core.validators import RegexValidator
 from django.utils import timezone
 from django.conf import settings
@@ -156,21 +157,30 @@ class Utilisateur(TimeStampedModel):
 
     @property
     def sessions_count(self):
-        """Nombre total de sessions"""
+        """Nombre total de sessions (annotation _nombre_sessions si présente)"""
+        if hasattr(self, '_nombre_sessions'):
+            return self._nombre_sessions
         return self.sessions.count()
 
     @property
     def sessions_today(self):
-        """Nombre de sessions aujourd'hui"""
-        today = timezone.now().date()
-        return self.sessions.filter(created_at__date=today).count()
+        """Nombre de sessions aujourd'hui (lu dans le compteur journalier)"""
+        return CompteurSessionsJour.pour_utilisateurs([self.pk]).get(self.pk, 0)
 
-    def can_create_session_today(self):
-        """Vérifie si l'utilisateur peut créer une session aujourd'hui"""
+    def can_create_session_today(self, sessions_today=None):
+        """
+        Vérifie si l'utilisateur peut créer une session aujourd'hui
+
+        Args:
+            sessions_today: Nombre de sessions du jour déjà connu (lecture
+                groupée), sinon lu dans le compteur
+        """
         if self.is_guest:
             return True  # Pas de limite pour les guests
+        if sessions_today is None:
+            sessions_today = self.sessions_today
         max_sessions = settings.POSTE_PUBLIC.get('MAX_SESSIONS_PER_USER_PER_DAY', 3)
-        return self.sessions_today < max_sessions
+        return sessions_today < max_sessions
 
     def save(self, *args, **kwargs):
         """Override save pour gérer la date de consentement RGPD"""
@@ -217,3 +227,72 @@ class Utilisateur(TimeStampedModel):
 
         # Fallback avec timestamp si trop de collisions
         return f"GUEST-{timezone.now().strftime('%H%M%S')}"
+
+
+class CompteurSessionsJour(models.Model):
+    """
+    Nombre de sessions créées par utilisateur et par jour
+
+    Tenu à jour par Session (signal à la création, SessionQuerySet.delete
+    et Session.delete à la suppression des sessions du jour) pour
+    que le quota journalier se lise par clé, et pour toute une page
+    d'utilisateurs en une seule requête, sans COUNT sur les sessions.
+    """
+
+    utilisateur = models.ForeignKey(
+        Utilisateur,
+        on_delete=models.CASCADE,
+        related_name='compteurs_sessions',
+        verbose_name="Utilisateur"
+    )
+    jour = models.DateField(verbose_name="Jour")
+    nombre = models.PositiveIntegerField(default=0, verbose_name="Nombre de sessions")
+
+    class Meta:
+        db_table = 'compteurs_sessions_jour'
+        verbose_name = 'Compteur de sessions journalier'
+        verbose_name_plural = 'Compteurs de sessions journaliers'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['utilisateur', 'jour'],
+                name='unique_compteur_utilisateur_jour'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.utilisateur_id} - {self.jour}: {self.nombre}"
+
+    @classmethod
+    def incrementer(cls, utilisateur_id, jour=None, delta=1):
+        """
+        Ajoute delta au compteur du jour (négatif pour décrémenter)
+
+        UPDATE atomique ; la ligne est créée au premier incrément du jour.
+        """
+        jour = jour or timezone.localdate()
+        compteurs = cls.objects.filter(utilisateur_id=utilisateur_id, jour=jour)
+        if delta < 0:
+            compteurs.filter(nombre__gte=-delta).update(nombre=F('nombre') + delta)
+            return
+        if compteurs.update(nombre=F('nombre') + delta):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(utilisateur_id=utilisateur_id, jour=jour, nombre=delta)
+        except IntegrityError:
+            # Créée entre-temps par une requête concurrente
+            compteurs.update(nombre=F('nombre') + delta)
+
+    @classmethod
+    def pour_utilisateurs(cls, utilisateur_ids, jour=None):
+        """
+        Lit les compteurs d'un lot d'utilisateurs en une requête
+
+        Returns:
+            dict {utilisateur_id: nombre} (utilisateurs absents : 0 session)
+        """
+        jour = jour or timezone.localdate()
+        return dict(cls.objects.filter(
+            utilisateur_id__in=list(utilisateur_ids),
+            jour=jour
+        ).values_list('utilisateur_id', 'nombre'))
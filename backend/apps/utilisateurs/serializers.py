@@ -3,7 +3,24 @@ Serializers pour l'app Utilisateurs
 """
 
 from rest_framework import serializers
-from .models import Utilisateur
+from .models import CompteurSessionsJour, Utilisateur
+
+
+class UtilisateurBulkListSerializer(serializers.ListSerializer):
+    """
+    Sérialisation d'une liste d'utilisateurs
+
+    Lit les compteurs de sessions du jour de toute la liste en une requête
+    (contexte 'sessions_today') au lieu d'une lecture par utilisateur.
+    """
+
+    def to_representation(self, data):
+        utilisateurs = list(data.all() if hasattr(data, 'all') else data)
+        self.context.setdefault(
+            'sessions_today',
+            CompteurSessionsJour.pour_utilisateurs(u.pk for u in utilisateurs)
+        )
+        return super().to_representation(utilisateurs)
 
 
 class UtilisateurSerializer(serializers.ModelSerializer):
@@ -27,6 +44,7 @@ class UtilisateurSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Utilisateur
+        list_serializer_class = UtilisateurBulkListSerializer
         fields = [
             'id',
             'nom',
@@ -67,6 +85,9 @@ class UtilisateurSerializer(serializers.ModelSerializer):
 
     def get_can_create_session(self, obj):
         """Vérifie si l'utilisateur peut créer une session aujourd'hui"""
+        sessions_today = self.context.get('sessions_today')
+        if sessions_today is not None:
+            return obj.can_create_session_today(sessions_today.get(obj.pk, 0))
         return obj.can_create_session_today()
 
     def validate_telephone(self, value):
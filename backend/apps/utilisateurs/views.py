@@ -5,6 +5,7 @@ ViewSets pour l'app Utilisateurs
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Count
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Utilisateur
 from .serializers import (
@@ -39,6 +40,13 @@ class UtilisateurViewSet(viewsets.ModelViewSet):
     ordering_fields = ['nom', 'prenom', 'created_at', 'derniere_session']
     ordering = ['-created_at']
 
+    def get_queryset(self):
+        """Compte les sessions de chaque utilisateur de la liste en une requête"""
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.annotate(_nombre_sessions=Count('sessions'))
+        return queryset
+
     def get_serializer_class(self):
         """Retourne le serializer approprié selon l'action"""
         if self.action == 'list':
@@ -70,11 +78,19 @@ class UtilisateurViewSet(viewsets.ModelViewSet):
         date_limite = timezone.now() - timedelta(days=30)
         actifs = Utilisateur.objects.filter(derniere_session__gte=date_limite).count()
 
+        # Sessions des 30 derniers jours (statistiques quotidiennes)
+        from apps.sessions.statistiques import totaux
+        sessions = totaux(debut=timezone.localdate() - timedelta(days=29))
+
         return Response({
             'total': total,
             'avec_consentement_rgpd': avec_consentement,
             'sans_consentement_rgpd': sans_consentement,
-            'actifs_30_jours': actifs
+            'actifs_30_jours': actifs,
+            'sessions_30_jours': {
+                'inscrits': sessions['sessions_inscrits'],
+                'invites': sessions['sessions_invites'],
+            }
         })
 
     @action(detail=True, methods=['get'])
@@ -85,7 +101,7 @@ class UtilisateurViewSet(viewsets.ModelViewSet):
         GET /api/utilisateurs/{id}/sessions/
         """
         utilisateur = self.get_object()
-        sessions = utilisateur.sessions.all()
+        sessions = utilisateur.sessions.select_related('utilisateur', 'poste')
 
         # Import ici pour éviter les imports circulaires
         from apps.sessions.serializers import SessionListSerializer
@@ -111,8 +127,8 @@ class UtilisateurViewSet(viewsets.ModelViewSet):
         from django.conf import settings
 
         utilisateur = self.get_object()
-        can_create = utilisateur.can_create_session_today()
         sessions_today = utilisateur.sessions_today
+        can_create = utilisateur.can_create_session_today(sessions_today)
         max_sessions = settings.POSTE_PUBLIC.get('MAX_SESSIONS_PER_USER_PER_DAY', 3)
 
         return Response({
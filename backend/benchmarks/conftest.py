@@ -0,0 +1,93 @@
+"""
+Suite de benchmarks (pytest-benchmark) sur un jeu de données synthétiques
+
+Hors de la suite de tests (testpaths = tests) :
+    pytest benchmarks                                  # mesure
+    pytest benchmarks --benchmark-autosave             # enregistre une référence (.benchmarks/)
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:25%
+
+Les durées dépendent de la machine : la référence est enregistrée sur la
+machine de CI avant chaque déploiement. Le nombre de requêtes SQL de chaque
+scénario, lui, est déterministe : il est comparé à benchmarks/baselines.json
+(régénéré avec --update-baselines après une évolution voulue).
+"""
+import json
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.donnees_synthetiques import GenerateurDonnees
+from tests.conftest import _ensure_atomic_requests_setting  # noqa: F401 (fixture autouse)
+
+BASELINES = Path(__file__).with_name('baselines.json')
+
+# Volumes du jeu de données pour --echelle 1
+VOLUMES = {'postes': 50, 'utilisateurs': 2000, 'sessions': 20000, 'logs': 50000}
+
+
+def pytest_addoption(parser):
+    parser.addoption('--echelle', type=int, default=1, help="Multiplicateur des volumes du jeu de données")
+    parser.addoption('--update-baselines', action='store_true', help="Réécrire baselines.json")
+
+
+@pytest.fixture(scope='session')
+def jeu_de_donnees(request, django_db_setup, django_db_blocker):
+    """Jeu de données partagé par toute la session (non annulé entre les tests)"""
+    echelle = request.config.getoption('--echelle')
+    with django_db_blocker.unblock():
+        return GenerateurDonnees(graine=42, jours=90).generer(
+            **{table: volume * echelle for table, volume in VOLUMES.items()}
+        )
+
+
+@pytest.fixture(autouse=True)
+def _sans_cache_http(settings):
+    """Mesure le calcul des réponses, pas le cache HTTP"""
+    settings.HTTP_CACHE_ENABLED = False
+
+
+@pytest.fixture(scope='session')
+def _references(request):
+    references = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+    mesures = {}
+    yield references, mesures
+    if request.config.getoption('--update-baselines') and mesures:
+        BASELINES.write_text(json.dumps(dict(references, **mesures), indent=2, sort_keys=True) + '\n')
+
+
+@pytest.fixture
+def requetes(request, _references):
+    """
+    Compare le nombre de requêtes SQL d'un appel à la référence enregistrée
+
+    Usage : requetes(lambda: client.get(url)) ; la clé est le nom du test.
+    """
+    references, mesures = _references
+
+    def verifier(fonction):
+        with CaptureQueriesContext(connection) as capture:
+            fonction()
+        nombre = len(capture)
+        cle = request.node.name
+        mesures[cle] = nombre
+        if not request.config.getoption('--update-baselines'):
+            assert cle in references, f"Pas de référence pour {cle} : lancer avec --update-baselines"
+            assert nombre <= references[cle], (
+                f"{cle} : {nombre} requêtes SQL pour une référence de {references[cle]}"
+            )
+        return nombre
+
+    return verifier
+
+
+@pytest.fixture
+def client_admin(jeu_de_donnees, db):
+    """Client API authentifié (sans coût JWT)"""
+    from rest_framework.test import APIClient
+    from tests.factories import UserFactory
+
+    client = APIClient()
+    client.force_authenticate(UserFactory(is_staff=True, is_superuser=True))
+    return client
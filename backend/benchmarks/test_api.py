@@ -0,0 +1,42 @@
+"""
+Benchmarks des endpoints de liste et de statistiques
+"""
+import pytest
+
+ENDPOINTS = [
+    '/api/postes/',
+    '/api/postes/disponibles/',
+    '/api/postes/stats/',
+    '/api/postes/seat_board/',
+    '/api/sessions/',
+    '/api/sessions/actives/',
+    '/api/sessions/stats/',
+    '/api/sessions/stats_quotidiennes/',
+    '/api/logs/',
+    '/api/logs/stats/',
+    '/api/utilisateurs/',
+]
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_endpoint(benchmark, client_admin, requetes, url):
+    """Lecture d'un endpoint sur le jeu de données complet"""
+    def appel():
+        response = client_admin.get(url)
+        assert response.status_code == 200
+        return response
+
+    requetes(appel)
+    benchmark(appel)
+
+
+def test_cached_endpoint_hit(benchmark, client_admin, requetes, settings):
+    """Lecture servie par le cache HTTP (304 sur If-None-Match)"""
+    settings.HTTP_CACHE_ENABLED = True
+    etag = client_admin.get('/api/sessions/stats/')['ETag']
+
+    def appel():
+        assert client_admin.get('/api/sessions/stats/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    requetes(appel)
+    benchmark(appel)
@@ -0,0 +1,64 @@
+"""
+Benchmarks des traitements des consumers WebSocket (accès base)
+
+Les méthodes sont appelées sans le pool de threads (__wrapped__) : la base
+SQLite en mémoire des tests n'est pas partagée entre threads.
+"""
+import pytest
+
+from apps.postes.consumers import ClientConsumer
+from apps.sessions.models import Session
+
+
+@pytest.fixture
+def consumer(jeu_de_donnees, db):
+    from tests.factories import PosteFactory
+
+    consumer = ClientConsumer()
+    consumer.poste = PosteFactory(statut='disponible')
+    consumer.authenticated = True
+    return consumer
+
+
+@pytest.fixture
+def session_en_attente(consumer, jeu_de_donnees):
+    return Session.objects.create(
+        utilisateur_id=jeu_de_donnees['utilisateurs'][0], poste=consumer.poste,
+        duree_initiale=3600, operateur='admin'
+    )
+
+
+def test_validate_code(benchmark, requetes, consumer, session_en_attente):
+    """Validation d'un code d'accès par le poste client"""
+    def appel():
+        assert ClientConsumer._validate_session_code.__wrapped__(consumer, session_en_attente.code_acces)
+
+    requetes(appel)
+    benchmark(appel)
+
+
+def test_start_session(benchmark, requetes, consumer, session_en_attente):
+    """Démarrage puis reconnexion (appels suivants) depuis le poste client"""
+    def appel():
+        assert ClientConsumer._start_session.__wrapped__(consumer, session_en_attente.pk)['success']
+
+    requetes(appel)
+    benchmark(appel)
+
+
+def test_get_session_time(benchmark, requetes, consumer, session_en_attente):
+    """Lecture du temps restant"""
+    def appel():
+        ClientConsumer._get_session_time.__wrapped__(consumer, session_en_attente.pk)
+
+    requetes(appel)
+    benchmark(appel)
+
+
+def test_heartbeat(benchmark, requetes, consumer):
+    """Mise à jour de la dernière connexion du poste"""
+    def appel():
+        ClientConsumer._update_poste_connection.__wrapped__(consumer)
+
+    requetes(appel)
+    benchmark(appel)
@@ -0,0 +1,39 @@
+"""
+Benchmarks du cycle de vie des sessions et des tâches périodiques
+"""
+import itertools
+
+import pytest
+
+from apps.sessions import tasks
+from apps.sessions.models import Session
+
+
+@pytest.fixture
+def poste_libre(jeu_de_donnees, db):
+    from tests.factories import PosteFactory
+    return PosteFactory(statut='disponible')
+
+
+def test_session_lifecycle(benchmark, requetes, poste_libre, jeu_de_donnees):
+    """Création, démarrage, ajout de temps et fin d'une session"""
+    utilisateurs = itertools.cycle(jeu_de_donnees['utilisateurs'])
+
+    def cycle():
+        session = Session.objects.create(
+            utilisateur_id=next(utilisateurs), poste=poste_libre, duree_initiale=3600, operateur='admin'
+        )
+        assert session.demarrer(exiger_poste_disponible=True)
+        assert session.ajouter_temps(600, 'admin')
+        assert session.terminer('admin')
+
+    requetes(cycle)
+    benchmark(cycle)
+
+
+@pytest.mark.parametrize('tache', ['update_session_times', 'cleanup_expired_sessions', 'send_time_warnings'])
+def test_periodic_task(benchmark, requetes, jeu_de_donnees, db, tache):
+    """Tâche périodique sur toutes les sessions en cours"""
+    fonction = getattr(tasks, tache)
+    requetes(fonction)
+    benchmark(fonction)
@@ -19,6 +19,9 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
 # Configuration des tâches périodiques
+# Files (CELERY_TASK_ROUTES) et budgets d'exécution (TASK_RUNTIME_BUDGETS)
+# dans les settings ; les tâches périodiques sont protégées contre les
+# exécutions concurrentes par apps.core.taches.single_flight
 app.conf.beat_schedule = {
     # === SESSIONS ===
 
@@ -32,6 +35,8 @@ app.conf.beat_schedule = {
     'send-session-warnings': {
         'task': 'apps.sessions.tasks.send_time_warnings',
         'schedule': 10.0,  # Toutes les 10 secondes
+        # Périmée si non démarrée avant la suivante : pas d'accumulation
+        'options': {'expires': 10},
     },
 
     # Mise à jour des temps de session (toutes les secondes)
@@ -39,6 +44,21 @@ app.conf.beat_schedule = {
     'update-session-times': {
         'task': 'apps.sessions.tasks.update_session_times',
         'schedule': 1.0,  # Toutes les secondes
+        'options': {'expires': 1},
+    },
+
+    # Ouverture des créneaux réservés (toutes les minutes)
+    'ouvrir-reservations': {
+        'task': 'apps.sessions.tasks.ouvrir_reservations',
+        'schedule': 60.0,
+        'options': {'expires': 60},
+    },
+
+    # File d'attente : postes attribués non occupés, libérations manquées
+    'traiter-file-attente': {
+        'task': 'apps.sessions.tasks.traiter_file_attente',
+        'schedule': 30.0,
+        'options': {'expires': 30},
     },
 
     # Nettoyage des vieilles sessions (tous les jours à 4h)
@@ -47,12 +67,38 @@ app.conf.beat_schedule = {
         'schedule': crontab(hour=4, minute=0),
     },
 
+    # Consolidation des statistiques quotidiennes (toutes les heures)
+    'consolider-statistiques': {
+        'task': 'apps.sessions.tasks.consolider_statistiques',
+        'schedule': crontab(minute=10),
+    },
+
     # Rapport quotidien des sessions (tous les jours à 6h)
     'sessions-daily-report': {
         'task': 'apps.sessions.tasks.generate_sessions_report',
         'schedule': crontab(hour=6, minute=0),
     },
 
+    # === POSTES ===
+
+    # Clés non récupérées effacées, anciennes demandes de certificat purgées (toutes les 5 minutes)
+    'cleanup-certificate-requests': {
+        'task': 'apps.postes.tasks.cleanup_certificate_requests',
+        'schedule': crontab(minute='*/5'),
+    },
+
+    # Expiration des commandes non acquittées, purge des anciennes (toutes les 5 minutes)
+    'expirer-commandes': {
+        'task': 'apps.postes.tasks.expirer_commandes',
+        'schedule': crontab(minute='*/5'),
+    },
+
+    # Régénération de la CRL (tous les jours à 5h)
+    'export-crl': {
+        'task': 'apps.postes.tasks.export_crl',
+        'schedule': crontab(hour=5, minute=0),
+    },
+
     # === LOGS ===
 
     # Nettoyage des logs anciens (tous les jours à 3h du matin)
@@ -46,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # En tête : mesure aussi le temps passé dans les autres middlewares
+    'apps.core.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -100,7 +102,9 @@ else:
             'PASSWORD': config('POSTGRES_PASSWORD', default='password'),
             'HOST': config('DB_HOST', default='postgres'),
             'PORT': config('DB_PORT', default='5432'),
-            'CONN_MAX_AGE': 600,
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+            # Vérifie une connexion persistante avant de la réutiliser
+            'CONN_HEALTH_CHECKS': True,
             'ATOMIC_REQUESTS': True,
             'OPTIONS': {
                 'connect_timeout': 10,
@@ -108,6 +112,55 @@ else:
         }
     }
 
+# ============== Pool de connexions PostgreSQL ==============
+# Type de processus (daphne, celery-worker, celery-beat, manage) : fixe la
+# taille du pool et le nom d'application visible dans pg_stat_activity
+DB_PROCESS_TYPE = config('DB_PROCESS_TYPE', default='daphne')
+
+# Mode de pooling :
+# - none      : connexions persistantes (CONN_MAX_AGE) par thread
+# - pgbouncer : DB_HOST pointe sur PgBouncer en mode transaction
+#               (docker/docker-compose.pgbouncer.yml)
+# - psycopg   : pool natif psycopg par processus (Django >= 5.1)
+DB_POOL_MODE = config('DB_POOL_MODE', default='none')
+
+# Connexions maximum par processus. Daphne : threads du pool des consumers
+# (DB_EXECUTOR_WORKERS) + thread des vues + marge. Celery en prefork : chaque
+# processus enfant exécute une tâche à la fois.
+DB_POOL_SIZES = {
+    'daphne': config('DB_POOL_SIZE_DAPHNE', default=10, cast=int),
+    'celery-worker': config('DB_POOL_SIZE_CELERY_WORKER', default=1, cast=int),
+    'celery-beat': config('DB_POOL_SIZE_CELERY_BEAT', default=1, cast=int),
+    'manage': config('DB_POOL_SIZE_MANAGE', default=2, cast=int),
+}
+# Attente maximum d'une connexion libre dans le pool (secondes)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=int)
+
+if not USE_SQLITE:
+    DATABASES['default']['OPTIONS']['application_name'] = f'epn-{DB_PROCESS_TYPE}'
+
+    if DB_POOL_MODE == 'pgbouncer':
+        # Mode transaction : un curseur serveur ne survit pas à la transaction
+        # (QuerySet.iterator hors atomic, exports en streaming)
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+    elif DB_POOL_MODE == 'psycopg':
+        import django
+        from django.core.exceptions import ImproperlyConfigured
+
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured("DB_POOL_MODE=psycopg nécessite Django 5.1 ou supérieur")
+        # Le pool remplace les connexions persistantes
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': 1,
+            'max_size': DB_POOL_SIZES.get(DB_PROCESS_TYPE, DB_POOL_SIZES['manage']),
+            'timeout': DB_POOL_TIMEOUT,
+        }
+    elif DB_POOL_MODE != 'none':
+        from django.core.exceptions import ImproperlyConfigured
+
+        raise ImproperlyConfigured(f"DB_POOL_MODE inconnu: {DB_POOL_MODE}")
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -180,17 +233,23 @@ CORS_ALLOW_CREDENTIALS = True
 # Channels (WebSocket)
 CHANNEL_LAYERS = {
     'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'BACKEND': 'apps.core.channel_layers.RedisChannelLayer',
         'CONFIG': {
             'hosts': [(config('REDIS_HOST', default='redis'), config('REDIS_PORT', default=6379, cast=int))],
             'capacity': 1500,
             'expiry': 10,
+            # Un canal d'un worker mort sort de ses groupes après ce délai
+            # (secondes). Les kiosques rafraîchissent les leurs au heartbeat,
+            # pas les tableaux de bord : ne pas descendre sous leur durée
+            # de connexion
+            'group_expiry': config('CHANNEL_GROUP_EXPIRY', default=86400, cast=int),
         },
     },
 }
 
-# Cache (Local Memory pour tests, Redis pour production)
-USE_REDIS_CACHE = config('USE_REDIS_CACHE', default=False, cast=bool)
+# Cache (Redis par défaut hors DEBUG : partagé entre tous les processus,
+# nécessaire au cache HTTP, aux verrous et aux compteurs des tâches)
+USE_REDIS_CACHE = config('USE_REDIS_CACHE', default=not DEBUG, cast=bool)
 
 if USE_REDIS_CACHE:
     CACHES = {
@@ -232,6 +291,35 @@ CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 1000
 
+# Files Celery : les tâches de session (sensibles à la latence) ont leur
+# propre file et leur propre worker, pour ne jamais attendre derrière
+# l'archivage des logs ou la génération des rapports. L'émission de
+# certificats (génération de clés) reste sur la file par défaut.
+CELERY_TASK_DEFAULT_QUEUE = 'celery'
+CELERY_TASK_ROUTES = {
+    'apps.sessions.tasks.update_session_times': {'queue': 'temps_reel'},
+    'apps.sessions.tasks.send_time_warnings': {'queue': 'temps_reel'},
+    'apps.sessions.tasks.cleanup_expired_sessions': {'queue': 'temps_reel'},
+    'apps.sessions.tasks.ouvrir_reservations': {'queue': 'temps_reel'},
+    'apps.sessions.tasks.attribuer_postes': {'queue': 'temps_reel'},
+    'apps.sessions.tasks.traiter_file_attente': {'queue': 'temps_reel'},
+    'apps.logs.tasks.*': {'queue': 'maintenance'},
+    'apps.sessions.tasks.generate_sessions_report': {'queue': 'maintenance'},
+    'apps.sessions.tasks.cleanup_old_sessions': {'queue': 'maintenance'},
+}
+
+# Budget d'exécution (secondes) des tâches périodiques, en général leur
+# période : au-delà, l'exécution suivante est retardée (alerte + compteur
+# epn_celery_task_budget_exceeded_total)
+TASK_RUNTIME_BUDGETS = {
+    'apps.sessions.tasks.update_session_times': 1.0,
+    'apps.sessions.tasks.send_time_warnings': 10.0,
+    'apps.sessions.tasks.cleanup_expired_sessions': 300.0,
+    'apps.sessions.tasks.ouvrir_reservations': 60.0,
+    'apps.sessions.tasks.traiter_file_attente': 30.0,
+    'apps.sessions.tasks.consolider_statistiques': 3600.0,
+}
+
 # Email Configuration (optionnel)
 EMAIL_BACKEND = config(
     'EMAIL_BACKEND',
@@ -351,6 +439,19 @@ CA_KEY_PASSWORD = config('CA_KEY_PASSWORD', default=None)
 CLIENT_CERT_VALIDITY_DAYS = config('CLIENT_CERT_VALIDITY_DAYS', default=365, cast=int)
 # Nom de l'organisation dans les certificats
 CA_ORGANIZATION_NAME = config('CA_ORGANIZATION_NAME', default='EPN')
+# Algorithme des clés clients : 'rsa' (RSA 2048) ou 'ecdsa' (P-256, génération bien plus rapide)
+CLIENT_CERT_KEY_ALGORITHM = config('CLIENT_CERT_KEY_ALGORITHM', default='rsa')
+# Nombre de clés clients pré-générées par le worker Celery (0 = désactivé)
+CLIENT_CERT_KEY_POOL_SIZE = config('CLIENT_CERT_KEY_POOL_SIZE', default=0, cast=int)
+# Durée de conservation d'une clé délivrée en mode asynchrone et non récupérée (secondes)
+CLIENT_CERT_KEY_TTL = config('CLIENT_CERT_KEY_TTL', default=600, cast=int)
+# CRL exportée pour le reverse proxy (régénérée à chaque révocation et chaque jour)
+CA_CRL_PATH = config('CA_CRL_PATH', default=str(BASE_DIR / 'certs' / 'crl.pem'))
+CRL_VALIDITY_DAYS = config('CRL_VALIDITY_DAYS', default=7, cast=int)
+# Liste de révocation : fréquence de vérification de la version partagée (secondes)
+# et durée de vie de la copie en cache
+REVOCATION_CHECK_INTERVAL = config('REVOCATION_CHECK_INTERVAL', default=1, cast=int)
+REVOCATION_CACHE_TIMEOUT = config('REVOCATION_CACHE_TIMEOUT', default=300, cast=int)
 
 # ============== Configuration découverte automatique clients ==============
 # Token partagé pour l'auto-découverte des clients
@@ -358,3 +459,85 @@ CA_ORGANIZATION_NAME = config('CA_ORGANIZATION_NAME', default='EPN')
 DISCOVERY_TOKEN = config('DISCOVERY_TOKEN', default=None)
 # Token précédent pour rotation gracieuse (optionnel)
 DISCOVERY_TOKEN_PREVIOUS = config('DISCOVERY_TOKEN_PREVIOUS', default=None)
+
+# ============== Accès base depuis les consumers WebSocket ==============
+# Pool de threads dédié aux requêtes des consumers (à garder sous la taille du
+# pool de connexions PostgreSQL) et seuil d'attente journalisé (secondes)
+DB_EXECUTOR_WORKERS = config('DB_EXECUTOR_WORKERS', default=8, cast=int)
+DB_EXECUTOR_SLOW_WAIT = config('DB_EXECUTOR_SLOW_WAIT', default=0.5, cast=float)
+
+# ============== Contre-pression des consumers WebSocket ==============
+# File locale de chaque consumer (apps.core.backpressure) : types coalescés
+# (la dernière valeur remplace celle en attente), taille au-delà de laquelle
+# un consumer est en retard, délai toléré (secondes) puis politique
+# appliquée : 'disconnect' (fermeture 4429) ou 'drop' (plus anciens écartés)
+WS_COALESCE_TYPES = config('WS_COALESCE_TYPES', default='time_update,stats_update', cast=Csv())
+WS_MAX_BACKLOG = config('WS_MAX_BACKLOG', default=100, cast=int)
+WS_SLOW_CONSUMER_GRACE = config('WS_SLOW_CONSUMER_GRACE', default=5, cast=float)
+WS_SLOW_CONSUMER_POLICY = config('WS_SLOW_CONSUMER_POLICY', default='disconnect')
+
+# ============== Réservations des postes ==============
+# Plage réservable de chaque jour (heure locale)
+RESERVATION_HORAIRES = (
+    config('RESERVATION_OUVERTURE', default='09:00'),
+    config('RESERVATION_FERMETURE', default='18:00'),
+)
+# Ouverture du créneau (session créée, poste réservé) avant son début, en secondes
+RESERVATION_AVANCE = config('RESERVATION_AVANCE', default=300, cast=int)
+# Délai après le début au-delà duquel un créneau non démarré est libéré
+RESERVATION_DELAI_ABSENCE = config('RESERVATION_DELAI_ABSENCE', default=900, cast=int)
+RESERVATION_DUREE_MAX = config('RESERVATION_DUREE_MAX', default=4 * 3600, cast=int)
+
+# ============== File d'attente des postes ==============
+# Délai laissé à l'usager pour se connecter au poste attribué, en secondes
+FILE_ATTENTE_DELAI_PRESENTATION = config('FILE_ATTENTE_DELAI_PRESENTATION', default=300, cast=int)
+
+# ============== Présence des postes (plusieurs workers ASGI) ==============
+# Durée du bail d'une socket kiosque dans le registre partagé
+# (apps.core.presence), renouvelé à chaque heartbeat (secondes)
+PRESENCE_TTL = config('PRESENCE_TTL', default=90, cast=int)
+
+# ============== Rejeu des événements de session ==============
+# Événements numérotés (time_added, session_warning, extension_response,
+# session_terminated) conservés dans un stream Redis borné par session et
+# rejoués au kiosque qui se reconnecte (apps.sessions.evenements)
+SESSION_EVENTS_REDIS = config('SESSION_EVENTS_REDIS', default=USE_REDIS_CACHE, cast=bool)
+SESSION_EVENTS_REDIS_URL = config('SESSION_EVENTS_REDIS_URL', default=config('REDIS_URL', default='redis://redis:6379/0'))
+SESSION_EVENTS_MAXLEN = config('SESSION_EVENTS_MAXLEN', default=50, cast=int)
+SESSION_EVENTS_TTL = config('SESSION_EVENTS_TTL', default=4 * 3600, cast=int)
+
+# ============== Commandes aux postes ==============
+# Durée de validité d'une commande non acquittée (renvoyée à la reconnexion
+# du poste jusque-là), et conservation de l'historique, en secondes / jours
+COMMANDES_TTL = config('COMMANDES_TTL', default=300, cast=int)
+COMMANDES_RETENTION_JOURS = config('COMMANDES_RETENTION_JOURS', default=30, cast=int)
+
+# ============== Métriques Prometheus ==============
+# GET /api/metrics/ : jeton à fournir par le collecteur
+# (Authorization: Bearer <METRICS_TOKEN>). Sans jeton, l'endpoint n'est
+# ouvert qu'en DEBUG.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# ============== Cache des endpoints de lecture ==============
+# Réponses mises en cache (apps.core.http_cache), invalidées par les écritures ;
+# durée de vie par défaut et du verrou de recalcul (secondes)
+HTTP_CACHE_ENABLED = config('HTTP_CACHE_ENABLED', default=True, cast=bool)
+HTTP_CACHE_TIMEOUT = config('HTTP_CACHE_TIMEOUT', default=60, cast=int)
+HTTP_CACHE_LOCK_TIMEOUT = config('HTTP_CACHE_LOCK_TIMEOUT', default=10, cast=int)
+
+# ============== Limitation de débit (rate limiting) ==============
+# Compteurs partagés dans Redis entre tous les workers (repli en mémoire locale
+# si Redis est désactivé ou indisponible)
+USE_REDIS_RATE_LIMIT = config('USE_REDIS_RATE_LIMIT', default=True, cast=bool)
+RATE_LIMIT_REDIS_URL = config('RATE_LIMIT_REDIS_URL', default=config('REDIS_URL', default='redis://redis:6379/0'))
+# Nombre de reverse proxies de confiance devant Django (Traefik : 1) ; 0 :
+# X-Forwarded-For est ignoré et l'IP limitée est REMOTE_ADDR
+RATE_LIMIT_TRUSTED_PROXIES = config('RATE_LIMIT_TRUSTED_PROXIES', default=0, cast=int)
+# Limites par fonctionnalité (fenêtre glissante), par IP ou par poste
+RATE_LIMITS = {
+    'validate_code': config('RATE_LIMIT_VALIDATE_CODE', default='10/m'),
+    'register_client': config('RATE_LIMIT_REGISTER_CLIENT', default='5/m'),
+    'discover': config('RATE_LIMIT_DISCOVER', default='10/m'),
+    'discovery_status': config('RATE_LIMIT_DISCOVERY_STATUS', default='30/m'),
+    'certificate_status': config('RATE_LIMIT_CERTIFICATE_STATUS', default='60/m'),
+}
@@ -20,10 +20,16 @@ CACHES = {
 # Channel layers en mémoire pour les tests
 CHANNEL_LAYERS = {
     'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        'BACKEND': 'apps.core.channel_layers.InMemoryChannelLayer',
     }
 }
 
+# Rate limiting en mémoire locale pour les tests
+USE_REDIS_RATE_LIMIT = False
+
+# Journal des événements de session en mémoire locale
+SESSION_EVENTS_REDIS = False
+
 # Désactiver Celery pour les tests
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
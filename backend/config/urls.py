@@ -11,11 +11,16 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
 )
+from apps.core.views import health, metrics
 
 urlpatterns = [
     # Django Admin
     path('admin/', admin.site.urls),
 
+    # Supervision (HEALTHCHECK Docker, Prometheus)
+    path('api/health/', health, name='health'),
+    path('api/metrics/', metrics, name='metrics'),
+
     # API Authentication (JWT)
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -25,8 +30,12 @@ urlpatterns = [
     path('api/auth/', include('apps.auth.urls')),
     path('api/utilisateurs/', include('apps.utilisateurs.urls')),
     path('api/postes/', include('apps.postes.urls')),
+    path('api/sites/', include('apps.postes.site_urls')),
+    path('api/commandes/', include('apps.postes.commande_urls')),
     path('api/sessions/', include('apps.sessions.urls')),
     path('api/extension-requests/', include('apps.sessions.extension_urls')),
+    path('api/reservations/', include('apps.sessions.reservation_urls')),
+    path('api/file-attente/', include('apps.sessions.file_attente_urls')),
     path('api/logs/', include('apps.logs.urls')),
 ]
 
@@ -17,6 +17,28 @@ from tests.factories import (
 User = get_user_model()
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        '--rapport-requetes', nargs='?', const='-', default=None,
+        help="Affiche les scénarios les plus coûteux en requêtes SQL (et les écrit en JSON si un chemin est donné)"
+    )
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Rapport des pires scénarios mesurés par garde_requetes"""
+    from tests import requetes
+
+    option = config.getoption('--rapport-requetes')
+    if option is None or not requetes.PROFILS:
+        return
+    terminalreporter.write_sep('=', 'requêtes SQL par scénario (1 → 50 lignes)')
+    for ligne in requetes.rapport():
+        terminalreporter.write_line(ligne)
+    if option != '-':
+        requetes.ecrire_rapport(option)
+        terminalreporter.write_line(f'Rapport complet : {option}')
+
+
 @pytest.fixture(autouse=True)
 def _ensure_atomic_requests_setting():
     """Ensure ATOMIC_REQUESTS is in connections.settings for all databases."""
@@ -28,6 +50,74 @@ def _ensure_atomic_requests_setting():
                 connections.settings[alias]['ATOMIC_REQUESTS'] = True
 
 
+@pytest.fixture(autouse=True)
+def _reset_rate_limits():
+    """Repart de compteurs de rate limiting vides pour chaque test"""
+    from apps.core.ratelimit import reset_rate_limits
+    reset_rate_limits()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _reset_journal_evenements():
+    """Repart d'un journal des événements de session vide pour chaque test"""
+    from apps.sessions.evenements import reset_journal
+    reset_journal()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    """Vide le cache partagé : les écritures annulées en fin de test ne l'invalident pas"""
+    from django.core.cache import cache
+    cache.clear()
+    yield
+
+
+@pytest.fixture
+def garde_requetes(db):
+    """
+    Vérifie qu'un scénario ne fait pas plus de requêtes sur 50 lignes que sur 1
+
+    Usage : garde_requetes(nom, peupler=lambda n: ..., appel=lambda: ...)
+    """
+    from tests.requetes import profiler
+
+    def garde(nom, peupler, appel):
+        profil = profiler(nom, peupler, appel)
+        if profil.croissance > 0:
+            pytest.fail(f"Requêtes proportionnelles aux données — {profil.description()}", pytrace=False)
+        return profil
+
+    return garde
+
+
+@pytest.fixture(scope='session')
+def ca_dir(tmp_path_factory):
+    """Répertoire de CA partagé (la génération RSA 4096 est coûteuse)"""
+    from apps.postes.certificate_manager import CertificateManager
+    path = tmp_path_factory.mktemp('ca')
+    manager = CertificateManager()
+    manager.ca_cert_path = path / 'ca.crt'
+    manager.ca_key_path = path / 'ca.key'
+    manager.ca_key_password = None
+    manager.ensure_ca_exists()
+    return path
+
+
+@pytest.fixture
+def cert_manager(ca_dir, monkeypatch):
+    """CertificateManager singleton pointant sur la CA de test"""
+    from apps.postes import certificate_manager as cm
+    manager = cm.CertificateManager()
+    manager.ca_cert_path = ca_dir / 'ca.crt'
+    manager.ca_key_path = ca_dir / 'ca.key'
+    manager.ca_key_password = None
+    manager.crl_path = ca_dir / 'crl.pem'
+    monkeypatch.setattr(cm, '_certificate_manager', manager)
+    return manager
+
+
 @pytest.fixture
 def api_client():
     """Client API non authentifié"""
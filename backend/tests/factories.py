@@ -8,7 +8,7 @@ from django.utils import timezone
 from datetime import timedelta
 
 from apps.utilisateurs.models import Utilisateur
-from apps.postes.models import Poste
+from apps.postes.models import Poste, Site
 from apps.sessions.models import Session
 from apps.logs.models import Log
 
@@ -50,6 +50,16 @@ class UtilisateurFactory(DjangoModelFactory):
     nombre_sessions_total = 0
 
 
+class SiteFactory(DjangoModelFactory):
+    """Factory pour les sites (salles EPN)"""
+
+    class Meta:
+        model = Site
+
+    nom = factory.Sequence(lambda n: f'Salle {n}')
+    slug = factory.Sequence(lambda n: f'salle-{n}')
+
+
 class PosteFactory(DjangoModelFactory):
     """Factory pour les postes informatiques"""
 
@@ -57,8 +67,8 @@ class PosteFactory(DjangoModelFactory):
         model = Poste
 
     nom = factory.Sequence(lambda n: f'Poste-{n:02d}')
-    ip_address = factory.Sequence(lambda n: f'192.168.1.{100 + n}')
-    mac_address = factory.Sequence(lambda n: f'AA:BB:CC:DD:EE:{n:02X}')
+    ip_address = factory.Sequence(lambda n: f'192.168.{1 + n // 155}.{100 + n % 155}')
+    mac_address = factory.Sequence(lambda n: f'AA:BB:CC:DD:{n // 256 % 256:02X}:{n % 256:02X}')
     statut = 'disponible'
     derniere_connexion = factory.LazyFunction(timezone.now)
     version_client = '1.0.0'
@@ -0,0 +1,118 @@
+"""
+Garde anti N+1 : nombre et forme des requêtes SQL selon le volume de données
+
+Un scénario est exécuté sur un petit jeu (1 ligne) puis sur un grand
+(50 lignes) ; le nombre de requêtes ne doit pas croître. La forme d'une
+requête est son verbe et sa première table ('SELECT sessions'), ce qui
+désigne directement la relation chargée ligne par ligne.
+
+Usage (fixture garde_requetes, tests/conftest.py) :
+    def test_liste_postes(garde_requetes, authenticated_client):
+        garde_requetes(
+            'GET /api/postes/',
+            peupler=lambda n: SessionFactory.create_batch(n, statut='active'),
+            appel=lambda: authenticated_client.get('/api/postes/'),
+        )
+
+Les profils mesurés sont repris par le rapport des pires scénarios
+(pytest --rapport-requetes[=rapport.json]).
+"""
+
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from apps.core.instrumentation import cle_requete
+
+PETIT, GRAND = 1, 50
+
+# Profils mesurés pendant la session de tests (rapport)
+PROFILS = []
+
+
+@dataclass
+class ProfilRequetes:
+    """Requêtes d'un scénario sur le petit et le grand jeu de données"""
+
+    nom: str
+    petit: int
+    grand: int
+    formes_petit: Counter = field(default_factory=Counter)
+    formes_grand: Counter = field(default_factory=Counter)
+
+    @property
+    def croissance(self):
+        return self.grand - self.petit
+
+    def formes_en_croissance(self):
+        """[(forme, petit, grand)] des formes dont le nombre augmente"""
+        return sorted(
+            (
+                (forme, self.formes_petit[forme], nombre)
+                for forme, nombre in self.formes_grand.items()
+                if nombre > self.formes_petit[forme]
+            ),
+            key=lambda ligne: ligne[2] - ligne[1],
+            reverse=True,
+        )
+
+    def description(self):
+        formes = ', '.join(f'{forme} {petit}→{grand}' for forme, petit, grand in self.formes_en_croissance())
+        return f'{self.nom} : {self.petit} requêtes pour {PETIT} ligne(s), {self.grand} pour {GRAND} ({formes})'
+
+    def as_dict(self):
+        return {
+            'nom': self.nom, 'petit': self.petit, 'grand': self.grand,
+            'croissance': [list(ligne) for ligne in self.formes_en_croissance()],
+        }
+
+
+def capturer(appel):
+    """
+    Exécute un appel et renvoie (nombre de requêtes, Counter des formes)
+
+    Le cache HTTP est désactivé : la mesure porte sur le calcul.
+    """
+    with override_settings(HTTP_CACHE_ENABLED=False), CaptureQueriesContext(connection) as capture:
+        appel()
+    formes = Counter(cle_requete(requete['sql']) for requete in capture.captured_queries)
+    return len(capture), formes
+
+
+def profiler(nom, peupler, appel, petit=PETIT, grand=GRAND):
+    """
+    Mesure un scénario après peupler(petit), puis après peupler(grand - petit)
+
+    Args:
+        nom: Nom du scénario (rapport)
+        peupler: Fonction créant n lignes supplémentaires
+        appel: Fonction exécutant le scénario (requête HTTP, tâche...)
+    """
+    peupler(petit)
+    nombre_petit, formes_petit = capturer(appel)
+    peupler(grand - petit)
+    nombre_grand, formes_grand = capturer(appel)
+
+    profil = ProfilRequetes(nom, nombre_petit, nombre_grand, formes_petit, formes_grand)
+    PROFILS.append(profil)
+    return profil
+
+
+def rapport(limite=10):
+    """Lignes du rapport : les scénarios les plus coûteux sur le grand jeu"""
+    pires = sorted(PROFILS, key=lambda profil: (profil.croissance, profil.grand), reverse=True)
+    return [
+        f'{profil.grand:4d} requêtes (+{profil.croissance}) {profil.nom}'
+        + ''.join(f'\n       {forme} {petit}→{grand}' for forme, petit, grand in profil.formes_en_croissance())
+        for profil in pires[:limite]
+    ]
+
+
+def ecrire_rapport(chemin):
+    """Rapport complet au format JSON"""
+    pires = sorted(PROFILS, key=lambda profil: (profil.croissance, profil.grand), reverse=True)
+    with open(chemin, 'w') as fichier:
+        json.dump([profil.as_dict() for profil in pires], fichier, indent=2, ensure_ascii=False)
@@ -0,0 +1,76 @@
+"""
+Tests pour le pool DB dédié des consumers
+"""
+import threading
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from apps.core import async_db
+from apps.core.async_db import DBExecutor, db_sync_to_async
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    """Pool de 2 threads isolé pour le test"""
+    executor = DBExecutor(2)
+    monkeypatch.setattr(async_db, '_executor', executor)
+    yield executor
+    executor.pool.shutdown(wait=True)
+
+
+class TestDbSyncToAsync:
+    """Tests du décorateur db_sync_to_async"""
+
+    def test_runs_in_dedicated_pool(self, executor):
+        """Test que la fonction s'exécute dans un thread du pool"""
+        @db_sync_to_async
+        def thread_name():
+            return threading.current_thread().name
+
+        assert async_to_sync(thread_name)().startswith('db-async')
+
+    def test_metrics(self, executor):
+        """Test des compteurs (appels, erreurs)"""
+        @db_sync_to_async
+        def ok():
+            return 1
+
+        @db_sync_to_async
+        def ko():
+            raise ValueError('boom')
+
+        async_to_sync(ok)()
+        with pytest.raises(ValueError):
+            async_to_sync(ko)()
+
+        stats = executor.stats()
+        assert stats['total'] == 2
+        assert stats['erreurs'] == 1
+        assert stats['en_cours'] == 0
+        assert stats['en_attente'] == 0
+
+    def test_concurrency_is_bounded(self, executor):
+        """Test que le pool n'exécute jamais plus de max_workers appels à la fois"""
+        import asyncio
+
+        lock = threading.Lock()
+        actifs = [0, 0]  # en cours, maximum observé
+
+        @db_sync_to_async
+        def lente():
+            with lock:
+                actifs[0] += 1
+                actifs[1] = max(actifs[1], actifs[0])
+            time.sleep(0.05)
+            with lock:
+                actifs[0] -= 1
+
+        async def rafale():
+            await asyncio.gather(*(lente() for _ in range(6)))
+
+        async_to_sync(rafale)()
+        assert actifs[1] == 2
+        assert executor.stats()['total'] == 6
+        assert executor.stats()['attente_max_ms'] > 0
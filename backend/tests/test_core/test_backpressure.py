@@ -0,0 +1,149 @@
+"""
+Tests de la contre-pression des consumers WebSocket
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+
+from apps.core import metrics
+from apps.core.backpressure import CODE_CONSUMER_LENT, BackpressureConsumerMixin, FileCanal
+
+
+class TestFileCanal:
+    """Tests de la file locale"""
+
+    def test_coalescence(self):
+        """Test de la dernière valeur qui remplace sur place celle en attente"""
+        file = FileCanal(['time_update'])
+
+        assert file.ajouter({'type': 'time_update', 'session_id': 1, 'temps_restant': 30}) is False
+        assert file.ajouter({'type': 'time_update', 'session_id': 2, 'temps_restant': 50}) is False
+        assert file.ajouter({'type': 'time_update', 'session_id': 1, 'temps_restant': 29}) is True
+
+        messages = [file.retirer() for _ in range(len(file))]
+        assert [(m['session_id'], m['temps_restant']) for m in messages] == [(1, 29), (2, 50)]
+
+    def test_barriere(self):
+        """Test d'une valeur arrivée après un autre message : jamais remontée avant lui"""
+        file = FileCanal(['time_update'])
+
+        file.ajouter({'type': 'time_update', 'session_id': 1, 'statut': 'active'})
+        file.ajouter({'type': 'session_terminated'})
+        assert file.ajouter({'type': 'time_update', 'session_id': 1, 'statut': 'terminee'}) is False
+        assert file.ajouter({'type': 'time_update', 'session_id': 1, 'statut': 'expiree'}) is True
+
+        messages = [file.retirer() for _ in range(len(file))]
+        assert [(m['type'], m.get('statut')) for m in messages] == [
+            ('time_update', 'active'), ('session_terminated', None), ('time_update', 'expiree')
+        ]
+
+    def test_autres_types_non_coalesces(self):
+        """Test des deltas (seat_update) : tous conservés, dans l'ordre"""
+        file = FileCanal(['time_update'])
+        for version in range(3):
+            file.ajouter({'type': 'seat_update', 'data': {'version': version}})
+
+        assert [file.retirer()['data']['version'] for _ in range(3)] == [0, 1, 2]
+        assert not file.disponible.is_set()
+
+
+class LentConsumer(BackpressureConsumerMixin, AsyncWebsocketConsumer):
+    """Consumer dont le traitement attend le feu vert du test"""
+
+    feu_vert = None
+
+    async def connect(self):
+        await self.channel_layer.group_add('test_lent', self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard('test_lent', self.channel_name)
+
+    async def time_update(self, event):
+        await self.feu_vert.wait()
+        await self.send(text_data=json.dumps(event))
+
+    async def info(self, event):
+        await self.feu_vert.wait()
+        await self.send(text_data=json.dumps(event))
+
+
+async def _retard(messages):
+    """
+    Bloque le consumer sur son premier message, lui envoie les suivants,
+    puis le débloque (renvoie le communicator)
+    """
+    channel_layer = get_channel_layer()
+    LentConsumer.feu_vert = asyncio.Event()
+    communicator = WebsocketCommunicator(LentConsumer.as_asgi(), '/ws/test/')
+    connected, _ = await communicator.connect()
+    assert connected
+
+    await channel_layer.group_send('test_lent', messages[0])
+    await asyncio.sleep(0.05)
+    for message in messages[1:]:
+        await channel_layer.group_send('test_lent', message)
+    await asyncio.sleep(0.05)
+    LentConsumer.feu_vert.set()
+    return communicator
+
+
+class TestBackpressureConsumer:
+    """Tests de BackpressureConsumerMixin"""
+
+    def test_retard_resume_a_la_derniere_valeur(self, settings):
+        """Test d'une rafale de time_update pendant un traitement lent"""
+        settings.WS_COALESCE_TYPES = ['time_update']
+        avant = metrics.WS_MESSAGES_COALESCED.value(consumer='test_core.LentConsumer', type='time_update')
+
+        async def scenario():
+            communicator = await _retard([
+                {'type': 'time_update', 'session_id': 1, 'temps_restant': temps}
+                for temps in range(60, 50, -1)
+            ])
+            recus = [json.loads(await communicator.receive_from())['temps_restant'] for _ in range(2)]
+            assert await communicator.receive_nothing()
+            await communicator.disconnect()
+            return recus
+
+        assert async_to_sync(scenario)() == [60, 51]
+        apres = metrics.WS_MESSAGES_COALESCED.value(consumer='test_core.LentConsumer', type='time_update')
+        assert apres - avant == 8
+
+    def test_consumer_lent_deconnecte(self, settings):
+        """Test de la politique 'disconnect' au-delà de WS_MAX_BACKLOG"""
+        settings.WS_MAX_BACKLOG = 3
+        settings.WS_SLOW_CONSUMER_GRACE = 0
+        settings.WS_SLOW_CONSUMER_POLICY = 'disconnect'
+        avant = metrics.WS_SLOW_CONSUMER_DISCONNECTS.value(consumer='test_core.LentConsumer')
+
+        async def scenario():
+            communicator = await _retard([{'type': 'info', 'numero': numero} for numero in range(6)])
+            # Fermée pendant le traitement du premier message
+            fermeture = await communicator.receive_output()
+            await communicator.disconnect()
+            return fermeture
+
+        fermeture = async_to_sync(scenario)()
+        assert fermeture == {'type': 'websocket.close', 'code': CODE_CONSUMER_LENT}
+        assert metrics.WS_SLOW_CONSUMER_DISCONNECTS.value(consumer='test_core.LentConsumer') == avant + 1
+
+    def test_consumer_lent_messages_ecartes(self, settings):
+        """Test de la politique 'drop' : les plus anciens messages sont écartés"""
+        settings.WS_MAX_BACKLOG = 2
+        settings.WS_SLOW_CONSUMER_GRACE = 0
+        settings.WS_SLOW_CONSUMER_POLICY = 'drop'
+
+        async def scenario():
+            communicator = await _retard([{'type': 'info', 'numero': numero} for numero in range(6)])
+            recus = [json.loads(await communicator.receive_from())['numero'] for _ in range(3)]
+            assert await communicator.receive_nothing()
+            await communicator.disconnect()
+            return recus
+
+        assert async_to_sync(scenario)() == [0, 4, 5]
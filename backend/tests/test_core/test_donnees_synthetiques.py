@@ -0,0 +1,75 @@
+"""
+Tests pour le générateur de données synthétiques
+"""
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.core.donnees_synthetiques import GenerateurDonnees, encoder_code
+from apps.logs.models import Log
+from apps.postes.models import Poste, SeatBoardEntry
+from apps.sessions.models import Session, StatistiqueJour
+from apps.utilisateurs.models import Utilisateur
+from tests.factories import SessionFactory
+
+
+def test_codes_are_unique_and_fixed_length():
+    """Test que les codes dérivés des IDs sont uniques et sans caractère ambigu"""
+    codes = {encoder_code(numero) for numero in range(5000)}
+    assert len(codes) == 5000
+    assert all(len(code) == 8 and not set(code) & set('O0I1') for code in codes)
+
+
+@pytest.mark.django_db
+class TestGenerateurDonnees:
+    """Tests de la génération en masse"""
+
+    def test_generates_consistent_dataset(self):
+        """Test des volumes, des relations et des tables dérivées"""
+        GenerateurDonnees(graine=1, jours=30, taille_lot=100).generer(
+            postes=10, utilisateurs=50, sessions=300, logs=500
+        )
+
+        assert Poste.objects.count() == 10
+        assert Utilisateur.objects.count() == 50
+        assert Session.objects.count() == 305
+        assert Log.objects.count() == 500
+        assert Session.objects.filter(statut='active').count() == 5
+        assert Poste.objects.filter(statut='occupe').count() == 5
+        assert SeatBoardEntry.objects.filter(session_id__isnull=False).count() == 5
+        assert StatistiqueJour.objects.exists()
+
+    def test_same_seed_same_data(self):
+        """Test de la reproductibilité"""
+        GenerateurDonnees(graine=7, jours=10).generer(postes=2, utilisateurs=5, sessions=20, logs=0, consolider=False)
+        premiere = list(Session.objects.order_by('pk').values_list('poste_id', 'utilisateur_id', 'duree_initiale', 'statut'))
+        Session.objects.all().delete()
+
+        GenerateurDonnees(graine=7, jours=10).generer(postes=2, utilisateurs=5, sessions=20, logs=0, consolider=False)
+        seconde = list(Session.objects.order_by('pk').values_list('poste_id', 'utilisateur_id', 'duree_initiale', 'statut'))
+        # Nouveaux postes et utilisateurs : comparer les positions relatives
+        assert [ligne[2:] for ligne in premiere] == [ligne[2:] for ligne in seconde]
+
+    def test_sequences_are_reset(self):
+        """Test que les créations ORM suivantes ne réutilisent pas les IDs générés"""
+        GenerateurDonnees(graine=1, jours=5).generer(postes=2, utilisateurs=3, sessions=10, logs=0, consolider=False)
+        dernier = Session.objects.order_by('-pk').values_list('pk', flat=True).first()
+        assert SessionFactory().pk > dernier
+
+
+@pytest.mark.django_db
+class TestCommand:
+    """Tests de la commande generate_synthetic_data"""
+
+    def test_refused_outside_debug(self):
+        """Test du garde-fou hors DEBUG"""
+        with pytest.raises(CommandError):
+            call_command('generate_synthetic_data', postes=1, utilisateurs=1, sessions=0, logs=0)
+
+    def test_forced(self):
+        """Test de l'exécution avec --force"""
+        call_command(
+            'generate_synthetic_data', postes=3, utilisateurs=5, sessions=10, logs=10,
+            force=True, consolider=False
+        )
+        assert Session.objects.count() == 11
@@ -0,0 +1,134 @@
+"""
+Tests pour les exports en streaming (sessions, logs)
+"""
+import csv
+import io
+import warnings
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import StreamingHttpResponse
+from django.test import AsyncClient
+from django.utils import timezone
+
+from apps.logs.models import Log
+from rest_framework_simplejwt.tokens import RefreshToken
+from tests.factories import PosteFactory, SessionFactory, SessionTermineeFactory
+
+
+def lire_csv(response):
+    """Reconstitue le CSV d'une réponse en streaming"""
+    assert isinstance(response, StreamingHttpResponse)
+    contenu = b''.join(response.streaming_content).decode('utf-8-sig')
+    return list(csv.DictReader(io.StringIO(contenu)))
+
+
+@pytest.mark.django_db
+class TestSessionsExport:
+    """Tests de GET /api/sessions/export/"""
+
+    def test_export_csv(self, authenticated_client):
+        """Test de l'export CSV des sessions avec utilisateur et poste"""
+        session = SessionTermineeFactory()
+
+        response = authenticated_client.get('/api/sessions/export/')
+
+        assert response.status_code == 200
+        assert response['Content-Disposition'].startswith('attachment; filename="sessions_')
+        lignes = lire_csv(response)
+        assert len(lignes) == 1
+        assert lignes[0]['code_acces'] == session.code_acces
+        assert lignes[0]['poste'] == session.poste.nom
+        assert lignes[0]['utilisateur_nom'] == session.utilisateur.nom
+        assert int(lignes[0]['duree_utilisee']) == 3600
+
+    def test_export_filters(self, authenticated_client):
+        """Test des filtres poste et période"""
+        poste = PosteFactory()
+        SessionFactory(poste=poste)
+        SessionFactory()
+        aujourdhui = timezone.localdate().isoformat()
+
+        response = authenticated_client.get(
+            f'/api/sessions/export/?poste={poste.id}&debut={aujourdhui}&fin={aujourdhui}'
+        )
+        assert len(lire_csv(response)) == 1
+
+        response = authenticated_client.get('/api/sessions/export/?fin=2000-01-01')
+        assert lire_csv(response) == []
+
+    def test_export_invalid_params(self, authenticated_client):
+        """Test qu'une date invalide est refusée"""
+        response = authenticated_client.get('/api/sessions/export/?debut=janvier')
+        assert response.status_code == 400
+
+    def test_export_requires_auth(self, api_client):
+        """Test que l'export nécessite une authentification"""
+        response = api_client.get('/api/sessions/export/')
+        assert response.status_code == 401
+
+    def test_export_parquet(self, authenticated_client):
+        """Test de l'export Parquet (si pyarrow est installé)"""
+        pq = pytest.importorskip('pyarrow.parquet')
+        SessionFactory.create_batch(3)
+
+        response = authenticated_client.get('/api/sessions/export/?type=parquet')
+
+        table = pq.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        assert table.num_rows == 3
+
+    def test_export_asgi_en_streaming(self, user):
+        """Test sous ASGI : itérateur asynchrone, pas de consommation d'un bloc"""
+        SessionFactory.create_batch(3)
+        jeton = RefreshToken.for_user(user).access_token
+
+        async def scenario():
+            response = await AsyncClient().get(
+                '/api/sessions/export/', headers={'Authorization': f'Bearer {jeton}'}
+            )
+            return response, b''.join([morceau async for morceau in response])
+
+        with warnings.catch_warnings(record=True) as avertissements:
+            warnings.simplefilter('always')
+            response, contenu = async_to_sync(scenario)()
+
+        assert response.status_code == 200
+        assert response.is_async
+        assert not [a for a in avertissements if 'synchronous iterators' in str(a.message)]
+        assert len(list(csv.DictReader(io.StringIO(contenu.decode('utf-8-sig'))))) == 3
+
+    def test_export_unknown_format(self, authenticated_client):
+        """Test qu'un format inconnu est refusé"""
+        response = authenticated_client.get('/api/sessions/export/?type=xlsx')
+        assert response.status_code == 400
+        assert 'csv' in response.data['formats']
+
+
+@pytest.mark.django_db
+class TestLogsExport:
+    """Tests de GET /api/logs/export/"""
+
+    def test_export_csv_with_poste_filter(self, authenticated_client):
+        """Test du filtre poste (via la session ou les métadonnées)"""
+        session = SessionFactory()
+        autre = PosteFactory()
+        Log.objects.create(action='info', details='Sans poste')
+        Log.objects.create(action='info', details='Méta', metadata={'poste_id': session.poste_id})
+        Log.objects.create(action='info', details='Autre', metadata={'poste_id': autre.id})
+
+        response = authenticated_client.get(f'/api/logs/export/?poste={session.poste_id}')
+
+        assert response.status_code == 200
+        lignes = lire_csv(response)
+        # Log de génération du code (session) + log avec métadonnées
+        assert {ligne['details'] for ligne in lignes} >= {'Méta'}
+        assert all(int(ligne['poste_id']) == session.poste_id for ligne in lignes)
+
+    def test_export_action_filter(self, authenticated_client):
+        """Test du filtre action"""
+        Log.objects.create(action='erreur', details='Erreur')
+        Log.objects.create(action='info', details='Info')
+
+        lignes = lire_csv(authenticated_client.get('/api/logs/export/?action=erreur'))
+
+        assert [ligne['details'] for ligne in lignes] == ['Erreur']
@@ -0,0 +1,38 @@
+"""
+Tests pour la sonde de santé
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+
+@pytest.mark.django_db
+class TestHealthView:
+    """Tests de GET /api/health/"""
+
+    def test_health_ok_without_auth(self, api_client):
+        """Test que la sonde répond sans authentification"""
+        response = api_client.get('/api/health/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'ok'
+        assert response.data['database'] == 'ok'
+        assert response.data['process_type']
+
+    def test_health_single_query(self, api_client):
+        """Test que la sonde fait une seule requête sur la connexion courante"""
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get('/api/health/')
+        assert [q['sql'] for q in ctx.captured_queries] == ['SELECT 1']
+
+    def test_health_database_unavailable(self, api_client, monkeypatch):
+        """Test du 503 quand la base est injoignable"""
+        from django.db.utils import OperationalError
+
+        def cursor_ko(*args, **kwargs):
+            raise OperationalError('connexion refusée')
+
+        monkeypatch.setattr(connection, 'cursor', cursor_ko)
+        response = api_client.get('/api/health/')
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.data['database'] == 'unavailable'
@@ -0,0 +1,173 @@
+"""
+Tests pour le cache des endpoints de lecture (versions, ETag, anti-stampede)
+"""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.core import http_cache
+from tests.factories import PosteFactory, SessionFactory
+
+
+def requetes_sur(capture, table):
+    return [q['sql'] for q in capture.captured_queries if f'"{table}"' in q['sql']]
+
+
+@pytest.mark.django_db
+class TestCachedEndpoint:
+    """Tests des réponses mises en cache"""
+
+    URL = '/api/postes/disponibles/'
+
+    def test_second_read_skips_database(self, authenticated_client):
+        """Test qu'une réponse en cache ne relit pas les postes"""
+        PosteFactory(statut='disponible')
+        premiere = authenticated_client.get(self.URL)
+
+        with CaptureQueriesContext(connection) as capture:
+            seconde = authenticated_client.get(self.URL)
+
+        assert seconde.status_code == status.HTTP_200_OK
+        assert seconde.json() == premiere.json()
+        assert seconde['ETag'] == premiere['ETag']
+        assert requetes_sur(capture, 'postes') == []
+
+    def test_if_none_match_returns_304(self, authenticated_client):
+        """Test du 304 sans corps quand l'ETag correspond"""
+        PosteFactory(statut='disponible')
+        etag = authenticated_client.get(self.URL)['ETag']
+
+        with CaptureQueriesContext(connection) as capture:
+            response = authenticated_client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert not response.content
+        assert requetes_sur(capture, 'postes') == []
+
+    def test_write_invalidates(self, authenticated_client):
+        """Test qu'une écriture sur un poste change la réponse et l'ETag"""
+        poste = PosteFactory(statut='disponible')
+        etag = authenticated_client.get(self.URL)['ETag']
+
+        poste.statut = 'maintenance'
+        poste.save()
+        response = authenticated_client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == []
+        assert response['ETag'] != etag
+
+    def test_heartbeat_does_not_invalidate(self, authenticated_client):
+        """Test que le heartbeat d'un poste n'invalide pas le cache"""
+        poste = PosteFactory(statut='disponible')
+        authenticated_client.get(self.URL)
+        avant = http_cache.versions(['postes'])
+
+        poste.save(update_fields=['derniere_connexion'])
+
+        assert http_cache.versions(['postes']) == avant
+
+    def test_bulk_update_invalidates(self, authenticated_client, django_capture_on_commit_callbacks):
+        """Test de l'invalidation par update_returning (terminaison en masse), après le commit"""
+        from apps.sessions.services import terminate_many
+
+        session = SessionFactory(statut='active')
+        assert len(authenticated_client.get('/api/sessions/actives/').json()) == 1
+        avant = http_cache.versions(['sessions'])
+
+        with django_capture_on_commit_callbacks(execute=True):
+            terminate_many([session.id], operateur='admin', raison='test')
+            assert http_cache.versions(['sessions']) == avant
+
+        assert authenticated_client.get('/api/sessions/actives/').json() == []
+
+    def test_countdown_does_not_invalidate(self, django_capture_on_commit_callbacks):
+        """Test que le décompte périodique n'invalide le cache qu'à l'expiration"""
+        from apps.sessions.services import decrement_all
+
+        SessionFactory(statut='active', temps_restant=100)
+        avant = http_cache.versions(['sessions'])
+
+        with django_capture_on_commit_callbacks(execute=True):
+            decrement_all()
+
+        assert http_cache.versions(['sessions']) == avant
+
+        SessionFactory(statut='active', temps_restant=1)
+        with django_capture_on_commit_callbacks(execute=True):
+            decrement_all()
+
+        assert http_cache.versions(['sessions']) != avant
+
+    def test_query_params_are_part_of_key(self, authenticated_client):
+        """Test que des paramètres différents ne partagent pas l'entrée"""
+        PosteFactory(statut='disponible')
+        authenticated_client.get(self.URL)
+        version = ':'.join(str(v) for v in http_cache.versions(http_cache.dependances(['postes'])))
+
+        authenticated_client.get(self.URL, {'emplacement': 'Salle 1'})
+
+        assert cache.get(f'{http_cache.ENTRY_PREFIX}postes:disponibles:{version}:') is not None
+        assert cache.get(f'{http_cache.ENTRY_PREFIX}postes:disponibles:{version}:emplacement=Salle+1') is not None
+
+    def test_disabled(self, authenticated_client, settings):
+        """Test que HTTP_CACHE_ENABLED=False désactive le cache"""
+        settings.HTTP_CACHE_ENABLED = False
+        response = authenticated_client.get(self.URL)
+        assert response.status_code == status.HTTP_200_OK
+        assert 'ETag' not in response
+
+
+@pytest.mark.django_db
+class TestStampede:
+    """Tests du recalcul unique"""
+
+    def test_stale_served_while_recomputing(self, authenticated_client):
+        """Test que la dernière réponse est servie pendant un recalcul ailleurs"""
+        url = '/api/postes/disponibles/'
+        PosteFactory(statut='disponible')
+        ancienne = authenticated_client.get(url).json()
+
+        PosteFactory(statut='disponible')
+        version = ':'.join(str(v) for v in http_cache.versions(http_cache.dependances(['postes'])))
+        cache.add(f'{http_cache.ENTRY_PREFIX}postes:disponibles:{version}::lock', 1, 10)
+
+        with CaptureQueriesContext(connection) as capture:
+            response = authenticated_client.get(url)
+
+        assert response.json() == ancienne
+        assert requetes_sur(capture, 'postes') == []
+
+    def test_lock_of_other_process_kept(self):
+        """Test d'un recalcul sans réponse connue : le verrou tenu ailleurs n'est pas libéré"""
+        cache.add('entree:lock', 'autre-processus', 10)
+
+        entree, erreur = http_cache._calculer(
+            'entree', 'entree:stale', lambda: Response({'ok': True}), 60
+        )
+
+        assert (entree['data'], erreur) == ({'ok': True}, None)
+        assert cache.get('entree:lock') == 'autre-processus'
+
+        # Verrou acquis par ce recalcul : libéré
+        http_cache._calculer('autre', 'autre:stale', lambda: Response({'ok': True}), 60)
+        assert cache.get('autre:lock') is None
+
+    def test_errors_are_not_cached(self, authenticated_client, monkeypatch):
+        """Test qu'une réponse d'erreur n'est pas mise en cache"""
+        from apps.postes import views
+
+        class CAIndisponible:
+            def get_ca_certificate(self):
+                raise FileNotFoundError('ca.crt')
+
+        monkeypatch.setattr(views, 'get_certificate_manager', CAIndisponible)
+        response = authenticated_client.get('/api/postes/ca_certificate/')
+
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert cache.get(f'{http_cache.ENTRY_PREFIX}postes:ca_certificate::') is None
+        assert 'ETag' not in response
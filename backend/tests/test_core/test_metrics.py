@@ -0,0 +1,165 @@
+"""
+Tests pour l'instrumentation (middleware, consumers, couche de canaux, /api/metrics/)
+"""
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from rest_framework import status
+
+from apps.core import metrics
+from apps.core.instrumentation import InstrumentedConsumerMixin, Mesure, mesurer
+from tests.factories import SessionFactory
+
+
+class TestRegistry:
+    """Tests de l'exposition texte"""
+
+    def test_counter_and_histogram_render(self):
+        """Test du format Prometheus (labels, buckets cumulés, +Inf)"""
+        registry = metrics.Registry()
+        counter = registry.register(metrics.Counter('c_total', 'Compteur', ('kind',)))
+        histogram = registry.register(metrics.Histogram('h_seconds', 'Durée', ('route',), buckets=(0.1, 1.0)))
+
+        counter.inc(kind='a')
+        counter.inc(2, kind='a')
+        histogram.observe(0.05, route='r')
+        histogram.observe(0.5, route='r')
+        histogram.observe(5, route='r')
+
+        texte = registry.render()
+        assert '# TYPE c_total counter' in texte
+        assert 'c_total{kind="a"} 3' in texte
+        assert 'h_seconds_bucket{route="r",le="0.1"} 1' in texte
+        assert 'h_seconds_bucket{route="r",le="1.0"} 2' in texte
+        assert 'h_seconds_bucket{route="r",le="+Inf"} 3' in texte
+        assert 'h_seconds_count{route="r"} 3' in texte
+
+    def test_labels_are_checked(self):
+        """Test qu'un label manquant est refusé"""
+        counter = metrics.Counter('c_total', 'Compteur', ('kind',))
+        with pytest.raises(ValueError):
+            counter.inc(type='a')
+
+
+class TestMesure:
+    """Tests de la répartition SQL"""
+
+    def test_resume_groups_by_verb_and_table(self):
+        """Test du regroupement verbe + table, les plus coûteuses d'abord"""
+        mesure = Mesure(detail=True)
+        mesure.ajouter_requete('SELECT "sessions"."id" FROM "sessions" WHERE 1', 0.001)
+        mesure.ajouter_requete('SELECT "sessions"."id" FROM "sessions" WHERE 2', 0.001)
+        mesure.ajouter_requete('UPDATE "postes" SET "statut" = %s', 0.005)
+
+        assert mesure.requetes == 3
+        assert mesure.resume() == 'UPDATE postes x1 (5.0ms), SELECT sessions x2 (2.0ms)'
+
+
+@pytest.mark.django_db
+class TestInstrumentationMiddleware:
+    """Tests du middleware HTTP"""
+
+    def test_records_latency_and_queries_per_route(self, authenticated_client):
+        """Test des histogrammes par vue résolue"""
+        SessionFactory.create_batch(2)
+        labels = {'method': 'GET', 'route': 'sessions:session-list'}
+        avant = metrics.HTTP_REQUEST_QUERIES.count(**labels)
+        requetes_avant = metrics.HTTP_REQUEST_QUERIES.sum(**labels)
+
+        response = authenticated_client.get('/api/sessions/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert metrics.HTTP_REQUEST_QUERIES.count(**labels) == avant + 1
+        assert metrics.HTTP_REQUEST_QUERIES.sum(**labels) > requetes_avant
+        assert metrics.HTTP_REQUEST_DURATION.count(status='2xx', **labels) >= 1
+
+    def test_sql_header_only_in_debug(self, authenticated_client, settings):
+        """Test de l'en-tête X-SQL-Breakdown (DEBUG uniquement)"""
+        SessionFactory()
+
+        settings.DEBUG = False
+        response = authenticated_client.get('/api/sessions/')
+        assert 'X-SQL-Queries' not in response
+
+        settings.DEBUG = True
+        response = authenticated_client.get('/api/sessions/')
+        assert int(response['X-SQL-Queries'].split(';')[0]) > 0
+        assert 'SELECT sessions' in response['X-SQL-Breakdown']
+
+    def test_channel_sends_are_attributed(self):
+        """Test qu'un group_send est compté une fois (la couche mémoire passe par send)"""
+        channel_layer = get_channel_layer()
+        labels = {'kind': 'group_send', 'type': 'test_event'}
+        avant = metrics.CHANNEL_LAYER_SENDS.value(**labels)
+        envois_avant = metrics.CHANNEL_LAYER_SENDS.value(kind='send', type='test_event')
+
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('test_metrics', channel_name)
+        with mesurer() as mesure:
+            async_to_sync(channel_layer.group_send)('test_metrics', {'type': 'test_event'})
+
+        assert metrics.CHANNEL_LAYER_SENDS.value(**labels) == avant + 1
+        assert metrics.CHANNEL_LAYER_SENDS.value(kind='send', type='test_event') == envois_avant
+        assert mesure.envois == 1
+
+
+class EchoConsumer(InstrumentedConsumerMixin, AsyncWebsocketConsumer):
+    """Consumer minimal pour tester le mixin"""
+
+    async def receive(self, text_data=None, bytes_data=None):
+        await self.handle_ping(json.loads(text_data))
+
+    async def handle_ping(self, data):
+        await self.send(text_data=json.dumps({'type': 'pong'}))
+
+
+class TestInstrumentedConsumerMixin:
+    """Tests du mixin de consumer"""
+
+    def test_records_per_message_type(self):
+        """Test de la latence par type de message client (types inconnus regroupés)"""
+        labels = {'consumer': 'test_core.EchoConsumer'}
+        avant = metrics.WS_MESSAGE_DURATION.count(type='ping', **labels)
+        autres = metrics.WS_MESSAGE_DURATION.count(type='autre', **labels)
+
+        async def echange():
+            communicator = WebsocketCommunicator(EchoConsumer.as_asgi(), '/ws/test/')
+            connected, _ = await communicator.connect()
+            assert connected
+            await communicator.send_to(text_data=json.dumps({'type': 'ping'}))
+            assert json.loads(await communicator.receive_from())['type'] == 'pong'
+            await communicator.send_to(text_data=json.dumps({'type': 'n_importe_quoi'}))
+            await communicator.receive_from()
+            await communicator.disconnect()
+
+        async_to_sync(echange)()
+
+        assert metrics.WS_MESSAGE_DURATION.count(type='ping', **labels) == avant + 1
+        assert metrics.WS_MESSAGE_DURATION.count(type='autre', **labels) == autres + 1
+        assert metrics.WS_MESSAGE_DURATION.count(type='websocket.connect', **labels) >= 1
+
+
+class TestMetricsView:
+    """Tests de GET /api/metrics/"""
+
+    def test_requires_token(self, api_client, settings):
+        """Test du jeton Bearer"""
+        settings.METRICS_TOKEN = 'secret'
+
+        response = api_client.get('/api/metrics/')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        response = api_client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/plain')
+        assert '# TYPE epn_http_request_duration_seconds histogram' in response.content.decode()
+
+    def test_disabled_without_token(self, api_client, settings):
+        """Test que l'endpoint est fermé sans jeton hors DEBUG"""
+        settings.METRICS_TOKEN = ''
+        settings.DEBUG = False
+        assert api_client.get('/api/metrics/').status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,238 @@
+"""
+Tests du registre de présence partagé (plusieurs workers ASGI)
+"""
+
+import json
+import os
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.utils import timezone
+from rest_framework import status
+
+from apps.core import presence
+from apps.postes.consumers import ClientConsumer
+from tests.factories import PosteFactory
+
+
+class TestRegistre:
+    """Tests des baux"""
+
+    def test_enregistrer_et_lire(self):
+        """Test du bail posé à la connexion"""
+        presence.enregistrer(1, 'canal-a', session_id=7)
+
+        bail = presence.bail(1)
+        assert bail['channel'] == 'canal-a'
+        assert bail['session_id'] == 7
+        assert bail['worker'] == presence.WORKER_ID
+        assert presence.bail(2) is None
+
+    def test_connexion_recente_gagne(self):
+        """Test d'une reconnexion sur un autre worker : l'ancienne socket est obsolète"""
+        presence.enregistrer(1, 'canal-a')
+        presence.enregistrer(1, 'canal-b')
+
+        assert presence.renouveler(1, 'canal-a') is False
+        assert presence.renouveler(1, 'canal-b') is True
+        assert presence.bail(1)['channel'] == 'canal-b'
+
+    def test_liberer_uniquement_son_bail(self):
+        """Test de la déconnexion tardive de l'ancienne socket"""
+        presence.enregistrer(1, 'canal-a')
+        presence.enregistrer(1, 'canal-b')
+
+        presence.liberer(1, 'canal-a')
+        assert presence.bail(1)['channel'] == 'canal-b'
+
+        presence.liberer(1, 'canal-b')
+        assert presence.bail(1) is None
+
+    def test_renouvellement_atomique(self, monkeypatch):
+        """Test d'une reconnexion pendant le renouvellement : le bail récent n'est pas écrasé"""
+        presence.enregistrer(1, 'canal-a')
+        lire = presence.cache.get
+        reconnexion = threading.Thread(target=presence.enregistrer, args=(1, 'canal-b'))
+
+        def get_puis_reconnexion(*args, **kwargs):
+            valeur = lire(*args, **kwargs)
+            if not reconnexion.is_alive():
+                reconnexion.start()
+                # Sans atomicité, la reconnexion s'intercalerait ici
+                reconnexion.join(timeout=0.2)
+            return valeur
+        monkeypatch.setattr(presence.cache, 'get', get_puis_reconnexion)
+
+        assert presence.renouveler(1, 'canal-a') is True
+        reconnexion.join()
+        monkeypatch.undo()
+
+        assert presence.bail(1)['channel'] == 'canal-b'
+        assert presence.renouveler(1, 'canal-a') is False
+
+    def test_baux(self):
+        """Test de la lecture groupée"""
+        presence.enregistrer(1, 'canal-a')
+        presence.enregistrer(3, 'canal-c')
+
+        assert set(presence.baux([1, 2, 3])) == {1, 3}
+
+
+class TestEnvoyerAuPoste:
+    """Tests du routage vers le worker qui tient la socket"""
+
+    def test_envoi_direct_au_canal_du_bail(self):
+        """Test de l'envoi au seul canal qui tient le bail"""
+        channel_layer = get_channel_layer()
+        actuel = async_to_sync(channel_layer.new_channel)()
+        ancien = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('poste_1', ancien)
+        presence.enregistrer(1, actuel)
+
+        assert presence.envoyer_au_poste(1, {'type': 'remote_command', 'command': 'lock'}) is True
+
+        message = async_to_sync(channel_layer.receive)(actuel)
+        assert message['command'] == 'lock'
+        assert not channel_layer.channels.get(ancien)
+
+    def test_repli_sur_le_groupe(self):
+        """Test sans bail : diffusion au groupe poste_<id>"""
+        channel_layer = get_channel_layer()
+        canal = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('poste_2', canal)
+
+        assert presence.envoyer_au_poste(2, {'type': 'remote_command', 'command': 'lock'}) is False
+        assert async_to_sync(channel_layer.receive)(canal)['command'] == 'lock'
+
+
+def _communicator(poste):
+    communicator = WebsocketCommunicator(ClientConsumer.as_asgi(), '/ws/client/')
+    communicator.scope.update({'cert_valid': True, 'poste': poste, 'poste_cn': poste.nom})
+    return communicator
+
+
+@pytest.fixture
+def sans_mise_a_jour_connexion(monkeypatch):
+    """La mise à jour de derniere_connexion passe par le pool DB (autre thread)"""
+    async def rien(self):
+        pass
+    monkeypatch.setattr(ClientConsumer, '_update_poste_connection', rien)
+
+    async def aucune_commande(self):
+        return []
+    monkeypatch.setattr(ClientConsumer, '_commandes_en_suspens', aucune_commande)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('sans_mise_a_jour_connexion')
+class TestPlusieursWorkers:
+    """
+    Reconnexion d'un kiosque d'un worker à l'autre
+
+    Chaque communicator tient son propre canal, comme deux processus Daphne
+    reliés par la même couche de canaux.
+    """
+
+    def test_commande_routee_vers_la_derniere_connexion(self):
+        """Test d'une commande après reconnexion du kiosque sur un autre worker"""
+        poste = PosteFactory()
+
+        async def scenario():
+            worker_a = _communicator(poste)
+            assert (await worker_a.connect())[0]
+            await worker_a.receive_from()
+            bail_a = presence.bail(poste.id)
+
+            worker_b = _communicator(poste)
+            assert (await worker_b.connect())[0]
+            await worker_b.receive_from()
+            assert presence.bail(poste.id)['channel'] != bail_a['channel']
+
+            # La socket du worker A se ferme après coup : le bail de B reste
+            await worker_a.disconnect()
+            assert presence.bail(poste.id) is not None
+
+            # Envoyé depuis un thread, comme une vue de n'importe quel worker
+            direct = await sync_to_async(presence.envoyer_au_poste)(
+                poste.id, {'type': 'remote_command', 'command': 'lock'}
+            )
+            message = json.loads(await worker_b.receive_from())
+            await worker_b.disconnect()
+            return direct, message
+
+        direct, message = async_to_sync(scenario)()
+        assert direct is True
+        assert message == {'type': 'remote_command', 'commande_id': None, 'command': 'lock', 'payload': None}
+        assert presence.bail(poste.id) is None
+
+    def test_vues_passent_par_le_registre(self, admin_client, monkeypatch, django_capture_on_commit_callbacks):
+        """Test de remote_command et unlock_kiosk : envoi au poste, pas au groupe"""
+        poste = PosteFactory(derniere_connexion=timezone.now())
+        envois = []
+        monkeypatch.setattr(presence, 'envoyer_au_poste', lambda poste_id, message: envois.append((poste_id, message)))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post(
+                f'/api/postes/{poste.id}/remote_command/', {'command': 'lock'}, format='json'
+            )
+            assert response.status_code == status.HTTP_200_OK
+            response = admin_client.post(f'/api/postes/{poste.id}/unlock_kiosk/')
+            assert response.status_code == status.HTTP_200_OK
+
+        assert [(poste_id, message['type']) for poste_id, message in envois] == [
+            (poste.id, 'remote_command'), (poste.id, 'unlock_kiosk')
+        ]
+
+    def test_heartbeat_renouvelle_le_bail(self):
+        """Test du renouvellement et de la session publiée dans le bail"""
+        poste = PosteFactory()
+
+        async def scenario():
+            communicator = _communicator(poste)
+            await communicator.connect()
+            await communicator.receive_from()
+            presence.enregistrer(poste.id, presence.bail(poste.id)['channel'], session_id=42)
+            await communicator.send_to(text_data=json.dumps({'type': 'heartbeat'}))
+            assert json.loads(await communicator.receive_from())['type'] == 'heartbeat_ack'
+            bail = presence.bail(poste.id)
+            await communicator.disconnect()
+            return bail
+
+        bail = async_to_sync(scenario)()
+        assert bail['session_id'] is None  # état du consumer, pas du bail précédent
+
+    def test_liste_des_postes_connectes(self, admin_client):
+        """Test de GET /api/postes/presence/"""
+        connecte, _ = PosteFactory(), PosteFactory()
+        presence.enregistrer(connecte.id, 'canal-a', session_id=5)
+
+        response = admin_client.get('/api/postes/presence/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 1
+        assert response.data['postes'][0]['poste_id'] == connecte.id
+        assert response.data['postes'][0]['session_id'] == 5
+
+
+@pytest.mark.skipif(not os.environ.get('PRESENCE_REDIS_HOST'), reason='PRESENCE_REDIS_HOST non défini')
+class TestCoucheRedis:
+    """Deux couches Redis distinctes, comme deux processus Daphne"""
+
+    def test_envoi_entre_workers(self):
+        """Test d'un message envoyé par un worker au canal tenu par l'autre"""
+        from apps.core.channel_layers import RedisChannelLayer
+
+        hosts = [(os.environ['PRESENCE_REDIS_HOST'], int(os.environ.get('PRESENCE_REDIS_PORT', 6379)))]
+
+        async def scenario():
+            worker_a, worker_b = RedisChannelLayer(hosts=hosts), RedisChannelLayer(hosts=hosts)
+            canal = await worker_a.new_channel()
+            await worker_b.send(canal, {'type': 'unlock_kiosk', 'admin': 'admin'})
+            message = await worker_a.receive(canal)
+            await worker_a.flush()
+            return message
+
+        assert async_to_sync(scenario)()['type'] == 'unlock_kiosk'
@@ -0,0 +1,119 @@
+"""
+Tests pour le rate limiting partagé
+"""
+import pytest
+from rest_framework import status
+
+from apps.core.ratelimit import MemoryRateLimiter, check_rate_limit, get_client_ip, parse_rate
+
+
+class TestParseRate:
+    """Tests du format des limites"""
+
+    def test_parse_simple_rates(self):
+        """Test des unités courantes"""
+        assert parse_rate('10/s') == (10, 1)
+        assert parse_rate('10/m') == (10, 60)
+        assert parse_rate('100/h') == (100, 3600)
+
+    def test_parse_multiplied_period(self):
+        """Test d'une fenêtre multiple ('10/5m')"""
+        assert parse_rate('10/5m') == (10, 300)
+
+
+class TestMemoryRateLimiter:
+    """Tests de la fenêtre glissante en mémoire"""
+
+    def test_blocks_after_limit(self):
+        """Test que la requête au-delà de la limite est refusée"""
+        limiter = MemoryRateLimiter()
+        results = [limiter.hit('k', 3, 60) for _ in range(4)]
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert results[2].remaining == 0
+        assert 0 < results[3].retry_after <= 60
+
+    def test_keys_are_independent(self):
+        """Test que chaque identifiant a son propre compteur"""
+        limiter = MemoryRateLimiter()
+        limiter.hit('a', 1, 60)
+        assert limiter.hit('b', 1, 60).allowed is True
+        assert limiter.hit('a', 1, 60).allowed is False
+
+    def test_window_slides(self, monkeypatch):
+        """Test qu'une tentative sort de la fenêtre après son expiration"""
+        import apps.core.ratelimit as ratelimit
+        now = [1000.0]
+        monkeypatch.setattr(ratelimit.time, 'monotonic', lambda: now[0])
+
+        limiter = MemoryRateLimiter()
+        assert limiter.hit('k', 1, 60).allowed is True
+        now[0] += 59
+        assert limiter.hit('k', 1, 60).allowed is False
+        now[0] += 2
+        assert limiter.hit('k', 1, 60).allowed is True
+
+
+class TestCheckRateLimit:
+    """Tests de la fonction partagée REST / WebSocket"""
+
+    def test_uses_configured_rate(self, settings):
+        """Test que la limite vient de settings.RATE_LIMITS"""
+        settings.RATE_LIMITS = {**settings.RATE_LIMITS, 'validate_code': '2/m'}
+        assert check_rate_limit('validate_code', '1.2.3.4').allowed is True
+        assert check_rate_limit('validate_code', '1.2.3.4').allowed is True
+        assert check_rate_limit('validate_code', '1.2.3.4').allowed is False
+
+    def test_redis_failure_falls_back_to_memory(self, settings):
+        """Test qu'une panne Redis ne bloque pas les requêtes"""
+        import apps.core.ratelimit as ratelimit
+        settings.USE_REDIS_RATE_LIMIT = True
+        settings.RATE_LIMIT_REDIS_URL = 'redis://127.0.0.1:1/0'
+        try:
+            assert check_rate_limit('discover', '1.2.3.4').allowed is True
+        finally:
+            ratelimit._redis_limiter = None
+            ratelimit._redis_down_until = 0
+
+
+class TestGetClientIp:
+    """Tests de l'IP limitée"""
+
+    def test_x_forwarded_for_ignore_sans_proxy(self, rf, settings):
+        """Test qu'un X-Forwarded-For fourni par le client est ignoré"""
+        settings.RATE_LIMIT_TRUSTED_PROXIES = 0
+        request = rf.get('/', HTTP_X_FORWARDED_FOR='1.2.3.4', REMOTE_ADDR='10.0.0.9')
+        assert get_client_ip(request) == '10.0.0.9'
+
+    def test_adresse_ajoutee_par_le_proxy(self, rf, settings):
+        """Test derrière un proxy : la valeur la plus à droite, pas celle du client"""
+        settings.RATE_LIMIT_TRUSTED_PROXIES = 1
+        request = rf.get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.7', REMOTE_ADDR='10.0.0.2')
+        assert get_client_ip(request) == '203.0.113.7'
+
+        settings.RATE_LIMIT_TRUSTED_PROXIES = 2
+        request = rf.get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.7, 10.0.0.3', REMOTE_ADDR='10.0.0.2')
+        assert get_client_ip(request) == '203.0.113.7'
+
+
+@pytest.mark.django_db
+class TestRateLimitedEndpoints:
+    """Tests des endpoints limités"""
+
+    def test_validate_code_returns_429(self, authenticated_client, settings):
+        """Test que validate_code renvoie 429 avec Retry-After"""
+        settings.RATE_LIMITS = {**settings.RATE_LIMITS, 'validate_code': '2/m'}
+        data = {'code_acces': 'ABCDEF', 'ip_address': '192.168.1.10'}
+        for _ in range(2):
+            response = authenticated_client.post('/api/sessions/validate_code/', data, format='json')
+            assert response.status_code != status.HTTP_429_TOO_MANY_REQUESTS
+
+        response = authenticated_client.post('/api/sessions/validate_code/', data, format='json')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) >= 1
+
+    def test_discover_is_rate_limited(self, api_client, settings):
+        """Test que la découverte est limitée par IP"""
+        settings.RATE_LIMITS = {**settings.RATE_LIMITS, 'discover': '1/m'}
+        api_client.post('/api/postes/discover/', {}, format='json')
+        response = api_client.post('/api/postes/discover/', {}, format='json')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
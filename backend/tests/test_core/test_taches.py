@@ -0,0 +1,120 @@
+"""
+Tests pour le verrou des tâches périodiques et les métriques Celery
+"""
+import pytest
+from celery import shared_task
+from django.core.cache import cache
+
+from apps.core import metrics, taches
+from apps.core.taches import single_flight, statistiques
+
+
+@pytest.fixture(autouse=True)
+def _cache_vide():
+    cache.clear()
+    taches._noms_connus.clear()
+    yield
+    cache.clear()
+    taches._noms_connus.clear()
+
+
+@single_flight(timeout=30)
+def tache_exclusive(appels):
+    appels.append('execution')
+    # Exécution imbriquée pendant la première : doit être ignorée
+    if len(appels) == 1:
+        appels.append(tache_exclusive(appels))
+    return 'ok'
+
+
+@shared_task
+def tache_lente(secondes):
+    return secondes
+
+
+@shared_task
+def tache_en_erreur():
+    raise ValueError('boom')
+
+
+class TestSingleFlight:
+    """Tests du verrou d'exclusivité"""
+
+    def test_concurrent_run_is_skipped(self):
+        """Test qu'une exécution pendant une autre est ignorée et comptée"""
+        appels = []
+        assert tache_exclusive(appels) == 'ok'
+
+        assert appels[0] == 'execution'
+        assert 'déjà en cours' in appels[1]
+        nom = 'tests.test_core.test_taches.tache_exclusive'
+        assert statistiques()[nom]['chevauchements'] == 1
+
+    def test_lock_released_after_run(self):
+        """Test que le verrou est libéré, y compris après une erreur"""
+        @single_flight()
+        def echoue():
+            raise RuntimeError('boom')
+
+        with pytest.raises(RuntimeError):
+            echoue()
+        with pytest.raises(RuntimeError):
+            echoue()  # Pas ignorée : le verrou a été libéré
+
+    def test_periodic_tasks_are_protected(self):
+        """Test que les tâches périodiques à haute fréquence portent le verrou"""
+        from apps.sessions.tasks import update_session_times
+
+        cache.add(f'{taches.LOCK_PREFIX}apps.sessions.tasks.update_session_times', 'autre', 30)
+        assert 'déjà en cours' in update_session_times()
+
+
+@pytest.mark.django_db
+class TestTaskSignals:
+    """Tests des métriques alimentées par les signaux Celery"""
+
+    def test_records_runs_and_failures(self):
+        """Test des exécutions, durées et erreurs par tâche"""
+        tache_lente.delay(1)
+        with pytest.raises(ValueError):
+            tache_en_erreur.delay()
+
+        stats = statistiques()
+        assert stats[tache_lente.name]['executions'] == 1
+        assert stats[tache_lente.name]['erreurs'] == 0
+        assert stats[tache_en_erreur.name]['executions'] == 1
+        assert stats[tache_en_erreur.name]['erreurs'] == 1
+
+    def test_budget_exceeded(self, settings):
+        """Test de l'alerte de dépassement de budget"""
+        settings.TASK_RUNTIME_BUDGETS = {tache_lente.name: -1}
+        tache_lente.delay(1)
+        assert statistiques()[tache_lente.name]['depassements'] == 1
+
+    def test_exported_by_registry(self):
+        """Test de l'export Prometheus des compteurs partagés"""
+        tache_lente.delay(1)
+        texte = metrics.REGISTRY.render()
+        assert f'epn_celery_task_duration_seconds_count{{task="{tache_lente.name}"}} 1' in texte
+        assert '# TYPE epn_celery_task_overlaps_total counter' in texte
+
+
+class TestRouting:
+    """Tests du routage des files"""
+
+    def test_session_tasks_have_dedicated_queue(self):
+        """Test que les tâches de session ne partagent pas la file des rapports"""
+        from config.celery import app
+
+        router = app.amqp.router
+        assert router.route({}, 'apps.sessions.tasks.update_session_times')['queue'].name == 'temps_reel'
+        assert router.route({}, 'apps.logs.tasks.archive_old_logs')['queue'].name == 'maintenance'
+        assert router.route({}, 'apps.sessions.tasks.consolider_statistiques')['queue'].name == 'celery'
+
+    def test_certificate_tasks_off_realtime_queue(self):
+        """Test que la génération de clés ne passe pas par la file temps_reel"""
+        from config.celery import app
+
+        router = app.amqp.router
+        for tache in ('issue_client_certificate', 'fill_certificate_key_pool'):
+            assert router.route({}, f'apps.postes.tasks.{tache}')['queue'].name == 'celery'
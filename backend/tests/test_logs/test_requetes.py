@@ -0,0 +1,31 @@
+"""
+Tests du nombre de requêtes des endpoints Logs (1 vs 50 logs)
+"""
+import itertools
+
+import pytest
+
+from apps.logs.models import Log
+from tests.factories import SessionFactory
+
+ENDPOINTS = [
+    '/api/logs/',
+    '/api/logs/stats/',
+    '/api/logs/recent/',
+    '/api/logs/errors/',
+]
+
+_actions = itertools.cycle(code for code, _ in Log.ACTION_CHOICES)
+
+
+def logs_varies(n):
+    """Logs d'actions différentes, liés ou non à une session"""
+    for session in SessionFactory.create_batch(n):
+        Log.log_action(action=next(_actions), details='test', session=session)
+        Log.log_action(action='erreur', details='test')
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_endpoint_query_count(garde_requetes, authenticated_client, url):
+    """Test que le nombre de requêtes ne dépend pas du nombre de logs"""
+    garde_requetes(f'GET {url}', peupler=logs_varies, appel=lambda: authenticated_client.get(url))
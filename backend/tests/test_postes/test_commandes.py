@@ -0,0 +1,270 @@
+"""
+Tests de la boîte d'envoi des commandes aux postes
+"""
+
+import datetime
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.utils import timezone
+from rest_framework import status
+
+from apps.core import presence
+from apps.logs.models import Log
+from apps.postes import commandes
+from apps.postes.consumers import ClientConsumer
+from apps.postes.models import CommandePoste
+from apps.postes.tasks import expirer_commandes
+from tests.factories import PosteFactory, SiteFactory
+
+
+@pytest.fixture
+def envois(monkeypatch):
+    """Messages envoyés aux postes (sans couche de canaux)"""
+    envoyes = []
+    monkeypatch.setattr(presence, 'envoyer_au_poste', lambda poste_id, message: envoyes.append((poste_id, message)))
+    return envoyes
+
+
+@pytest.mark.django_db
+class TestBoiteEnvoi:
+    """Tests de l'envoi, de l'acquittement et de l'expiration"""
+
+    def test_envoi_apres_commit(self, envois, django_capture_on_commit_callbacks):
+        """Test d'une commande persistée puis envoyée avec son identifiant"""
+        postes = PosteFactory.create_batch(2)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            envoyees = commandes.envoyer(
+                [poste.id for poste in postes], 'remote_command', {'command': 'lock'}, operateur='admin'
+            )
+            assert envois == []
+
+        assert CommandePoste.objects.filter(statut='envoyee').count() == 2
+        assert envois[0] == (postes[0].id, {
+            'type': 'remote_command', 'command': 'lock', 'commande_id': str(envoyees[0].pk)
+        })
+
+    def test_acquittement(self, envois):
+        """Test de l'acquittement par le seul poste destinataire, une fois"""
+        poste, autre = PosteFactory.create_batch(2)
+        commande, = commandes.envoyer([poste.id], 'unlock_kiosk', {}, operateur='admin')
+
+        assert commandes.acquitter(autre.id, commande.pk) is False
+        assert commandes.acquitter(poste.id, 'pas-un-uuid') is False
+        assert commandes.acquitter(poste.id, str(commande.pk)) is True
+        assert commandes.acquitter(poste.id, str(commande.pk)) is False
+        commande.refresh_from_db()
+        assert commande.statut == 'acquittee'
+        assert commande.acquittee_at is not None
+
+    def test_en_suspens_puis_expiration(self, envois):
+        """Test des commandes renvoyées à la reconnexion tant qu'elles sont valides"""
+        poste = PosteFactory()
+        lock, = commandes.envoyer([poste.id], 'remote_command', {'command': 'lock'}, operateur='admin')
+        message, = commandes.envoyer([poste.id], 'remote_command', {'command': 'message'}, operateur='admin', ttl=3600)
+        commandes.acquitter(poste.id, message.pk)
+
+        assert [m['commande_id'] for m in commandes.en_suspens(poste.id)] == [str(lock.pk)]
+        lock.refresh_from_db()
+        assert lock.tentatives == 2
+
+        assert commandes.expirer(now=timezone.now() + datetime.timedelta(minutes=10)) == 1
+        assert commandes.en_suspens(poste.id) == []
+
+    def test_tache_expiration_et_purge(self, envois):
+        """Test de la tâche périodique"""
+        poste = PosteFactory()
+        commandes.envoyer([poste.id], 'remote_command', {'command': 'lock'}, operateur='admin', ttl=1)
+        ancienne, = commandes.envoyer([poste.id], 'remote_command', {'command': 'lock'}, operateur='admin')
+        CommandePoste.objects.filter(pk=ancienne.pk).update(created_at=timezone.now() - datetime.timedelta(days=60))
+        CommandePoste.objects.update(expire_at=timezone.now())
+
+        assert expirer_commandes() == "2 commande(s) expirée(s), 1 supprimée(s)"
+        assert CommandePoste.objects.get().statut == 'expiree'
+
+
+@pytest.mark.django_db
+class TestConsumer:
+    """Tests du kiosque : renvoi à la connexion et acquittement"""
+
+    def test_renvoi_puis_acquittement(self, envois, monkeypatch):
+        """Test d'une commande manquée reçue à la reconnexion puis acquittée"""
+        poste = PosteFactory()
+        commande, = commandes.envoyer([poste.id], 'remote_command', {'command': 'lock'}, operateur='admin')
+        en_suspens = commandes.en_suspens(poste.id)
+        acquittees = []
+
+        # Les accès DB du consumer passent par le pool (autre thread)
+        async def rien(self):
+            pass
+
+        async def suspens(self):
+            return en_suspens
+
+        async def acquitter(self, commande_id):
+            acquittees.append(commande_id)
+        monkeypatch.setattr(ClientConsumer, '_update_poste_connection', rien)
+        monkeypatch.setattr(ClientConsumer, '_commandes_en_suspens', suspens)
+        monkeypatch.setattr(ClientConsumer, '_acquitter_commande', acquitter)
+
+        async def scenario():
+            communicator = WebsocketCommunicator(ClientConsumer.as_asgi(), '/ws/client/')
+            communicator.scope.update({'cert_valid': True, 'poste': poste, 'poste_cn': poste.nom})
+            await communicator.connect()
+            await communicator.receive_from()  # connection_established
+            recue = json.loads(await communicator.receive_from())
+            await communicator.send_to(text_data=json.dumps({
+                'type': 'command_ack', 'commande_id': recue['commande_id']
+            }))
+            await communicator.send_to(text_data=json.dumps({'type': 'heartbeat'}))
+            await communicator.receive_from()  # heartbeat_ack : acquittement traité
+            await communicator.disconnect()
+            return recue
+
+        recue = async_to_sync(scenario)()
+
+        assert recue == {
+            'type': 'remote_command', 'commande_id': str(commande.pk), 'command': 'lock', 'payload': None
+        }
+        assert acquittees == [str(commande.pk)]
+
+
+@pytest.mark.django_db
+class TestDiffusion:
+    """Tests de la diffusion à la flotte"""
+
+    def test_un_message_pour_le_site(self, django_capture_on_commit_callbacks):
+        """Test d'une diffusion à un site : une commande par poste, un message de groupe"""
+        site, autre_site = SiteFactory.create_batch(2)
+        postes = PosteFactory.create_batch(3, site=site, type_poste='gaming')
+        PosteFactory(site=site, type_poste='bureautique')
+        PosteFactory(site=autre_site, type_poste='gaming')
+        channel_layer = get_channel_layer()
+        canal = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f'flotte_{site.id}', canal)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            diffusion, poste_ids = commandes.diffuser(
+                'remote_command', {'command': 'lock'}, operateur='admin', sites=[site.id], type_poste='gaming'
+            )
+
+        assert poste_ids == [poste.id for poste in postes]
+        message = async_to_sync(channel_layer.receive)(canal)
+        assert message['diffusion_id'] == str(diffusion)
+        assert message['commande'] == {'command': 'lock', 'type': 'remote_command'}
+        assert not channel_layer.channels.get(canal)
+        assert CommandePoste.objects.get(pk=commandes.id_commande(diffusion, postes[0].id)).diffusion == diffusion
+
+    def test_consumer_filtre_et_acquitte(self, monkeypatch):
+        """Test du kiosque : commande reçue avec son identifiant, type non ciblé ignoré"""
+        gaming = PosteFactory(type_poste='gaming')
+        bureautique = PosteFactory(type_poste='bureautique')
+
+        async def rien(self):
+            pass
+
+        async def aucune_commande(self):
+            return []
+        monkeypatch.setattr(ClientConsumer, '_update_poste_connection', rien)
+        monkeypatch.setattr(ClientConsumer, '_commandes_en_suspens', aucune_commande)
+
+        async def scenario():
+            communicators = []
+            for poste in (gaming, bureautique):
+                communicator = WebsocketCommunicator(ClientConsumer.as_asgi(), '/ws/client/')
+                communicator.scope.update({'cert_valid': True, 'poste': poste, 'poste_cn': poste.nom})
+                await communicator.connect()
+                await communicator.receive_from()
+                communicators.append(communicator)
+
+            await get_channel_layer().group_send('flotte', {
+                'type': 'diffusion',
+                'diffusion_id': '6f1c1f34-8c52-4a43-9d4e-2f9cf7c1b0aa',
+                'commande': {'type': 'remote_command', 'command': 'message', 'payload': 'Fermeture'},
+                'type_poste': 'gaming',
+            })
+            recue = json.loads(await communicators[0].receive_from())
+            rien_recu = await communicators[1].receive_nothing()
+            for communicator in communicators:
+                await communicator.disconnect()
+            return recue, rien_recu
+
+        recue, rien_recu = async_to_sync(scenario)()
+
+        assert recue == {
+            'type': 'remote_command',
+            'commande_id': str(commandes.id_commande('6f1c1f34-8c52-4a43-9d4e-2f9cf7c1b0aa', gaming.id)),
+            'command': 'message',
+            'payload': 'Fermeture',
+        }
+        assert rien_recu is True
+
+
+@pytest.mark.django_db
+class TestCommandesAPI:
+    """Tests des endpoints /api/commandes/"""
+
+    def test_envoi_groupe(self, authenticated_client, user, envois, django_capture_on_commit_callbacks):
+        """Test de POST /api/commandes/ : postes hors du site de l'opérateur ignorés, un seul log"""
+        site, autre_site = SiteFactory.create_batch(2)
+        site.operateurs.add(user)
+        postes = PosteFactory.create_batch(3, site=site)
+        hors_site = PosteFactory(site=autre_site)
+        data = {'poste_ids': [poste.id for poste in postes] + [hors_site.id], 'command': 'lock'}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post('/api/commandes/', data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert set(response.data['commandes']) == {poste.id for poste in postes}
+        assert response.data['ignores'] == [hors_site.id]
+        assert sorted(poste_id for poste_id, _ in envois) == [poste.id for poste in postes]
+        assert Log.objects.filter(action='remote_command').count() == 1
+
+    def test_message_sans_texte(self, admin_client):
+        """Test d'une commande 'message' sans payload"""
+        poste = PosteFactory()
+
+        response = admin_client.post('/api/commandes/', {'poste_ids': [poste.id], 'command': 'message'}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_liste_filtree(self, admin_client, envois):
+        """Test de GET /api/commandes/?statut=envoyee"""
+        poste = PosteFactory()
+        commande, = commandes.envoyer([poste.id], 'remote_command', {'command': 'lock'}, operateur='admin')
+        commandes.envoyer([poste.id], 'unlock_kiosk', {}, operateur='admin')
+        commandes.acquitter(poste.id, commande.pk)
+
+        response = admin_client.get(f'/api/commandes/?poste={poste.id}&statut=envoyee')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [c['type'] for c in response.data['results']] == ['unlock_kiosk']
+
+    def test_diffuser_puis_resume(self, admin_client, django_capture_on_commit_callbacks):
+        """Test de POST /api/commandes/diffuser/ et du résumé des acquittements"""
+        postes = PosteFactory.create_batch(3)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post(
+                '/api/commandes/diffuser/', {'command': 'message', 'payload': 'Fermeture dans 15 minutes'},
+                format='json'
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['postes'] == 3
+        assert Log.objects.filter(action='remote_command').count() == 1
+        diffusion = response.data['diffusion']
+        commandes.acquitter(postes[0].id, commandes.id_commande(diffusion, postes[0].id))
+
+        response = admin_client.get(f'/api/commandes/diffusions/{diffusion}/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert (response.data['total'], response.data['acquittee'], response.data['envoyee']) == (3, 1, 2)
+        assert admin_client.get(
+            '/api/commandes/diffusions/00000000-0000-0000-0000-000000000000/'
+        ).status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,37 @@
+"""
+Tests du nombre de requêtes des endpoints Postes (1 vs 50 postes)
+"""
+import pytest
+
+from tests.factories import PosteFactory, SessionActiveFactory
+
+ENDPOINTS = [
+    '/api/postes/',
+    '/api/postes/disponibles/',
+    '/api/postes/stats/',
+    '/api/postes/seat_board/',
+    '/api/postes/pending_validation/',
+]
+
+
+def postes_occupes(n):
+    """Postes disponibles, occupés (session active) et en attente de validation"""
+    PosteFactory.create_batch(n)
+    SessionActiveFactory.create_batch(n)
+    PosteFactory.create_batch(n, statut='en_attente_validation')
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_endpoint_query_count(garde_requetes, authenticated_client, url):
+    """Test que le nombre de requêtes ne dépend pas du nombre de postes"""
+    garde_requetes(f'GET {url}', peupler=postes_occupes, appel=lambda: authenticated_client.get(url))
+
+
+def test_detail_query_count(garde_requetes, authenticated_client):
+    """Test du détail d'un poste quel que soit son historique de sessions"""
+    poste = PosteFactory()
+    garde_requetes(
+        'GET /api/postes/{id}/',
+        peupler=lambda n: SessionActiveFactory.create_batch(n, poste=poste),
+        appel=lambda: authenticated_client.get(f'/api/postes/{poste.id}/'),
+    )
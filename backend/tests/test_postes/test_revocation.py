@@ -0,0 +1,139 @@
+"""
+Tests pour la liste de révocation des certificats clients
+"""
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from cryptography import x509
+from django.core.cache import cache
+
+from apps.postes.admin import PosteAdmin
+from apps.postes.middleware import ClientCertAuthMiddleware
+from apps.postes.models import Poste, RevokedCertificate
+from apps.postes.revocation import RevocationSet, VERSION_KEY, get_revocation_set, load_revocations
+from tests.factories import PosteFactory
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def enregistrer(cert_manager, poste):
+    """Délivre un certificat au poste comme le ferait register_client"""
+    from apps.postes.models import CertificateRequest
+    cert_request = CertificateRequest.objects.create(poste=poste)
+    assert cert_request.issue()
+    poste.refresh_from_db()
+    return cert_request.client_cert
+
+
+@pytest.mark.django_db
+class TestRevocation:
+    """Tests de la révocation"""
+
+    def test_revoked_certificate_is_rejected(self, cert_manager, django_capture_on_commit_callbacks):
+        """Test qu'un certificat révoqué est refusé"""
+        poste = PosteFactory()
+        cert_pem = enregistrer(cert_manager, poste)
+        assert cert_manager.verify_client_certificate(cert_pem)[0] is True
+
+        with django_capture_on_commit_callbacks(execute=True):
+            poste.revoke_certificate()
+
+        assert cert_manager.verify_client_certificate(cert_pem) == (False, "Certificat révoqué")
+
+    def test_verification_without_db_query(self, cert_manager, django_assert_num_queries):
+        """Test que la vérification n'interroge pas la base une fois le jeu chargé"""
+        poste = PosteFactory()
+        cert_pem = enregistrer(cert_manager, poste)
+        get_revocation_set().refresh(force=True)
+
+        with django_assert_num_queries(0):
+            assert cert_manager.verify_client_certificate(cert_pem)[0] is True
+
+    def test_reregistration_supersedes_old_certificate(self, cert_manager):
+        """Test qu'un ré-enregistrement révoque l'ancien certificat"""
+        poste = PosteFactory()
+        ancien = enregistrer(cert_manager, poste)
+        ancienne_empreinte = cert_manager.certificate_fingerprint(ancien)
+
+        enregistrer(cert_manager, poste)
+
+        entry = RevokedCertificate.objects.get(fingerprint=ancienne_empreinte)
+        assert entry.raison == 'superseded'
+
+    def test_revocation_kicks_live_socket(self, cert_manager, django_capture_on_commit_callbacks):
+        """Test que la révocation est envoyée au groupe WebSocket du poste"""
+        poste = PosteFactory()
+        enregistrer(cert_manager, poste)
+
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f'poste_{poste.id}', channel_name)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            poste.revoke_certificate()
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        assert message['type'] == 'certificate_revoked'
+
+    def test_revoked_flag_is_enforced(self, cert_manager):
+        """Test qu'un poste marqué révoqué est refusé, même hors du jeu de révocation"""
+        poste = PosteFactory()
+        cert_pem = enregistrer(cert_manager, poste)
+        cn = cert_manager.verify_client_certificate(cert_pem)[1]
+        middleware = ClientCertAuthMiddleware(app=None)
+        assert async_to_sync(middleware._get_poste_from_cn)(cn, cert_pem) == poste
+
+        Poste.objects.filter(pk=poste.pk).update(is_certificate_revoked=True)
+
+        assert async_to_sync(middleware._get_poste_from_cn)(cn, cert_pem) is None
+        # Seul revoke_certificate / revoke_many modifie le drapeau
+        assert 'is_certificate_revoked' in PosteAdmin.readonly_fields
+
+    def test_crl_contains_revoked_serial(self, cert_manager, django_capture_on_commit_callbacks):
+        """Test que la CRL exportée liste le numéro de série révoqué"""
+        poste = PosteFactory()
+        enregistrer(cert_manager, poste)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            poste.revoke_certificate()
+
+        crl = x509.load_pem_x509_crl(cert_manager.crl_path.read_bytes())
+        serial = int(poste.certificate_serial, 16)
+        assert crl.get_revoked_certificate_by_serial_number(serial) is not None
+
+    def test_crl_endpoint(self, api_client, cert_manager):
+        """Test de l'endpoint GET /api/postes/crl/"""
+        response = api_client.get('/api/postes/crl/')
+        assert response.status_code == 200
+        assert response.content.startswith(b'-----BEGIN X509 CRL-----')
+
+
+@pytest.mark.django_db
+class TestRevocationSet:
+    """Tests de la copie en mémoire"""
+
+    def test_mirror_follows_shared_version(self, settings):
+        """Test qu'un autre processus voit la révocation au changement de version"""
+        settings.REVOCATION_CHECK_INTERVAL = 0
+        mirror = RevocationSet()
+        assert mirror.is_revoked('abc') is False
+
+        RevokedCertificate.objects.create(fingerprint='abc')
+        load_revocations()
+        assert mirror.is_revoked('abc') is True
+
+    def test_mirror_skips_reload_when_version_unchanged(self, settings, django_assert_num_queries):
+        """Test qu'une version inchangée ne relit ni la base ni le jeu"""
+        settings.REVOCATION_CHECK_INTERVAL = 0
+        mirror = RevocationSet()
+        mirror.refresh()
+        version = cache.get(VERSION_KEY)
+
+        with django_assert_num_queries(0):
+            mirror.refresh()
+        assert cache.get(VERSION_KEY) == version
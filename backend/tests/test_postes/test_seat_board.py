@@ -0,0 +1,158 @@
+"""
+Tests pour le tableau des places (seat board)
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.postes.models import SeatBoardEntry
+from apps.postes.seat_board import refresh_seats, get_snapshot
+from tests.factories import PosteFactory, SessionFactory, SiteFactory, UtilisateurFactory
+
+
+@pytest.mark.django_db
+class TestSeatBoardMaintenance:
+    """Tests de mise à jour du read model"""
+
+    def test_poste_creation_creates_seat(self):
+        """Test qu'un poste créé apparaît sur le tableau"""
+        poste = PosteFactory(nom='PC-01', emplacement='Salle 1')
+        seat = SeatBoardEntry.objects.get(poste=poste)
+        assert seat.nom == 'PC-01'
+        assert seat.emplacement == 'Salle 1'
+        assert seat.session_id is None
+
+    def test_demarrer_fills_seat(self):
+        """Test que le démarrage d'une session occupe la place"""
+        utilisateur = UtilisateurFactory(prenom='Jean', nom='Dupont')
+        session = SessionFactory(utilisateur=utilisateur)
+        session.demarrer()
+
+        seat = SeatBoardEntry.objects.get(poste=session.poste)
+        assert seat.statut == 'occupe'
+        assert seat.session_id == session.pk
+        assert seat.session_code == session.code_acces
+        assert seat.utilisateur_nom == 'Jean Dupont'
+        assert seat.temps_restant == session.temps_restant
+
+    def test_time_changes_update_seat(self):
+        """Test que l'ajout et le décompte du temps sont répercutés"""
+        session = SessionFactory(temps_restant=600)
+        session.demarrer()
+
+        session.ajouter_temps(300, operateur='admin')
+        assert SeatBoardEntry.objects.get(poste=session.poste).temps_restant == 900
+
+        session.decremente_temps(secondes=10)
+        assert SeatBoardEntry.objects.get(poste=session.poste).temps_restant == 890
+
+    def test_terminer_frees_seat(self):
+        """Test que la fin de session libère la place"""
+        session = SessionFactory()
+        session.demarrer()
+        session.terminer(operateur='admin')
+
+        seat = SeatBoardEntry.objects.get(poste=session.poste)
+        assert seat.statut == 'disponible'
+        assert seat.session_id is None
+
+    def test_poste_deletion_removes_seat(self):
+        """Test que la suppression du poste retire la place"""
+        poste = PosteFactory()
+        poste.delete()
+        assert not SeatBoardEntry.objects.filter(poste_id=poste.pk).exists()
+
+    def test_pending_poste_not_on_board(self):
+        """Test qu'un poste en attente de validation n'a pas de place"""
+        poste = PosteFactory(statut='en_attente_validation')
+        assert not SeatBoardEntry.objects.filter(poste=poste).exists()
+
+    def test_refresh_query_count_is_constant(self):
+        """Test que le recalcul ne dépend pas du nombre de postes"""
+        for _ in range(3):
+            SessionFactory().demarrer()
+        with CaptureQueriesContext(connection) as petit:
+            refresh_seats()
+
+        for _ in range(20):
+            SessionFactory().demarrer()
+        with CaptureQueriesContext(connection) as grand:
+            refresh_seats()
+
+        assert len(grand) == len(petit)
+
+
+@pytest.mark.django_db
+class TestSeatBoardSnapshot:
+    """Tests de lecture du tableau"""
+
+    def test_snapshot_filters_by_emplacement(self):
+        """Test du filtre par emplacement"""
+        PosteFactory(emplacement='Salle 1')
+        PosteFactory(emplacement='Salle 2')
+
+        snapshot = get_snapshot(emplacement='Salle 1')
+        assert len(snapshot['seats']) == 1
+        assert snapshot['seats'][0]['emplacement'] == 'Salle 1'
+
+    def test_snapshot_since_returns_delta(self, django_capture_on_commit_callbacks):
+        """Test que 'since' ne renvoie que les places modifiées"""
+        with django_capture_on_commit_callbacks(execute=True):
+            PosteFactory()
+            session = SessionFactory()
+        version = get_snapshot()['version']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            session.demarrer()
+        delta = get_snapshot(since=version)
+        assert [seat['poste_id'] for seat in delta['seats']] == [session.poste_id]
+        assert delta['removed'] == []
+        assert delta['version'] > version
+
+    def test_version_assigned_after_commit(self, django_capture_on_commit_callbacks):
+        """Test qu'une place modifiée dans une transaction non validée garde sa version"""
+        with django_capture_on_commit_callbacks(execute=True):
+            session = SessionFactory()
+        avant = SeatBoardEntry.objects.get(poste=session.poste).version
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            session.demarrer()
+            assert SeatBoardEntry.objects.get(poste=session.poste).version == avant
+        for callback in callbacks:
+            callback()
+
+        assert SeatBoardEntry.objects.get(poste=session.poste).version > avant
+
+    def test_snapshot_since_returns_removed(self, django_capture_on_commit_callbacks):
+        """Test qu'un poste supprimé après 'since' est signalé dans 'removed'"""
+        with django_capture_on_commit_callbacks(execute=True):
+            poste = PosteFactory(site=SiteFactory())
+            PosteFactory()
+        poste_id = poste.pk
+        version = get_snapshot()['version']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            poste.delete()
+        delta = get_snapshot(since=version)
+
+        assert delta['seats'] == []
+        assert delta['removed'] == [poste_id]
+        assert delta['version'] > version
+        assert get_snapshot(since=delta['version'])['removed'] == []
+        assert get_snapshot(since=version, sites=[SiteFactory().pk])['removed'] == []
+
+    def test_seat_board_endpoint(self, authenticated_client):
+        """Test de l'endpoint GET /api/postes/seat_board/"""
+        session = SessionFactory()
+        session.demarrer()
+
+        response = authenticated_client.get('/api/postes/seat_board/')
+        assert response.status_code == 200
+        seats = response.data['seats']
+        assert len(seats) == 1
+        assert seats[0]['session']['code_acces'] == session.code_acces
+
+    def test_seat_board_endpoint_invalid_since(self, authenticated_client):
+        """Test qu'un 'since' non entier est refusé"""
+        response = authenticated_client.get('/api/postes/seat_board/?since=abc')
+        assert response.status_code == 400
@@ -0,0 +1,140 @@
+"""
+Tests pour les opérations en masse sur les postes
+"""
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.logs.models import Log
+from apps.postes.models import Poste, RevokedCertificate
+from apps.postes.services import revoke_many, validate_many
+from tests.factories import PosteFactory
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def poste_enregistre(**kwargs):
+    """Poste avec un certificat actif (sans passer par la CA)"""
+    poste = PosteFactory(**kwargs)
+    poste.certificate_cn = f'client-{poste.id}'
+    poste.certificate_fingerprint = f'{poste.id:064x}'
+    poste.certificate_serial = f'{poste.id:x}'
+    poste.save()
+    return poste
+
+
+@pytest.mark.django_db
+class TestValidateMany:
+    """Tests de validate_many"""
+
+    def test_validates_pending_postes(self):
+        """Test que seuls les postes en attente sont validés"""
+        en_attente = PosteFactory.create_batch(2, statut='en_attente_validation')
+        disponible = PosteFactory()
+
+        valides = validate_many([p.id for p in en_attente] + [disponible.id], 'admin')
+
+        assert sorted(valides) == sorted(p.id for p in en_attente)
+        for poste in Poste.objects.filter(pk__in=valides):
+            assert poste.statut == 'hors_ligne'
+            assert poste.validated_by == 'admin'
+            assert poste.validated_at is not None
+        assert Log.objects.filter(action='client_validated').count() == 2
+
+    def test_constant_query_count(self):
+        """Test que le nombre de requêtes ne dépend pas de la taille du lot"""
+        une = [PosteFactory(statut='en_attente_validation').id]
+        plusieurs = [p.id for p in PosteFactory.create_batch(10, statut='en_attente_validation')]
+
+        with CaptureQueriesContext(connection) as ctx_une:
+            validate_many(une, 'admin')
+        with CaptureQueriesContext(connection) as ctx_plusieurs:
+            validate_many(plusieurs, 'admin')
+
+        assert len(ctx_une.captured_queries) == len(ctx_plusieurs.captured_queries)
+
+
+@pytest.mark.django_db
+class TestRevokeMany:
+    """Tests de revoke_many"""
+
+    def test_revokes_certificates(self):
+        """Test que les certificats sont révoqués et ajoutés à la liste"""
+        postes = [poste_enregistre() for _ in range(3)]
+        sans_certificat = PosteFactory()
+
+        revoques = revoke_many([p.id for p in postes] + [sans_certificat.id], 'admin')
+
+        assert sorted(revoques) == sorted(p.id for p in postes)
+        assert Poste.objects.filter(is_certificate_revoked=True).count() == 3
+        assert set(RevokedCertificate.objects.values_list('fingerprint', flat=True)) == {
+            p.certificate_fingerprint for p in postes
+        }
+        assert Log.objects.filter(action='certificate_revoked').count() == 3
+
+    def test_already_revoked_is_skipped(self):
+        """Test qu'un poste déjà révoqué est ignoré"""
+        poste = poste_enregistre()
+        revoke_many([poste.id], 'admin')
+
+        assert revoke_many([poste.id], 'admin') == []
+
+    def test_constant_query_count(self):
+        """Test que le nombre de requêtes ne dépend pas de la taille du lot"""
+        une = [poste_enregistre().id]
+        plusieurs = [poste_enregistre().id for _ in range(10)]
+
+        with CaptureQueriesContext(connection) as ctx_une:
+            revoke_many(une, 'admin')
+        with CaptureQueriesContext(connection) as ctx_plusieurs:
+            revoke_many(plusieurs, 'admin')
+
+        assert len(ctx_une.captured_queries) == len(ctx_plusieurs.captured_queries)
+
+    def test_kicks_all_postes_after_commit(self, cert_manager, django_capture_on_commit_callbacks):
+        """Test que chaque poste révoqué reçoit certificate_revoked"""
+        postes = [poste_enregistre() for _ in range(2)]
+        channel_layer = get_channel_layer()
+        channels = []
+        for poste in postes:
+            channel_name = async_to_sync(channel_layer.new_channel)()
+            async_to_sync(channel_layer.group_add)(f'poste_{poste.id}', channel_name)
+            channels.append(channel_name)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            revoke_many([p.id for p in postes], 'admin')
+
+        for channel_name in channels:
+            message = async_to_sync(channel_layer.receive)(channel_name)
+            assert message['type'] == 'certificate_revoked'
+
+    def test_bulk_revoke_endpoint(self, authenticated_client):
+        """Test POST /api/postes/bulk_revoke/"""
+        poste = poste_enregistre()
+
+        response = authenticated_client.post('/api/postes/bulk_revoke/', {
+            'poste_ids': [poste.id]
+        }, format='json')
+
+        assert response.status_code == 200
+        assert response.data['poste_ids'] == [poste.id]
+
+    def test_bulk_validate_endpoint(self, authenticated_client):
+        """Test POST /api/postes/bulk_validate/"""
+        poste = PosteFactory(statut='en_attente_validation')
+
+        response = authenticated_client.post('/api/postes/bulk_validate/', {
+            'poste_ids': [poste.id, 999999]
+        }, format='json')
+
+        assert response.status_code == 200
+        assert response.data['poste_ids'] == [poste.id]
+        assert response.data['ignores'] == [999999]
@@ -0,0 +1,236 @@
+"""
+Tests du découpage par site (salles EPN)
+"""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from rest_framework import status
+
+from apps.core import http_cache
+from apps.postes.models import Site
+from apps.sessions.models import Session
+from apps.postes.seat_board import get_snapshot
+from apps.postes.sites import groupes, resoudre_sites
+from tests.factories import (
+    PosteFactory, SessionActiveFactory, SessionFactory, SiteFactory, UserFactory
+)
+
+
+@pytest.fixture
+def deux_sites(db):
+    """Deux sites avec un poste occupé chacun"""
+    sites = SiteFactory.create_batch(2)
+    for site in sites:
+        SessionActiveFactory(poste=PosteFactory(site=site, statut='occupe'))
+    return sites
+
+
+@pytest.mark.django_db
+class TestResolutionSites:
+    """Tests des sites visibles par un opérateur"""
+
+    def test_operateur_sans_rattachement_voit_tout(self, user, deux_sites):
+        """Test qu'un opérateur sans site n'est pas restreint"""
+        assert resoudre_sites(user) is None
+
+    def test_operateur_rattache(self, user, deux_sites):
+        """Test qu'un opérateur rattaché est restreint à ses sites"""
+        deux_sites[0].operateurs.add(user)
+        assert resoudre_sites(user) == [deux_sites[0].pk]
+
+    def test_superuser_voit_tout(self, admin_user, deux_sites):
+        """Test qu'un superutilisateur n'est jamais restreint"""
+        deux_sites[0].operateurs.add(admin_user)
+        assert resoudre_sites(admin_user) is None
+
+    def test_site_par_slug_ou_id(self, user, deux_sites):
+        """Test de la sélection d'un site par slug ou par ID"""
+        site = deux_sites[1]
+        assert resoudre_sites(user, site.slug) == [site.pk]
+        assert resoudre_sites(user, str(site.pk)) == [site.pk]
+
+    def test_site_refuse(self, user, deux_sites):
+        """Test qu'un site inconnu ou hors des sites de l'opérateur est refusé"""
+        deux_sites[0].operateurs.add(user)
+        with pytest.raises(Site.DoesNotExist):
+            resoudre_sites(user, 'inconnu')
+        with pytest.raises(Site.DoesNotExist):
+            resoudre_sites(user, deux_sites[1].slug)
+
+    def test_groupes(self):
+        """Test des groupes WebSocket d'une portée"""
+        assert groupes('dashboard', None) == ['dashboard']
+        assert groupes('dashboard', [3, 5]) == ['dashboard_3', 'dashboard_5']
+
+
+@pytest.mark.django_db
+class TestSessionSite:
+    """Tests du site dénormalisé sur les sessions"""
+
+    def test_session_prend_le_site_du_poste(self):
+        """Test qu'une session est rattachée au site de son poste"""
+        site = SiteFactory()
+        session = SessionFactory(poste=PosteFactory(site=site))
+        assert session.site_id == site.pk
+
+    def test_poste_sans_site(self):
+        """Test qu'une session sur un poste sans site n'a pas de site"""
+        assert SessionFactory(poste=PosteFactory(site=None)).site_id is None
+
+
+@pytest.mark.django_db
+class TestEndpointsParSite:
+    """Tests des endpoints restreints à un site"""
+
+    def test_liste_postes_par_site(self, authenticated_client, deux_sites):
+        """Test que ?site= restreint la liste des postes"""
+        response = authenticated_client.get('/api/postes/', {'site': deux_sites[0].slug})
+        assert response.status_code == status.HTTP_200_OK
+        assert {poste['site'] for poste in response.data['results']} == {deux_sites[0].pk}
+
+    def test_site_inconnu(self, authenticated_client, deux_sites):
+        """Test qu'un site inconnu renvoie 404"""
+        response = authenticated_client.get('/api/postes/', {'site': 'inconnu'})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_operateur_rattache_restreint(self, api_client, deux_sites):
+        """Test qu'un opérateur rattaché ne voit que les sessions de son site"""
+        operateur = UserFactory()
+        deux_sites[1].operateurs.add(operateur)
+        api_client.force_authenticate(operateur)
+
+        response = api_client.get('/api/sessions/actives/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+        assert api_client.get('/api/postes/', {'site': deux_sites[0].slug}).status_code == \
+            status.HTTP_404_NOT_FOUND
+
+    def test_stats_par_site(self, authenticated_client, deux_sites):
+        """Test que les statistiques des postes sont restreintes au site"""
+        PosteFactory(site=deux_sites[0])
+
+        response = authenticated_client.get('/api/postes/stats/', {'site': deux_sites[0].slug})
+
+        assert response.data['total'] == 2
+
+    def test_liste_sites(self, api_client, deux_sites):
+        """Test que /api/sites/ ne liste que les sites de l'opérateur"""
+        operateur = UserFactory()
+        deux_sites[0].operateurs.add(operateur)
+        api_client.force_authenticate(operateur)
+
+        response = api_client.get('/api/sites/')
+
+        assert [site['slug'] for site in response.data['results']] == [deux_sites[0].slug]
+        assert response.data['results'][0]['nombre_postes'] == 1
+
+
+@pytest.mark.django_db
+class TestOperationsEnMasseParSite:
+    """Tests des opérations en masse d'un opérateur rattaché à un site"""
+
+    @pytest.fixture
+    def operateur_site(self, api_client, deux_sites):
+        operateur = UserFactory()
+        deux_sites[0].operateurs.add(operateur)
+        api_client.force_authenticate(operateur)
+        return api_client
+
+    def test_sessions_autre_site_ignorees(self, operateur_site, deux_sites):
+        """Test de bulk_add_time et bulk_terminate : sessions de l'autre site ignorées"""
+        ids = {
+            site.pk: Session.objects.get(poste__site=site, statut='active').pk for site in deux_sites
+        }
+        mon_id, autre_id = ids[deux_sites[0].pk], ids[deux_sites[1].pk]
+
+        response = operateur_site.post(
+            '/api/sessions/bulk_add_time/', {'session_ids': [mon_id, autre_id], 'minutes': 10}, format='json'
+        )
+        assert (response.data['session_ids'], response.data['ignorees']) == ([mon_id], [autre_id])
+
+        response = operateur_site.post('/api/sessions/bulk_terminate/', {
+            'session_ids': [mon_id, autre_id], 'raison': 'fermeture_normale'
+        }, format='json')
+        assert (response.data['session_ids'], response.data['ignorees']) == ([mon_id], [autre_id])
+        assert Session.objects.get(pk=autre_id).statut == 'active'
+
+    def test_postes_autre_site_ignores(self, operateur_site, deux_sites):
+        """Test de bulk_validate : poste de l'autre site ignoré"""
+        mien, autre = (PosteFactory(site=site, statut='en_attente_validation') for site in deux_sites)
+
+        response = operateur_site.post(
+            '/api/postes/bulk_validate/', {'poste_ids': [mien.id, autre.id]}, format='json'
+        )
+
+        assert (response.data['poste_ids'], response.data['ignores']) == ([mien.id], [autre.id])
+        response = operateur_site.post('/api/postes/bulk_revoke/', {'poste_ids': [autre.id]}, format='json')
+        assert response.data['ignores'] == [autre.id]
+
+    def test_export_restreint(self, operateur_site, deux_sites):
+        """Test de l'export : sessions du seul site de l'opérateur"""
+        response = operateur_site.get('/api/sessions/export/')
+
+        lignes = b''.join(response.streaming_content).decode().strip().splitlines()
+        assert len(lignes) == 2  # en-tête + la session du site
+
+    def test_stats_quotidiennes_poste_autre_site(self, operateur_site, deux_sites):
+        """Test de stats_quotidiennes : poste de l'autre site introuvable"""
+        mien, autre = (site.postes.get() for site in deux_sites)
+
+        response = operateur_site.get(f'/api/sessions/stats_quotidiennes/?poste={autre.id}')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        response = operateur_site.get(f'/api/sessions/stats_quotidiennes/?poste={mien.id}')
+        assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestCacheParSite:
+    """Tests des versions de cache par site"""
+
+    def test_ecriture_n_invalide_que_son_site(self, deux_sites):
+        """Test qu'une session d'un site n'invalide pas le cache de l'autre"""
+        site_a, site_b = deux_sites
+        avant_a = http_cache.versions(http_cache.dependances(['sessions'], [site_a.pk]))
+        avant_tous = http_cache.versions(http_cache.dependances(['sessions']))
+
+        SessionFactory(poste=PosteFactory(site=site_b))
+
+        assert http_cache.versions(http_cache.dependances(['sessions'], [site_a.pk])) == avant_a
+        assert http_cache.versions(http_cache.dependances(['sessions'])) != avant_tous
+
+    def test_ecriture_sans_site_invalide_tout(self, deux_sites):
+        """Test qu'une écriture de site inconnu invalide toutes les réponses"""
+        avant = http_cache.versions(http_cache.dependances(['sessions'], [deux_sites[0].pk]))
+        http_cache.invalider('sessions')
+        assert http_cache.versions(http_cache.dependances(['sessions'], [deux_sites[0].pk])) != avant
+
+    def test_entree_par_site(self, authenticated_client, deux_sites):
+        """Test que chaque site a sa propre entrée de cache"""
+        for site in deux_sites:
+            response = authenticated_client.get('/api/sessions/actives/', {'site': site.slug})
+            assert len(response.data) == 1
+
+
+@pytest.mark.django_db
+class TestSeatBoardParSite:
+    """Tests du tableau des places par site"""
+
+    def test_snapshot_par_site(self, deux_sites):
+        """Test que le snapshot est restreint aux sites donnés"""
+        seats = get_snapshot(sites=[deux_sites[0].pk])['seats']
+        assert [seat['site_id'] for seat in seats] == [deux_sites[0].pk]
+
+    def test_delta_diffuse_au_groupe_du_site(self, django_capture_on_commit_callbacks):
+        """Test que le delta est envoyé au groupe global et au groupe du site"""
+        site = SiteFactory()
+        channel_layer = MagicMock(group_send=AsyncMock())
+
+        with patch('apps.postes.seat_board.get_channel_layer', return_value=channel_layer):
+            with django_capture_on_commit_callbacks(execute=True):
+                poste = PosteFactory(site=site)
+
+        envois = {appel.args[0]: appel.args[1]['data'] for appel in channel_layer.group_send.await_args_list}
+        assert set(envois) == {'seat_board', f'seat_board_{site.pk}'}
+        assert [seat['poste_id'] for seat in envois[f'seat_board_{site.pk}']['seats']] == [poste.pk]
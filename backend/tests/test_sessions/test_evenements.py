@@ -0,0 +1,168 @@
+"""
+Tests du journal des événements de session et du rejeu à la reconnexion
+"""
+
+import json
+import os
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+
+from apps.postes.consumers import ClientConsumer
+from apps.sessions import evenements
+from apps.sessions.services import add_time_many
+from tests.factories import PosteFactory, SessionActiveFactory
+
+
+def _avertissement(message):
+    return {'type': 'session_warning', 'level': 'info', 'message': message, 'temps_restant': 60}
+
+
+class TestJournal:
+    """Tests du journal en mémoire"""
+
+    def test_numerotation_et_rejeu(self):
+        """Test des numéros croissants par session et des événements suivants"""
+        for texte in ('a', 'b', 'c'):
+            evenements.publier(1, _avertissement(texte))
+        assert evenements.publier(2, _avertissement('x'))['seq'] == 1
+
+        rejoues, complet = evenements.depuis(1, 1)
+
+        assert [(e['seq'], e['message']) for e in rejoues] == [(2, 'b'), (3, 'c')]
+        assert complet is True
+
+    def test_tampon_borne(self, settings):
+        """Test d'un rejeu au-delà du tampon : incomplet"""
+        settings.SESSION_EVENTS_MAXLEN = 2
+        for texte in ('a', 'b', 'c'):
+            evenements.publier(1, _avertissement(texte))
+
+        rejoues, complet = evenements.depuis(1, 0)
+        assert [e['seq'] for e in rejoues] == [2, 3]
+        assert complet is False
+        assert evenements.depuis(1, 1)[1] is True
+
+    def test_journal_expire(self):
+        """Test d'un resume_from postérieur au dernier numéro (journal reparti de zéro)"""
+        evenements.publier(1, _avertissement('a'))
+
+        rejoues, complet = evenements.depuis(1, 40)
+
+        assert [e['seq'] for e in rejoues] == [1]
+        assert complet is False
+
+
+@pytest.mark.django_db
+class TestPublication:
+    """Tests des envois numérotés"""
+
+    def test_ajout_temps_en_masse(self, django_capture_on_commit_callbacks):
+        """Test de add_time_many : time_added numéroté et journalisé"""
+        session = SessionActiveFactory()
+        channel_layer = get_channel_layer()
+        canal = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f'session_{session.id}', canal)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            add_time_many([session.id], 600, 'admin')
+
+        message = async_to_sync(channel_layer.receive)(canal)
+        assert (message['type'], message['seq']) == ('time_added', 1)
+        assert evenements.depuis(session.id, 0)[0][0]['secondes'] == 600
+
+
+@pytest.mark.django_db
+class TestRejeuKiosque:
+    """Tests du rejeu par ClientConsumer"""
+
+    def test_reprise_apres_coupure(self, monkeypatch):
+        """Test de resume_from : seuls les événements manqués, puis pas de doublon"""
+        poste = PosteFactory()
+        for texte in ('a', 'b', 'c'):
+            evenements.publier(7, _avertissement(texte))
+
+        # Les accès DB du consumer passent par le pool (autre thread)
+        async def rien(self, *args):
+            pass
+
+        async def aucune_commande(self):
+            return []
+
+        async def session_valide(self, code, mac_address=None):
+            return {'id': 7, 'is_reconnection': True}
+        monkeypatch.setattr(ClientConsumer, '_update_poste_connection', rien)
+        monkeypatch.setattr(ClientConsumer, '_commandes_en_suspens', aucune_commande)
+        monkeypatch.setattr(ClientConsumer, '_validate_session_code', session_valide)
+
+        async def scenario():
+            communicator = WebsocketCommunicator(ClientConsumer.as_asgi(), '/ws/client/')
+            communicator.scope.update({'cert_valid': True, 'poste': poste, 'poste_cn': poste.nom})
+            await communicator.connect()
+            await communicator.receive_from()
+            await communicator.send_to(text_data=json.dumps({
+                'type': 'validate_code', 'code': 'ABC123', 'resume_from': 1
+            }))
+            recus = [json.loads(await communicator.receive_from()) for _ in range(4)]
+
+            # Événement déjà rejoué puis nouvel événement
+            channel_layer = get_channel_layer()
+            await channel_layer.group_send('session_7', {**_avertissement('c'), 'seq': 3})
+            await channel_layer.group_send('session_7', {**_avertissement('d'), 'seq': 4})
+            recus.append(json.loads(await communicator.receive_from()))
+            assert await communicator.receive_nothing()
+            await communicator.disconnect()
+            return recus
+
+        recus = async_to_sync(scenario)()
+
+        assert [(m['type'], m.get('seq')) for m in recus] == [
+            ('code_valid', None), ('warning', 2), ('warning', 3), ('replay_complete', 3), ('warning', 4)
+        ]
+        assert recus[3]['complet'] is True
+
+
+class TestDedoublonnage:
+    """Tests du filtrage des événements déjà envoyés au kiosque"""
+
+    def test_ordre_inverse(self):
+        """Test d'événements livrés dans le désordre : aucun perdu, doublons écartés"""
+        consumer = ClientConsumer()
+
+        livres = [consumer._evenement_nouveau({'seq': seq}) for seq in (2, 1, 1, 4, 3, 2, 4)]
+
+        assert livres == [True, True, False, True, True, False, False]
+        assert (consumer.dernier_seq, consumer.seq_envoyes) == (4, set())
+
+    def test_fenetre_bornee(self, settings):
+        """Test d'un trou plus ancien que le journal : abandonné"""
+        settings.SESSION_EVENTS_MAXLEN = 2
+        consumer = ClientConsumer()
+
+        for seq in (2, 3, 5):
+            consumer._evenement_nouveau({'seq': seq})
+
+        assert (consumer.dernier_seq, consumer.seq_envoyes) == (3, {5})
+        assert consumer._evenement_nouveau({'seq': 1}) is False
+        assert consumer._evenement_nouveau({'seq': 4}) is True
+        assert consumer.dernier_seq == 5
+
+
+@pytest.mark.skipif(not os.environ.get('SESSION_EVENTS_REDIS_URL'), reason='SESSION_EVENTS_REDIS_URL non défini')
+class TestJournalRedis:
+    """Journal partagé dans un stream Redis"""
+
+    def test_numerotation_et_rejeu(self, settings):
+        """Test du script de publication et de la lecture bornée"""
+        settings.SESSION_EVENTS_MAXLEN = 100
+        journal = evenements.RedisJournal(os.environ['SESSION_EVENTS_REDIS_URL'], prefix='test:evenements')
+        try:
+            for texte in ('a', 'b', 'c'):
+                journal.publier(1, _avertissement(texte))
+
+            assert [e['message'] for e in journal.depuis(1, 1)] == ['b', 'c']
+            assert journal.dernier(1) == 3
+        finally:
+            journal.reset()
@@ -0,0 +1,181 @@
+"""
+Tests de la file d'attente et de l'attribution automatique des postes
+"""
+
+import datetime
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.utils import timezone
+from rest_framework import status
+
+from apps.sessions.file_attente import attribuer, inscrire, liberer_absents
+from apps.sessions.models import FileAttente, Session
+from apps.sessions.reservations import reserver
+from tests.factories import PosteFactory, SessionActiveFactory, UtilisateurFactory
+
+
+@pytest.fixture
+def usagers(db):
+    return UtilisateurFactory.create_batch(3)
+
+
+@pytest.mark.django_db
+class TestAttribution:
+    """Tests du moteur d'attribution"""
+
+    def test_premier_arrive_premier_servi(self, usagers):
+        """Test de l'ordre d'inscription et de la session créée"""
+        premier = inscrire(usagers[0], 1800, 'accueil')
+        second = inscrire(usagers[1], 3600, 'accueil')
+        poste = PosteFactory(statut='disponible')
+
+        attribuees = attribuer()
+
+        assert [entree.pk for entree in attribuees] == [premier.pk]
+        premier.refresh_from_db()
+        poste.refresh_from_db()
+        assert premier.statut == 'attribuee'
+        assert premier.poste == poste
+        assert premier.session.statut == 'en_attente'
+        assert premier.session.duree_initiale == 1800
+        assert premier.session.utilisateur_id == usagers[0].pk
+        assert poste.statut == 'reserve'
+        second.refresh_from_db()
+        assert second.statut == 'en_attente'
+
+    def test_preference_type_poste(self, usagers):
+        """Test d'un usager qui attend un poste gaming"""
+        gamer = inscrire(usagers[0], 1800, 'accueil', type_poste='gaming')
+        indifferent = inscrire(usagers[1], 1800, 'accueil')
+        PosteFactory(statut='disponible', type_poste='bureautique')
+
+        assert [entree.pk for entree in attribuer()] == [indifferent.pk]
+
+        gaming = PosteFactory(statut='disponible', type_poste='gaming')
+        attribuees = attribuer()
+        assert [(entree.pk, entree.poste_id) for entree in attribuees] == [(gamer.pk, gaming.pk)]
+
+    def test_postes_occupes_ou_retenus_ignores(self, usagers):
+        """Test des postes avec une session en cours ou en attente"""
+        inscrire(usagers[0], 1800, 'accueil')
+        occupe = SessionActiveFactory(poste=PosteFactory(statut='disponible')).poste
+        attendu = Session.objects.create(
+            utilisateur=usagers[1], poste=PosteFactory(statut='disponible'), duree_initiale=600, operateur='accueil'
+        ).poste
+
+        assert attribuer([occupe.pk, attendu.pk]) == []
+
+    def test_reservation_prochaine_respectee(self, usagers):
+        """Test d'un poste réservé dans 40 minutes : session trop longue refusée"""
+        poste = PosteFactory(statut='disponible')
+        debut = timezone.now() + datetime.timedelta(minutes=40)
+        reserver(usagers[2], poste, debut, debut + datetime.timedelta(hours=1), 'accueil')
+        long = inscrire(usagers[0], 3600, 'accueil')
+        court = inscrire(usagers[1], 1200, 'accueil')
+
+        assert [entree.pk for entree in attribuer()] == [court.pk]
+        long.refresh_from_db()
+        assert long.statut == 'en_attente'
+
+    def test_inscription_unique(self, usagers):
+        """Test d'un usager déjà dans la file"""
+        inscrire(usagers[0], 1800, 'accueil')
+
+        with pytest.raises(ValueError):
+            inscrire(usagers[0], 1800, 'accueil')
+
+
+@pytest.mark.django_db
+class TestPosteLibere:
+    """Tests du déclenchement à la libération d'un poste"""
+
+    def test_fin_de_session_attribue_le_poste(self, usagers, django_capture_on_commit_callbacks):
+        """Test de Session.terminer : le poste passe au premier de la file"""
+        session = SessionActiveFactory(poste=PosteFactory(statut='occupe'))
+        entree = inscrire(usagers[0], 1800, 'accueil')
+        channel_layer = get_channel_layer()
+        canal = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('sessions', canal)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            session.terminer(operateur='admin')
+
+        entree.refresh_from_db()
+        assert entree.statut == 'attribuee'
+        assert entree.poste_id == session.poste_id
+        message = async_to_sync(channel_layer.receive)(canal)
+        assert message['type'] == 'place_attribuee'
+        assert message['data']['code_acces'] == entree.session.code_acces
+
+    def test_expiration_attribue_le_poste(self, usagers, django_capture_on_commit_callbacks):
+        """Test de Session.decremente_temps : le poste expiré passe au premier de la file"""
+        session = SessionActiveFactory(poste=PosteFactory(statut='occupe'), temps_restant=1)
+        entree = inscrire(usagers[0], 1800, 'accueil')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert session.decremente_temps() is True
+
+        entree.refresh_from_db()
+        assert session.statut == 'expiree'
+        assert (entree.statut, entree.poste_id) == ('attribuee', session.poste_id)
+
+    def test_demarrage_sur_poste_attribue(self, usagers):
+        """Test d'un poste attribué : seule la session de l'usager y démarre"""
+        entree = inscrire(usagers[0], 1800, 'accueil')
+        poste = PosteFactory(statut='disponible')
+        attribuer()
+        entree.refresh_from_db()
+        autre = Session.objects.create(utilisateur=usagers[1], poste=poste, duree_initiale=600, operateur='accueil')
+
+        assert autre.demarrer(exiger_poste_disponible=True) is False
+        assert entree.session.demarrer(exiger_poste_disponible=True) is True
+
+    def test_absent_remplace_par_le_suivant(self, usagers, django_capture_on_commit_callbacks):
+        """Test d'un usager qui ne se présente pas : poste attribué au suivant"""
+        absent = inscrire(usagers[0], 1800, 'accueil')
+        suivant = inscrire(usagers[1], 1800, 'accueil')
+        poste = PosteFactory(statut='disponible')
+        attribuer()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert liberer_absents(now=timezone.now() + datetime.timedelta(minutes=10)) == 1
+
+        absent.refresh_from_db()
+        suivant.refresh_from_db()
+        assert absent.statut == 'absente'
+        assert absent.session.statut == 'terminee'
+        assert suivant.statut == 'attribuee'
+        assert suivant.poste_id == poste.pk
+
+
+@pytest.mark.django_db
+class TestFileAttenteAPI:
+    """Tests des endpoints /api/file-attente/"""
+
+    def test_inscrire_avec_poste_libre(self, admin_client, usagers, django_capture_on_commit_callbacks):
+        """Test de POST /api/file-attente/ : attribution immédiate"""
+        PosteFactory(statut='disponible', type_poste='gaming')
+        data = {'utilisateur': usagers[0].id, 'duree_minutes': 30, 'type_poste': 'gaming', 'operateur': 'accueil'}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post('/api/file-attente/', data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert FileAttente.objects.get(pk=response.data['id']).statut == 'attribuee'
+
+    def test_annuler(self, admin_client, usagers):
+        """Test de POST /api/file-attente/{id}/annuler/ : poste attribué libéré"""
+        entree = inscrire(usagers[0], 1800, 'accueil')
+        poste = PosteFactory(statut='disponible')
+        attribuer()
+
+        response = admin_client.post(f'/api/file-attente/{entree.id}/annuler/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['statut'] == 'annulee'
+        poste.refresh_from_db()
+        assert poste.statut == 'disponible'
+        response = admin_client.post(f'/api/file-attente/{entree.id}/annuler/')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
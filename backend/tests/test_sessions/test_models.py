@@ -168,8 +168,8 @@ class TestSessionModel:
         poste_disponible.refresh_from_db()
         assert poste_disponible.statut == 'occupe'
 
-    def test_demarrer_increments_user_sessions(self, utilisateur, poste):
-        """Test que démarrer incrémente le compteur de sessions utilisateur"""
+    def test_demarrer_increments_user_sessions(self, utilisateur, poste, django_capture_on_commit_callbacks):
+        """Test que démarrer incrémente le compteur de sessions utilisateur (après le commit)"""
         initial_count = utilisateur.nombre_sessions_total
         session = SessionFactory(
             utilisateur=utilisateur,
@@ -177,7 +177,8 @@ class TestSessionModel:
             statut='en_attente'
         )
 
-        with patch('apps.logs.models.Log.objects.create'):
+        with patch('apps.logs.models.Log.objects.create'), \
+                django_capture_on_commit_callbacks(execute=True):
             session.demarrer()
 
         utilisateur.refresh_from_db()
@@ -331,3 +332,134 @@ class TestSessionStatutTransitions:
         with patch('apps.logs.models.Log.objects.create'):
             session.reprendre('test_op')
         assert session.statut == 'active'
+
+
+@pytest.mark.django_db
+class TestSessionConditionalUpdates:
+    """Tests des transitions par UPDATE conditionnel (écritures concurrentes)"""
+
+    def test_ajouter_temps_keeps_concurrent_decrement(self, utilisateur, poste):
+        """Test qu'un ajout de temps part de la valeur en base, pas de l'instance"""
+        session = SessionFactory(
+            utilisateur=utilisateur,
+            poste=poste,
+            statut='active',
+            temps_restant=100
+        )
+        # Décrément concurrent non vu par l'instance
+        Session.objects.filter(pk=session.pk).update(temps_restant=40)
+
+        with patch('apps.logs.models.Log.objects.create'):
+            assert session.ajouter_temps(60, 'test_op')
+
+        assert session.temps_restant == 100
+        session.refresh_from_db()
+        assert session.temps_restant == 100
+        assert session.temps_ajoute == 60
+
+    def test_ajouter_temps_refused_after_termination(self, utilisateur, poste):
+        """Test qu'on n'ajoute pas de temps à une session terminée entre-temps"""
+        session = SessionFactory(utilisateur=utilisateur, poste=poste, statut='active')
+        Session.objects.filter(pk=session.pk).update(statut='terminee', temps_restant=0)
+
+        with patch('apps.logs.models.Log.objects.create') as log_create:
+            assert not session.ajouter_temps(600, 'test_op')
+
+        log_create.assert_not_called()
+        session.refresh_from_db()
+        assert session.temps_restant == 0
+
+    def test_demarrer_only_once(self, session, django_capture_on_commit_callbacks):
+        """Test qu'une session ne peut être démarrée qu'une fois"""
+        stale = Session.objects.get(pk=session.pk)
+
+        with patch('apps.logs.models.Log.objects.create'), \
+                django_capture_on_commit_callbacks(execute=True):
+            assert session.demarrer()
+            assert not stale.demarrer()
+
+        session.utilisateur.refresh_from_db()
+        assert session.utilisateur.nombre_sessions_total == 1
+
+    def test_demarrer_query_count(self, django_capture_on_commit_callbacks):
+        """Test du démarrage en une transaction : deux UPDATE et la place, effets après le commit"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.logs.models import Log
+
+        session = SessionFactory(poste=PosteFactory(statut='disponible'))
+
+        with django_capture_on_commit_callbacks() as callbacks, \
+                CaptureQueriesContext(connection) as capture:
+            assert session.demarrer(exiger_poste_disponible=True)
+
+        requetes = [q['sql'] for q in capture.captured_queries]
+        # SAVEPOINT, UPDATE session, UPDATE poste, place (3 lectures/écritures + obsolètes), RELEASE
+        assert len(requetes) == 8
+        assert len([q for q in requetes if q.startswith('UPDATE "postes"')]) == 1
+        assert not Log.objects.filter(session=session, action='demarrage_session').exists()
+
+        # Log et statistiques de l'utilisateur écrits après le commit
+        for callback in callbacks:
+            callback()
+        log = Log.objects.get(session=session, action='demarrage_session')
+        assert session.poste.nom in log.details
+        session.utilisateur.refresh_from_db()
+        assert session.utilisateur.nombre_sessions_total == 1
+
+    def test_demarrer_refused_when_poste_unavailable(self, utilisateur, django_capture_on_commit_callbacks):
+        """Test qu'un poste occupé par une autre session bloque le démarrage sans rien modifier"""
+        poste = PosteFactory(statut='disponible')
+        SessionFactory(poste=poste, statut='active')
+        session = SessionFactory(utilisateur=utilisateur, poste=poste)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            assert not session.demarrer(exiger_poste_disponible=True)
+
+        assert callbacks == []
+        assert session.statut == 'en_attente'
+        session.refresh_from_db()
+        poste.refresh_from_db()
+        assert session.statut == 'en_attente'
+        assert poste.nombre_sessions_total == 0
+
+    def test_terminer_already_terminated(self, session_terminee):
+        """Test que terminer une session terminée ne fait rien"""
+        with patch('apps.logs.models.Log.objects.create') as log_create:
+            assert not session_terminee.terminer('test_op')
+        log_create.assert_not_called()
+
+    def test_suspendre_non_active_no_change(self, session):
+        """Test que suspendre une session en attente ne fait rien"""
+        assert not session.suspendre('test_op')
+        session.refresh_from_db()
+        assert session.statut == 'en_attente'
+
+    def test_decremente_temps_does_not_resurrect(self, utilisateur, poste):
+        """Test que le décrément n'écrase pas une fin de session concurrente"""
+        session = SessionFactory(
+            utilisateur=utilisateur,
+            poste=poste,
+            statut='active',
+            temps_restant=100
+        )
+        Session.objects.filter(pk=session.pk).update(statut='terminee', temps_restant=0)
+
+        assert not session.decremente_temps(1)
+        session.refresh_from_db()
+        assert session.statut == 'terminee'
+        assert session.temps_restant == 0
+
+    def test_expirer_skips_session_with_added_time(self, utilisateur, poste):
+        """Test que l'expiration ignore une session à qui on a rajouté du temps"""
+        session = SessionFactory(
+            utilisateur=utilisateur,
+            poste=poste,
+            statut='active',
+            temps_restant=0
+        )
+        Session.objects.filter(pk=session.pk).update(temps_restant=900)
+
+        assert not session.expirer()
+        session.refresh_from_db()
+        assert session.statut == 'active'
@@ -0,0 +1,37 @@
+"""
+Tests du nombre de requêtes des endpoints et tâches Sessions (1 vs 50 sessions)
+"""
+import pytest
+
+from apps.sessions import tasks
+from tests.factories import SessionActiveFactory, SessionFactory, SessionTermineeFactory
+
+ENDPOINTS = [
+    '/api/sessions/',
+    '/api/sessions/actives/',
+    '/api/sessions/stats/',
+    '/api/sessions/stats_quotidiennes/',
+]
+
+
+def sessions_variees(n):
+    """Sessions en attente, actives et terminées"""
+    SessionFactory.create_batch(n)
+    SessionActiveFactory.create_batch(n)
+    SessionTermineeFactory.create_batch(n)
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_endpoint_query_count(garde_requetes, authenticated_client, url):
+    """Test que le nombre de requêtes ne dépend pas du nombre de sessions"""
+    garde_requetes(f'GET {url}', peupler=sessions_variees, appel=lambda: authenticated_client.get(url))
+
+
+@pytest.mark.parametrize('tache', ['update_session_times', 'send_time_warnings', 'cleanup_expired_sessions'])
+def test_task_query_count(garde_requetes, tache):
+    """Test que les tâches périodiques ne font pas une requête par session"""
+    def peupler(n):
+        SessionActiveFactory.create_batch(n, temps_restant=300)
+        SessionActiveFactory.create_batch(n, temps_restant=1)
+
+    garde_requetes(f'tâche {tache}', peupler=peupler, appel=getattr(tasks, tache))
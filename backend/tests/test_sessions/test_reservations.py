@@ -0,0 +1,217 @@
+"""
+Tests des réservations de postes
+"""
+
+import datetime
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+
+from apps.postes.consumers import ClientConsumer
+from apps.sessions.models import Reservation, Session
+from apps.sessions.reservations import CreneauIndisponible, disponibilites, ouvrir_reservations, reserver
+from tests.factories import PosteFactory, UtilisateurFactory
+
+
+def demain(heure, minute=0):
+    """Datetime locale de demain"""
+    jour = timezone.localdate() + datetime.timedelta(days=1)
+    return timezone.make_aware(datetime.datetime.combine(jour, datetime.time(heure, minute)))
+
+
+@pytest.fixture
+def poste(db):
+    return PosteFactory(statut='disponible')
+
+
+@pytest.fixture
+def utilisateur(db):
+    return UtilisateurFactory()
+
+
+@pytest.mark.django_db
+class TestReserver:
+    """Tests de la création des réservations"""
+
+    def test_chevauchement_refuse(self, poste, utilisateur):
+        """Test du refus d'un créneau qui chevauche une réservation active"""
+        reserver(utilisateur, poste, demain(10), demain(11), 'admin')
+
+        with pytest.raises(CreneauIndisponible):
+            reserver(utilisateur, poste, demain(10, 30), demain(11, 30), 'admin')
+        # Créneaux contigus : acceptés
+        reserver(utilisateur, poste, demain(11), demain(12), 'admin')
+        assert Reservation.objects.filter(poste=poste).count() == 2
+
+    def test_creneau_libere_par_annulation(self, poste, utilisateur):
+        """Test d'un créneau annulé : de nouveau réservable"""
+        reservation = reserver(utilisateur, poste, demain(10), demain(11), 'admin')
+        assert reservation.annuler('admin') is True
+        assert reservation.annuler('admin') is False
+
+        reserver(utilisateur, poste, demain(10), demain(11), 'admin')
+
+    def test_poste_en_maintenance(self, utilisateur):
+        """Test d'un poste non réservable"""
+        poste = PosteFactory(statut='maintenance')
+
+        with pytest.raises(ValueError):
+            reserver(utilisateur, poste, demain(10), demain(11), 'admin')
+
+
+@pytest.mark.django_db
+class TestDisponibilites:
+    """Tests de la recherche de créneaux libres"""
+
+    def test_creneaux_libres(self, poste, utilisateur):
+        """Test des trous entre les réservations d'un poste"""
+        reserver(utilisateur, poste, demain(10), demain(12), 'admin')
+        reserver(utilisateur, poste, demain(12, 30), demain(16, 30), 'admin')
+        reserver(utilisateur, poste, demain(16, 30), demain(17), 'admin')
+        jour = demain(0).date()
+
+        resultat = disponibilites(jour, duree=3600)
+
+        assert resultat == [{
+            'poste_id': poste.id,
+            'nom': poste.nom,
+            'type_poste': poste.type_poste,
+            'site_id': poste.site_id,
+            'creneaux': [
+                {'debut': demain(9), 'fin': demain(10)},
+                {'debut': demain(17), 'fin': demain(18)},
+            ],
+        }]
+        # 30 minutes : le trou de midi convient aussi
+        assert len(disponibilites(jour, duree=1800)[0]['creneaux']) == 3
+
+    def test_une_seule_requete(self, utilisateur, django_assert_num_queries):
+        """Test d'une journée de 200 postes en une requête"""
+        postes = PosteFactory.create_batch(200, statut='disponible')
+        for poste in postes[::4]:
+            reserver(utilisateur, poste, demain(9), demain(13), 'admin')
+
+        with django_assert_num_queries(1):
+            resultat = disponibilites(demain(0).date(), duree=4 * 3600)
+
+        assert len(resultat) == 200
+        debuts = {poste['poste_id']: poste['creneaux'][0]['debut'] for poste in resultat}
+        assert debuts[postes[0].id] == demain(13)
+        assert debuts[postes[1].id] == demain(9)
+
+
+@pytest.mark.django_db
+class TestOuvrirReservations:
+    """Tests de la tâche périodique"""
+
+    def test_session_creee_et_poste_reserve(self, poste, utilisateur):
+        """Test de l'ouverture d'un créneau : session en attente, poste réservé"""
+        reservation = reserver(utilisateur, poste, demain(10), demain(11), 'admin')
+
+        assert ouvrir_reservations(now=demain(9, 56)) == (1, 1, 0)
+
+        reservation.refresh_from_db()
+        poste.refresh_from_db()
+        assert reservation.statut == 'honoree'
+        assert reservation.session.statut == 'en_attente'
+        assert reservation.session.duree_initiale == 3600
+        assert poste.statut == 'reserve'
+        # Tâche idempotente
+        assert ouvrir_reservations(now=demain(9, 57)) == (0, 0, 0)
+
+    def test_seule_la_session_reservee_demarre(self, poste, utilisateur):
+        """Test d'un poste réservé : refusé aux autres sessions"""
+        reservation = reserver(utilisateur, poste, demain(10), demain(11), 'admin')
+        ouvrir_reservations(now=demain(9, 56))
+        reservation.refresh_from_db()
+        autre = Session.objects.create(utilisateur=utilisateur, poste=poste, duree_initiale=600, operateur='admin')
+
+        assert autre.demarrer(exiger_poste_disponible=True) is False
+        assert reservation.session.demarrer(exiger_poste_disponible=True) is True
+        poste.refresh_from_db()
+        assert poste.statut == 'occupe'
+
+    def test_kiosque_refuse_autre_session(self, poste, utilisateur):
+        """Test du démarrage depuis le kiosque : poste réservé refusé aux autres sessions"""
+        reservation = reserver(utilisateur, poste, demain(10), demain(11), 'admin')
+        ouvrir_reservations(now=demain(9, 56))
+        reservation.refresh_from_db()
+        autre = Session.objects.create(utilisateur=utilisateur, poste=poste, duree_initiale=600, operateur='admin')
+        consumer = ClientConsumer()
+        consumer.poste = poste
+        # Appel synchrone : hors du pool DB des consumers
+        start_session = ClientConsumer._start_session.__wrapped__
+
+        refus = start_session(consumer, autre.id)
+
+        assert refus == {'success': False, 'error': f"Le poste {poste.nom} est réservé ou indisponible"}
+        autre.refresh_from_db()
+        poste.refresh_from_db()
+        assert (autre.statut, poste.statut) == ('en_attente', 'reserve')
+        assert start_session(consumer, reservation.session.id)['success'] is True
+
+    def test_reservation_non_honoree(self, poste, utilisateur):
+        """Test d'un créneau non démarré : libéré après le délai"""
+        reservation = reserver(utilisateur, poste, demain(10), demain(11), 'admin')
+        ouvrir_reservations(now=demain(9, 56))
+
+        assert ouvrir_reservations(now=demain(10, 20)) == (0, 0, 1)
+
+        reservation.refresh_from_db()
+        poste.refresh_from_db()
+        assert reservation.statut == 'absente'
+        assert reservation.session.statut == 'terminee'
+        assert poste.statut == 'disponible'
+
+    def test_poste_occupe_non_libere(self, poste, utilisateur):
+        """Test d'un créneau non honoré sur un poste occupé par une autre session"""
+        reservation = reserver(utilisateur, poste, demain(10), demain(11), 'admin')
+        poste.marquer_occupe()
+        ouvrir_reservations(now=demain(9, 56))
+        assert reservation.annuler('admin') is True
+
+        poste.refresh_from_db()
+        assert poste.statut == 'occupe'
+
+
+@pytest.mark.django_db
+class TestReservationAPI:
+    """Tests des endpoints /api/reservations/"""
+
+    def test_reserver_puis_conflit(self, admin_client, poste, utilisateur):
+        """Test de POST /api/reservations/ et du refus d'un chevauchement"""
+        data = {
+            'utilisateur': utilisateur.id,
+            'poste': poste.id,
+            'debut': demain(14).isoformat(),
+            'duree_minutes': 60,
+            'operateur': 'admin',
+        }
+        response = admin_client.post('/api/reservations/', data, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['statut'] == 'confirmee'
+
+        response = admin_client.post('/api/reservations/', data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_disponibilites(self, admin_client, poste, utilisateur):
+        """Test de GET /api/reservations/disponibilites/ (cache invalidé par une réservation)"""
+        url = f'/api/reservations/disponibilites/?date={demain(0).date().isoformat()}&duree=240'
+        response = admin_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 1
+
+        reserver(utilisateur, poste, demain(11), demain(15), 'admin')
+        assert admin_client.get(url).data['count'] == 0
+
+    def test_annuler(self, admin_client, poste, utilisateur):
+        """Test de POST /api/reservations/{id}/annuler/"""
+        reservation = reserver(utilisateur, poste, demain(10), demain(11), 'admin')
+
+        response = admin_client.post(f'/api/reservations/{reservation.id}/annuler/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['statut'] == 'annulee'
+
+        response = admin_client.post(f'/api/reservations/{reservation.id}/annuler/')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
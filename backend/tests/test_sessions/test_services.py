@@ -0,0 +1,190 @@
+"""
+Tests pour les opérations en masse sur les sessions
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.logs.models import Log
+from apps.sessions.models import Session
+from apps.postes.models import SeatBoardEntry
+from apps.sessions.services import add_time_many, decrement_all, terminate_many
+from tests.factories import SessionActiveFactory, SessionFactory, SessionTermineeFactory
+
+
+def compter_requetes(fonction, *args, **kwargs):
+    """Nombre de requêtes exécutées par un appel"""
+    with CaptureQueriesContext(connection) as ctx:
+        fonction(*args, **kwargs)
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+class TestTerminateMany:
+    """Tests de terminate_many"""
+
+    def test_terminates_and_frees_postes(self):
+        """Test que les sessions sont terminées et les postes libérés"""
+        sessions = SessionActiveFactory.create_batch(3)
+        for session in sessions:
+            session.poste.marquer_occupe()
+
+        terminees = terminate_many([s.id for s in sessions], operateur='admin')
+
+        assert sorted(terminees) == sorted(s.id for s in sessions)
+        for session in sessions:
+            session.refresh_from_db()
+            session.poste.refresh_from_db()
+            assert session.statut == 'terminee'
+            assert session.temps_restant == 0
+            assert session.poste.statut == 'disponible'
+        assert Log.objects.filter(action='fermeture').count() == 3
+
+    def test_skips_finished_sessions(self):
+        """Test que les sessions déjà terminées sont ignorées"""
+        active = SessionActiveFactory()
+        terminee = SessionTermineeFactory()
+
+        assert terminate_many([active.id, terminee.id], operateur='admin') == [active.id]
+        assert Log.objects.filter(action='fermeture').count() == 1
+
+    def test_constant_query_count(self):
+        """Test que le nombre de requêtes ne dépend pas de la taille du lot"""
+        une = [SessionActiveFactory().id]
+        plusieurs = [s.id for s in SessionActiveFactory.create_batch(10)]
+
+        assert compter_requetes(terminate_many, une, 'admin') == \
+            compter_requetes(terminate_many, plusieurs, 'admin')
+
+    def test_notifications_sent_after_commit(self, django_capture_on_commit_callbacks):
+        """Test que toutes les notifications partent en un seul lot après le commit"""
+        sessions = SessionActiveFactory.create_batch(2)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            terminate_many([s.id for s in sessions], operateur='admin')
+
+        assert callbacks
+
+
+@pytest.mark.django_db
+class TestAddTimeMany:
+    """Tests de add_time_many"""
+
+    def test_adds_time(self):
+        """Test que le temps est ajouté à chaque session"""
+        sessions = SessionActiveFactory.create_batch(2, temps_restant=600, temps_ajoute=0)
+
+        modifiees = add_time_many([s.id for s in sessions], 900, operateur='admin')
+
+        assert len(modifiees) == 2
+        for session in Session.objects.filter(pk__in=modifiees):
+            assert session.temps_restant == 1500
+            assert session.temps_ajoute == 900
+        assert Log.objects.filter(action='ajout_temps').count() == 2
+
+    def test_skips_finished_sessions(self):
+        """Test que les sessions terminées sont ignorées"""
+        terminee = SessionTermineeFactory()
+        avant = terminee.temps_restant
+
+        assert add_time_many([terminee.id], 900, operateur='admin') == []
+        terminee.refresh_from_db()
+        assert terminee.temps_restant == avant
+
+    def test_constant_query_count(self):
+        """Test que le nombre de requêtes ne dépend pas de la taille du lot"""
+        une = [SessionActiveFactory().id]
+        plusieurs = [s.id for s in SessionActiveFactory.create_batch(10)]
+
+        assert compter_requetes(add_time_many, une, 60, 'admin') == \
+            compter_requetes(add_time_many, plusieurs, 60, 'admin')
+
+
+@pytest.mark.django_db
+class TestDecrementAll:
+    """Tests de decrement_all (décompte périodique)"""
+
+    def test_decrements_and_expires(self):
+        """Test que les sessions sont décomptées et expirées à zéro, poste libéré"""
+        en_cours = SessionActiveFactory(temps_restant=100)
+        finie = SessionActiveFactory(temps_restant=1)
+        finie.poste.marquer_occupe()
+
+        assert sorted(decrement_all(secondes=1)) == sorted([en_cours.id, finie.id])
+
+        en_cours.refresh_from_db()
+        finie.refresh_from_db()
+        finie.poste.refresh_from_db()
+        assert en_cours.temps_restant == 99
+        assert en_cours.statut == 'active'
+        assert finie.statut == 'expiree'
+        assert finie.fin_session is not None
+        assert finie.poste.statut == 'disponible'
+        assert Log.objects.filter(action='expiration', session=finie).count() == 1
+
+    def test_updates_seat_board(self):
+        """Test que le temps restant des places suit le décompte"""
+        session = SessionFactory(temps_restant=600)
+        session.demarrer()
+
+        decrement_all(secondes=10)
+
+        assert SeatBoardEntry.objects.get(poste=session.poste).temps_restant == 590
+
+    def test_ignores_other_statuses(self):
+        """Test que seules les sessions actives avec du temps sont décomptées"""
+        SessionTermineeFactory()
+        epuisee = SessionActiveFactory()
+        Session.objects.filter(pk=epuisee.pk).update(temps_restant=0)
+
+        assert decrement_all() == []
+
+    def test_constant_query_count(self):
+        """Test que le nombre de requêtes ne dépend pas du nombre de sessions"""
+        SessionActiveFactory(temps_restant=300)
+        SessionActiveFactory(temps_restant=1)
+        une = compter_requetes(decrement_all)
+
+        SessionActiveFactory.create_batch(10, temps_restant=300)
+        SessionActiveFactory.create_batch(10, temps_restant=1)
+        assert compter_requetes(decrement_all) == une
+
+
+@pytest.mark.django_db
+class TestBulkEndpoints:
+    """Tests des endpoints REST en masse"""
+
+    def test_bulk_terminate(self, authenticated_client):
+        """Test POST /api/sessions/bulk_terminate/"""
+        active = SessionActiveFactory()
+        terminee = SessionTermineeFactory()
+
+        response = authenticated_client.post('/api/sessions/bulk_terminate/', {
+            'session_ids': [active.id, terminee.id],
+            'raison': 'fermeture_forcee'
+        }, format='json')
+
+        assert response.status_code == 200
+        assert response.data['session_ids'] == [active.id]
+        assert response.data['ignorees'] == [terminee.id]
+
+    def test_bulk_add_time(self, authenticated_client):
+        """Test POST /api/sessions/bulk_add_time/"""
+        session = SessionActiveFactory(temps_restant=600)
+
+        response = authenticated_client.post('/api/sessions/bulk_add_time/', {
+            'session_ids': [session.id],
+            'minutes': 10
+        }, format='json')
+
+        assert response.status_code == 200
+        session.refresh_from_db()
+        assert session.temps_restant == 1200
+
+    def test_bulk_requires_ids(self, authenticated_client):
+        """Test qu'une liste vide est refusée"""
+        response = authenticated_client.post('/api/sessions/bulk_terminate/', {
+            'session_ids': []
+        }, format='json')
+
+        assert response.status_code == 400
@@ -0,0 +1,160 @@
+"""
+Tests pour les statistiques quotidiennes
+"""
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.sessions.models import Session, StatistiqueJour
+from apps.sessions.statistiques import (
+    bornes_jour, calculer_jour, consolider, consolider_jour, serie, totaux
+)
+from tests.factories import PosteFactory, SessionFactory, SessionTermineeFactory, UtilisateurFactory
+
+
+def deplacer(session, jour, heure=10):
+    """Replace une session (création, début et fin) sur un jour passé"""
+    debut = bornes_jour(jour)[0] + timedelta(hours=heure)
+    Session.objects.filter(pk=session.pk).update(
+        created_at=debut,
+        debut_session=debut if session.debut_session else None,
+        fin_session=debut + timedelta(minutes=45) if session.fin_session else None,
+    )
+
+
+@pytest.mark.django_db
+class TestConsolidation:
+    """Tests du calcul et de la consolidation"""
+
+    def test_calculer_jour(self):
+        """Test des agrégats d'un jour, par poste"""
+        poste = PosteFactory()
+        hier = timezone.localdate() - timedelta(days=1)
+        terminee = SessionTermineeFactory(poste=poste, temps_ajoute=600)
+        invite = SessionFactory(poste=poste, utilisateur=UtilisateurFactory(is_guest=True))
+        for session in (terminee, invite):
+            deplacer(session, hier)
+
+        ligne = calculer_jour(hier)[poste.pk]
+
+        assert ligne['sessions_creees'] == 2
+        assert ligne['sessions_invites'] == 1
+        assert ligne['sessions_inscrits'] == 1
+        assert ligne['sessions_demarrees'] == 1
+        assert ligne['sessions_terminees'] == 1
+        assert ligne['secondes_utilisees'] == 45 * 60
+        assert ligne['secondes_ajoutees'] == 600
+
+    def test_consolider_is_idempotent(self):
+        """Test qu'une reconsolidation remplace les lignes du jour"""
+        hier = timezone.localdate() - timedelta(days=1)
+        session = SessionFactory()
+        deplacer(session, hier)
+
+        consolider_jour(hier)
+        consolider_jour(hier)
+        assert StatistiqueJour.objects.get(jour=hier).sessions_creees == 1
+
+        session.delete()
+        consolider_jour(hier)
+        assert not StatistiqueJour.objects.filter(jour=hier).exists()
+
+    def test_consolider_stops_before_today(self):
+        """Test que la journée en cours n'est jamais stockée"""
+        avant_hier = timezone.localdate() - timedelta(days=2)
+        deplacer(SessionFactory(), avant_hier)
+        SessionFactory()
+
+        jours = consolider()
+
+        assert jours == [avant_hier, avant_hier + timedelta(days=1)]
+        assert not StatistiqueJour.objects.filter(jour=timezone.localdate()).exists()
+
+    def test_backfill_command(self):
+        """Test de la commande backfill_daily_stats"""
+        il_y_a_5_jours = timezone.localdate() - timedelta(days=5)
+        deplacer(SessionFactory(), il_y_a_5_jours)
+
+        call_command('backfill_daily_stats')
+
+        assert StatistiqueJour.objects.get(jour=il_y_a_5_jours).sessions_creees == 1
+
+
+@pytest.mark.django_db
+class TestLecture:
+    """Tests des lectures (historique consolidé + delta du jour)"""
+
+    def test_totaux_include_today(self):
+        """Test que les totaux ajoutent la journée en cours"""
+        hier = timezone.localdate() - timedelta(days=1)
+        deplacer(SessionFactory(), hier)
+        consolider()
+        SessionFactory.create_batch(2)
+
+        assert totaux()['sessions_creees'] == 3
+        assert totaux(debut=timezone.localdate())['sessions_creees'] == 2
+        assert totaux(debut=hier, fin=hier)['sessions_creees'] == 1
+
+    def test_totaux_read_history_in_constant_queries(self, django_assert_num_queries):
+        """Test que la lecture ne dépend pas de la longueur de l'historique"""
+        aujourdhui = timezone.localdate()
+        for jours in range(1, 11):
+            deplacer(SessionFactory(), aujourdhui - timedelta(days=jours))
+        consolider()
+
+        # Dernier jour consolidé, agrégation sur la table de faits, quatre requêtes pour aujourd'hui
+        with django_assert_num_queries(6):
+            assert totaux()['sessions_creees'] == 10
+
+    def test_veille_avant_consolidation(self):
+        """Test entre minuit et la consolidation : la veille est calculée à la volée"""
+        aujourdhui = timezone.localdate()
+        avant_hier, hier = aujourdhui - timedelta(days=2), aujourdhui - timedelta(days=1)
+        deplacer(SessionFactory(), avant_hier)
+        consolider(jusqu_a=avant_hier)
+        deplacer(SessionFactory(), hier)
+        SessionFactory()
+
+        assert totaux()['sessions_creees'] == 3
+        assert totaux(debut=hier, fin=hier)['sessions_creees'] == 1
+        assert [(j['jour'], j['sessions_creees']) for j in serie(avant_hier)] == [
+            (avant_hier, 1), (hier, 1), (aujourdhui, 1)
+        ]
+
+    def test_postes_filtres_en_base(self):
+        """Test du calcul à la volée restreint aux postes demandés"""
+        mien = PosteFactory()
+        SessionFactory(poste=mien)
+        SessionFactory()
+
+        assert list(calculer_jour(timezone.localdate(), poste_ids=[mien.pk])) == [mien.pk]
+        assert totaux(poste_ids=[mien.pk])['sessions_creees'] == 1
+
+    def test_serie(self):
+        """Test de la série quotidienne"""
+        hier = timezone.localdate() - timedelta(days=1)
+        deplacer(SessionFactory(), hier)
+        consolider()
+        SessionFactory()
+
+        jours = serie(hier)
+
+        assert [(j['jour'], j['sessions_creees']) for j in jours] == [
+            (hier, 1), (timezone.localdate(), 1)
+        ]
+
+    def test_stats_quotidiennes_endpoint(self, authenticated_client):
+        """Test GET /api/sessions/stats_quotidiennes/"""
+        SessionFactory()
+
+        response = authenticated_client.get('/api/sessions/stats_quotidiennes/')
+
+        assert response.status_code == 200
+        assert response.data['jours'][-1]['sessions_creees'] == 1
+
+    def test_stats_quotidiennes_invalid_dates(self, authenticated_client):
+        """Test qu'une date invalide est refusée"""
+        response = authenticated_client.get('/api/sessions/stats_quotidiennes/?debut=hier')
+        assert response.status_code == 400
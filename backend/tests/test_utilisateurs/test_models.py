@@ -4,9 +4,11 @@ Tests pour le modèle Utilisateur
 import pytest
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete
 from datetime import date, timedelta
 
-from apps.utilisateurs.models import Utilisateur
+from apps.sessions.models import Session
+from apps.utilisateurs.models import CompteurSessionsJour, Utilisateur
 from tests.factories import UtilisateurFactory, SessionFactory
 
 
@@ -82,6 +84,44 @@ class TestUtilisateurModel:
         SessionFactory.create_batch(3, utilisateur=utilisateur)
         assert utilisateur.can_create_session_today() is False
 
+    def test_sessions_today_decremented_on_delete(self, utilisateur):
+        """Test que la suppression d'une session décrémente le compteur"""
+        sessions = SessionFactory.create_batch(2, utilisateur=utilisateur)
+        sessions[0].delete()
+        assert utilisateur.sessions_today == 1
+
+    def test_sessions_today_decremented_on_bulk_delete(self, utilisateur):
+        """Test d'une suppression en masse : compteur du jour décrémenté, sans post_delete"""
+        sessions = SessionFactory.create_batch(3, utilisateur=utilisateur)
+        ancienne = SessionFactory(utilisateur=utilisateur)
+        Session.objects.filter(pk=ancienne.pk).update(created_at=timezone.now() - timedelta(days=100))
+
+        Session.objects.filter(pk__in=[sessions[0].pk, sessions[1].pk, ancienne.pk]).delete()
+
+        assert utilisateur.sessions_today == 2
+        assert not post_delete.has_listeners(Session)
+
+    def test_sessions_today_ignores_other_days(self, utilisateur):
+        """Test que seul le compteur du jour est pris en compte"""
+        CompteurSessionsJour.objects.create(
+            utilisateur=utilisateur,
+            jour=timezone.localdate() - timedelta(days=1),
+            nombre=5
+        )
+        assert utilisateur.sessions_today == 0
+        assert utilisateur.can_create_session_today() is True
+
+    def test_compteurs_bulk_read(self, django_assert_num_queries):
+        """Test que les compteurs d'une page d'utilisateurs se lisent en une requête"""
+        utilisateurs = UtilisateurFactory.create_batch(3)
+        for i, utilisateur in enumerate(utilisateurs):
+            SessionFactory.create_batch(i, utilisateur=utilisateur)
+
+        with django_assert_num_queries(1):
+            compteurs = CompteurSessionsJour.pour_utilisateurs(u.pk for u in utilisateurs)
+
+        assert [compteurs.get(u.pk, 0) for u in utilisateurs] == [0, 1, 2]
+
     def test_consentement_rgpd_date_auto(self):
         """Test que la date de consentement est auto-remplie"""
         utilisateur = Utilisateur(
@@ -0,0 +1,32 @@
+"""
+Tests du nombre de requêtes des endpoints Utilisateurs (1 vs 50 utilisateurs)
+"""
+import pytest
+
+from tests.factories import SessionTermineeFactory, UtilisateurFactory
+
+ENDPOINTS = [
+    '/api/utilisateurs/',
+    '/api/utilisateurs/stats/',
+]
+
+
+def utilisateurs_avec_sessions(n):
+    for utilisateur in UtilisateurFactory.create_batch(n):
+        SessionTermineeFactory(utilisateur=utilisateur)
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_endpoint_query_count(garde_requetes, authenticated_client, url):
+    """Test que le nombre de requêtes ne dépend pas du nombre d'utilisateurs"""
+    garde_requetes(f'GET {url}', peupler=utilisateurs_avec_sessions, appel=lambda: authenticated_client.get(url))
+
+
+def test_user_sessions_query_count(garde_requetes, authenticated_client):
+    """Test des sessions d'un utilisateur quel que soit leur nombre"""
+    utilisateur = UtilisateurFactory()
+    garde_requetes(
+        'GET /api/utilisateurs/{id}/sessions/',
+        peupler=lambda n: SessionTermineeFactory.create_batch(n, utilisateur=utilisateur),
+        appel=lambda: authenticated_client.get(f'/api/utilisateurs/{utilisateur.id}/sessions/'),
+    )
@@ -213,3 +213,20 @@ class TestRevokeConsentView:
 
         utilisateur_avec_rgpd.refresh_from_db()
         assert utilisateur_avec_rgpd.consentement_rgpd is False
+
+    def test_serializer_list_reads_counters_once(self):
+        """Test que sérialiser une liste ne fait qu'une lecture des compteurs"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.utilisateurs.serializers import UtilisateurSerializer
+
+        for utilisateur in UtilisateurFactory.create_batch(5):
+            SessionFactory.create_batch(3, utilisateur=utilisateur)
+        utilisateurs = list(Utilisateur.objects.all())
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = UtilisateurSerializer(utilisateurs, many=True).data
+
+        assert all(item['can_create_session'] is False for item in data)
+        lectures = [q for q in ctx.captured_queries if 'compteurs_sessions_jour' in q['sql']]
+        assert len(lectures) == 1
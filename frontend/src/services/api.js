@@ -121,6 +121,9 @@ export const postesService = {
   getStats() {
     return api.get('/postes/stats/')
   },
+  getSeatBoard(params) {
+    return api.get('/postes/seat_board/', { params })
+  },
   heartbeat(id, data) {
     return api.post(`/postes/${id}/heartbeat/`, data)
   },
@@ -165,6 +168,20 @@ export const postesService = {
   rejectDiscovery(id) {
     return api.delete(`/postes/${id}/`)
   },
+  /**
+   * Valide plusieurs postes découverts en une requête
+   * @param {number[]} posteIds - IDs des postes
+   */
+  bulkValidate(posteIds) {
+    return api.post('/postes/bulk_validate/', { poste_ids: posteIds })
+  },
+  /**
+   * Révoque les certificats de plusieurs postes en une requête
+   * @param {number[]} posteIds - IDs des postes
+   */
+  bulkRevoke(posteIds) {
+    return api.post('/postes/bulk_revoke/', { poste_ids: posteIds })
+  },
   // ==================== Commandes à distance ====================
   /**
    * Envoie une commande à distance à un poste
@@ -209,6 +226,15 @@ export const sessionsService = {
   getStats() {
     return api.get('/sessions/stats/')
   },
+  getDailyStats(params) {
+    return api.get('/sessions/stats_quotidiennes/', { params })
+  },
+  /**
+   * Exporte les sessions (params: type csv|parquet, debut, fin, poste)
+   */
+  export(params) {
+    return api.get('/sessions/export/', { params, responseType: 'blob' })
+  },
   validateCode(data) {
     return api.post('/sessions/validate_code/', data)
   },
@@ -221,6 +247,12 @@ export const sessionsService = {
   terminate(id, data) {
     return api.post(`/sessions/${id}/terminate/`, data)
   },
+  bulkAddTime(sessionIds, minutes) {
+    return api.post('/sessions/bulk_add_time/', { session_ids: sessionIds, minutes })
+  },
+  bulkTerminate(sessionIds, raison = 'fermeture_normale') {
+    return api.post('/sessions/bulk_terminate/', { session_ids: sessionIds, raison })
+  },
   suspend(id, data) {
     return api.post(`/sessions/${id}/suspend/`, data)
   },
@@ -278,6 +310,12 @@ export const logsService = {
   getErrors(hours = 24) {
     return api.get('/logs/errors/', { params: { hours } })
   },
+  /**
+   * Exporte les logs (params: type csv|parquet, debut, fin, poste, action)
+   */
+  export(params) {
+    return api.get('/logs/export/', { params, responseType: 'blob' })
+  },
 }
 
 export default api